@@ -0,0 +1,289 @@
+# bot_app/services/backtest.py
+
+import numpy as np
+
+from bot_app.services.tick_capture import load_ticks
+
+# Backtest vectorisé de la stratégie de TradingBot._apply_trade_logic (série d'OFFSET_CANDLES bougies
+# de même couleur, puis Martingale BET_SIZES), sur des tableaux de bougies réelles (bougies gap exclues,
+# comme dans la stratégie). Règles reproduites :
+#   - une bougie est verte si close > open, rouge sinon ;
+#   - la séquence s'active à la première bougie t où les OFFSET_CANDLES dernières couleurs sont identiques ;
+#   - une fois active, un ordre est placé à chaque bougie t, dans le sens de la couleur de la bougie
+#     t - OFFSET_CANDLES + 1, et se résout sur la couleur de la bougie t + 1 ;
+#   - victoire : retour à la mise BET_SIZES[0] ; perte : mise suivante ; après len(BET_SIZES) pertes
+#     consécutives (plafond), la séquence s'arrête sans nouvel ordre et attend une nouvelle série.
+# Seule la succession des séquences (une itération Python par séquence) n'est pas vectorisée.
+
+GREEN = 1
+RED = -1
+
+
+def candle_colors(opens, closes):
+    """
+    🎨 Couleurs des bougies : 1 (verte, close > open) ou -1 (rouge).
+    @param {numpy.ndarray} opens - Ouvertures.
+    @param {numpy.ndarray} closes - Clôtures.
+    @returns {numpy.ndarray} - Tableau int8.
+    """
+    return np.where(np.asarray(closes) > np.asarray(opens), GREEN, RED).astype(np.int8)
+
+
+def run_lengths(values):
+    """
+    📏 Longueur de la série de valeurs identiques se terminant à chaque position (encodage par plages).
+    @param {numpy.ndarray} values - Les valeurs.
+    @returns {numpy.ndarray} - Longueurs (int64), 1 au début de chaque plage.
+    """
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    positions = np.arange(n)
+    starts = np.empty(n, dtype=bool)
+    starts[0] = True
+    starts[1:] = values[1:] != values[:-1]
+    return positions - np.maximum.accumulate(np.where(starts, positions, 0)) + 1
+
+
+def _next_index_table(indices, n):
+    # table[p] = premier indice de `indices` >= p (n si aucun), pour p dans [0, n + 1]
+    table = np.full(n + 2, n, dtype=np.int64)
+    table[indices] = indices
+    return np.minimum.accumulate(table[::-1])[::-1]
+
+
+def candles_from_ticks(timestamps, prices, period_ms):
+    """
+    🕯️ Bougies OHLC des périodes avec ticks, alignées sur les multiples de period_ms (comme CandleBuilder).
+    @param {numpy.ndarray} timestamps - Horodatages serveur (epoch ms), triés.
+    @param {numpy.ndarray} prices - Prix.
+    @param {int} period_ms - Durée d'une bougie.
+    @returns {dict} - Tableaux 'start_ms', 'open', 'high', 'low', 'close', 'ticks'.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(timestamps) == 0:
+        empty = np.zeros(0)
+        return {"start_ms": empty.astype(np.int64), "open": empty, "high": empty, "low": empty, "close": empty, "ticks": empty.astype(np.int64)}
+    buckets = timestamps // period_ms
+    first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    last = np.r_[first[1:] - 1, len(buckets) - 1]
+    return {
+        "start_ms": buckets[first] * period_ms,
+        "open": prices[first],
+        "high": np.maximum.reduceat(prices, first),
+        "low": np.minimum.reduceat(prices, first),
+        "close": prices[last],
+        "ticks": last - first + 1,
+    }
+
+
+class BacktestResult:
+    """
+    📊 Ordres simulés d'un backtest (un élément par ordre placé) et synthèse.
+    """
+
+    def __init__(self, bet_index, direction, stake, level, win, pnl, resolved, sessions, busts, payout):
+        self.bet_index = bet_index # Indice de la bougie à laquelle l'ordre est placé
+        self.direction = direction # 1 (CALL/green) ou -1 (PUT/red)
+        self.stake = stake
+        self.level = level # Rang dans BET_SIZES
+        self.win = win
+        self.pnl = pnl # Gain net par ordre (0 pour l'ordre éventuellement encore ouvert)
+        self.resolved = resolved
+        self.sessions = sessions
+        self.busts = busts # Séquences arrêtées par le plafond de Martingale
+        self.payout = payout
+
+    def trades(self):
+        """
+        📜 Ordres résolus, au format de l'historique des trades du bot.
+        @returns {list} - Dicts traded_color, amount, outcome_candle_color, result.
+        """
+        names = {GREEN: "green", RED: "red"}
+        return [
+            {
+                "traded_color": names[int(direction)],
+                "amount": stake.item(),
+                "outcome_candle_color": names[int(direction)] if win else names[-int(direction)],
+                "result": "WIN" if win else "LOSS",
+            }
+            for direction, stake, win in zip(self.direction[self.resolved], self.stake[self.resolved], self.win[self.resolved])
+        ]
+
+    def summary(self):
+        """
+        📋 Synthèse : nombre d'ordres, taux de réussite, PnL, drawdown maximal, plafonds atteints, rendement d'équilibre.
+        @returns {dict} - Sérialisable en JSON.
+        """
+        resolved = self.resolved
+        wins = int(np.count_nonzero(self.win & resolved))
+        count = int(np.count_nonzero(resolved))
+        equity = np.cumsum(self.pnl)
+        drawdown = np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity if len(equity) else np.zeros(0)
+        won_stake = float(self.stake[self.win].sum())
+        lost_stake = float(self.stake[resolved & ~self.win].sum())
+        return {
+            "bets": count,
+            "wins": wins,
+            "losses": count - wins,
+            "win_rate": round(wins / count, 4) if count else None,
+            "staked": float(self.stake[resolved].sum()),
+            "pnl": round(float(equity[-1]), 6) if len(equity) else 0.0,
+            "max_drawdown": round(float(drawdown.max()), 6) if len(drawdown) else 0.0,
+            "max_level": int(self.level.max()) if len(self.level) else None,
+            "sessions": self.sessions,
+            "busts": self.busts,
+            "open_bet": bool(len(resolved) and not resolved[-1]),
+            "payout": self.payout,
+            "break_even_payout": round(lost_stake / won_stake, 4) if won_stake else None, # Rendement minimal pour un PnL nul
+        }
+
+
+def backtest_streak_martingale(opens, closes, offset_candles=2, bet_sizes=(1, 2, 5), payout=0.92):
+    """
+    ⚡ Backtest vectorisé de la stratégie série + Martingale sur des bougies réelles.
+    @param {numpy.ndarray} opens - Ouvertures.
+    @param {numpy.ndarray} closes - Clôtures.
+    @param {int} offset_candles - OFFSET_CANDLES.
+    @param {list} bet_sizes - BET_SIZES.
+    @param {float} payout - Gain net par unité misée en cas de victoire (rendement, ex : 0.92).
+    @returns {BacktestResult}
+    """
+    colors = candle_colors(opens, closes)
+    n = len(colors)
+    offset = max(1, int(offset_candles))
+    tiers = np.asarray(bet_sizes, dtype=np.float64 if any(isinstance(size, float) for size in bet_sizes) else np.int64)
+    max_level = len(tiers)
+
+    # Série en cours (encodage par plages) : séquence activable dès qu'elle atteint l'offset
+    eligible = np.flatnonzero(run_lengths(colors) >= offset)
+
+    # Ordre placé en t : sens = couleur de t - offset + 1, résolu sur la couleur de t + 1
+    direction = np.zeros(n, dtype=np.int8)
+    direction[offset - 1:] = colors[:n - offset + 1]
+    loss = np.zeros(n, dtype=bool)
+    if n > offset:
+        loss[offset - 1:n - 1] = colors[offset:] != direction[offset - 1:n - 1]
+    loss_run = np.where(loss, run_lengths(loss), 0) # Pertes consécutives se terminant en t
+    busted = np.flatnonzero(loss_run >= max_level)
+
+    # Enchaînement des séquences : [début, fin] ; une itération par séquence
+    next_eligible = _next_index_table(eligible, n).tolist()
+    next_bust = _next_index_table(busted, n).tolist()
+    starts, ends = [], []
+    busts = 0
+    position = 0
+    while position < n:
+        start = next_eligible[position]
+        if start >= n:
+            break
+        bust = next_bust[min(start + max_level - 1, n)]
+        starts.append(start)
+        if bust >= n:
+            ends.append(n - 1) # Séquence encore active en fin d'historique
+            break
+        ends.append(bust)
+        busts += 1
+        position = bust + 2 # Plafond constaté à la bougie bust + 1 : nouvelle série vérifiée à partir de bust + 2
+
+    if not starts:
+        empty = np.zeros(0, dtype=np.int64)
+        return BacktestResult(empty, empty.astype(np.int8), tiers[:0], empty, empty.astype(bool), np.zeros(0), empty.astype(bool), 0, 0, payout)
+
+    starts, ends = np.asarray(starts), np.asarray(ends)
+    lengths = ends - starts + 1
+    session_start = np.repeat(starts, lengths)
+    bet_index = session_start + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    # Rang de Martingale = pertes consécutives précédentes au sein de la séquence
+    previous_losses = np.r_[0, loss_run[:-1]][bet_index]
+    level = np.minimum(previous_losses, bet_index - session_start)
+    stake = tiers[level]
+    resolved = bet_index < n - 1
+    win = ~loss[bet_index] & resolved
+    pnl = np.where(resolved, np.where(win, stake * payout, -stake), 0.0)
+    return BacktestResult(bet_index, direction[bet_index], stake, level, win, pnl, resolved, len(starts), busts, payout)
+
+
+def backtest_recorded_ticks(directory, symbol, config=None, payout=0.92, start_ms=None, end_ms=None):
+    """
+    📼 Backtest sur les ticks enregistrés par TickRecorder (segments mappés en mémoire), agrégés en bougies.
+    @param {str} directory - Répertoire des segments (TICK_CAPTURE_DIR).
+    @param {str} symbol - Le symbole.
+    @param {dict} config - Configuration du bot (OFFSET_CANDLES, BET_SIZES, PERIOD, TRADING_PERIOD_MINUTES).
+    @param {float} payout - Gain net par unité misée.
+    @param {int|None} start_ms - Début inclus (epoch ms).
+    @param {int|None} end_ms - Fin exclue (epoch ms).
+    @returns {BacktestResult}
+    """
+    config = config or {}
+    period_seconds = config.get("PERIOD", 0)
+    if not 0 < period_seconds < 60: # Même règle que TradingBot._get_candle_period_seconds
+        period_seconds = config.get("TRADING_PERIOD_MINUTES", 1) * 60
+    timestamps, prices = load_ticks(directory, symbol, start_ms, end_ms)
+    candles = candles_from_ticks(timestamps, prices, int(period_seconds * 1000))
+    return backtest_streak_martingale(candles["open"], candles["close"], config.get("OFFSET_CANDLES", 2),
+                                      config.get("BET_SIZES", [1, 2, 5]), payout)
+
+
+def event_driven_trades(opens, closes, config=None, start_ms=1700000040000):
+    """
+    🐢 Référence événementielle : les mêmes bougies passent par le vrai TradingBot (registre de ticks,
+    fermeture des bougies, indicateurs, _apply_trade_logic, Martingale), avec une interface simulée
+    (ReplayDriver). Bougies d'une minute, deux ticks par bougie : ouverture puis clôture.
+    @param {numpy.ndarray} opens - Ouvertures.
+    @param {numpy.ndarray} closes - Clôtures.
+    @param {dict} config - Configuration du bot (OFFSET_CANDLES, BET_SIZES...).
+    @param {int} start_ms - Début de la première bougie (multiple d'une minute).
+    @returns {list} - Les trades enregistrés par le bot.
+    """
+    from bot_app.services.clock import SimulatedClock
+    from bot_app.services.replay import ReplayDriver
+    from bot_app.services.trading_logic import TradingBot
+
+    symbol, asset, period_ms = "BACKTEST", "Backtest", 60000
+    config = dict(config or {})
+    config.update({
+        "TRADING_PERIOD_MINUTES": 1, "PERIOD": 0, "TIMEZONE": "UTC",
+        "CURRENCIES": {asset: symbol}, "SPILL_DIR": None, "TICK_CAPTURE_DIR": None, "CAPTURE_PATH": None,
+        "TRADE_HISTORY_SIZE": len(opens) + 1, "SIGNAL_FILTERS": {},
+    })
+    clock = SimulatedClock(start_ms)
+    bot = TradingBot(config=config, clock=clock)
+    bot.driver = ReplayDriver([], clock, asset)
+    bot.current_active_currency = symbol
+    for i, (open_price, close_price) in enumerate(zip(opens, closes)):
+        candle_start = start_ms + i * period_ms
+        for offset_ms, price in ((1, float(open_price)), (period_ms - 1, float(close_price))):
+            clock.advance_to(candle_start + offset_ms)
+            for candle in bot._integrate_ticks([(symbol, candle_start + offset_ms, price)]):
+                bot._on_candle_closed(candle)
+    clock.advance_to(start_ms + len(opens) * period_ms)
+    for candle in bot._integrate_ticks([(symbol, start_ms + len(opens) * period_ms, float(closes[-1]))]) if len(opens) else []:
+        bot._on_candle_closed(candle) # Fermeture de la dernière bougie
+    return bot.get_trade_history(len(bot.trade_history_log))
+
+
+def check_equivalence(opens, closes, offset_candles=2, bet_sizes=(1, 2, 5)):
+    """
+    ⚖️ Compare le backtest vectorisé à la référence événementielle (TradingBot) sur les mêmes bougies.
+    @param {numpy.ndarray} opens - Ouvertures.
+    @param {numpy.ndarray} closes - Clôtures.
+    @param {int} offset_candles - OFFSET_CANDLES.
+    @param {list} bet_sizes - BET_SIZES.
+    @returns {dict} - {'equivalent': bool, 'trades': int, 'first_mismatch': int|None}.
+    """
+    keys = ("traded_color", "amount", "outcome_candle_color", "result")
+    vectorized = backtest_streak_martingale(opens, closes, offset_candles, bet_sizes).trades()
+    reference = [{key: trade[key] for key in keys}
+                 for trade in event_driven_trades(opens, closes, {"OFFSET_CANDLES": offset_candles, "BET_SIZES": list(bet_sizes)})]
+    first_mismatch = next((i for i, (a, b) in enumerate(zip(vectorized, reference)) if a != b), None)
+    if first_mismatch is None and len(vectorized) != len(reference):
+        first_mismatch = min(len(vectorized), len(reference))
+    return {
+        "equivalent": first_mismatch is None,
+        "trades": len(reference),
+        "vectorized_trades": len(vectorized),
+        "first_mismatch": first_mismatch,
+    }
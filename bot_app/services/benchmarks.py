@@ -0,0 +1,306 @@
+# bot_app/services/benchmarks.py
+
+import argparse
+import base64
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+
+from bot_app.services.capture import frame_to_log_entry
+from bot_app.services.clock import SimulatedClock
+from bot_app.services.frame_decoder import FrameDecoder
+from bot_app.services.metrics import LatencyStats
+from bot_app.services.replay import ReplayDriver
+from bot_app.services.trading_logic import TradingBot
+
+logger = logging.getLogger(__name__)
+
+# Micro-benchmarks du chemin des ticks, sur des entrées de log de performance CDP synthétiques :
+# frames binaires base64 de plusieurs symboles mêlées à des événements parasites (requêtes réseau,
+# frames texte socket.io, pings). Le bot est piloté par un ReplayDriver et une horloge simulée :
+# aucun Chrome, aucune attente réelle. Les résultats sont ajoutés à un historique JSON Lines
+# (un enregistrement par exécution, avec le commit et l'hôte) et comparés à l'exécution précédente
+# du même hôte (nom, architecture, version de Python) : des mesures d'une autre machine ne sont
+# jamais une référence. L'historique est local (benchmarks/ est ignoré par git).
+#
+#   python -m bot_app.services.benchmarks --record            # mesure et ajoute à l'historique
+#   python -m bot_app.services.benchmarks --threshold 10      # échoue si régression > 10 %
+#   python -m bot_app.services.benchmarks --record --force    # enregistre même une régression (nouvelle référence)
+#
+# Convention des métriques : *_per_second = plus haut est meilleur, *_us = plus bas est meilleur.
+
+BENCHMARK_VERSION = 1
+DEFAULT_HISTORY_PATH = os.path.join("benchmarks", "history.jsonl")
+DEFAULT_THRESHOLD_PERCENT = 10.0
+BENCHMARK_SYMBOLS = ("EURUSD_otc", "GBPUSD_otc", "USDJPY_otc", "AUDCAD_otc")
+BENCHMARK_START_MS = 1700000040000 # Multiple d'une minute : bougies alignées comme sur le serveur
+
+NOISE_MESSAGES = (
+    {"method": "Network.requestWillBeSent", "params": {"requestId": "1000.1", "request": {"url": "https://pocketoption.com/api/v1/ping", "method": "GET"}}},
+    {"method": "Network.responseReceived", "params": {"requestId": "1000.1", "response": {"status": 200, "mimeType": "application/json"}}},
+    {"method": "Network.loadingFinished", "params": {"requestId": "1000.1", "encodedDataLength": 512}},
+    {"method": "Network.webSocketFrameSent", "params": {"response": {"opcode": 1, "mask": True, "payloadData": "42[\"ps\"]"}}},
+    {"method": "Network.webSocketFrameReceived", "params": {"response": {"opcode": 1, "mask": False, "payloadData": "451-[\"updateStream\",{\"_placeholder\":true,\"num\":0}]"}}},
+    {"method": "Network.webSocketFrameReceived", "params": {"response": {"opcode": 1, "mask": False, "payloadData": "2"}}},
+)
+
+
+def make_log_batches(seconds=600, symbols=BENCHMARK_SYMBOLS, ticks_per_second=4, noise_per_tick=1.0, seed=7,
+                     start_ms=BENCHMARK_START_MS):
+    """
+    🧪 Génère des lots réalistes d'entrées driver.get_log('performance') (format de capture).
+    Chaque symbole reçoit ticks_per_second ticks par seconde (parfois plusieurs ticks par frame),
+    mêlés à des événements parasites dans la proportion noise_per_tick.
+    @param {int} seconds - Durée simulée.
+    @param {tuple} symbols - Les symboles (le premier est la devise active).
+    @param {int} ticks_per_second - Ticks par seconde et par symbole.
+    @param {float} noise_per_tick - Événements parasites par tick.
+    @param {int} seed - Graine (lots reproductibles).
+    @param {int} start_ms - Heure du premier lot (epoch ms).
+    @returns {list} - Lots {'t', 'symbol', 'entries'} (un lot par tranche de 1/ticks_per_second s).
+    """
+    rng = random.Random(seed)
+    prices = {symbol: 1.0 + 0.1 * i for i, symbol in enumerate(symbols)}
+    noise = [{"message": json.dumps({"message": message}, separators=(',', ':')), "level": "INFO"} for message in NOISE_MESSAGES]
+    step_ms = 1000 // ticks_per_second
+    batches = []
+    for step in range(seconds * ticks_per_second):
+        server_ms = start_ms + step * step_ms + rng.randint(0, step_ms - 1)
+        entries = []
+        for symbol in symbols:
+            ticks = []
+            for _ in range(2 if rng.random() < 0.1 else 1): # Quelques frames groupent deux ticks
+                prices[symbol] += rng.gauss(0, 1e-4)
+                ticks.append([symbol, (server_ms + len(ticks)) / 1000, round(prices[symbol], 6)])
+            payload = base64.b64encode(json.dumps(ticks, separators=(',', ':')).encode()).decode()
+            entries.append(frame_to_log_entry(2, payload))
+        noise_count = int(noise_per_tick * len(symbols)) + (1 if rng.random() < (noise_per_tick * len(symbols)) % 1 else 0)
+        for _ in range(noise_count):
+            entries.insert(rng.randint(0, len(entries)), rng.choice(noise))
+        batches.append({"t": server_ms + 30, "symbol": symbols[0], "entries": entries})
+    return batches
+
+
+def _benchmark_bot(batches, symbol, config=None):
+    clock = SimulatedClock(batches[0]["t"])
+    bot_config = {
+        "CURRENCIES": {symbol: symbol}, "TIMEZONE": "UTC", "TRADING_PERIOD_MINUTES": 1, "PERIOD": 0,
+        "HUMAN_TYPING": False, "SPILL_DIR": None, "TICK_CAPTURE_DIR": None, "CAPTURE_PATH": None,
+        "MIN_YIELD_PERCENT": 0,
+    }
+    bot_config.update(config or {})
+    bot = TradingBot(config=bot_config, clock=clock)
+    bot.driver = ReplayDriver(batches, clock, symbol)
+    bot.current_active_currency = symbol
+    return bot, clock
+
+
+def bench_decode(batches):
+    """
+    🔬 Débit du décodeur seul (FrameDecoder.decode_log_entry, tous symboles).
+    @param {list} batches - Lots d'entrées de log.
+    @returns {dict} - entries_per_second, ticks_per_second.
+    """
+    decoder = FrameDecoder()
+    messages = [entry["message"] for batch in batches for entry in batch["entries"]]
+    started = time.perf_counter()
+    ticks = 0
+    for message in messages:
+        ticks += len(decoder.decode_log_entry(message))
+    elapsed = time.perf_counter() - started
+    return {"entries_per_second": len(messages) / elapsed, "ticks_per_second": ticks / elapsed}
+
+
+def bench_ingest(batches, config=None):
+    """
+    📡 Chemin complet du polling : _process_websocket_data (get_log, décodage, registre multi-devises,
+    fermeture des bougies, indicateurs) et latence de chaque fermeture de bougie (_on_candle_closed,
+    qui inclut _apply_trade_logic et les ordres passés sur le driver simulé).
+    @param {list} batches - Lots d'entrées de log.
+    @param {dict} config - Surcharge de la configuration du bot.
+    @returns {dict} - ticks_per_second, entries_per_second, candle_close_p50_us, candle_close_p99_us, candles.
+    """
+    bot, clock = _benchmark_bot(batches, batches[0]["symbol"], dict({"PERIOD": 5}, **(config or {}))) # Bougies de 5 s : assez de fermetures mesurées
+    close_latency = LatencyStats("candle_close", window=100000)
+    on_candle_closed = bot._on_candle_closed
+
+    def timed_on_candle_closed(candle):
+        started = time.perf_counter()
+        on_candle_closed(candle)
+        close_latency.record((time.perf_counter() - started) * 1000)
+
+    bot._on_candle_closed = timed_on_candle_closed
+    started = time.perf_counter()
+    for batch in batches:
+        clock.advance_to(batch["t"])
+        bot._process_websocket_data()
+    elapsed = time.perf_counter() - started
+    decoded = bot.frame_decoder.decoded_ticks
+    entries = sum(len(batch["entries"]) for batch in batches)
+    summary = close_latency.summary()
+    return {
+        "ticks_per_second": decoded / elapsed,
+        "entries_per_second": entries / elapsed,
+        "candle_close_p50_us": (summary.get("p50_ms") or 0) * 1000,
+        "candle_close_p99_us": (summary.get("p99_ms") or 0) * 1000,
+        "candles": summary.get("count", 0),
+    }
+
+
+def bench_trade_logic(candles=20000, seed=7, config=None):
+    """
+    🎯 Coût d'un appel à _apply_trade_logic (séries, indicateurs, Martingale, ordres sur le driver simulé).
+    @param {int} candles - Nombre de couleurs de bougies.
+    @param {int} seed - Graine.
+    @param {dict} config - Surcharge de la configuration du bot.
+    @returns {dict} - calls_per_second, call_mean_us.
+    """
+    rng = random.Random(seed)
+    symbol = BENCHMARK_SYMBOLS[0]
+    bot, clock = _benchmark_bot([{"t": BENCHMARK_START_MS, "symbol": symbol, "entries": []}], symbol, config)
+    colors = [rng.choice(("green", "red")) for _ in range(candles)]
+    elapsed = 0.0
+    for i, color in enumerate(colors):
+        candle = type("BenchCandle", (), {"open": 1.0, "close": 1.001 if color == "green" else 0.999, "high": 1.001,
+                                          "low": 0.999, "ticks": 2, "is_gap": False})() # Entrée minimale des indicateurs
+        clock.advance_to(BENCHMARK_START_MS + (i + 1) * 60000)
+        bot.indicators.update(candle, color)
+        started = time.perf_counter()
+        bot._apply_trade_logic(color)
+        elapsed += time.perf_counter() - started
+    return {"calls_per_second": candles / elapsed, "call_mean_us": elapsed / candles * 1e6}
+
+
+def run_benchmarks(seconds=600, repeats=3, seed=7):
+    """
+    ⏱️ Exécute la suite et garde, pour chaque métrique, la médiane des répétitions.
+    @param {int} seconds - Durée simulée du flux synthétique.
+    @param {int} repeats - Nombre de répétitions.
+    @param {int} seed - Graine.
+    @returns {dict} - 'benchmark.métrique' -> valeur.
+    """
+    batches = make_log_batches(seconds=seconds, seed=seed)
+    runs = []
+    for _ in range(repeats):
+        results = {}
+        for name, metrics in (("decode", bench_decode(batches)), ("ingest", bench_ingest(batches)),
+                              ("trade_logic", bench_trade_logic(seed=seed))):
+            results.update({f"{name}.{metric}": value for metric, value in metrics.items()})
+        runs.append(results)
+    return {metric: round(statistics.median(run[metric] for run in runs), 3) for metric in runs[0]}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def host_signature():
+    """
+    🖥️ Identifie l'hôte de mesure : seuls les enregistrements du même hôte sont comparables.
+    @returns {dict} - host, machine, python.
+    """
+    return {"host": platform.node(), "machine": platform.machine(), "python": platform.python_version()}
+
+
+def matching_history(history, signature):
+    """
+    🔎 Enregistrements mesurés sur l'hôte décrit par signature (même version de benchmark).
+    @param {list} history - Les enregistrements, du plus ancien au plus récent.
+    @param {dict} signature - host, machine, python.
+    @returns {list} - Les enregistrements comparables, dans le même ordre.
+    """
+    return [record for record in history if record.get("version") == BENCHMARK_VERSION
+            and all(record.get(key) == value for key, value in signature.items())]
+
+
+def load_history(path):
+    """
+    📚 Historique des exécutions enregistrées.
+    @param {str} path - Fichier JSON Lines.
+    @returns {list} - Les enregistrements, du plus ancien au plus récent.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as history_file:
+        return [json.loads(line) for line in history_file if line.strip()]
+
+
+def append_history(path, record):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as history_file:
+        history_file.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+
+def compare_results(baseline, current, threshold_percent=DEFAULT_THRESHOLD_PERCENT):
+    """
+    ⚖️ Compare deux jeux de résultats métrique par métrique.
+    @param {dict} baseline - Résultats de référence.
+    @param {dict} current - Résultats courants.
+    @param {float} threshold_percent - Dégradation tolérée (en %).
+    @returns {list} - Une ligne par métrique : metric, baseline, current, change_percent, regression.
+    """
+    rows = []
+    for metric, value in current.items():
+        reference = baseline.get(metric)
+        if not reference or metric.endswith(".candles"):
+            continue
+        change = (value - reference) / reference * 100
+        worse = -change if metric.endswith("_per_second") else change
+        rows.append({"metric": metric, "baseline": reference, "current": value,
+                     "change_percent": round(change, 1), "regression": worse > threshold_percent})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks du traitement des ticks (flux CDP synthétique).")
+    parser.add_argument("--seconds", type=int, default=600, help="Durée simulée du flux synthétique")
+    parser.add_argument("--repeats", type=int, default=3, help="Répétitions (médiane retenue)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="Historique des résultats (JSON Lines)")
+    parser.add_argument("--record", action="store_true", help="Ajoute les résultats à l'historique")
+    parser.add_argument("--baseline", default=None, help="Commit de référence (défaut : dernier enregistrement)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PERCENT, help="Régression tolérée (en %%)")
+    parser.add_argument("--force", action="store_true", help="Avec --record, enregistre même en cas de régression")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("bot_app.services.trading_logic").setLevel(logging.CRITICAL) # Mesure du calcul, pas de la console
+
+    results = run_benchmarks(args.seconds, args.repeats)
+    signature = host_signature()
+    recorded = load_history(args.history)
+    history = matching_history(recorded, signature)
+    if args.baseline:
+        history = [record for record in history if record.get("commit") == args.baseline]
+    baseline = history[-1] if history else None
+
+    for metric, value in results.items():
+        print(f"{metric:36} {value:>16,.3f}")
+    regressions = []
+    if baseline is None and recorded:
+        print(f"\nAucune référence pour cet hôte ({signature['host']}, {signature['machine']}, Python {signature['python']}) : comparaison ignorée.")
+    if baseline is not None:
+        print(f"\nComparaison avec {baseline.get('commit')} ({baseline.get('recorded_at')}), seuil {args.threshold} %")
+        for row in compare_results(baseline["results"], results, args.threshold):
+            regressions += [row["metric"]] if row["regression"] else []
+            print(f"{row['metric']:36} {row['change_percent']:>+8.1f} %{'  ❌ RÉGRESSION' if row['regression'] else ''}")
+    if args.record and regressions and not args.force:
+        # Une régression enregistrée deviendrait la nouvelle référence et masquerait la suivante
+        print(f"\nRésultats non enregistrés ({len(regressions)} régression(s)) : relancer avec --force pour les accepter.")
+    elif args.record:
+        append_history(args.history, {
+            "version": BENCHMARK_VERSION, "commit": _git_commit(), "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **signature, "seconds": args.seconds,
+            "results": results,
+        })
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
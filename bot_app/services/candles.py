@@ -0,0 +1,147 @@
+# bot_app/services/candles.py
+
+GAP_CANDLE_COLOR = "gray" # Couleur des bougies plates des périodes sans tick
+
+
+class Candle:
+    """
+    🕯️ Bougie OHLC terminée (ou en cours), horodatée en epoch ms.
+    """
+    __slots__ = ("start_ms", "end_ms", "open", "high", "low", "close", "ticks")
+
+    def __init__(self, start_ms, end_ms, open_price=None, high_price=None, low_price=None, close_price=None, ticks=0):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.open = open_price
+        self.high = high_price
+        self.low = low_price
+        self.close = close_price
+        self.ticks = ticks
+
+    @property
+    def is_gap(self):
+        """
+        🕳️ True pour une bougie plate de période sans tick (prix = clôture précédente).
+        """
+        return self.ticks == 0 and self.open is not None
+
+    def __repr__(self):
+        return (f"Candle(start_ms={self.start_ms}, O={self.open}, H={self.high}, "
+                f"L={self.low}, C={self.close}, ticks={self.ticks})")
+
+
+class CandleBuilder:
+    """
+    🧱 Agrégateur OHLC incrémental : chaque tick met à jour open/high/low/close/nombre de ticks
+    de la bougie courante en O(1). La fermeture émet simplement la bougie en cours,
+    quel que soit le volume d'historique de ticks conservé ailleurs.
+
+    La fermeture peut venir d'un tick (update) ou d'une horloge (advance_to). Les périodes
+    sans tick deviennent des bougies plates (gap) au prix de la dernière clôture, plutôt que
+    d'être fusionnées silencieusement (au plus max_gap_candles par avance).
+    """
+
+    def __init__(self, period_ms, fill_gaps=True, max_gap_candles=1000):
+        if period_ms <= 0:
+            raise ValueError("La période des bougies doit être positive.")
+        self.period_ms = int(period_ms)
+        self.fill_gaps = fill_gaps
+        self.max_gap_candles = max_gap_candles
+        self.start_ms = None
+        self.end_ms = None
+        self.last_close = None # Clôture de la dernière bougie avec des ticks (prix des bougies gap)
+        self.skipped_periods = 0 # Périodes sans tick non matérialisées en bougies gap
+        self.late_ticks = 0 # Ticks antérieurs à la bougie courante (ignorés)
+        self._open = None
+        self._high = None
+        self._low = None
+        self._close = None
+        self._ticks = 0
+
+    def reset(self, start_ms, end_ms=None):
+        """
+        🔄 (Ré)initialise la fenêtre de la bougie courante et vide les valeurs en cours.
+        @param {int} start_ms - Début de la bougie (epoch ms).
+        @param {int} end_ms - Optionnel, fin de la bougie (par défaut start_ms + période).
+        """
+        self.start_ms = int(start_ms)
+        self.end_ms = int(end_ms) if end_ms is not None else self.start_ms + self.period_ms
+        self._clear_running()
+
+    def _clear_running(self):
+        self._open = None
+        self._high = None
+        self._low = None
+        self._close = None
+        self._ticks = 0
+
+    @property
+    def current(self):
+        """
+        👀 Instantané de la bougie en cours de construction.
+        @returns {Candle} - La bougie courante (ticks == 0 si aucun tick reçu).
+        """
+        return Candle(self.start_ms, self.end_ms, self._open, self._high, self._low, self._close, self._ticks)
+
+    def update(self, epoch_ms, price):
+        """
+        📥 Intègre un tick. Si le tick dépasse la fin de la bougie courante, celle-ci est fermée
+        et la fenêtre avance jusqu'à la période contenant le tick.
+        @param {int} epoch_ms - Horodatage serveur du tick.
+        @param {float} price - Prix du tick.
+        @returns {list} - Les bougies fermées par ce tick (vide dans le cas courant).
+        """
+        if self.start_ms is None:
+            self.reset(epoch_ms - epoch_ms % self.period_ms)
+
+        closed = []
+        if epoch_ms >= self.end_ms:
+            closed = self.advance_to(epoch_ms)
+        elif epoch_ms < self.start_ms:
+            self.late_ticks += 1
+            return closed
+
+        if self._ticks == 0:
+            self._open = self._high = self._low = price
+        elif price > self._high:
+            self._high = price
+        elif price < self._low:
+            self._low = price
+        self._close = price
+        self._ticks += 1
+        return closed
+
+    def advance_to(self, epoch_ms):
+        """
+        ⏭️ Ferme la bougie courante si epoch_ms a atteint sa fin, et avance la fenêtre
+        jusqu'à la période contenant epoch_ms (sans y ajouter de tick).
+        @param {int} epoch_ms - Heure serveur de référence.
+        @returns {list} - Les bougies fermées, dans l'ordre : la bougie courante puis les
+                          éventuelles bougies gap des périodes vides (vide si rien à fermer).
+        """
+        if self.start_ms is None or epoch_ms < self.end_ms:
+            return []
+        period = self.period_ms
+        closed = []
+        if self._ticks:
+            closed.append(self.current)
+            self.last_close = self._close
+        elif self.fill_gaps and self.last_close is not None:
+            closed.append(self._gap_candle(self.start_ms))
+        else:
+            closed.append(self.current) # Bougie vide, sans prix de référence
+
+        periods_ahead = (epoch_ms - self.end_ms) // period
+        if self.fill_gaps and self.last_close is not None:
+            gap_count = min(periods_ahead, self.max_gap_candles)
+            self.skipped_periods += periods_ahead - gap_count
+            first_gap = self.end_ms + (periods_ahead - gap_count) * period
+            closed.extend(self._gap_candle(first_gap + i * period) for i in range(gap_count))
+        else:
+            self.skipped_periods += periods_ahead
+        self.reset(self.end_ms + periods_ahead * period)
+        return closed
+
+    def _gap_candle(self, start_ms):
+        price = self.last_close
+        return Candle(start_ms, start_ms + self.period_ms, price, price, price, price, 0)
@@ -0,0 +1,109 @@
+# bot_app/services/capture.py
+
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_FORMAT_VERSION = 1
+
+# Fichier de capture (JSON Lines) :
+#   1re ligne : {"meta": {"version": 1}}
+#   puis un lot par ligne : {"t": heure locale de réception (epoch ms), "symbol": devise active, "entries": [...]}
+# Chaque entrée a la forme d'une entrée de driver.get_log('performance') : le rejeu sert ces lots
+# tels quels au bot, qui les décode avec son vrai FrameDecoder.
+
+
+def frame_to_log_entry(opcode, payload_b64):
+    """
+    🔁 Convertit une frame poussée par CDP (opcode, payload base64) en entrée de log de performance équivalente.
+    @param {int} opcode - Opcode WebSocket.
+    @param {str} payload_b64 - Payload en base64.
+    @returns {dict} - L'entrée {'message': str, 'level': 'INFO'}.
+    """
+    message = {"message": {"method": "Network.webSocketFrameReceived",
+                           "params": {"response": {"opcode": opcode, "mask": False, "payloadData": payload_b64}}}}
+    return {"message": json.dumps(message, separators=(',', ':')), "level": "INFO"}
+
+
+class CaptureWriter:
+    """
+    🎙️ Enregistre les frames WebSocket reçues par le bot (lots de get_log ou frames CDP) dans un
+    fichier de capture rejouable hors ligne. Sans chemin configuré (CAPTURE_PATH), rien n'est écrit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.batches = 0
+        self.entries = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def write_entries(self, local_ms, symbol, entries):
+        """
+        ✍️ Enregistre un lot d'entrées de log de performance.
+        @param {float} local_ms - Heure locale de réception (epoch ms).
+        @param {str|None} symbol - Devise active au moment de la réception.
+        @param {list} entries - Les entrées ({'message': str, ...}).
+        """
+        if not self.path or not entries:
+            return
+        line = json.dumps({"t": local_ms, "symbol": symbol,
+                           "entries": [{"message": entry["message"]} for entry in entries]}, separators=(',', ':')) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                    if self._file.tell() == 0:
+                        self._file.write(json.dumps({"meta": {"version": CAPTURE_FORMAT_VERSION}}) + "\n")
+                self._file.write(line)
+                self.batches += 1
+                self.entries += len(entries)
+            except OSError as e:
+                logger.error("❌ Écriture de la capture impossible (%s): %s", self.path, e)
+
+    def write_frames(self, local_ms, symbol, frames):
+        """
+        ✍️ Enregistre un lot de frames CDP (converties en entrées de log de performance).
+        @param {float} local_ms - Heure locale de réception (epoch ms).
+        @param {str|None} symbol - Devise active.
+        @param {list} frames - Les frames (opcode, payload_base64).
+        """
+        if self.path and frames:
+            self.write_entries(local_ms, symbol, [frame_to_log_entry(opcode, payload) for opcode, payload in frames])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path):
+    """
+    📼 Charge un fichier de capture.
+    @param {str} path - Chemin du fichier.
+    @returns {list} - Les lots {'t', 'symbol', 'entries'}, triés par heure de réception.
+    @throws {ValueError} - Si la version du format n'est pas supportée.
+    """
+    batches = []
+    with open(path, "r", encoding="utf-8") as capture_file:
+        for line in capture_file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "meta" in record:
+                if record["meta"].get("version") != CAPTURE_FORMAT_VERSION:
+                    raise ValueError(f"Version de capture non supportée: {record['meta'].get('version')}")
+                continue
+            batches.append(record)
+    batches.sort(key=lambda batch: batch["t"]) # Tri stable : l'ordre d'arrivée est conservé à heure égale
+    return batches
@@ -0,0 +1,126 @@
+# bot_app/services/clock.py
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+def local_time_ms():
+    """
+    🕒 Heure locale en epoch ms.
+    @returns {float} - L'heure locale.
+    """
+    return time.time() * 1000
+
+
+class SystemClock:
+    """
+    🕒 Horloge du bot : heure locale, temps monotone et pauses. Injectable pour rejouer une
+    session enregistrée sur une horloge simulée (SimulatedClock).
+    """
+
+    def time_ms(self):
+        return time.time() * 1000
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now(self, tz=None):
+        return datetime.now(tz)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    ⏩ Horloge simulée pour le rejeu : le temps n'avance que par sleep() (ou advance_to()).
+    Avec speed=None, les pauses sont instantanées (rejeu aussi vite que le CPU le permet) ;
+    avec speed=k, chaque pause dure réellement seconds / k (horloge murale accélérée).
+    """
+
+    def __init__(self, start_ms, speed=None):
+        if speed is not None and speed <= 0:
+            raise ValueError("La vitesse de rejeu doit être positive.")
+        self.speed = speed
+        self._now_ms = float(start_ms)
+        self._lock = threading.Lock()
+
+    def time_ms(self):
+        return self._now_ms
+
+    def monotonic(self):
+        return self._now_ms / 1000
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self._now_ms / 1000, tz)
+
+    def sleep(self, seconds):
+        if self.speed is not None and seconds > 0:
+            time.sleep(seconds / self.speed)
+        self.advance_to(self._now_ms + seconds * 1000)
+
+    def advance_to(self, epoch_ms):
+        """
+        ⏭️ Avance l'horloge jusqu'à epoch_ms (jamais en arrière).
+        @param {float} epoch_ms - La nouvelle heure.
+        """
+        with self._lock:
+            if epoch_ms > self._now_ms:
+                self._now_ms = float(epoch_ms)
+
+
+class ServerClock:
+    """
+    🛰️ Estimation de l'heure serveur à partir des horodatages des ticks.
+
+    Chaque tick donne un échantillon d'offset (heure serveur du tick - heure locale de réception),
+    biaisé par le délai réseau/traitement. Le maximum des échantillons sur une fenêtre glissante
+    correspond au tick le moins retardé : c'est la meilleure estimation de l'offset réel.
+    Le maximum glissant est maintenu par une deque monotone (O(1) amorti par échantillon).
+    """
+
+    def __init__(self, window_ms=60 * 1000, time_source=local_time_ms):
+        self.window_ms = window_ms
+        self.time_source = time_source # Heure locale en epoch ms (injectable pour le rejeu)
+        self.samples = 0
+        self._window = deque() # (heure locale, offset), offsets décroissants
+
+    @property
+    def is_synchronized(self):
+        return bool(self._window)
+
+    @property
+    def offset_ms(self):
+        """
+        ⚖️ Offset estimé heure serveur - heure locale (ms), ou 0 si aucun tick reçu.
+        """
+        return self._window[0][1] if self._window else 0.0
+
+    def observe(self, server_ms, local_ms=None):
+        """
+        ➕ Ajoute un échantillon d'offset à partir d'un tick.
+        @param {int} server_ms - Horodatage serveur du tick.
+        @param {float} local_ms - Optionnel, heure locale de réception (par défaut maintenant).
+        """
+        if local_ms is None:
+            local_ms = self.time_source()
+        offset = server_ms - local_ms
+        window = self._window
+        while window and window[-1][1] <= offset:
+            window.pop()
+        window.append((local_ms, offset))
+        while window[0][0] < local_ms - self.window_ms:
+            window.popleft()
+        self.samples += 1
+
+    def now_ms(self, local_ms=None):
+        """
+        🕰️ Heure serveur estimée (epoch ms).
+        @param {float} local_ms - Optionnel, heure locale de référence (par défaut maintenant).
+        @returns {float} - L'heure serveur estimée.
+        """
+        if local_ms is None:
+            local_ms = self.time_source()
+        return local_ms + self.offset_ms
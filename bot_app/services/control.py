@@ -0,0 +1,187 @@
+# bot_app/services/control.py
+
+import json
+import logging
+import queue
+import threading
+
+from bot_app.services.publisher import get_redis_client, redis
+
+logger = logging.getLogger(__name__)
+
+# Canal de contrôle par bot (pub/sub Redis). Un message est un objet JSON :
+#   {"command": "stop"}
+#   {"command": "pause"} / {"command": "resume"}
+#   {"command": "update_config", "config": {"BET_SIZES": [1, 2, 4], "OFFSET_CANDLES": 3, "MIN_YIELD_PERCENT": 85}}
+# Le thread d'écoute ne fait que mettre les commandes en file ; la boucle du bot les applique
+# elle-même (drain) à chaque itération, sans verrou sur son état.
+
+CONTROL_CHANNEL = "trading_bot:{bot_id}:control"
+COMMAND_STOP = "stop"
+COMMAND_PAUSE = "pause"
+COMMAND_RESUME = "resume"
+COMMAND_UPDATE_CONFIG = "update_config"
+CONTROL_COMMANDS = (COMMAND_STOP, COMMAND_PAUSE, COMMAND_RESUME, COMMAND_UPDATE_CONFIG)
+LIVE_CONFIG_KEYS = ("BET_SIZES", "OFFSET_CANDLES", "MIN_YIELD_PERCENT") # Modifiables sans redémarrage
+
+
+def validate_live_config(config):
+    """
+    ✅ Vérifie une mise à jour de configuration à chaud.
+    @param {dict} config - Les clés à modifier (parmi LIVE_CONFIG_KEYS).
+    @returns {dict} - La mise à jour normalisée.
+    @throws {ValueError} - Clé non modifiable à chaud ou valeur invalide.
+    """
+    if not isinstance(config, dict) or not config:
+        raise ValueError("La mise à jour de configuration doit être un objet non vide.")
+    unknown = set(config) - set(LIVE_CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Clés non modifiables à chaud: {sorted(unknown)} (autorisées: {list(LIVE_CONFIG_KEYS)}).")
+    update = {}
+    if "BET_SIZES" in config:
+        bet_sizes = config["BET_SIZES"]
+        if not isinstance(bet_sizes, list) or not bet_sizes or any(
+                isinstance(size, bool) or not isinstance(size, (int, float)) or size <= 0 for size in bet_sizes):
+            raise ValueError("BET_SIZES doit être une liste non vide de mises positives.")
+        update["BET_SIZES"] = bet_sizes
+    if "OFFSET_CANDLES" in config:
+        offset = config["OFFSET_CANDLES"]
+        if isinstance(offset, bool) or not isinstance(offset, int) or offset < 1:
+            raise ValueError("OFFSET_CANDLES doit être un entier >= 1.")
+        update["OFFSET_CANDLES"] = offset
+    if "MIN_YIELD_PERCENT" in config:
+        min_yield = config["MIN_YIELD_PERCENT"]
+        if isinstance(min_yield, bool) or not isinstance(min_yield, (int, float)) or not 0 <= min_yield <= 100:
+            raise ValueError("MIN_YIELD_PERCENT doit être compris entre 0 et 100.")
+        update["MIN_YIELD_PERCENT"] = min_yield
+    return update
+
+
+def parse_command(raw):
+    """
+    📨 Décode et valide un message du canal de contrôle.
+    @param {str|bytes} raw - Le message JSON.
+    @returns {dict} - {'command', 'config'?}.
+    @throws {ValueError} - Message illisible ou commande inconnue.
+    """
+    try:
+        message = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Message de contrôle illisible: {e}")
+    if not isinstance(message, dict) or message.get("command") not in CONTROL_COMMANDS:
+        raise ValueError(f"Commande inconnue: {message!r}")
+    command = {"command": message["command"]}
+    if command["command"] == COMMAND_UPDATE_CONFIG:
+        command["config"] = validate_live_config(message.get("config"))
+    return command
+
+
+def send_control_command(redis_url, bot_id, command, config=None):
+    """
+    📣 Publie une commande sur le canal de contrôle d'un bot.
+    @param {str} redis_url - URL Redis.
+    @param {str} bot_id - Identifiant du bot (BOT_ID).
+    @param {str} command - stop, pause, resume ou update_config.
+    @param {dict|None} config - Mise à jour (update_config uniquement).
+    @returns {int} - Nombre de bots abonnés ayant reçu la commande (0 : aucun bot à l'écoute).
+    @throws {ValueError} - Commande invalide ou Redis non configuré.
+    """
+    message = {"command": command}
+    if command == COMMAND_UPDATE_CONFIG:
+        message["config"] = config
+    payload = json.dumps(message)
+    parse_command(payload) # Même validation que côté bot : l'erreur est renvoyée à l'appelant
+    client = get_redis_client(redis_url)
+    if client is None:
+        raise ValueError("Redis n'est pas configuré (REDIS_URL).")
+    return client.publish(CONTROL_CHANNEL.format(bot_id=bot_id), payload)
+
+
+class ControlListener:
+    """
+    🎛️ Abonnement au canal de contrôle d'un bot, dans un thread dédié. Les commandes valides sont mises
+    en file ; la boucle du bot les récupère avec drain() (O(1) si la file est vide). Reconnexion
+    automatique si Redis redémarre.
+    """
+
+    def __init__(self, redis_url, bot_id, poll_timeout=1.0):
+        self.redis_url = redis_url
+        self.channel = CONTROL_CHANNEL.format(bot_id=bot_id)
+        self.poll_timeout = poll_timeout
+        self.received = 0
+        self.rejected = 0
+        self._commands = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.redis_url) and redis is not None
+
+    def start(self):
+        """
+        ▶️ Démarre l'écoute (sans effet si Redis n'est pas configuré ou si déjà active).
+        """
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="control-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_timeout + 2)
+            self._thread = None
+
+    def push(self, raw):
+        """
+        ➕ Valide et met en file un message brut (appelé par le thread d'écoute).
+        @param {str|bytes} raw - Le message.
+        @returns {bool} - True si la commande est acceptée.
+        """
+        try:
+            command = parse_command(raw)
+        except ValueError as e:
+            self.rejected += 1
+            logger.warning("⚠️ Commande de contrôle rejetée sur %s: %s", self.channel, e)
+            return False
+        self.received += 1
+        self._commands.put(command)
+        return True
+
+    def drain(self):
+        """
+        📥 Commandes reçues depuis le dernier appel, dans l'ordre d'arrivée.
+        @returns {list} - Les commandes.
+        """
+        commands = []
+        while True:
+            try:
+                commands.append(self._commands.get_nowait())
+            except queue.Empty:
+                return commands
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = get_redis_client(self.redis_url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                logger.info("🎛️ Écoute du canal de contrôle %s.", self.channel)
+                backoff = 1.0
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=self.poll_timeout)
+                    if message and message.get("type") == "message":
+                        self.push(message["data"])
+            except redis.RedisError as e:
+                logger.warning("⚠️ Canal de contrôle %s indisponible (%s), nouvelle tentative dans %.0f s.", self.channel, e, backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except redis.RedisError:
+                        pass
@@ -0,0 +1,129 @@
+# bot_app/services/dom_extraction.py
+
+import re
+import time
+
+from selenium.webdriver.common.by import By
+
+# Lecture groupée du DOM : un seul execute_script (un aller-retour WebDriver) remplace
+# les find_element + .text successifs. Les XPaths viennent du registre de localisateurs.
+
+# Textes de plusieurs localisateurs absolus : arguments[0] = {nom: xpath}, retourne {nom: texte|null}
+# (valeur saisie pour les champs <input>)
+TEXTS_SCRIPT = """
+const result = {};
+for (const [name, xpath] of Object.entries(arguments[0])) {
+    const node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    result[name] = !node ? null : (node.tagName === 'INPUT' ? node.value : node.textContent.trim());
+}
+return result;
+"""
+
+# Liste des actifs du modal : arguments[0] = xpath des items, [1] = label relatif, [2] = rendement relatif.
+# Retourne [{name, yield_text, available, element}] ; l'élément <li> est renvoyé comme WebElement pour le clic.
+ASSET_LIST_SCRIPT = """
+const items = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const text = (item, xpath) => {
+    const node = document.evaluate(xpath, item, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return node ? node.textContent.trim() : null;
+};
+const assets = [];
+for (let i = 0; i < items.snapshotLength; i++) {
+    const item = items.snapshotItem(i);
+    const flags = (item.className || '') + ' ' + (item.querySelector('a') ? item.querySelector('a').className : '');
+    assets.push({
+        name: text(item, arguments[1]),
+        yield_text: text(item, arguments[2]),
+        available: !/disabled|inactive|closed/.test(flags),
+        element: item,
+    });
+}
+return assets;
+"""
+
+PERCENT_PATTERN = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
+
+
+def parse_percent(text):
+    """
+    🔢 Extrait le pourcentage d'un texte de rendement ("+92%" -> 92.0).
+    @param {str|None} text - Le texte affiché.
+    @returns {float|None} - Le pourcentage, ou None si illisible.
+    """
+    match = PERCENT_PATTERN.search(text or "")
+    return float(match.group().replace(",", ".")) if match else None
+
+
+def parse_amount(text):
+    """
+    💲 Convertit un montant affiché ("$1,234.56") en float.
+    @param {str|None} text - Le texte affiché.
+    @returns {float|None} - Le montant, ou None si illisible.
+    """
+    try:
+        return float((text or "").replace('$', '').replace(',', '').strip())
+    except ValueError:
+        return None
+
+
+class DomReader:
+    """
+    📖 Lectures groupées du DOM en un seul execute_script par appel (solde, panneau de trading,
+    liste des actifs), avec le temps de chaque lecture enregistré dans les statistiques du registre.
+    """
+
+    def __init__(self, locator_registry):
+        self.locators = locator_registry
+
+    def read_texts(self, *names):
+        """
+        📝 Lit le texte de plusieurs localisateurs absolus en un aller-retour.
+        @param {str} names - Noms des localisateurs (XPath).
+        @returns {dict} - Texte par nom (None si l'élément est absent).
+        """
+        return self._run("texts", TEXTS_SCRIPT, {name: self._xpath(name) for name in names}) or {}
+
+    def read_balance(self):
+        """
+        🏦 Lit le solde affiché dans l'en-tête.
+        @returns {float|None} - Le solde, ou None si absent/illisible.
+        """
+        return parse_amount(self.read_texts("balance").get("balance"))
+
+    def read_trading_panel(self):
+        """
+        📊 Lit l'actif courant, son rendement et le montant saisi en un aller-retour.
+        @returns {dict} - {'asset': str|None, 'yield_text': str|None, 'yield_percent': float|None, 'amount': float|None}.
+        """
+        texts = self.read_texts("current_asset_label", "current_yield", "bet_amount_input")
+        return {
+            "amount": parse_amount(texts.get("bet_amount_input")),
+            "asset": texts.get("current_asset_label"),
+            "yield_text": texts.get("current_yield"),
+            "yield_percent": parse_percent(texts.get("current_yield")),
+        }
+
+    def read_assets(self):
+        """
+        📋 Lit tous les actifs du modal de sélection (nom, rendement, disponibilité) en un aller-retour.
+        @returns {list} - [{'name', 'yield_text', 'yield_percent', 'available', 'element'}].
+        """
+        assets = self._run("asset_list_items", ASSET_LIST_SCRIPT,
+                           self._xpath("asset_list_items"), self._xpath("asset_item_label"), self._xpath("asset_item_yield")) or []
+        for asset in assets:
+            asset["yield_percent"] = parse_percent(asset.get("yield_text"))
+        return assets
+
+    def _xpath(self, name):
+        by, value = self.locators.locators[name]
+        if by != By.XPATH:
+            raise ValueError(f"Le localisateur {name} n'est pas un XPath.")
+        return value
+
+    def _run(self, stats_name, script, *args):
+        driver = self.locators.current_driver()
+        started = time.perf_counter()
+        try:
+            return driver.execute_script(script, *args)
+        finally:
+            self.locators.record_script(stats_name, (time.perf_counter() - started) * 1000)
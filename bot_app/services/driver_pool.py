@@ -0,0 +1,284 @@
+# bot_app/services/driver_pool.py
+
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pool de drivers Chrome chauds d'un processus : chaque driver est lancé, a ses cookies chargés et affiche
+# la page de trading avant d'être prêté. Le démarrage d'un bot emprunte un driver (quelques ms) au lieu de
+# lancer Chrome et de naviguer (plusieurs dizaines de secondes). À l'arrêt du bot, le driver revient au pool :
+# la page de trading est rechargée et vérifiée avant un nouveau prêt ; il est recyclé (quit) s'il est en
+# erreur, trop ancien ou trop utilisé. Un thread dédié lance, recharge, vérifie et ferme les drivers.
+
+DRIVER_CONFIG_KEYS = ("BASE_URL", "HEADLESS", "CHROME_USER_AGENT", "SELENIUM_COMMAND_EXECUTOR") # Définissent un driver chaud
+
+
+def driver_pool_key(cookies_path, config):
+    """
+    🔑 Clé d'un pool : compte (cookies) et options du driver. Un bot n'emprunte qu'un driver de même clé.
+    @param {str} cookies_path - Fichier de cookies du compte.
+    @param {dict} config - La configuration du bot.
+    @returns {tuple}
+    """
+    return (cookies_path,) + tuple(repr(config.get(key)) for key in DRIVER_CONFIG_KEYS)
+
+
+class PooledDriver:
+    """
+    🚗 Driver du pool et son historique (âge, nombre de prêts, génération).
+    """
+
+    def __init__(self, driver, generation):
+        self.driver = driver
+        self.generation = generation
+        self.created_at = time.monotonic()
+        self.checked_at = self.created_at
+        self.uses = 0
+
+
+class DriverPool:
+    """
+    🏊 Garde `size` drivers chauds prêts à être prêtés (en plus de ceux déjà prêtés) et vérifie
+    périodiquement leur état.
+    """
+
+    def __init__(self, create, prepare, check, size=1, max_uses=20, max_age_seconds=3600, health_check_seconds=30, key=None):
+        self.create = create # () -> driver lancé
+        self.prepare = prepare # driver -> None : cookies chargés, page de trading affichée
+        self.check = check # driver -> bool : encore prêt (appelé à chaque prêt et périodiquement)
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age_seconds = max_age_seconds
+        self.health_check_seconds = health_check_seconds
+        self.key = key
+        self.generation = 0 # Incrémentée par recycle_all() : les drivers plus anciens ne sont plus prêtés
+        self.created = 0
+        self.recycled = 0
+        self.leases = 0
+        self.misses = 0 # Prêts demandés sans driver chaud disponible
+        self.errors = 0
+        self._idle = collections.deque()
+        self._returned = collections.deque() # À recharger avant un nouveau prêt
+        self._retiring = collections.deque() # À fermer
+        self._leased = 0
+        self._checking = 0 # Retirés de _idle le temps d'une vérification périodique
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        ▶️ Démarre le thread de maintenance (remplit le pool en arrière-plan).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="driver-pool", daemon=True)
+        self._thread.start()
+
+    def lease(self, timeout=1.0):
+        """
+        🏊 Emprunte un driver chaud, vérifié juste avant le prêt.
+        @param {float} timeout - Attente maximale (s) d'un driver disponible.
+        @returns {PooledDriver|None} - None si aucun driver n'est prêt à temps (démarrage à froid).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                while not self._idle:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stop.is_set():
+                        self.misses += 1
+                        self._wake.set() # Le thread de maintenance relance un driver
+                        return None
+                    self._condition.wait(remaining)
+                pooled = self._idle.popleft()
+                self._leased += 1
+            if pooled.generation == self.generation and self._is_ready(pooled):
+                pooled.uses += 1
+                self.leases += 1
+                self._wake.set() # Remplacement du driver prêté
+                return pooled
+            with self._condition:
+                self._leased -= 1
+            self._retire(pooled)
+
+    def release(self, pooled, healthy=True):
+        """
+        ♻️ Rend un driver emprunté : rechargé puis reprêté, ou recyclé.
+        @param {PooledDriver} pooled - Le driver emprunté.
+        @param {bool} healthy - False pour le recycler sans essayer de le réutiliser.
+        """
+        with self._condition:
+            self._leased -= 1
+        if not healthy or self._worn_out(pooled) or self._stop.is_set():
+            self._retire(pooled)
+            return
+        self._returned.append(pooled)
+        self._wake.set()
+
+    def recycle_all(self):
+        """
+        🔁 Recycle tous les drivers (ex : cookies mis à jour). Les drivers prêtés le seront à leur retour.
+        """
+        with self._condition:
+            self.generation += 1
+            stale = list(self._idle)
+            self._idle.clear()
+        for pooled in stale:
+            self._retire(pooled)
+        logger.info("🔁 Pool de drivers recyclé (%s drivers chauds fermés).", len(stale))
+
+    def close(self):
+        """
+        ⏹️ Arrête le thread de maintenance et ferme les drivers non prêtés.
+        """
+        self._stop.set()
+        self._wake.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+        with self._condition:
+            remaining = list(self._idle) + list(self._returned)
+            self._idle.clear()
+            self._returned.clear()
+        for pooled in remaining:
+            self._retire(pooled)
+        self._close_retired()
+
+    def stats(self):
+        """
+        📊 État du pool.
+        @returns {dict}
+        """
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "leased": self._leased,
+            "returning": len(self._returned),
+            "checking": self._checking,
+            "retiring": len(self._retiring),
+            "created": self.created,
+            "recycled": self.recycled,
+            "leases": self.leases,
+            "misses": self.misses,
+            "errors": self.errors,
+            "generation": self.generation,
+        }
+
+    def _worn_out(self, pooled):
+        return (pooled.generation != self.generation or pooled.uses >= self.max_uses
+                or time.monotonic() - pooled.created_at > self.max_age_seconds)
+
+    def _is_ready(self, pooled):
+        try:
+            ready = self.check(pooled.driver)
+        except Exception as e:
+            logger.warning("🩺 Driver chaud inutilisable: %s", e)
+            return False
+        pooled.checked_at = time.monotonic()
+        return ready
+
+    def _retire(self, pooled):
+        self._retiring.append(pooled)
+        self._wake.set()
+
+    def _close_retired(self):
+        while self._retiring:
+            pooled = self._retiring.popleft()
+            try:
+                pooled.driver.quit()
+            except Exception as e:
+                logger.debug("Fermeture d'un driver recyclé: %s", e)
+            self.recycled += 1
+
+    def _add_idle(self, pooled):
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def _prepare(self, pooled):
+        try:
+            self.prepare(pooled.driver)
+        except Exception as e:
+            self.errors += 1
+            logger.error("❌ Préparation d'un driver chaud impossible: %s", e)
+            return False
+        return self._is_ready(pooled)
+
+    def _warm_count(self):
+        # Drivers non prêtés qui occupent une place du pool : disponibles, en vérification, à recharger, à fermer
+        return len(self._idle) + self._checking + len(self._returned) + len(self._retiring)
+
+    def _reload_returned(self):
+        while self._returned and not self._stop.is_set():
+            pooled = self._returned.popleft()
+            if len(self._idle) + self._checking >= self.size: # Pool déjà plein : pas de navigateur chaud en trop
+                self._retire(pooled)
+            elif self._prepare(pooled):
+                self._add_idle(pooled)
+            else:
+                self._retire(pooled)
+
+    def _health_check_idle(self):
+        now = time.monotonic()
+        with self._condition:
+            due = [pooled for pooled in self._idle if now - pooled.checked_at >= self.health_check_seconds]
+            for pooled in due:
+                self._idle.remove(pooled)
+            self._checking += len(due)
+        for pooled in due: # Hors verrou : un prêt reste possible sur les autres drivers pendant la vérification
+            healthy = not self._worn_out(pooled) and self._is_ready(pooled)
+            if not healthy:
+                self._retire(pooled) # Compté dans _retiring avant de quitter _checking : jamais hors du compte de _fill
+            with self._condition: # Retour dans _idle et sortie de _checking d'un bloc
+                self._checking -= 1
+                if healthy:
+                    self._idle.append(pooled)
+                    self._condition.notify()
+
+    def _fill(self):
+        self._close_retired() # Les drivers à fermer occupent encore leur place jusqu'à leur fermeture
+        while not self._stop.is_set() and self._warm_count() < self.size:
+            started = time.perf_counter()
+            try:
+                pooled = PooledDriver(self.create(), self.generation)
+            except Exception as e:
+                self.errors += 1
+                logger.error("❌ Lancement d'un driver chaud impossible: %s", e)
+                return False
+            self.created += 1
+            if not self._prepare(pooled):
+                self._retire(pooled)
+                return False
+            self._add_idle(pooled)
+            logger.info("🏊 Driver chaud prêt en %.1f s (%s disponibles).", time.perf_counter() - started, len(self._idle))
+        return True
+
+    def _maintain(self):
+        """
+        🔧 Un cycle de maintenance : ferme, recharge, vérifie puis complète le pool.
+        @returns {bool} - False si un driver n'a pas pu être lancé ou préparé.
+        """
+        self._close_retired()
+        self._reload_returned()
+        self._health_check_idle()
+        return self._fill()
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            if self._maintain():
+                backoff = 1.0
+                self._wake.wait(min(1.0, self.health_check_seconds))
+            else: # Chrome ou la page indisponibles : nouvelle tentative espacée
+                self._wake.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            self._wake.clear()
+            self._close_retired()
@@ -0,0 +1,134 @@
+# bot_app/services/frame_decoder.py
+
+import base64
+import binascii
+
+try:
+    import ujson as fast_json # Listé dans requirements.txt, nettement plus rapide que json
+except ImportError: # pragma: no cover - fallback si ujson n'est pas installé
+    import json as fast_json
+
+FRAME_RECEIVED_MARKER = '"Network.webSocketFrameReceived"'
+BINARY_OPCODE_MARKERS = ('"opcode":2', '"opcode": 2') # Chrome sérialise sans espace, on tolère les deux
+TICK_PAYLOAD_PREFIX = b'[["'
+
+# Étapes du décodage, dans l'ordre où une frame peut être rejetée
+DECODER_STAGES = (
+    "method", # Entrée de log qui n'est pas un Network.webSocketFrameReceived (test de sous-chaîne)
+    "opcode", # Frame non binaire (test de sous-chaîne puis opcode de l'enveloppe)
+    "envelope", # Enveloppe CDP illisible
+    "base64", # Payload absent ou base64 invalide
+    "prefix", # Payload qui n'a pas la forme [["SYMBOLE", ...]] (test d'octets)
+    "symbol", # Tick d'une autre devise (test d'octets, avant tout parsing)
+    "json", # Payload JSON invalide
+    "shape", # JSON valide mais aucun tick exploitable
+)
+
+
+def normalize_epoch_ms(timestamp):
+    """
+    🔢 Normalise un timestamp serveur (secondes ou millisecondes) en epoch ms entier.
+    @param {int|float} timestamp - Le timestamp.
+    @returns {int} - L'epoch en ms.
+    """
+    return int(timestamp) if timestamp > 1e12 else int(timestamp * 1000)
+
+
+class FrameDecoder:
+    """
+    ⚡ Décodeur par étapes des frames WebSocket PocketOption.
+
+    Les frames inutiles sont rejetées le plus tôt possible par des tests de sous-chaînes/octets
+    (méthode CDP, opcode, préfixe du payload, symbole) avant tout parsing JSON complet ;
+    seul le payload des frames retenues est parsé (avec ujson). Un compteur par étape
+    permet de voir où partent les frames.
+    """
+
+    def __init__(self, symbol=None):
+        self.dropped = dict.fromkeys(DECODER_STAGES, 0)
+        self.decoded_frames = 0
+        self.decoded_ticks = 0
+        self.symbol = None
+        self._symbol_marker = None
+        self.set_symbol(symbol)
+
+    def set_symbol(self, symbol):
+        """
+        🎯 Restreint le décodage aux ticks d'un symbole (None = tous les symboles).
+        @param {str|None} symbol - Le symbole, ex: "EURUSD_otc".
+        """
+        self.symbol = symbol
+        self._symbol_marker = f'"{symbol}"'.encode() if symbol else None
+
+    def decode_log_entry(self, raw_message):
+        """
+        📜 Décode une entrée de driver.get_log('performance') (enveloppe CDP en JSON).
+        @param {str} raw_message - Le champ 'message' de l'entrée de log.
+        @returns {list} - Les ticks (symbole, epoch_ms, prix) retenus.
+        """
+        if FRAME_RECEIVED_MARKER not in raw_message:
+            self.dropped["method"] += 1
+            return []
+        if BINARY_OPCODE_MARKERS[0] not in raw_message and BINARY_OPCODE_MARKERS[1] not in raw_message:
+            self.dropped["opcode"] += 1
+            return []
+        try:
+            response = fast_json.loads(raw_message)['message']['params']['response']
+        except (ValueError, KeyError, TypeError):
+            self.dropped["envelope"] += 1
+            return []
+        return self.decode_frame(response.get('opcode', 0), response.get('payloadData'))
+
+    def decode_frame(self, opcode, payload_b64):
+        """
+        🧩 Décode une frame WebSocket déjà extraite de son enveloppe (mode push CDP).
+        @param {int} opcode - Opcode WebSocket (2 = binaire).
+        @param {str} payload_b64 - Payload encodé en base64.
+        @returns {list} - Les ticks (symbole, epoch_ms, prix) retenus.
+        """
+        if opcode != 2:
+            self.dropped["opcode"] += 1
+            return []
+        try:
+            payload = base64.b64decode(payload_b64)
+        except (binascii.Error, TypeError, ValueError):
+            self.dropped["base64"] += 1
+            return []
+        if not payload.startswith(TICK_PAYLOAD_PREFIX):
+            self.dropped["prefix"] += 1
+            return []
+        if self._symbol_marker is not None and self._symbol_marker not in payload:
+            self.dropped["symbol"] += 1
+            return []
+        try:
+            data = fast_json.loads(payload)
+        except ValueError:
+            self.dropped["json"] += 1
+            return []
+
+        # Le format est souvent: [["EURUSD_otc",1678886400.123,1.06659]] ou similaire
+        ticks = []
+        for row in data:
+            if isinstance(row, list) and len(row) == 3 and isinstance(row[0], str) \
+                    and (self.symbol is None or row[0] == self.symbol):
+                try:
+                    ticks.append((row[0], normalize_epoch_ms(row[1]), float(row[2])))
+                except (TypeError, ValueError):
+                    continue
+        if not ticks:
+            self.dropped["shape"] += 1
+            return []
+        self.decoded_frames += 1
+        self.decoded_ticks += len(ticks)
+        return ticks
+
+    def stats(self):
+        """
+        📊 Compteurs du décodeur.
+        @returns {dict} - Frames/ticks décodés et frames rejetées par étape.
+        """
+        return {
+            "decoded_frames": self.decoded_frames,
+            "decoded_ticks": self.decoded_ticks,
+            "dropped": dict(self.dropped),
+        }
@@ -0,0 +1,401 @@
+# bot_app/services/indicators.py
+
+import math
+from collections import deque
+
+from bot_app.services.candles import GAP_CANDLE_COLOR
+
+# Indicateurs en flux : chaque bougie fermée met à jour l'état en O(1) (sommes glissantes, lissages
+# exponentiels), sans jamais recalculer la série complète. La valeur vaut None tant que l'indicateur
+# n'a pas reçu assez de bougies (`ready` à False).
+
+
+class ColorStreak:
+    """
+    🎨 Longueur de la série de bougies de même couleur en cours (bougies gap ignorées),
+    et couleurs des `window` dernières bougies (fenêtre bornée de la règle d'offset).
+    """
+
+    def __init__(self, window=2):
+        self.color = None
+        self.length = 0
+        self.recent = deque(maxlen=max(1, window))
+
+    @property
+    def ready(self):
+        return self.length > 0
+
+    @property
+    def value(self):
+        return self.length
+
+    def reset(self):
+        self.color = None
+        self.length = 0
+        self.recent.clear()
+
+    def update(self, color):
+        """
+        ➕ Intègre la couleur d'une bougie fermée.
+        @param {str} color - "green" ou "red" ("gray" est ignoré).
+        @returns {int} - La longueur de la série.
+        """
+        if color == GAP_CANDLE_COLOR:
+            return self.length
+        self.recent.append(color)
+        if color == self.color:
+            self.length += 1
+        else:
+            self.color = color
+            self.length = 1
+        return self.length
+
+    def peek(self, color):
+        """
+        🔮 Longueur qu'aurait la série si la prochaine bougie avait cette couleur (sans rien modifier).
+        @param {str} color - Couleur provisoire.
+        @returns {int} - La longueur hypothétique.
+        """
+        return self.length + 1 if color == self.color else 1
+
+
+class SMA:
+    """
+    📏 Moyenne mobile simple sur `period` clôtures (somme glissante).
+    """
+
+    def __init__(self, period):
+        if period <= 0:
+            raise ValueError("La période de la SMA doit être positive.")
+        self.period = period
+        self.value = None
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def reset(self):
+        self.value = None
+        self._window.clear()
+        self._sum = 0.0
+
+    def update(self, price):
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(price)
+        self._sum += price
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+
+class EMA:
+    """
+    📈 Moyenne mobile exponentielle (alpha = 2 / (period + 1)), amorcée par la SMA des `period` premières clôtures.
+    """
+
+    def __init__(self, period):
+        if period <= 0:
+            raise ValueError("La période de l'EMA doit être positive.")
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+        self._seed = SMA(period)
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def reset(self):
+        self.value = None
+        self._seed.reset()
+
+    def update(self, price):
+        if self.value is None:
+            self.value = self._seed.update(price)
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class RSI:
+    """
+    📊 Relative Strength Index (lissage de Wilder des hausses et baisses de clôture).
+    """
+
+    def __init__(self, period=14):
+        if period <= 0:
+            raise ValueError("La période du RSI doit être positive.")
+        self.period = period
+        self.value = None
+        self._previous = None
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def reset(self):
+        self.value = None
+        self._previous = None
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, price):
+        if self._previous is None:
+            self._previous = price
+            return self.value
+        change = price - self._previous
+        self._previous = price
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self._count += 1
+        if self._count <= self.period:
+            # Amorçage : moyenne simple des `period` premières variations
+            self._avg_gain += gain / self.period
+            self._avg_loss += loss / self.period
+            if self._count < self.period:
+                return self.value
+        else:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+        if self._avg_loss == 0:
+            self.value = 100.0 if self._avg_gain > 0 else 50.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+        return self.value
+
+
+class BollingerBands:
+    """
+    🎚️ Bandes de Bollinger : SMA ± `k` écarts-types (population) sur `period` clôtures,
+    par sommes glissantes des prix et de leurs carrés.
+    """
+
+    def __init__(self, period=20, k=2.0):
+        if period <= 0:
+            raise ValueError("La période des bandes de Bollinger doit être positive.")
+        self.period = period
+        self.k = k
+        self.middle = None
+        self.upper = None
+        self.lower = None
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    @property
+    def ready(self):
+        return self.middle is not None
+
+    @property
+    def value(self):
+        if self.middle is None:
+            return None
+        return {"middle": self.middle, "upper": self.upper, "lower": self.lower}
+
+    def reset(self):
+        self.middle = self.upper = self.lower = None
+        self._window.clear()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, price):
+        if len(self._window) == self.period:
+            oldest = self._window[0]
+            self._sum -= oldest
+            self._sum_sq -= oldest * oldest
+        self._window.append(price)
+        self._sum += price
+        self._sum_sq += price * price
+        if len(self._window) == self.period:
+            mean = self._sum / self.period
+            deviation = math.sqrt(max(self._sum_sq / self.period - mean * mean, 0.0)) # max : erreurs d'arrondi
+            self.middle = mean
+            self.upper = mean + self.k * deviation
+            self.lower = mean - self.k * deviation
+        return self.value
+
+    def percent_b(self, price):
+        """
+        📍 Position du prix dans les bandes (0 = bande basse, 1 = bande haute).
+        @param {float} price - Le prix.
+        @returns {float|None} - %B, ou None si les bandes ne sont pas prêtes ou sont plates.
+        """
+        if self.middle is None or self.upper == self.lower:
+            return None
+        return (price - self.lower) / (self.upper - self.lower)
+
+
+class ATR:
+    """
+    📐 Average True Range (lissage de Wilder du true range des bougies).
+    """
+
+    def __init__(self, period=14):
+        if period <= 0:
+            raise ValueError("La période de l'ATR doit être positive.")
+        self.period = period
+        self.value = None
+        self._previous_close = None
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def reset(self):
+        self.value = None
+        self._previous_close = None
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, high, low, close):
+        if self._previous_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self._previous_close), abs(low - self._previous_close))
+        self._previous_close = close
+        self._count += 1
+        if self._count < self.period:
+            self._sum += true_range
+        elif self._count == self.period:
+            self.value = (self._sum + true_range) / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class IndicatorSet:
+    """
+    🧮 Ensemble des indicateurs de la devise active, mis à jour en O(1) à chaque bougie fermée.
+
+    Les bougies gap (périodes sans tick) sont ignorées, comme dans la règle d'offset de la stratégie.
+    `confirms(direction, filters)` combine les indicateurs avec le signal de série : chaque filtre
+    configuré doit être satisfait (un filtre dont l'indicateur n'est pas encore prêt est bloquant).
+    """
+
+    def __init__(self, streak_window=2, sma_period=20, ema_period=9, rsi_period=14, bollinger_period=20, bollinger_k=2.0, atr_period=14):
+        self.streak = ColorStreak(streak_window)
+        self.sma = SMA(sma_period)
+        self.ema = EMA(ema_period)
+        self.rsi = RSI(rsi_period)
+        self.bollinger = BollingerBands(bollinger_period, bollinger_k)
+        self.atr = ATR(atr_period)
+        self.last_close = None
+        self.updates = 0
+
+    @classmethod
+    def from_config(cls, config, streak_window=2):
+        """
+        ⚙️ Construit l'ensemble depuis la section INDICATORS de la configuration.
+        @param {dict} config - Périodes des indicateurs (clés absentes = valeurs par défaut).
+        @param {int} streak_window - Nombre de couleurs récentes conservées (OFFSET_CANDLES).
+        @returns {IndicatorSet}
+        """
+        config = config or {}
+        return cls(
+            streak_window=streak_window,
+            sma_period=config.get("SMA_PERIOD", 20),
+            ema_period=config.get("EMA_PERIOD", 9),
+            rsi_period=config.get("RSI_PERIOD", 14),
+            bollinger_period=config.get("BOLLINGER_PERIOD", 20),
+            bollinger_k=config.get("BOLLINGER_K", 2.0),
+            atr_period=config.get("ATR_PERIOD", 14),
+        )
+
+    def reset(self):
+        for indicator in (self.streak, self.sma, self.ema, self.rsi, self.bollinger, self.atr):
+            indicator.reset()
+        self.last_close = None
+        self.updates = 0
+
+    def set_streak_window(self, window, colors=()):
+        """
+        🔧 Change la fenêtre de la série (OFFSET_CANDLES modifié à chaud) et la recalcule.
+        @param {int} window - Nouvelle fenêtre.
+        @param {list} colors - Couleurs des bougies réelles récentes, de la plus ancienne à la plus récente.
+        """
+        self.streak = ColorStreak(window)
+        for color in colors:
+            self.streak.update(color)
+
+    def update(self, candle, color):
+        """
+        ➕ Intègre une bougie fermée dans tous les indicateurs (O(1)).
+        @param {Candle} candle - La bougie.
+        @param {str} color - Sa couleur ("gray" : bougie gap, ignorée).
+        """
+        if color == GAP_CANDLE_COLOR:
+            return
+        self.streak.update(color)
+        self.sma.update(candle.close)
+        self.ema.update(candle.close)
+        self.rsi.update(candle.close)
+        self.bollinger.update(candle.close)
+        self.atr.update(candle.high, candle.low, candle.close)
+        self.last_close = candle.close
+        self.updates += 1
+
+    def confirms(self, direction, filters):
+        """
+        ✅ Vérifie les filtres d'indicateurs pour un trade dans le sens `direction`.
+        Filtres reconnus (tous optionnels) :
+          - RSI_MAX / RSI_MIN : RSI <= RSI_MAX pour un CALL, RSI >= RSI_MIN pour un PUT (pas de trade en zone extrême).
+          - TREND_EMA : True -> clôture au-dessus de l'EMA pour un CALL, en dessous pour un PUT.
+          - MIN_ATR : volatilité minimale (ATR, en unités de prix).
+          - MAX_BOLLINGER_PERCENT_B / MIN_BOLLINGER_PERCENT_B : %B <= max pour un CALL, >= min pour un PUT.
+        @param {str} direction - "green" (CALL) ou "red" (PUT).
+        @param {dict} filters - Les filtres configurés (SIGNAL_FILTERS).
+        @returns {tuple} - (bool, str|None) : confirmation et, sinon, le filtre bloquant.
+        """
+        if not filters:
+            return True, None
+        call = direction == "green"
+        if "RSI_MAX" in filters or "RSI_MIN" in filters:
+            if not self.rsi.ready:
+                return False, "rsi_not_ready"
+            if call and "RSI_MAX" in filters and self.rsi.value > filters["RSI_MAX"]:
+                return False, "rsi_max"
+            if not call and "RSI_MIN" in filters and self.rsi.value < filters["RSI_MIN"]:
+                return False, "rsi_min"
+        if filters.get("TREND_EMA"):
+            if not self.ema.ready:
+                return False, "ema_not_ready"
+            if (self.last_close > self.ema.value) != call:
+                return False, "trend_ema"
+        if "MIN_ATR" in filters:
+            if not self.atr.ready:
+                return False, "atr_not_ready"
+            if self.atr.value < filters["MIN_ATR"]:
+                return False, "min_atr"
+        if "MAX_BOLLINGER_PERCENT_B" in filters or "MIN_BOLLINGER_PERCENT_B" in filters:
+            percent_b = self.bollinger.percent_b(self.last_close) if self.last_close is not None else None
+            if percent_b is None:
+                return False, "bollinger_not_ready"
+            if call and "MAX_BOLLINGER_PERCENT_B" in filters and percent_b > filters["MAX_BOLLINGER_PERCENT_B"]:
+                return False, "bollinger_max"
+            if not call and "MIN_BOLLINGER_PERCENT_B" in filters and percent_b < filters["MIN_BOLLINGER_PERCENT_B"]:
+                return False, "bollinger_min"
+        return True, None
+
+    def snapshot(self):
+        """
+        📊 Valeurs courantes des indicateurs.
+        @returns {dict} - Sérialisable en JSON.
+        """
+        return {
+            "streak": {"color": self.streak.color, "length": self.streak.length},
+            "sma": self.sma.value,
+            "ema": self.ema.value,
+            "rsi": self.rsi.value,
+            "bollinger": self.bollinger.value,
+            "atr": self.atr.value,
+            "last_close": self.last_close,
+            "updates": self.updates,
+        }
@@ -0,0 +1,142 @@
+# bot_app/services/ingestion.py
+
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INGESTION_MODE_CDP = "cdp" # Push : abonnement CDP à Network.webSocketFrameReceived
+INGESTION_MODE_POLL = "poll" # Polling : driver.get_log('performance') (fallback)
+
+
+class CdpFrameListener:
+    """
+    📡 Abonnement push aux frames WebSocket reçues par Chrome via le Chrome DevTools Protocol.
+
+    Seul l'évènement Network.webSocketFrameReceived est écouté, sur une connexion CDP dédiée
+    (driver.bidi_connection) gérée dans un thread. Les frames sont poussées dans une file bornée
+    sous la forme (opcode, payload_base64) dès leur arrivée, sans passer par
+    le canal HTTP WebDriver ni par le tampon des logs de performance.
+    """
+
+    def __init__(self, driver, max_queue_size=10000):
+        self.driver = driver
+        self.frames = queue.Queue(maxsize=max_queue_size)
+        self.dropped_frames = 0 # Frames perdues car la file était pleine
+        self.error = None
+        self._ready = threading.Event()
+        self._stop_requested = False
+        self._thread = None
+
+    @property
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, ready_timeout=10):
+        """
+        ▶️ Démarre le thread d'écoute et attend que l'abonnement CDP soit actif.
+        @param {float} ready_timeout - Délai max (s) d'attente de l'abonnement.
+        @returns {bool} - True si l'abonnement est actif, False sinon (le polling doit prendre le relais).
+        """
+        self._stop_requested = False
+        self._thread = threading.Thread(target=self._run, name="cdp-frame-listener", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(ready_timeout):
+            logger.warning("🟡 Abonnement CDP non actif après %ss.", ready_timeout)
+            self.stop()
+            return False
+        return self.error is None
+
+    def stop(self, join_timeout=2):
+        """
+        ⏹️ Demande l'arrêt du thread d'écoute.
+        """
+        self._stop_requested = True
+        if self._thread is not None:
+            self._thread.join(join_timeout)
+            self._thread = None
+
+    def drain(self, timeout=0.1):
+        """
+        📥 Attend au plus `timeout` secondes la première frame, puis vide la file.
+        @param {float} timeout - Délai max d'attente de la première frame.
+        @returns {list} - Les frames (opcode, payload_base64).
+        """
+        try:
+            batch = [self.frames.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                batch.append(self.frames.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _push(self, frame):
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            # Politique "drop oldest" : les ticks récents sont plus utiles que les anciens
+            try:
+                self.frames.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped_frames += 1
+            self.frames.put_nowait(frame)
+
+    def _run(self):
+        import trio # Dépendance de selenium, importée uniquement si le mode CDP est utilisé
+        try:
+            trio.run(self._listen)
+        except Exception as e:
+            self.error = e
+            logger.error("❌ Erreur de l'écoute CDP des frames WebSocket: %s", e)
+        finally:
+            self._ready.set()
+
+    async def _listen(self):
+        import trio
+        async with self.driver.bidi_connection() as connection:
+            session, devtools = connection.session, connection.devtools
+            await session.execute(devtools.network.enable())
+            listener = session.listen(devtools.network.WebSocketFrameReceived, buffer_size=1000)
+            self._ready.set()
+            logger.info("📡 Abonnement CDP à Network.webSocketFrameReceived actif.")
+
+            async with trio.open_nursery() as nursery:
+                async def watch_stop():
+                    while not self._stop_requested:
+                        await trio.sleep(0.2)
+                    nursery.cancel_scope.cancel()
+
+                nursery.start_soon(watch_stop)
+                async for event in listener:
+                    self._push((int(event.response.opcode), event.response.payload_data))
+
+
+def measure_ingestion_latency(bot_factory, modes=(INGESTION_MODE_CDP, INGESTION_MODE_POLL), duration_seconds=120):
+    """
+    🧪 Compare la latence de bout en bout des ticks (horodatage serveur -> tick intégré à la bougie)
+    entre les modes d'ingestion, avec le même harnais : un bot est lancé par mode pendant
+    `duration_seconds`, puis arrêté, et ses statistiques tick_latency sont collectées.
+    L'offset d'horloge local/serveur s'applique de la même façon aux deux modes : seul l'écart compte.
+    @param {callable} bot_factory - Fonction (mode) -> TradingBot configuré pour ce mode.
+    @param {tuple} modes - Les modes à comparer.
+    @param {int} duration_seconds - Durée de mesure par mode.
+    @returns {dict} - Résumé des latences par mode.
+    """
+    results = {}
+    for mode in modes:
+        bot = bot_factory(mode)
+        runner = threading.Thread(target=bot.start, name=f"latency-{mode}", daemon=True)
+        runner.start()
+        time.sleep(duration_seconds)
+        summary = bot.tick_latency.summary()
+        summary["effective_mode"] = bot.ingestion_mode # Le mode CDP peut avoir basculé en polling
+        bot.stop()
+        runner.join(30)
+        results[mode] = summary
+        logger.info("⏱️ Latence des ticks (%s): %s", mode, summary)
+    return results
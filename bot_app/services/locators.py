@@ -0,0 +1,281 @@
+# bot_app/services/locators.py
+
+import logging
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from bot_app.services.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+# Localisateurs nommés de l'interface PocketOption : (stratégie, sélecteur).
+# Les XPATH/CSS Selectors sont spécifiques à l'UI de PocketOption et peuvent casser : c'est le seul endroit à mettre à jour.
+LOCATORS = {
+    # Page principale
+    "congrats_close": (By.XPATH, "/html/body/div[20]/div/div/div/a"), # Pop-up "Congratulations"
+    "balance": (By.XPATH, "/html/body/div[4]/div[1]/header/div[3]/div[3]/div/div[2]/div[1]/span"),
+    "bet_amount_input": (By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[1]/div[2]/div[2]/div[1]/div/input"),
+    "call_button": (By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[2]/div[2]/div[1]/a"), # Bouton CALL/UP
+    "put_button": (By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[2]/div[2]/div[2]/a"), # Bouton PUT/DOWN
+    "current_yield": (By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[2]/div[1]/div[2]/div/div/div[1]"),
+    "current_asset_label": (By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[1]/div[1]/div[1]/div/a/div/span"),
+    "asset_selector": (By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[1]/div[1]/div[1]/div"), # Ouvre la liste des devises
+    "expiration_mode_icon": (By.CSS_SELECTOR, "#put-call-buttons-chart-1 > div > div.blocks-wrap > div.block.block--expiration-inputs > div.block__control.control > div.control-buttons__wrapper > div > a > div > div > svg"),
+
+    # Modal de sélection des devises
+    "asset_currencies_tab": (By.XPATH, "/html/body/div[9]/div/div/div/div[1]/div/div[1]/a[1]"), # Onglet "Currencies"
+    "asset_search_input": (By.XPATH, "/html/body/div[9]/div/div/div/div[2]/div[1]/div[1]/input"),
+    "asset_list_items": (By.XPATH, "/html/body/div[9]/div/div/div/div[2]/div[2]/div/div/div[1]/ul/li"),
+    "asset_item_label": (By.XPATH, ".//a/span[3]"), # Relatif à un item de la liste : nom de la devise
+    "asset_item_yield": (By.XPATH, ".//a/span[4]/span"), # Relatif à un item de la liste : rendement
+
+    # Modal d'expiration
+    "expiry_hours_input": (By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__in > div:nth-child(1) > div > input"),
+    "expiry_minutes_input": (By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__in > div:nth-child(2) > div > input"),
+    "expiry_seconds_input": (By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__in > div:nth-child(3) > div > input"),
+    "auto_switch_label": (By.XPATH, '//*[@id="modal-root"]/div/div/div/div[2]/div/label'),
+    "auto_switch_thumb": (By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__dops.dops.dops-with-timeframes > div > label > div.mdl-switch__thumb > span"),
+    "timeframe_m1": (By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__dops.dops.dops-with-timeframes.opened > div.dops__timeframes > div:nth-child(2)"),
+}
+
+# Conditions d'attente disponibles pour LocatorRegistry.wait_for
+WAIT_CONDITIONS = {
+    "present": EC.presence_of_element_located,
+    "visible": EC.visibility_of_element_located,
+    "clickable": EC.element_to_be_clickable,
+    "invisible": EC.invisibility_of_element_located,
+}
+
+
+class LocatorStats:
+    """
+    📊 Compteurs d'un localisateur : handles servis depuis le cache (hits), résolutions WebDriver
+    (misses), re-résolutions après StaleElementReferenceException, et temps de résolution.
+    """
+    __slots__ = ("hits", "misses", "stale", "lookup_time")
+
+    def __init__(self, name):
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.lookup_time = LatencyStats(f"lookup_{name}", window=256)
+
+    def summary(self):
+        lookup = self.lookup_time.summary()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "lookup_mean_ms": lookup.get("mean_ms"),
+            "lookup_max_ms": lookup.get("max_ms"),
+        }
+
+
+class CachedElement:
+    """
+    🔗 Handle WebElement mis en cache, re-résolu de façon transparente s'il est périmé.
+
+    S'utilise comme un WebElement (click, send_keys, text, get_attribute, ...) : si l'appel lève
+    StaleElementReferenceException (élément retiré du DOM, modal rouvert, ...), le handle est
+    invalidé, le localisateur est résolu à nouveau et l'appel est rejoué une fois.
+    """
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    def __getattr__(self, attribute):
+        registry, name = self._registry, self._name
+        try:
+            value = getattr(registry.resolve(name), attribute)
+        except StaleElementReferenceException: # Propriété (ex: .text) lue sur un handle périmé
+            value = getattr(registry.resolve(name, stale=True), attribute)
+        if not callable(value):
+            return value
+
+        def call_with_refresh(*args, **kwargs):
+            try:
+                return value(*args, **kwargs)
+            except StaleElementReferenceException:
+                logger.debug("♻️ Handle périmé pour '%s', nouvelle résolution.", name)
+                return getattr(registry.resolve(name, stale=True), attribute)(*args, **kwargs)
+        return call_with_refresh
+
+    def __repr__(self):
+        return f"CachedElement({self._name!r})"
+
+
+class LocatorRegistry:
+    """
+    🗂️ Registre des localisateurs nommés de l'interface : chaque localisateur n'est résolu
+    (find_element, un aller-retour WebDriver) qu'au premier usage, puis son handle WebElement
+    est réutilisé. Le cache est vidé si le driver change.
+    """
+
+    def __init__(self, driver_getter, locators=None, wait_timeout=10, poll_frequency=0.05):
+        """
+        @param {callable} driver_getter - Retourne le driver Selenium courant (ou None).
+        @param {dict} locators - Optionnel, localisateurs nommés (par défaut LOCATORS).
+        @param {float} wait_timeout - Délai max (s) par défaut des attentes conditionnelles.
+        @param {float} poll_frequency - Intervalle (s) entre deux vérifications d'une condition.
+        """
+        self._driver_getter = driver_getter
+        self.wait_timeout = wait_timeout
+        self.poll_frequency = poll_frequency
+        self.locators = dict(locators or LOCATORS)
+        self._driver = None
+        self._handles = {}
+        self._stats = {}
+
+    def element(self, name):
+        """
+        🔎 Retourne le handle mis en cache d'un localisateur (résolu au premier accès).
+        @param {str} name - Nom du localisateur.
+        @returns {CachedElement} - Le handle, utilisable comme un WebElement.
+        """
+        if name not in self._handles or self._driver_getter() is not self._driver:
+            self.resolve(name) # Résolution immédiate : un élément absent lève NoSuchElementException ici
+        return CachedElement(self, name)
+
+    def resolve(self, name, stale=False):
+        """
+        🧭 Retourne le WebElement d'un localisateur, depuis le cache si possible.
+        @param {str} name - Nom du localisateur.
+        @param {bool} stale - True si le handle en cache est connu comme périmé (force la résolution).
+        @returns {WebElement} - L'élément.
+        """
+        driver = self.current_driver()
+        stats = self._stats_for(name)
+        if stale:
+            stats.stale += 1
+            self._handles.pop(name, None)
+        handle = self._handles.get(name)
+        if handle is not None:
+            stats.hits += 1
+            return handle
+        handle = self._find(driver.find_element, name, stats)
+        self._handles[name] = handle
+        return handle
+
+    def wait_for(self, name, condition="visible", timeout=None):
+        """
+        ⏳ Attend qu'un localisateur remplisse une condition (présent, visible, cliquable, invisible)
+        et met le handle trouvé en cache. Retourne dès que la condition est vraie.
+        @param {str} name - Nom du localisateur.
+        @param {str} condition - Clé de WAIT_CONDITIONS.
+        @param {float} timeout - Optionnel, délai max (s), par défaut wait_timeout.
+        @returns {CachedElement|bool} - Le handle (True pour "invisible").
+        @throws {TimeoutException} - Si la condition n'est pas remplie à temps.
+        """
+        driver = self.current_driver()
+        stats = self._stats_for(name)
+        started = time.perf_counter()
+        try:
+            found = WebDriverWait(driver, self.wait_timeout if timeout is None else timeout, poll_frequency=self.poll_frequency) \
+                .until(WAIT_CONDITIONS[condition](self.locators[name]))
+        finally:
+            stats.misses += 1
+            stats.lookup_time.record((time.perf_counter() - started) * 1000)
+        if condition == "invisible":
+            self._handles.pop(name, None)
+            return True
+        self._handles[name] = found
+        return CachedElement(self, name)
+
+    def wait_until(self, predicate, timeout=None, message=""):
+        """
+        ⏳ Attend qu'une condition arbitraire soit vraie (ex: valeur d'un champ, actif sélectionné).
+        @param {callable} predicate - Fonction sans argument, retourne une valeur vraie quand c'est prêt.
+        @param {float} timeout - Optionnel, délai max (s), par défaut wait_timeout.
+        @param {str} message - Optionnel, message de la TimeoutException.
+        @returns {*} - La valeur retournée par predicate.
+        @throws {TimeoutException} - Si la condition n'est pas remplie à temps.
+        """
+        return WebDriverWait(self.current_driver(), self.wait_timeout if timeout is None else timeout, poll_frequency=self.poll_frequency) \
+            .until(lambda _driver: predicate(), message)
+
+    def find_all(self, name):
+        """
+        📋 Résout tous les éléments d'un localisateur (listes dynamiques : jamais mises en cache).
+        @param {str} name - Nom du localisateur.
+        @returns {list} - Les WebElements.
+        """
+        return self._find(self.current_driver().find_elements, name, self._stats_for(name))
+
+    def find_within(self, parent, name):
+        """
+        🔍 Résout un localisateur relatif à un élément parent (non mis en cache).
+        @param {WebElement} parent - L'élément parent.
+        @param {str} name - Nom du localisateur relatif.
+        @returns {WebElement} - L'élément.
+        """
+        return self._find(parent.find_element, name, self._stats_for(name))
+
+    def invalidate(self, name=None):
+        """
+        🧹 Oublie le handle d'un localisateur (ou de tous si name est None).
+        @param {str|None} name - Nom du localisateur.
+        """
+        if name is None:
+            self._handles.clear()
+        else:
+            self._handles.pop(name, None)
+
+    def record_script(self, name, duration_ms):
+        """
+        📜 Enregistre la durée d'une lecture groupée du DOM (execute_script) dans les statistiques.
+        @param {str} name - Nom de la lecture.
+        @param {float} duration_ms - Durée de l'aller-retour.
+        """
+        key = f"script:{name}"
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = LocatorStats(key)
+        stats.misses += 1
+        stats.lookup_time.record(duration_ms)
+
+    def stats(self):
+        """
+        📊 Statistiques par localisateur utilisé.
+        @returns {dict} - hits/misses/stale et temps de résolution par localisateur.
+        """
+        return {name: stats.summary() for name, stats in self._stats.items()}
+
+    def current_driver(self):
+        """
+        🚗 Driver Selenium courant (vide le cache des handles si le driver a changé).
+        @returns {WebDriver} - Le driver.
+        """
+        driver = self._driver_getter()
+        if driver is None:
+            raise RuntimeError("Aucun driver Selenium actif pour résoudre les localisateurs.")
+        if driver is not self._driver: # Nouveau driver : les anciens handles ne sont plus valides
+            self._driver = driver
+            self._handles.clear()
+        return driver
+
+    def _stats_for(self, name):
+        stats = self._stats.get(name)
+        if stats is None:
+            if name not in self.locators:
+                raise KeyError(f"Localisateur inconnu: {name}")
+            stats = self._stats[name] = LocatorStats(name)
+        return stats
+
+    def _find(self, finder, name, stats):
+        by, value = self.locators[name]
+        started = time.perf_counter()
+        try:
+            return finder(by, value)
+        finally:
+            stats.misses += 1
+            stats.lookup_time.record((time.perf_counter() - started) * 1000)
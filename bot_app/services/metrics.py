@@ -0,0 +1,237 @@
+# bot_app/services/metrics.py
+
+import bisect
+import functools
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Bornes (secondes) des histogrammes du chemin critique : de 50 µs (append d'un tick) à 10 s (chargement de page)
+DEFAULT_DURATION_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_PREFIX = "trading_bot"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class LatencyStats:
+    """
+    ⏱️ Statistiques de latence (ms) sur une fenêtre glissante d'échantillons.
+    L'enregistrement est en O(1) ; les percentiles ne sont calculés qu'à la lecture (summary).
+    """
+
+    def __init__(self, name, window=2048):
+        self.name = name
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._samples = deque(maxlen=window)
+
+    def record(self, value_ms):
+        """
+        ➕ Enregistre un échantillon.
+        @param {float} value_ms - La latence mesurée en millisecondes.
+        """
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+        self._samples.append(value_ms)
+
+    def reset(self):
+        """
+        🔄 Remet les compteurs à zéro.
+        """
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._samples.clear()
+
+    def summary(self):
+        """
+        📊 Résumé des latences : nombre, moyenne, p50/p90/p99 (fenêtre glissante) et max.
+        @returns {dict} - Le résumé, sérialisable en JSON.
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return {"name": self.name, "count": self.count}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+        return {
+            "name": self.name,
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3),
+            "p50_ms": percentile(0.50),
+            "p90_ms": percentile(0.90),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class StepTimings:
+    """
+    🧭 Durées (ms) par étape nommée (chargement de page, saisie du montant, ouverture de modal, ...),
+    chacune dans un LatencyStats créé au premier usage.
+    """
+
+    def __init__(self, window=256, sink=None):
+        self.window = window
+        self.sink = sink # HotPathMetrics optionnel : chaque étape alimente aussi l'histogramme "ui_<étape>"
+        self._steps = {}
+
+    @contextmanager
+    def step(self, name):
+        """
+        ⏱️ Mesure la durée du bloc `with` et l'enregistre sous le nom de l'étape (même en cas d'exception).
+        @param {str} name - Nom de l'étape.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def record(self, name, duration_ms):
+        """
+        ➕ Enregistre une durée pour une étape.
+        @param {str} name - Nom de l'étape.
+        @param {float} duration_ms - Durée en millisecondes.
+        """
+        stats = self._steps.get(name)
+        if stats is None:
+            stats = self._steps[name] = LatencyStats(name, window=self.window)
+        stats.record(duration_ms)
+        if self.sink is not None:
+            self.sink.observe("ui_" + name, duration_ms / 1000)
+
+    def summary(self):
+        """
+        📊 Résumé de chaque étape mesurée.
+        @returns {dict} - Résumé LatencyStats par étape.
+        """
+        return {name: stats.summary() for name, stats in self._steps.items()}
+
+
+class Histogram:
+    """
+    📶 Histogramme à bornes fixes (secondes), au format Prometheus : observe() en O(log b), sans allocation.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Dernier compartiment : au-delà de la plus grande borne (+Inf)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        """
+        ➕ Enregistre une durée.
+        @param {float} seconds - La durée en secondes.
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+
+class HotPathMetrics:
+    """
+    🔥 Histogrammes de durée par étape du chemin critique (get_log, décodage, ticks, bougies, logique,
+    actions Selenium) et compteurs (ticks, frames, bougies, ordres). Coût d'un enregistrement : une
+    recherche dichotomique et trois additions ; la lecture (snapshot) se fait depuis un autre thread.
+    """
+
+    def __init__(self, buckets=DEFAULT_DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self._histograms = {}
+
+    def observe(self, stage, seconds):
+        """
+        ⏱️ Enregistre la durée d'une étape (histogramme créé au premier usage).
+        @param {str} stage - Nom de l'étape.
+        @param {float} seconds - Durée en secondes.
+        """
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def inc(self, counter, value=1):
+        """
+        ➕ Incrémente un compteur.
+        @param {str} counter - Nom du compteur (ticks, frames, candles, orders...).
+        @param {int} value - Incrément.
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def snapshot(self):
+        """
+        📸 Instantané sérialisable en JSON (copie des dicts : sûr pendant les écritures des autres threads).
+        @returns {dict} - {'counters': {...}, 'histograms': {étape: {...}}}.
+        """
+        return {
+            "counters": dict(self.counters),
+            "histograms": {stage: histogram.snapshot() for stage, histogram in list(self._histograms.items())},
+        }
+
+
+def timed_stage(stage):
+    """
+    ⏱️ Décorateur de méthode : enregistre la durée de chaque appel dans self.hot_metrics (même en cas d'exception).
+    @param {str} stage - Nom de l'étape.
+    @returns {function} - Le décorateur.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.hot_metrics.observe(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _format_labels(labels):
+    # Échappements du format texte : antislash, guillemet et saut de ligne
+    return "{" + ",".join('%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                          for key, value in labels.items()) + "}"
+
+
+def render_prometheus(snapshots):
+    """
+    📝 Format texte d'exposition Prometheus des instantanés de plusieurs bots.
+    @param {dict} snapshots - bot_id -> instantané HotPathMetrics (avec 'published_at' optionnel).
+    @returns {str} - Le texte à servir.
+    """
+    lines = []
+    name = f"{METRICS_PREFIX}_stage_duration_seconds"
+    lines += [f"# HELP {name} Durée des étapes du chemin critique du bot.", f"# TYPE {name} histogram"]
+    for bot_id, snapshot in sorted(snapshots.items()):
+        for stage, histogram in sorted(snapshot.get("histograms", {}).items()):
+            cumulative = 0
+            for bound, count in zip(list(histogram["buckets"]) + ["+Inf"], histogram["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels({'bot': bot_id, 'stage': stage, 'le': bound})} {cumulative}")
+            labels = _format_labels({"bot": bot_id, "stage": stage})
+            lines.append(f"{name}_sum{labels} {histogram['sum']!r}")
+            lines.append(f"{name}_count{labels} {histogram['count']}")
+    counters = sorted({counter for snapshot in snapshots.values() for counter in snapshot.get("counters", {})})
+    for counter in counters:
+        name = f"{METRICS_PREFIX}_{counter}_total"
+        lines += [f"# HELP {name} Nombre cumulé de {counter}.", f"# TYPE {name} counter"]
+        for bot_id, snapshot in sorted(snapshots.items()):
+            if counter in snapshot.get("counters", {}):
+                lines.append(f"{name}{_format_labels({'bot': bot_id})} {snapshot['counters'][counter]}")
+    name = f"{METRICS_PREFIX}_snapshot_timestamp_seconds"
+    lines += [f"# HELP {name} Heure de publication de l'instantané.", f"# TYPE {name} gauge"]
+    for bot_id, snapshot in sorted(snapshots.items()):
+        if snapshot.get("published_at") is not None:
+            lines.append(f"{name}{_format_labels({'bot': bot_id})} {snapshot['published_at']!r}")
+    return "\n".join(lines) + "\n"
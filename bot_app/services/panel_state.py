@@ -0,0 +1,137 @@
+# bot_app/services/panel_state.py
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PANEL_FIELDS = ("amount", "expiry_minutes", "auto_switch", "asset")
+
+
+def _normalize(field, value):
+    if value is None:
+        return None
+    if field == "amount":
+        try:
+            return float(str(value).replace('$', '').replace(',', '').strip())
+        except ValueError:
+            return None
+    if field == "expiry_minutes":
+        return int(value)
+    return value
+
+
+class TradingPanelState:
+    """
+    🧾 Modèle vérifié de l'état du panneau de trading (montant, expiration, auto-switch, actif).
+
+    Une valeur n'est connue qu'après une action réussie ou une lecture du DOM : les actions
+    d'interface dont l'état voulu est déjà connu sont sautées. Une erreur d'interface rend l'état
+    inconnu (invalidate) et déclenche une re-vérification ; sinon, l'état est re-vérifié au plus
+    tard toutes les `verify_interval_seconds`.
+    """
+
+    def __init__(self, verify_interval_seconds=60, monotonic=time.monotonic):
+        self.verify_interval_seconds = verify_interval_seconds
+        self.monotonic = monotonic # Source de temps monotone (injectable pour le rejeu)
+        self.skipped_actions = dict.fromkeys(PANEL_FIELDS, 0) # Actions évitées car l'état était déjà bon
+        self.applied_actions = dict.fromkeys(PANEL_FIELDS, 0) # Actions réellement envoyées à l'interface
+        self.verifications = 0
+        self.mismatches = 0 # Écarts détectés entre le modèle et le DOM
+        self._values = {}
+        self._verified_at = None # Temps monotone de la dernière vérification
+
+    def get(self, field):
+        """
+        🔎 Valeur connue d'un champ (None si inconnue).
+        @param {str} field - Le champ.
+        @returns {*} - La valeur normalisée.
+        """
+        return self._values.get(field)
+
+    def matches(self, field, value):
+        """
+        ✅ True si le panneau affiche déjà cette valeur (l'action peut être sautée, et elle est comptée comme telle).
+        @param {str} field - Le champ.
+        @param {*} value - La valeur voulue.
+        @returns {bool} - True si la valeur connue est égale à la valeur voulue.
+        """
+        wanted = _normalize(field, value)
+        if wanted is not None and self._values.get(field) == wanted:
+            self.skipped_actions[field] += 1
+            return True
+        return False
+
+    def confirm(self, field, value, applied=True):
+        """
+        📝 Enregistre la valeur d'un champ après une action réussie (ou une lecture du DOM).
+        @param {str} field - Le champ.
+        @param {*} value - La valeur désormais affichée.
+        @param {bool} applied - True si une action d'interface a été envoyée.
+        """
+        self._values[field] = _normalize(field, value)
+        if applied:
+            self.applied_actions[field] += 1
+
+    def invalidate(self, field=None):
+        """
+        ❓ Rend un champ (ou tout le panneau) inconnu, et force une re-vérification.
+        @param {str|None} field - Le champ, ou None pour tout le panneau.
+        """
+        if field is None:
+            self._values.clear()
+        else:
+            self._values.pop(field, None)
+        self._verified_at = None
+
+    def retry_verification_in(self, seconds):
+        """
+        ⏳ Reporte la prochaine vérification (après un échec de lecture, pour ne pas boucler sur l'erreur).
+        @param {float} seconds - Délai avant la prochaine tentative.
+        """
+        self._verified_at = self.monotonic() - self.verify_interval_seconds + seconds
+
+    def needs_verification(self, now=None):
+        """
+        ⏰ True si la dernière vérification est trop ancienne (ou si une erreur l'a invalidée).
+        @param {float} now - Optionnel, temps monotone de référence.
+        @returns {bool}
+        """
+        if self._verified_at is None:
+            return True
+        return (self.monotonic() if now is None else now) - self._verified_at >= self.verify_interval_seconds
+
+    def reconcile(self, observed):
+        """
+        🔁 Confronte le modèle aux valeurs lues dans le DOM et adopte les valeurs lues.
+        @param {dict} observed - Valeurs lues par champ (les champs absents ou None sont ignorés).
+        @returns {list} - Les champs dont la valeur connue différait du DOM.
+        """
+        changed = []
+        for field, value in observed.items():
+            value = _normalize(field, value)
+            if value is None:
+                continue
+            known = self._values.get(field)
+            if known is not None and known != value:
+                changed.append(field)
+            self._values[field] = value
+        if changed:
+            self.mismatches += len(changed)
+            logger.warning("🟡 État du panneau différent du modèle pour: %s", ", ".join(changed))
+        self.verifications += 1
+        self._verified_at = self.monotonic()
+        return changed
+
+    def snapshot(self):
+        """
+        📊 État connu et compteurs.
+        @returns {dict} - Valeurs connues, actions évitées/envoyées, vérifications.
+        """
+        return {
+            "values": dict(self._values),
+            "skipped_actions": dict(self.skipped_actions),
+            "applied_actions": dict(self.applied_actions),
+            "verifications": self.verifications,
+            "mismatches": self.mismatches,
+        }
@@ -0,0 +1,264 @@
+# bot_app/services/pipeline.py
+
+import logging
+import queue
+import threading
+import time
+
+from bot_app.services.metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+RUNTIME_MODE_PIPELINE = "pipeline" # Workers ingestion / bougies / stratégie / exécution reliés par des files bornées
+RUNTIME_MODE_SEQUENTIAL = "sequential" # Boucle unique historique
+
+DROP_OLDEST = "drop_oldest" # File pleine : on jette l'élément le plus ancien (données de marché : la fraîcheur prime)
+DROP_NEWEST = "drop_newest" # File pleine : on jette l'élément entrant
+BLOCK = "block" # File pleine : le producteur attend (backpressure), puis jette l'élément entrant après block_timeout
+
+
+class BoundedQueue:
+    """
+    📬 File bornée entre deux étages du pipeline, avec une politique explicite quand elle est pleine.
+
+    Chaque élément est horodaté à l'entrée : le délai passé dans la file (lag) est mesuré à la sortie.
+    La profondeur courante, le maximum atteint et les éléments jetés sont exposés par stats().
+    """
+
+    def __init__(self, name, maxsize, drop_policy=DROP_OLDEST, block_timeout=1.0):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Politique de file inconnue: {drop_policy}")
+        self.name = name
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.lag = LatencyStats(f"{name}_lag", window=1024)
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def put(self, item):
+        """
+        ➕ Ajoute un élément selon la politique de la file.
+        @param {*} item - L'élément.
+        @returns {bool} - False si l'élément entrant a été jeté.
+        """
+        entry = (time.monotonic(), item)
+        try:
+            if self.drop_policy == BLOCK:
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.drop_policy != DROP_OLDEST:
+                self.dropped += 1
+                logger.warning("🧯 File %s pleine (%s), élément jeté.", self.name, self.maxsize)
+                return False
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            self._queue.put_nowait(entry)
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def get(self, timeout=None):
+        """
+        📤 Retire le prochain élément (attend au plus `timeout` secondes).
+        @param {float} timeout - Délai max d'attente (None = attente infinie).
+        @returns {*} - L'élément.
+        @throws {queue.Empty} - Si aucun élément n'est arrivé à temps.
+        """
+        enqueued_at, item = self._queue.get(timeout=timeout)
+        self.dequeued += 1
+        self.lag.record((time.monotonic() - enqueued_at) * 1000)
+        return item
+
+    def stats(self):
+        """
+        📊 Profondeur, débit, pertes et lag de la file.
+        @returns {dict} - Statistiques sérialisables en JSON.
+        """
+        lag = self.lag.summary()
+        return {
+            "depth": self._queue.qsize(),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "drop_policy": self.drop_policy,
+            "enqueued": self.enqueued,
+            "dequeued": self.dequeued,
+            "dropped": self.dropped,
+            "lag_p50_ms": lag.get("p50_ms"),
+            "lag_p99_ms": lag.get("p99_ms"),
+            "lag_max_ms": lag.get("max_ms"),
+        }
+
+
+class PendingCall:
+    """
+    ⏳ Résultat d'une action soumise à l'étage d'exécution (attendu seulement pour les appels bloquants).
+    """
+    __slots__ = ("_done", "result", "error")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def set(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        🕰️ Attend la fin de l'action.
+        @param {float} timeout - Délai max (s).
+        @returns {*} - Le résultat de l'action.
+        @throws {TimeoutError} - Si l'action n'est pas terminée à temps.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Action d'exécution non terminée à temps.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class ExecutionStage:
+    """
+    🖱️ Étage d'exécution : un seul thread possède les actions Selenium de l'interface (montant,
+    ordres, sélection de devise). Les actions sont exécutées dans l'ordre de soumission (FIFO),
+    sous le verrou du driver. Une action lente ne bloque que cet étage.
+    """
+
+    def __init__(self, driver_lock, maxsize=100):
+        self.driver_lock = driver_lock
+        self.commands = BoundedQueue("execution", maxsize, drop_policy=BLOCK, block_timeout=5.0)
+        self.action_time = LatencyStats("execution_action", window=1024)
+        self.failed_actions = 0
+        self.stopped = False
+        self._thread_ident = None
+
+    def is_current_thread(self):
+        """
+        🧵 True si l'appelant est le thread d'exécution (l'action doit alors s'exécuter directement).
+        """
+        return threading.get_ident() == self._thread_ident
+
+    def submit(self, function, *args):
+        """
+        📨 Soumet une action (sans attendre son résultat).
+        @param {callable} function - L'action.
+        @returns {PendingCall|None} - Le résultat en attente, ou None si la file est restée pleine.
+        """
+        pending = PendingCall()
+        if self.stopped:
+            pending.set(error=RuntimeError("Étage d'exécution arrêté."))
+            return pending
+        return pending if self.commands.put((function, args, pending)) else None
+
+    def call(self, function, *args, timeout=60):
+        """
+        📞 Soumet une action et attend son résultat (appel bloquant pour l'appelant uniquement).
+        @param {callable} function - L'action.
+        @param {float} timeout - Délai max d'attente (s).
+        @returns {*} - Le résultat de l'action.
+        """
+        pending = self.submit(function, *args)
+        if pending is None:
+            raise TimeoutError("File d'exécution pleine.")
+        return pending.wait(timeout)
+
+    def run(self, should_run, poll_timeout=0.1):
+        """
+        🔁 Boucle du thread d'exécution (jusqu'à ce que should_run() soit faux).
+        @param {callable} should_run - Condition de poursuite.
+        @param {float} poll_timeout - Attente max d'une action avant de revérifier should_run.
+        """
+        self._thread_ident = threading.get_ident()
+        while should_run():
+            try:
+                function, args, pending = self.commands.get(timeout=poll_timeout)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            try:
+                with self.driver_lock:
+                    pending.set(result=function(*args))
+            except Exception as e:
+                self.failed_actions += 1
+                logger.error("❌ Action d'exécution %s en échec: %s", getattr(function, "__name__", function), e)
+                pending.set(error=e)
+            finally:
+                self.action_time.record((time.perf_counter() - started) * 1000)
+        self._thread_ident = None
+        self.stopped = True
+        self._cancel_pending()
+
+    def _cancel_pending(self):
+        # Les actions restantes ne seront jamais exécutées : on libère les appels bloquants en attente
+        while True:
+            try:
+                _, _, pending = self.commands.get(timeout=0)
+            except queue.Empty:
+                return
+            pending.set(error=RuntimeError("Étage d'exécution arrêté."))
+
+    def stats(self):
+        """
+        📊 Statistiques de l'étage d'exécution.
+        @returns {dict} - File, durée des actions, échecs.
+        """
+        return {
+            "queue": self.commands.stats(),
+            "action_time": self.action_time.summary(),
+            "failed_actions": self.failed_actions,
+        }
+
+
+class PipelineWorker:
+    """
+    🧵 Thread d'un étage du pipeline : appelle `step()` en boucle tant que `should_run()` est vrai.
+    Une exception dans une itération est journalisée sans arrêter l'étage.
+    """
+
+    def __init__(self, name, step, should_run):
+        self.name = name
+        self.iterations = 0
+        self.errors = 0
+        self._step = step
+        self._should_run = should_run
+        self._thread = None
+
+    @property
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        logger.info("🧵 Étage %s démarré.", self.name)
+        while self._should_run():
+            try:
+                self._step()
+            except Exception as e:
+                self.errors += 1
+                logger.error("❌ Erreur dans l'étage %s: %s", self.name, e, exc_info=True)
+                time.sleep(0.1) # Évite une boucle d'erreurs à pleine vitesse
+            self.iterations += 1
+        logger.info("🧵 Étage %s arrêté.", self.name)
@@ -0,0 +1,270 @@
+# bot_app/services/publisher.py
+
+import json
+import logging
+import threading
+import time
+
+try:
+    import redis # Listé dans requirements.txt (broker Celery)
+except ImportError: # pragma: no cover - publication désactivée si redis n'est pas installé
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Clés Redis publiées par chaque bot (lues directement par les vues, sans passer par Celery)
+METRICS_KEY = "trading_bot:{bot_id}:metrics"
+METRICS_KEY_PATTERN = "trading_bot:*:metrics"
+STATE_KEY = "trading_bot:{bot_id}:{part}" # part : status, ohlc ou trades
+STATE_PARTS = ("status", "ohlc", "trades")
+STATE_SCHEMA_VERSION = 1
+STALE_AFTER_REFRESHES = 3 # Instantané périmé après ce nombre de republications manquées (bot tué sans arrêt propre)
+
+_clients = {} # URL -> client Redis (pool de connexions partagé par le processus)
+_clients_lock = threading.Lock()
+
+
+def get_redis_client(redis_url):
+    """
+    🔌 Client Redis partagé pour une URL (créé au premier usage).
+    @param {str} redis_url - Ex: "redis://redis:6379/0".
+    @returns {redis.Redis|None} - None si l'URL est vide ou si redis n'est pas installé.
+    """
+    if not redis_url or redis is None:
+        return None
+    with _clients_lock:
+        client = _clients.get(redis_url)
+        if client is None:
+            client = _clients[redis_url] = redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+        return client
+
+
+class MetricsPublisher:
+    """
+    📣 Publie périodiquement l'instantané des métriques du chemin critique dans Redis, depuis un thread
+    dédié : le chemin des ticks n'effectue aucune E/S. La clé expire si le bot cesse de publier.
+    """
+
+    def __init__(self, redis_url, bot_id, snapshot, interval_seconds=1.0, ttl_seconds=30):
+        self.redis_url = redis_url
+        self.key = METRICS_KEY.format(bot_id=bot_id)
+        self.snapshot = snapshot # Callable -> dict (HotPathMetrics.snapshot)
+        self.interval_seconds = interval_seconds
+        self.ttl_seconds = ttl_seconds
+        self.published = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.redis_url) and redis is not None
+
+    def start(self):
+        """
+        ▶️ Démarre le thread de publication (sans effet si Redis n'est pas configuré ou si déjà actif).
+        """
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-publisher", daemon=True)
+        self._thread.start()
+
+    def publish(self):
+        """
+        📤 Publie l'instantané courant.
+        @returns {bool} - True si la publication a réussi.
+        """
+        client = get_redis_client(self.redis_url)
+        if client is None:
+            return False
+        payload = dict(self.snapshot(), published_at=time.time())
+        try:
+            client.set(self.key, json.dumps(payload, separators=(',', ':')), ex=self.ttl_seconds)
+        except redis.RedisError as e:
+            self.errors += 1
+            if self.errors == 1 or self.errors % 60 == 0: # Pas un avertissement par seconde si Redis est absent
+                logger.warning("⚠️ Publication des métriques impossible (%s erreurs): %s", self.errors, e)
+            return False
+        self.published += 1
+        return True
+
+    def stop(self):
+        """
+        ⏹️ Arrête le thread et publie un dernier instantané.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval_seconds + 2)
+            self._thread = None
+            self.publish()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.publish()
+
+
+class StatePublisher:
+    """
+    🛰️ Publie dans Redis des instantanés versionnés de l'état du bot (statut, bougies récentes, trades
+    récents), lus directement par les vues. mark_dirty() est O(1) et peut être appelé depuis le chemin
+    critique : un thread dédié construit les instantanés et les écrit (une transaction pour les trois
+    clés), au plus une fois par min_interval_seconds ; plusieurs changements rapprochés sont regroupés.
+    Sans changement, l'état est republié toutes les refresh_seconds et les clés expirent après
+    ttl_seconds : un bot tué sans arrêt propre (SIGKILL) n'est pas vu « en cours » indéfiniment.
+    """
+
+    def __init__(self, redis_url, bot_id, build_snapshot, min_interval_seconds=0.05, refresh_seconds=None, ttl_seconds=None):
+        self.redis_url = redis_url
+        self.bot_id = bot_id
+        self.build_snapshot = build_snapshot # Callable -> {'status': dict, 'ohlc': list, 'trades': list}
+        self.min_interval_seconds = min_interval_seconds
+        self.refresh_seconds = refresh_seconds # None : publication uniquement sur changement
+        self.ttl_seconds = ttl_seconds # None : clés sans expiration
+        self.version = 0
+        self.published = 0
+        self.errors = 0
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._publish_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.redis_url) and redis is not None
+
+    def mark_dirty(self):
+        """
+        🚩 Signale un changement d'état (publication asynchrone).
+        """
+        self._dirty.set()
+
+    def start(self):
+        """
+        ▶️ Démarre le thread de publication (sans effet si Redis n'est pas configuré ou si déjà actif).
+        """
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="state-publisher", daemon=True)
+        self._thread.start()
+        self.mark_dirty()
+
+    def publish(self):
+        """
+        📤 Construit et publie les instantanés (statut, bougies, trades) avec le même numéro de version.
+        @returns {bool} - True si la publication a réussi.
+        """
+        client = get_redis_client(self.redis_url)
+        if client is None:
+            return False
+        with self._publish_lock:
+            try:
+                snapshot = self.build_snapshot()
+            except Exception as e: # État modifié pendant la lecture : nouvelle tentative au prochain cycle
+                logger.debug("Instantané de l'état non construit: %s", e)
+                self._dirty.set()
+                return False
+            version = self.version + 1
+            envelope = {"schema": STATE_SCHEMA_VERSION, "version": version, "published_at": time.time()}
+            if self.refresh_seconds:
+                envelope["max_age_seconds"] = self.refresh_seconds * STALE_AFTER_REFRESHES
+            try:
+                pipeline = client.pipeline(transaction=True)
+                for part in STATE_PARTS:
+                    pipeline.set(STATE_KEY.format(bot_id=self.bot_id, part=part),
+                                 json.dumps(dict(envelope, data=snapshot[part]), separators=(',', ':'), default=str),
+                                 ex=self.ttl_seconds)
+                pipeline.execute()
+            except redis.RedisError as e:
+                self.errors += 1
+                if self.errors == 1 or self.errors % 60 == 0:
+                    logger.warning("⚠️ Publication de l'état impossible (%s erreurs): %s", self.errors, e)
+                return False
+            self.version = version
+            self.published += 1
+            return True
+
+    def stop(self):
+        """
+        ⏹️ Arrête le thread et publie l'état final (bot arrêté).
+        """
+        self._stop.set()
+        self._dirty.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+        if self.enabled:
+            self.publish()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._dirty.wait(self.refresh_seconds) # Republication périodique même sans changement
+            if self._stop.is_set():
+                return
+            self._dirty.clear()
+            self.publish()
+            self._stop.wait(self.min_interval_seconds) # Regroupe les changements rapprochés
+
+
+def read_state(redis_url, bot_id, part):
+    """
+    📥 Dernier instantané publié d'une partie de l'état d'un bot.
+    @param {str} redis_url - URL Redis.
+    @param {str} bot_id - Identifiant du bot.
+    @param {str} part - "status", "ohlc" ou "trades".
+    @returns {dict|None} - {'schema', 'version', 'published_at', 'data'}, ou None si rien n'a été publié.
+    @throws {redis.RedisError} - Si Redis est injoignable.
+    """
+    client = get_redis_client(redis_url)
+    if client is None:
+        return None
+    value = client.get(STATE_KEY.format(bot_id=bot_id, part=part))
+    return json.loads(value) if value is not None else None
+
+
+def is_stale(snapshot, now=None):
+    """
+    ⌛ Indique si un instantané d'état n'a pas été republié à temps (bot arrêté sans publier son état final).
+    @param {dict} snapshot - Instantané lu par read_state.
+    @param {float|None} now - Heure courante (epoch s), time.time() par défaut.
+    @returns {bool} - True si l'instantané est plus ancien que son max_age_seconds.
+    """
+    max_age = snapshot.get("max_age_seconds")
+    if not max_age: # Publié sans republication périodique : l'âge ne dit rien
+        return False
+    return (time.time() if now is None else now) - snapshot["published_at"] > max_age
+
+
+def status_from_snapshot(snapshot, now=None):
+    """
+    🩺 Statut à servir pour un instantané : un statut périmé est marqué arrêté (stale) au lieu d'être servi tel quel.
+    @param {dict} snapshot - Instantané "status" lu par read_state.
+    @param {float|None} now - Heure courante (epoch s).
+    @returns {dict} - Le statut publié, ou une copie avec is_running = False et stale = True.
+    """
+    if not is_stale(snapshot, now):
+        return snapshot["data"]
+    age = (time.time() if now is None else now) - snapshot["published_at"]
+    return dict(snapshot["data"], is_running=False, stale=True, snapshot_age_seconds=round(age, 1))
+
+
+def read_metrics_snapshots(redis_url):
+    """
+    📥 Instantanés de métriques publiés par tous les bots.
+    @param {str} redis_url - URL Redis.
+    @returns {dict} - bot_id -> instantané.
+    @throws {redis.RedisError} - Si Redis est injoignable.
+    """
+    client = get_redis_client(redis_url)
+    if client is None:
+        return {}
+    keys = sorted(client.scan_iter(match=METRICS_KEY_PATTERN, count=100))
+    snapshots = {}
+    for key, value in zip(keys, client.mget(keys) if keys else []):
+        if value is None: # Expirée entre SCAN et MGET
+            continue
+        key = key.decode() if isinstance(key, bytes) else key
+        bot_id = key[len("trading_bot:"):-len(":metrics")]
+        snapshots[bot_id] = json.loads(value)
+    return snapshots
@@ -0,0 +1,322 @@
+# bot_app/services/replay.py
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.keys import Keys
+
+from bot_app.services.capture import read_capture
+from bot_app.services.clock import SimulatedClock
+from bot_app.services.dom_extraction import ASSET_LIST_SCRIPT, TEXTS_SCRIPT, parse_amount
+from bot_app.services.ingestion import INGESTION_MODE_POLL
+from bot_app.services.locators import LOCATORS
+from bot_app.services.pipeline import RUNTIME_MODE_SEQUENTIAL
+from bot_app.services.trading_logic import TradingBot
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_MODE_ICON = "/themes/cabinet/svg/icons/trading-panel/exp-mode-2.svg" # Mode d'expiration attendu par _set_trade_timeout
+
+
+class ReplayElement:
+    """
+    🧩 Élément d'interface simulé : les clics et saisies sont transmis au ReplayDriver.
+    """
+
+    def __init__(self, driver, name, asset=None):
+        self._driver = driver
+        self.name = name
+        self.asset = asset # Nom de l'actif pour un item du modal de sélection
+
+    @property
+    def text(self):
+        return self._driver._text(self.name) or ""
+
+    def click(self):
+        self._driver._on_click(self)
+
+    def send_keys(self, *values):
+        self._driver._on_keys(self.name, "".join(values))
+
+    def get_attribute(self, attribute):
+        return self._driver._attribute(self.name, attribute)
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def find_element(self, by, value):
+        return self._driver.find_element(by, value)
+
+
+class ReplayDriver:
+    """
+    📼 Driver WebDriver simulé pour le rejeu hors ligne, sans Selenium ni Chrome.
+
+    get_log('performance') sert les lots enregistrés dont l'heure de réception est passée sur
+    l'horloge simulée. L'interface PocketOption est réduite à son état (actif, rendement, montant,
+    expiration) : les saisies de montant et les clics CALL/PUT sont enregistrés. Une fois la capture
+    épuisée (plus la durée d'une bougie pour laisser fermer la dernière), on_exhausted() est appelé.
+    """
+
+    def __init__(self, batches, clock, asset, yield_percent=92, balance=1000.0, tail_ms=0, assets=None):
+        self.clock = clock
+        self.asset = asset
+        self.yield_percent = yield_percent
+        self.balance = balance
+        self.tail_ms = tail_ms
+        self.assets = assets if assets is not None else [{"name": asset, "yield_percent": yield_percent}]
+        self.orders = [] # {'time_ms', 'direction', 'amount'}
+        self.amount_changes = [] # {'time_ms', 'amount'}
+        self.calls = {} # Nombre d'appels par opération WebDriver simulée
+        self.served_batches = 0
+        self.served_entries = 0
+        self.on_exhausted = None
+        self.exhausted = False
+        self._batches = batches
+        self._next_batch = 0
+        self._names = {locator: name for name, locator in LOCATORS.items()}
+        self._fields = {"bet_amount_input": ""}
+        self._selected = set() # Champs dont le contenu est sélectionné (Ctrl+A)
+        self._auto_switch = False
+
+    # --- Flux WebSocket ---
+
+    def get_log(self, log_type):
+        self._count("get_log")
+        if log_type != "performance":
+            return []
+        now_ms = self.clock.time_ms()
+        entries = []
+        while self._next_batch < len(self._batches) and self._batches[self._next_batch]["t"] <= now_ms:
+            entries.extend(self._batches[self._next_batch]["entries"])
+            self._next_batch += 1
+            self.served_batches += 1
+        self.served_entries += len(entries)
+        if (not self.exhausted and self._next_batch == len(self._batches)
+                and now_ms >= self._batches[-1]["t"] + self.tail_ms):
+            self.exhausted = True
+            if self.on_exhausted is not None:
+                self.on_exhausted()
+        return entries
+
+    # --- Navigation et éléments ---
+
+    def get(self, url):
+        self._count("get")
+
+    def delete_all_cookies(self):
+        pass
+
+    def add_cookie(self, cookie):
+        pass
+
+    def maximize_window(self):
+        pass
+
+    def save_screenshot(self, filename):
+        return False
+
+    def quit(self):
+        self._count("quit")
+
+    def find_element(self, by, value):
+        self._count("find_element")
+        name = self._names.get((by, value))
+        if name is None:
+            raise NoSuchElementException(f"Élément inconnu du rejeu: {value}")
+        return ReplayElement(self, name)
+
+    def find_elements(self, by, value):
+        try:
+            return [self.find_element(by, value)]
+        except NoSuchElementException:
+            return []
+
+    def execute_script(self, script, *args):
+        self._count("execute_script")
+        if script == TEXTS_SCRIPT:
+            return {name: self._text(name) for name in args[0]}
+        if script == ASSET_LIST_SCRIPT:
+            return [{
+                "name": asset["name"],
+                "yield_text": f"+{asset['yield_percent']}%",
+                "available": asset.get("available", True),
+                "element": ReplayElement(self, "asset_item", asset=asset["name"]),
+            } for asset in self.assets]
+        if "document.readyState" in script:
+            return "complete"
+        return None
+
+    # --- État simulé de l'interface ---
+
+    def _count(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _text(self, name):
+        if name == "balance":
+            return f"${self.balance:,.2f}"
+        if name == "current_asset_label":
+            return self.asset
+        if name == "current_yield":
+            yield_percent = next((asset["yield_percent"] for asset in self.assets if asset["name"] == self.asset), self.yield_percent)
+            return f"+{yield_percent}%"
+        return self._fields.get(name)
+
+    def _attribute(self, name, attribute):
+        if name == "expiration_mode_icon" and attribute == "data-src":
+            return EXPIRY_MODE_ICON
+        if name == "auto_switch_label" and attribute == "class":
+            return "mdl-switch is-checked" if self._auto_switch else "mdl-switch"
+        if attribute == "value":
+            return self._fields.get(name)
+        return None
+
+    def _on_click(self, element):
+        self._count("click")
+        if element.name in ("call_button", "put_button"):
+            self.orders.append({
+                "time_ms": self.clock.time_ms(),
+                "direction": "call" if element.name == "call_button" else "put",
+                "amount": parse_amount(self._fields.get("bet_amount_input")),
+            })
+        elif element.name == "asset_item":
+            self.asset = element.asset
+        elif element.name == "auto_switch_thumb":
+            self._auto_switch = not self._auto_switch
+
+    def _on_keys(self, name, keys):
+        self._count("send_keys")
+        value = self._fields.get(name, "")
+        if keys == Keys.CONTROL + "a":
+            self._selected.add(name)
+            return
+        if keys in (Keys.ESCAPE, Keys.ENTER):
+            return
+        if keys == Keys.BACKSPACE:
+            value = "" if name in self._selected else value[:-1]
+        else:
+            value = keys if name in self._selected else value + keys
+        self._selected.discard(name)
+        self._fields[name] = value
+        if name == "bet_amount_input":
+            self.amount_changes.append({"time_ms": self.clock.time_ms(), "amount": parse_amount(value)})
+
+
+class ReplaySession:
+    """
+    ⏯️ Rejoue une capture de frames WebSocket à travers le vrai TradingBot (décodage, bougies,
+    indicateurs, logique de trading, Martingale, pré-armement), avec un ReplayDriver et une
+    horloge simulée : aussi vite que le CPU le permet (speed=None) ou en horloge accélérée.
+    Le runtime est forcé en mode séquentiel et l'ingestion en polling : le rejeu est déterministe.
+    """
+
+    def __init__(self, capture_path, config=None, speed=None, asset=None, yield_percent=92, balance=1000.0):
+        self.capture_path = capture_path
+        self.config = dict(config) if config else {}
+        self.speed = speed
+        self.asset = asset
+        self.yield_percent = yield_percent
+        self.balance = balance
+        self.bot = None
+        self.driver = None
+
+    def _resolve_asset(self, batches, currencies):
+        # Actif affiché : celui demandé, sinon celui de la devise active enregistrée dans la capture
+        if self.asset:
+            return self.asset
+        symbol = next((batch["symbol"] for batch in batches if batch.get("symbol")), None)
+        if symbol is None:
+            if not currencies:
+                raise ValueError("Capture sans devise active : précisez l'actif à rejouer.")
+            return next(iter(currencies))
+        return next((name for name, code in currencies.items() if code == symbol), symbol)
+
+    def run(self):
+        """
+        ▶️ Rejoue la capture jusqu'à son épuisement.
+        @returns {dict} - Rapport : ordres, trades, bougies, décodage, durées simulée et réelle.
+        """
+        batches = read_capture(self.capture_path)
+        if not batches:
+            raise ValueError(f"Capture vide: {self.capture_path}")
+        config = dict(self.config)
+        currencies = dict(config.get("CURRENCIES") or {})
+        asset = self._resolve_asset(batches, currencies)
+        currencies.setdefault(asset, asset)
+        config.update({
+            "CURRENCIES": currencies,
+            "RUNTIME_MODE": RUNTIME_MODE_SEQUENTIAL,
+            "INGESTION_MODE": INGESTION_MODE_POLL,
+            "HUMAN_TYPING": False,
+            "CAPTURE_PATH": None, # Ne pas ré-enregistrer ce qui est rejoué
+            "TICK_CAPTURE_DIR": None,
+        })
+        config.setdefault("BASE_URL", "https://pocketoption.com") # Jamais contacté : le ReplayDriver ne navigue pas
+        config.setdefault("MIN_YIELD_PERCENT", self.yield_percent)
+        config.setdefault("SPILL_DIR", None)
+
+        clock = SimulatedClock(batches[0]["t"], self.speed)
+        with tempfile.TemporaryDirectory() as workdir:
+            cookies_path = os.path.join(workdir, "cookies.json")
+            with open(cookies_path, "w") as cookies_file:
+                json.dump([], cookies_file)
+            self.bot = TradingBot(cookies_path=cookies_path, config=config, clock=clock, driver_factory=lambda: self.driver)
+            tail_ms = self.bot._get_candle_period_seconds() * 1000 + self.bot.candle_close_grace_ms
+            self.driver = ReplayDriver(batches, clock, asset, self.yield_percent, self.balance, tail_ms)
+            self.driver.on_exhausted = lambda: setattr(self.bot, "is_running", False)
+
+            logger.info("⏯️ Rejeu de %s (%s lots, actif %s, vitesse %s).", self.capture_path, len(batches), asset, self.speed or "max")
+            started = time.perf_counter()
+            self.bot.start()
+            wall_seconds = time.perf_counter() - started
+        return self._report(batches, clock, wall_seconds)
+
+    def _report(self, batches, clock, wall_seconds):
+        driver, bot = self.driver, self.bot
+        virtual_seconds = (clock.time_ms() - batches[0]["t"]) / 1000
+        return {
+            "capture": self.capture_path,
+            "batches": len(batches),
+            "entries": driver.served_entries,
+            "completed": driver.exhausted,
+            "virtual_seconds": round(virtual_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "speedup": round(virtual_seconds / wall_seconds, 1) if wall_seconds > 0 else None,
+            "entries_per_second": round(driver.served_entries / wall_seconds, 1) if wall_seconds > 0 else None,
+            "orders": driver.orders,
+            "amount_changes": len(driver.amount_changes),
+            "trades": bot.get_trade_history(len(bot.trade_history_log)),
+            "candles": len(bot.ohlc_store),
+            "frame_decoder": bot.frame_decoder.stats(),
+            "decision_latency": bot.decision_latency.summary(),
+            "boundary_to_click_latency": bot.boundary_to_click_latency.summary(),
+            "webdriver_calls": dict(driver.calls),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rejoue une capture de frames WebSocket à travers le TradingBot.")
+    parser.add_argument("capture", help="Fichier de capture (JSON Lines, CAPTURE_PATH)")
+    parser.add_argument("--config", help="Configuration du bot (JSON)")
+    parser.add_argument("--speed", type=float, default=None, help="Accélération de l'horloge (défaut : aussi vite que possible)")
+    parser.add_argument("--asset", default=None, help="Nom affiché de l'actif rejoué")
+    args = parser.parse_args(argv)
+    config = None
+    if args.config:
+        with open(args.config, "r") as config_file:
+            config = json.load(config_file)
+    logging.basicConfig(level=logging.WARNING)
+    report = ReplaySession(args.capture, config=config, speed=args.speed, asset=args.asset).run()
+    print(json.dumps(report, indent=1, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# bot_app/services/risk.py
+
+import numpy as np
+
+# Simulation Monte Carlo du capital sous la Martingale de TradingBot._apply_trade_logic :
+# la mise suit BET_SIZES, revient à BET_SIZES[0] après une victoire, et après len(BET_SIZES)
+# pertes consécutives (plafond) la série repart de BET_SIZES[0]. Les issues des ordres sont soit
+# tirées au hasard (taux de réussite), soit rééchantillonnées par blocs dans un historique réel
+# (les séries de pertes de l'historique sont conservées à l'intérieur des blocs).
+# Un chemin est ruiné dès que le capital ne couvre plus la mise suivante : il est gelé à ce point.
+
+MAX_SIMULATED_BETS = 20000000 # Plafond chemins x ordres (temps de réponse de l'API)
+CHUNK_BETS = 2000000 # Ordres simulés par bloc de chemins (mémoire bornée)
+MAX_BETS_PER_PATH = CHUNK_BETS # Un chemin n'est jamais découpé : sa longueur borne la taille d'un bloc
+DRAWDOWN_PERCENTILES = (50, 90, 95, 99)
+
+
+def _martingale_levels(wins):
+    # Rang de chaque ordre = pertes consécutives qui le précèdent (avant réduction modulo le plafond)
+    count = wins.shape[1]
+    positions = np.arange(count)
+    last_win = np.maximum.accumulate(np.where(wins, positions, -1), axis=1)
+    previous_win = np.empty_like(last_win)
+    previous_win[:, 0] = -1
+    previous_win[:, 1:] = last_win[:, :-1]
+    return positions - previous_win - 1
+
+
+def bootstrap_outcomes(history, paths, bets, block_size=10, rng=None):
+    """
+    🔁 Rééchantillonnage par blocs circulaires d'un historique d'issues (victoire/perte).
+    @param {numpy.ndarray} history - Issues observées (bool, True = victoire), dans l'ordre chronologique.
+    @param {int} paths - Nombre de chemins.
+    @param {int} bets - Ordres par chemin.
+    @param {int} block_size - Longueur des blocs (conserve les séries de pertes de l'historique).
+    @param {numpy.random.Generator} rng - Générateur aléatoire.
+    @returns {numpy.ndarray} - Matrice bool (paths, bets).
+    """
+    history = np.asarray(history, dtype=bool)
+    if len(history) == 0:
+        raise ValueError("Historique d'issues vide : impossible de rééchantillonner.")
+    rng = rng or np.random.default_rng()
+    block_size = max(1, min(int(block_size), len(history)))
+    blocks = -(-bets // block_size)
+    starts = rng.integers(0, len(history), size=(paths, blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)) % len(history)
+    return history[indices.reshape(paths, -1)[:, :bets]]
+
+
+def _simulate_chunk(wins, tiers, payout, bankroll):
+    max_level = len(tiers)
+    previous_losses = _martingale_levels(wins)
+    level = previous_losses % max_level
+    stake = tiers[level]
+    pnl = np.where(wins, stake * payout, -stake)
+    equity = bankroll + np.cumsum(pnl, axis=1)
+    equity_before = np.empty_like(equity)
+    equity_before[:, 0] = bankroll
+    equity_before[:, 1:] = equity[:, :-1]
+
+    # Ruine : premier ordre que le capital ne couvre plus ; le chemin est gelé à ce point
+    uncovered = equity_before < stake
+    ruined = uncovered.any(axis=1)
+    ruin_index = np.where(ruined, uncovered.argmax(axis=1), wins.shape[1])
+    alive = np.arange(wins.shape[1]) < ruin_index[:, None]
+    equity = np.where(alive, equity, equity_before[np.arange(len(wins)), np.minimum(ruin_index, wins.shape[1] - 1)][:, None])
+
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), bankroll)
+    drawdown = (peak - equity).max(axis=1)
+    busts = np.count_nonzero(~wins & (level == max_level - 1) & alive, axis=1)
+    return equity[:, -1], drawdown, ruined, ruin_index, busts
+
+
+def simulate_bankroll(bet_sizes=(1, 2, 5), payout=0.92, win_rate=0.5, bankroll=100.0, paths=10000, bets=500,
+                      outcomes=None, block_size=10, seed=None):
+    """
+    🎲 Monte Carlo du capital sous la Martingale : distribution du drawdown, probabilité de ruine, PnL espéré.
+    @param {list} bet_sizes - BET_SIZES.
+    @param {float} payout - Gain net par unité misée en cas de victoire (rendement, ex : 0.92).
+    @param {float} win_rate - Probabilité de victoire d'un ordre (ignorée si outcomes est fourni).
+    @param {float} bankroll - Capital initial.
+    @param {int} paths - Nombre de chemins simulés.
+    @param {int} bets - Ordres par chemin.
+    @param {list|None} outcomes - Historique d'issues (bool) à rééchantillonner par blocs.
+    @param {int} block_size - Longueur des blocs de rééchantillonnage.
+    @param {int|None} seed - Graine (résultat reproductible).
+    @returns {dict} - Synthèse sérialisable en JSON.
+    @throws {ValueError} - Si les paramètres sont invalides.
+    """
+    tiers = np.asarray(bet_sizes, dtype=np.float64)
+    paths, bets = int(paths), int(bets)
+    if tiers.ndim != 1 or len(tiers) == 0 or (tiers <= 0).any():
+        raise ValueError("BET_SIZES doit être une liste non vide de mises positives.")
+    if paths <= 0 or bets <= 0 or paths * bets > MAX_SIMULATED_BETS:
+        raise ValueError(f"paths x bets doit être compris entre 1 et {MAX_SIMULATED_BETS}.")
+    if bets > MAX_BETS_PER_PATH:
+        raise ValueError(f"bets ne peut pas dépasser {MAX_BETS_PER_PATH} ordres par chemin.")
+    if payout <= 0 or bankroll <= 0:
+        raise ValueError("payout et bankroll doivent être positifs.")
+    if outcomes is None and not 0 <= win_rate <= 1:
+        raise ValueError("win_rate doit être compris entre 0 et 1.")
+
+    rng = np.random.default_rng(seed)
+    history = None if outcomes is None else np.asarray(outcomes, dtype=bool)
+    chunk_paths = max(1, CHUNK_BETS // bets)
+    results = []
+    for first in range(0, paths, chunk_paths):
+        count = min(chunk_paths, paths - first)
+        if history is None:
+            wins = rng.random((count, bets)) < win_rate
+        else:
+            wins = bootstrap_outcomes(history, count, bets, block_size, rng)
+        results.append(_simulate_chunk(wins, tiers, payout, bankroll))
+    final, drawdown, ruined, ruin_index, busts = (np.concatenate(parts) for parts in zip(*results))
+
+    pnl = final - bankroll
+    effective_win_rate = float(history.mean()) if history is not None else float(win_rate)
+    # Série complète perdue : probabilité d'atteindre le plafond depuis BET_SIZES[0] (issues indépendantes)
+    bust_probability = (1 - effective_win_rate) ** len(tiers)
+    return {
+        "paths": paths,
+        "bets": bets,
+        "source": "bootstrap" if history is not None else "synthetic",
+        "win_rate": round(effective_win_rate, 4),
+        "payout": payout,
+        "bankroll": bankroll,
+        "bet_sizes": tiers.tolist(),
+        "ruin_probability": round(float(ruined.mean()), 6),
+        "median_bets_to_ruin": int(np.median(ruin_index[ruined])) if ruined.any() else None,
+        "expected_pnl": round(float(pnl.mean()), 4),
+        "pnl_percentiles": {str(q): round(float(v), 4) for q, v in zip((5, 50, 95), np.percentile(pnl, (5, 50, 95)))},
+        "drawdown_percentiles": {str(q): round(float(v), 4) for q, v in zip(DRAWDOWN_PERCENTILES, np.percentile(drawdown, DRAWDOWN_PERCENTILES))},
+        "max_drawdown": round(float(drawdown.max()), 4),
+        "mean_busts": round(float(busts.mean()), 4),
+        "bust_probability_per_series": round(bust_probability, 6),
+        "ladder_exposure": float(tiers.sum()), # Perte d'une série complète
+    }
@@ -0,0 +1,275 @@
+# bot_app/services/stores.py
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+from itertools import islice
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from bot_app.services.candles import GAP_CANDLE_COLOR
+
+logger = logging.getLogger(__name__)
+
+# Couleurs stockées en int8 dans le CandleStore
+CANDLE_COLOR_CODES = {"green": 1, "red": -1, GAP_CANDLE_COLOR: 0}
+CANDLE_COLORS_BY_CODE = {code: color for color, code in CANDLE_COLOR_CODES.items()}
+
+
+class SpillWriter:
+    """
+    💾 Déversement append-only (JSON Lines) des enregistrements évincés des stores en mémoire.
+    Le fichier n'est ouvert qu'à la première écriture ; sans répertoire configuré, rien n'est écrit.
+    Rétention bornée : au-delà de `max_bytes`, le fichier tourne (name.1.jsonl, name.2.jsonl...) et
+    seules `backups` anciennes versions sont gardées, soit au plus (backups + 1) * max_bytes sur disque.
+    """
+
+    def __init__(self, spill_dir, name, max_bytes=50 * 1024 * 1024, backups=1):
+        self.path = os.path.join(spill_dir, f"{name}.jsonl") if spill_dir else None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.spilled = 0
+        self.rotations = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def write(self, record):
+        """
+        ✍️ Ajoute un enregistrement (dict sérialisable en JSON) au fichier de déversement.
+        @param {dict} record - L'enregistrement.
+        """
+        if self.path is None:
+            return
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                if self.max_bytes and self._file.tell() and self._file.tell() + len(line) > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+                self.spilled += 1
+            except OSError as e:
+                logger.error("❌ Déversement impossible vers %s: %s", self.path, e)
+
+    def _backup_path(self, index):
+        return f"{self.path[:-len('.jsonl')]}.{index}.jsonl"
+
+    def _rotate(self):
+        # name.jsonl -> name.1.jsonl -> ... -> name.<backups>.jsonl ; la plus ancienne version est supprimée
+        self._file.close()
+        self._file = None
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                if os.path.exists(self._backup_path(index)):
+                    os.replace(self._backup_path(index), self._backup_path(index + 1))
+            os.replace(self.path, self._backup_path(1))
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.rotations += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CandleStore:
+    """
+    🕯️ Historique borné des bougies fermées, en tableaux numpy circulaires (une colonne par champ).
+    L'ajout est en O(1) ; la lecture des n dernières bougies est en O(n). La bougie la plus ancienne
+    est déversée (SpillWriter) quand la capacité est atteinte.
+    """
+
+    def __init__(self, capacity=500, spill=None, timezone=pytz.utc):
+        if capacity <= 0:
+            raise ValueError("La capacité du CandleStore doit être positive.")
+        self.capacity = capacity
+        self.spill = spill
+        self.timezone = timezone
+        self.symbol = None
+        self._start_ms = np.zeros(capacity, dtype=np.int64)
+        self._open = np.zeros(capacity, dtype=np.float64)
+        self._high = np.zeros(capacity, dtype=np.float64)
+        self._low = np.zeros(capacity, dtype=np.float64)
+        self._close = np.zeros(capacity, dtype=np.float64)
+        self._color = np.zeros(capacity, dtype=np.int8)
+        self._ticks = np.zeros(capacity, dtype=np.int32)
+        self._next = 0 # Prochaine position d'écriture
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def empty(self):
+        return self._count == 0
+
+    def clear(self, symbol=None):
+        """
+        🧹 Vide le store (sans déversement : les bougies restent dans le registre multi-devises).
+        @param {str} symbol - Optionnel, symbole des bougies à venir.
+        """
+        self.symbol = symbol
+        self._next = 0
+        self._count = 0
+
+    def append(self, candle, color):
+        """
+        ➕ Ajoute une bougie fermée.
+        @param {Candle} candle - La bougie.
+        @param {str} color - "green", "red" ou "gray" (bougie gap).
+        """
+        i = self._next
+        if self._count == self.capacity and self.spill is not None:
+            self.spill.write(self._record(i))
+        self._start_ms[i] = candle.start_ms
+        self._open[i] = candle.open
+        self._high[i] = candle.high
+        self._low[i] = candle.low
+        self._close[i] = candle.close
+        self._color[i] = CANDLE_COLOR_CODES[color]
+        self._ticks[i] = candle.ticks
+        self._next = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _indices(self, last_n):
+        n = self._count if last_n is None else max(0, min(last_n, self._count))
+        return (np.arange(self._next - n, self._next)) % self.capacity
+
+    def _record(self, i):
+        return {
+            "symbol": self.symbol,
+            "Open": float(self._open[i]), "High": float(self._high[i]),
+            "Low": float(self._low[i]), "Close": float(self._close[i]),
+            "Color": CANDLE_COLORS_BY_CODE[int(self._color[i])],
+            "Timestamp": datetime.fromtimestamp(self._start_ms[i] / 1000, self.timezone), # Heure d'ouverture
+            "ticks": int(self._ticks[i]),
+        }
+
+    def last(self, last_n=None):
+        """
+        📋 Les n dernières bougies, de la plus ancienne à la plus récente, en O(n).
+        @param {int|None} last_n - Nombre de bougies (None = toutes).
+        @returns {list} - Dicts Open/High/Low/Close/Color/Timestamp.
+        """
+        records = []
+        for i in self._indices(last_n):
+            record = self._record(i)
+            del record["symbol"], record["ticks"]
+            records.append(record)
+        return records
+
+    def recent_colors(self, count, exclude_gaps=True):
+        """
+        🎨 Couleurs des `count` dernières bougies (bougies gap exclues par défaut), en O(count) amorti.
+        @param {int} count - Nombre de couleurs voulues.
+        @param {bool} exclude_gaps - Ignorer les bougies sans tick.
+        @returns {list} - Les couleurs, de la plus ancienne à la plus récente.
+        """
+        colors = []
+        for offset in range(1, self._count + 1):
+            if len(colors) >= count:
+                break
+            code = int(self._color[(self._next - offset) % self.capacity])
+            if exclude_gaps and code == 0:
+                continue
+            colors.append(CANDLE_COLORS_BY_CODE[code])
+        colors.reverse()
+        return colors
+
+
+class TradeRecord:
+    """
+    📜 Trade clôturé (résultat déduit de la couleur de la bougie suivante).
+    """
+    __slots__ = ("timestamp_ms", "traded_color", "amount", "outcome_candle_color", "result", "boundary_to_click_ms")
+
+    def __init__(self, timestamp_ms, traded_color, amount, outcome_candle_color, result, boundary_to_click_ms=None):
+        self.timestamp_ms = timestamp_ms
+        self.traded_color = traded_color
+        self.amount = amount
+        self.outcome_candle_color = outcome_candle_color
+        self.result = result
+        self.boundary_to_click_ms = boundary_to_click_ms
+
+    def to_dict(self, timezone=pytz.utc):
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp_ms / 1000, timezone),
+            "traded_color": self.traded_color,
+            "amount": self.amount,
+            "outcome_candle_color": self.outcome_candle_color,
+            "result": self.result,
+            "boundary_to_click_ms": self.boundary_to_click_ms,
+        }
+
+
+class ActionRecord:
+    """
+    🖱️ Ordre envoyé à l'interface.
+    """
+    __slots__ = ("timestamp_ms", "direction", "amount", "boundary_to_click_ms")
+
+    def __init__(self, timestamp_ms, direction, amount, boundary_to_click_ms=None):
+        self.timestamp_ms = timestamp_ms
+        self.direction = direction
+        self.amount = amount
+        self.boundary_to_click_ms = boundary_to_click_ms
+
+    def to_dict(self, timezone=pytz.utc):
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp_ms / 1000, timezone),
+            "direction": self.direction,
+            "amount": self.amount,
+            "boundary_to_click_ms": self.boundary_to_click_ms,
+        }
+
+
+class RecordStore:
+    """
+    🗃️ Historique borné d'enregistrements à __slots__ (trades, actions). Au-delà de la capacité,
+    le plus ancien est déversé (SpillWriter) puis oublié. Lecture des n derniers en O(n).
+    """
+
+    def __init__(self, capacity=1000, spill=None, timezone=pytz.utc):
+        self.capacity = capacity
+        self.spill = spill
+        self.timezone = timezone
+        self._records = deque()
+
+    def __len__(self):
+        return len(self._records)
+
+    def append(self, record):
+        """
+        ➕ Ajoute un enregistrement, en déversant le plus ancien si le store est plein.
+        @param {TradeRecord|ActionRecord} record - L'enregistrement.
+        """
+        if len(self._records) >= self.capacity:
+            evicted = self._records.popleft()
+            if self.spill is not None:
+                self.spill.write(evicted.to_dict(self.timezone))
+        self._records.append(record)
+
+    def last(self, last_n=20):
+        """
+        📋 Les n derniers enregistrements (du plus ancien au plus récent), en O(n).
+        @param {int} last_n - Nombre d'enregistrements.
+        @returns {list} - Les enregistrements sous forme de dicts.
+        """
+        latest = [record.to_dict(self.timezone) for record in islice(reversed(self._records), max(0, last_n))]
+        latest.reverse()
+        return latest
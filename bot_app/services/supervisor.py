@@ -0,0 +1,595 @@
+# bot_app/services/supervisor.py
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from bot_app.services.control import COMMAND_STOP, send_control_command
+from bot_app.services.publisher import get_redis_client, redis
+from bot_app.services.trading_logic import TradingBot
+
+logger = logging.getLogger(__name__)
+
+# Superviseur multi-bots : un processus superviseur par nœud (hôte ou conteneur), chaque bot dans son propre
+# processus (son Chrome local ou une session du Selenium Grid). Aucun ordonnanceur central : tout passe par Redis.
+#   trading_bot:registry            HASH bot_id -> spécification {bot_id, cookies_path, config, node?, desired}
+#   trading_bot:node:<node_id>      nœud vivant {capacity, running, executor...}, expire sans battement de cœur
+#   trading_bot:<bot_id>:lease      propriétaire du bot (node_id), posé en SET NX, renouvelé par le nœud
+#   trading_bot:<bot_id>:heartbeat  battement de cœur écrit par le processus du bot lui-même
+# À chaque cycle, chaque nœud calcule le même placement (bots sans bail -> nœud le moins chargé) et ne
+# réclame que les bots qui lui reviennent ; le SET NX du bail départage les vues légèrement décalées.
+# Un nœud qui disparaît laisse expirer ses baux : ses bots sont replacés sur les nœuds restants.
+
+REGISTRY_KEY = "trading_bot:registry"
+NODE_KEY = "trading_bot:node:{node_id}"
+NODE_KEY_PATTERN = "trading_bot:node:*"
+LEASE_KEY = "trading_bot:{bot_id}:lease"
+HEARTBEAT_KEY = "trading_bot:{bot_id}:heartbeat"
+DESIRED_RUNNING = "running"
+DESIRED_STOPPED = "stopped"
+NODE_TTL_SECONDS = 15
+LEASE_TTL_SECONDS = 15
+HEARTBEAT_SECONDS = 5
+HEARTBEAT_TTL_SECONDS = 20 # Processus vivant sans battement au-delà : bot figé, redémarré
+STOP_GRACE_SECONDS = 30 # Délai laissé au bot pour fermer son driver avant SIGKILL
+MAX_RESTART_BACKOFF_SECONDS = 60
+BOT_ID_PATTERN = re.compile(r"[A-Za-z0-9_.-]+") # bot_id sert de nom de répertoire (SPILL_DIR/<bot_id>) et de clé Redis
+CLAIMS_PER_CYCLE = 2 # Bots réclamés par cycle : les nœuds qui démarrent ensemble se répartissent la flotte
+
+# Renouvellement / libération du bail uniquement par son propriétaire (atomique côté Redis)
+_RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _require_client(redis_url):
+    client = get_redis_client(redis_url)
+    if client is None:
+        raise ValueError("Redis n'est pas configuré (REDIS_URL).")
+    return client
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def register_bot(redis_url, bot_id, cookies_path="Trading_cookies.json", config=None, node=None, desired=DESIRED_RUNNING):
+    """
+    📝 Ajoute ou remplace un bot dans le registre ; un superviseur le démarre au cycle suivant.
+    La spécification s'applique au (re)démarrage ; en cours d'exécution, passer par le canal de contrôle.
+    @param {str} redis_url - URL Redis.
+    @param {str} bot_id - Identifiant du bot (BOT_ID : clés Redis et canal de contrôle).
+    @param {str} cookies_path - Fichier de cookies du compte.
+    @param {dict|None} config - Surcharges de la configuration par défaut (BOT_ID et REDIS_URL imposés).
+    @param {str|None} node - Nœud imposé (sinon placement selon la charge).
+    @param {str} desired - "running" ou "stopped".
+    @returns {dict} - La spécification enregistrée.
+    @throws {ValueError} - Paramètres invalides ou Redis non configuré.
+    """
+    validate_bot_id(bot_id)
+    if config is not None and not isinstance(config, dict):
+        raise ValueError("config doit être un objet.")
+    if desired not in (DESIRED_RUNNING, DESIRED_STOPPED):
+        raise ValueError(f"État souhaité inconnu: {desired!r}")
+    spec = {
+        "bot_id": bot_id,
+        "cookies_path": cookies_path,
+        "config": config or {},
+        "node": node,
+        "desired": desired,
+        "updated_at": time.time(),
+    }
+    _require_client(redis_url).hset(REGISTRY_KEY, bot_id, json.dumps(spec))
+    return spec
+
+
+def set_desired_state(redis_url, bot_id, desired):
+    """
+    🎚️ Change l'état souhaité d'un bot enregistré (le superviseur propriétaire l'applique).
+    @param {str} redis_url - URL Redis.
+    @param {str} bot_id - Identifiant du bot.
+    @param {str} desired - "running" ou "stopped".
+    @returns {dict|None} - La spécification mise à jour, None si le bot n'est pas enregistré.
+    @throws {ValueError} - État inconnu ou Redis non configuré.
+    """
+    if desired not in (DESIRED_RUNNING, DESIRED_STOPPED):
+        raise ValueError(f"État souhaité inconnu: {desired!r}")
+    client = _require_client(redis_url)
+    value = client.hget(REGISTRY_KEY, bot_id)
+    if value is None:
+        return None
+    spec = dict(json.loads(value), desired=desired, updated_at=time.time())
+    client.hset(REGISTRY_KEY, bot_id, json.dumps(spec))
+    return spec
+
+
+def unregister_bot(redis_url, bot_id):
+    """
+    🗑️ Retire un bot du registre (arrêté par son superviseur au cycle suivant).
+    @param {str} redis_url - URL Redis.
+    @param {str} bot_id - Identifiant du bot.
+    @returns {bool} - True si le bot était enregistré.
+    """
+    return bool(_require_client(redis_url).hdel(REGISTRY_KEY, bot_id))
+
+
+def load_registry(client):
+    """
+    📚 Spécifications de tous les bots enregistrés.
+    @param {redis.Redis} client - Client Redis.
+    @returns {dict} - bot_id -> spécification.
+    """
+    return {_decode(bot_id): json.loads(value) for bot_id, value in client.hgetall(REGISTRY_KEY).items()}
+
+
+def live_nodes(client):
+    """
+    🖥️ Nœuds dont le battement de cœur n'a pas expiré.
+    @param {redis.Redis} client - Client Redis.
+    @returns {list} - Les nœuds (dicts), triés par node_id.
+    """
+    keys = sorted(client.scan_iter(match=NODE_KEY_PATTERN, count=100))
+    return [json.loads(value) for value in (client.mget(keys) if keys else []) if value is not None]
+
+
+def plan_placement(pending, nodes):
+    """
+    🧭 Placement des bots sans propriétaire : chacun va au nœud le moins chargé (bots / capacité) ayant
+    une place libre, en tenant compte des placements précédents. Déterministe : tous les nœuds
+    calculent le même plan à partir du même registre.
+    @param {list} pending - Spécifications des bots à placer.
+    @param {list} nodes - Nœuds vivants ({'node_id', 'capacity', 'running'}).
+    @returns {dict} - bot_id -> node_id (les bots sans place sont absents).
+    """
+    load = {node["node_id"]: [len(node.get("running", [])), node.get("capacity", 0)] for node in nodes}
+    placement = {}
+    for spec in sorted(pending, key=lambda spec: spec["bot_id"]):
+        candidates = [node_id for node_id, (running, capacity) in load.items()
+                      if running < capacity and spec.get("node") in (None, node_id)]
+        if not candidates:
+            continue
+        target = min(candidates, key=lambda node_id: (load[node_id][0] / load[node_id][1], node_id))
+        placement[spec["bot_id"]] = target
+        load[target][0] += 1
+    return placement
+
+
+def grid_free_slots(executor, timeout=2):
+    """
+    🌐 Sessions libres du Selenium Grid (endpoint /status du hub).
+    @param {str} executor - SELENIUM_COMMAND_EXECUTOR (ex : "http://selenium-hub:4444/wd/hub").
+    @param {float} timeout - Délai maximal de la requête.
+    @returns {int|None} - Nombre de slots libres, None si le hub ne répond pas.
+    """
+    parts = urlsplit(executor)
+    try:
+        with urllib.request.urlopen(f"{parts.scheme}://{parts.netloc}/status", timeout=timeout) as response:
+            payload = json.load(response)
+    except (OSError, ValueError) as e:
+        logger.debug("Statut du Selenium Grid indisponible: %s", e)
+        return None
+    nodes = payload.get("value", {}).get("nodes", [])
+    return sum(1 for node in nodes if node.get("availability", "UP") == "UP"
+               for slot in node.get("slots", []) if not slot.get("session"))
+
+
+def fleet_status(redis_url):
+    """
+    📋 État de la flotte : bots enregistrés (propriétaire, battement de cœur) et nœuds vivants.
+    @param {str} redis_url - URL Redis.
+    @returns {dict} - {'bots': [...], 'nodes': [...]}.
+    @throws {redis.RedisError} - Si Redis est injoignable.
+    """
+    client = _require_client(redis_url)
+    specs = load_registry(client)
+    bot_ids = sorted(specs)
+    leases = client.mget([LEASE_KEY.format(bot_id=bot_id) for bot_id in bot_ids]) if bot_ids else []
+    heartbeats = client.mget([HEARTBEAT_KEY.format(bot_id=bot_id) for bot_id in bot_ids]) if bot_ids else []
+    bots = []
+    for bot_id, lease, heartbeat in zip(bot_ids, leases, heartbeats):
+        heartbeat = json.loads(heartbeat) if heartbeat is not None else None
+        if lease is None:
+            state = "pending" if specs[bot_id]["desired"] == DESIRED_RUNNING else "stopped"
+        else:
+            state = "running" if heartbeat is not None else "starting"
+        bots.append(dict(specs[bot_id], state=state, owner=_decode(lease), heartbeat=heartbeat))
+    return {"bots": bots, "nodes": live_nodes(client)}
+
+
+class BotHeartbeat:
+    """
+    💓 Thread du processus d'un bot : écrit son battement de cœur et arrête le bot si son superviseur
+    a disparu ou si le bail appartient à un autre nœud (jamais deux instances du même bot).
+    """
+
+    def __init__(self, redis_url, bot, node_id, restarts=0, interval_seconds=HEARTBEAT_SECONDS):
+        self.redis_url = redis_url
+        self.bot = bot
+        self.bot_id = bot.config["BOT_ID"]
+        self.node_id = node_id
+        self.restarts = restarts
+        self.interval_seconds = interval_seconds
+        self.parent_pid = os.getppid()
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="bot-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+    def beat(self):
+        """
+        💓 Écrit un battement de cœur après avoir vérifié le superviseur et le bail.
+        @returns {bool} - False si le bot doit s'arrêter.
+        """
+        if os.getppid() != self.parent_pid:
+            logger.error("💀 Superviseur disparu : arrêt du bot %s.", self.bot_id)
+            return False
+        client = get_redis_client(self.redis_url)
+        owner = _decode(client.get(LEASE_KEY.format(bot_id=self.bot_id)))
+        if owner is not None and owner != self.node_id:
+            logger.error("💀 Bail du bot %s repris par %s : arrêt de cette instance.", self.bot_id, owner)
+            return False
+        heartbeat = {
+            "node_id": self.node_id,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "restarts": self.restarts,
+            "at": time.time(),
+            "is_running": self.bot.is_running,
+            "is_paused": self.bot.is_paused,
+            "ticks": self.bot.hot_metrics.counters.get("ticks", 0),
+        }
+        client.set(HEARTBEAT_KEY.format(bot_id=self.bot_id), json.dumps(heartbeat), ex=HEARTBEAT_TTL_SECONDS)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.beat():
+                    self.bot.stop_requested = True
+                    self.bot.is_running = False
+                    return
+            except redis.RedisError as e:
+                logger.warning("⚠️ Battement de cœur du bot %s non publié: %s", self.bot_id, e)
+            self._stop.wait(self.interval_seconds)
+
+
+BOT_DIR_KEYS = ("SPILL_DIR", "TICK_CAPTURE_DIR") # Répertoires d'écriture propres à chaque bot
+
+
+def validate_bot_id(bot_id):
+    """
+    🪪 Vérifie un identifiant de bot : un seul composant de chemin, sans séparateur ni « .. ».
+    @param {str} bot_id - Identifiant du bot.
+    @returns {str} - L'identifiant.
+    @throws {ValueError} - Identifiant invalide (ex : "/tmp/evil", "../../x").
+    """
+    if not isinstance(bot_id, str) or not BOT_ID_PATTERN.fullmatch(bot_id) or bot_id == "." or ".." in bot_id:
+        raise ValueError(f"bot_id invalide: {bot_id!r} (lettres, chiffres, '_', '.' et '-' uniquement, sans '..').")
+    return bot_id
+
+
+def bot_process_config(spec, redis_url, executor=None):
+    """
+    🧾 Configuration d'un bot supervisé : configuration par défaut, surchargée par celle de la spécification.
+    Les répertoires par défaut (déversement, segments de ticks) sont séparés par BOT_ID : plusieurs bots
+    d'un même nœud n'écrivent jamais dans les mêmes fichiers. Une valeur de la spécification est gardée telle quelle.
+    @param {dict} spec - Spécification du registre.
+    @param {str} redis_url - URL Redis.
+    @param {str|None} executor - Selenium Grid du nœud (si la configuration du bot n'en impose pas).
+    @returns {dict} - La configuration du bot.
+    @throws {ValueError} - bot_id invalide (il ne doit jamais sortir des répertoires par défaut).
+    """
+    bot_id = validate_bot_id(spec["bot_id"])
+    spec_config = spec.get("config", {})
+    config = dict(TradingBot._load_default_config(), **spec_config)
+    for key in BOT_DIR_KEYS:
+        if key not in spec_config and config.get(key):
+            config[key] = os.path.join(config[key], bot_id)
+    config["BOT_ID"] = bot_id
+    config["REDIS_URL"] = redis_url
+    if executor and not config.get("SELENIUM_COMMAND_EXECUTOR"):
+        config["SELENIUM_COMMAND_EXECUTOR"] = executor
+    return config
+
+
+def run_bot_process(spec, redis_url, node_id, executor=None, restarts=0):
+    """
+    🤖 Point d'entrée du processus d'un bot (lancé par le superviseur). Code de sortie 0 : arrêt demandé ;
+    sinon crash (redémarrage par le superviseur).
+    @param {dict} spec - Spécification du registre.
+    @param {str} redis_url - URL Redis.
+    @param {str} node_id - Nœud propriétaire.
+    @param {str|None} executor - Selenium Grid du nœud (si la configuration du bot n'en impose pas).
+    @param {int} restarts - Nombre de redémarrages précédents.
+    """
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [{spec['bot_id']}] %(levelname)s %(name)s: %(message)s")
+    config = bot_process_config(spec, redis_url, executor)
+    bot = TradingBot(cookies_path=spec.get("cookies_path", "Trading_cookies.json"), config=config)
+
+    def request_stop(signum, frame): # SIGTERM du superviseur : la boucle s'arrête et stop() ferme le driver
+        bot.stop_requested = True
+        bot.is_running = False
+    signal.signal(signal.SIGTERM, request_stop)
+
+    heartbeat = BotHeartbeat(redis_url, bot, node_id, restarts)
+    heartbeat.start()
+    try:
+        if not bot.stop_requested:
+            bot.start()
+    finally:
+        heartbeat.stop()
+    sys.exit(0 if bot.stop_requested else 1)
+
+
+class _BotChild:
+    def __init__(self, spec, process, restarts):
+        self.spec = spec
+        self.process = process
+        self.restarts = restarts
+        self.started_at = time.monotonic()
+        self.stopping_since = None # Arrêt demandé : pas de redémarrage
+        self.terminated_at = None # SIGTERM envoyé (arrêt ou bot figé)
+
+
+class BotSupervisor:
+    """
+    🧑‍✈️ Superviseur d'un nœud : publie sa charge, réclame les bots qui lui reviennent, les exécute dans
+    des processus séparés, renouvelle leurs baux et redémarre ceux qui crashent (back-off exponentiel).
+    """
+
+    def __init__(self, redis_url, node_id=None, capacity=None, executor=None, reconcile_seconds=2.0,
+                 claims_per_cycle=CLAIMS_PER_CYCLE):
+        self.redis_url = redis_url
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.capacity = max(1, int(capacity or os.cpu_count() or 1))
+        self.executor = executor
+        self.reconcile_seconds = reconcile_seconds
+        self.claims_per_cycle = claims_per_cycle
+        self.children = {} # bot_id -> _BotChild
+        self.restart_queue = {} # bot_id -> (restarts, monotonic de redémarrage)
+        self.last_renewed_at = time.monotonic()
+        self._context = multiprocessing.get_context("spawn") # Pas de fork d'un processus avec threads et sockets Redis
+        self._stop = threading.Event()
+
+    @property
+    def client(self):
+        return _require_client(self.redis_url)
+
+    def effective_capacity(self):
+        """
+        📏 Capacité annoncée : bornée par les sessions libres du Selenium Grid s'il est utilisé.
+        @returns {int}
+        """
+        if not self.executor:
+            return self.capacity
+        free_slots = grid_free_slots(self.executor)
+        if free_slots is None:
+            return self.capacity
+        return min(self.capacity, len(self.children) + free_slots)
+
+    def publish_node(self):
+        node = {
+            "node_id": self.node_id,
+            "hostname": socket.gethostname(),
+            "pid": os.getpid(),
+            "capacity": self.effective_capacity(),
+            "running": sorted(self.children),
+            "executor": self.executor,
+            "heartbeat_at": time.time(),
+        }
+        self.client.set(NODE_KEY.format(node_id=self.node_id), json.dumps(node), ex=NODE_TTL_SECONDS)
+        return node
+
+    def reconcile(self):
+        """
+        🔁 Un cycle : battement du nœud, suivi des processus locaux, renouvellement des baux, placement.
+        """
+        client = self.client
+        self.publish_node()
+        registry = load_registry(client)
+        self._watch_children(registry)
+        self._renew_leases()
+        self._start_due_restarts(registry)
+        self._claim_pending(client, registry)
+
+    def _wanted(self, registry, bot_id):
+        spec = registry.get(bot_id)
+        return spec is not None and spec["desired"] == DESIRED_RUNNING
+
+    def _watch_children(self, registry):
+        now = time.monotonic()
+        for bot_id, child in list(self.children.items()):
+            if not child.process.is_alive():
+                del self.children[bot_id]
+                self._on_child_exit(registry, bot_id, child)
+                continue
+            if child.stopping_since is None and not self._wanted(registry, bot_id):
+                self._request_stop(bot_id, child)
+            elif child.stopping_since is None and child.terminated_at is None and now - child.started_at > HEARTBEAT_TTL_SECONDS \
+                    and self.client.exists(HEARTBEAT_KEY.format(bot_id=bot_id)) == 0:
+                logger.error("🥶 Bot %s sans battement de cœur depuis %s s : redémarrage.", bot_id, HEARTBEAT_TTL_SECONDS)
+                child.terminated_at = now
+                child.process.terminate()
+            if child.stopping_since is not None and child.terminated_at is None and now - child.stopping_since > STOP_GRACE_SECONDS:
+                child.terminated_at = now
+                child.process.terminate()
+            if child.terminated_at is not None and now - child.terminated_at > STOP_GRACE_SECONDS:
+                logger.error("🔪 Bot %s ne répond pas à SIGTERM : SIGKILL.", bot_id)
+                child.process.kill()
+
+    def _on_child_exit(self, registry, bot_id, child):
+        exitcode = child.process.exitcode
+        child.process.join()
+        if child.stopping_since is not None or not self._wanted(registry, bot_id):
+            logger.info("⏹️ Bot %s arrêté (code %s).", bot_id, exitcode)
+            self._release(bot_id)
+        elif exitcode == 0 and child.terminated_at is None: # Commande stop reçue sur le canal de contrôle
+            logger.info("⏹️ Bot %s arrêté sur commande : état souhaité -> stopped.", bot_id)
+            set_desired_state(self.redis_url, bot_id, DESIRED_STOPPED)
+            self._release(bot_id)
+        else:
+            restarts = child.restarts + 1
+            delay = min(2 ** (restarts - 1), MAX_RESTART_BACKOFF_SECONDS)
+            if time.monotonic() - child.started_at > MAX_RESTART_BACKOFF_SECONDS * 5: # Crash après une longue exécution
+                delay = 1
+            logger.error("💥 Bot %s terminé (code %s) : redémarrage n°%s dans %s s.", bot_id, exitcode, restarts, delay)
+            self.restart_queue[bot_id] = (restarts, time.monotonic() + delay) # Bail conservé pendant l'attente
+
+    def _request_stop(self, bot_id, child):
+        logger.info("🛑 Arrêt du bot %s demandé.", bot_id)
+        child.stopping_since = time.monotonic()
+        try:
+            if not send_control_command(self.redis_url, bot_id, COMMAND_STOP): # Bot pas encore à l'écoute
+                child.terminated_at = child.stopping_since
+                child.process.terminate()
+        except (ValueError, redis.RedisError):
+            child.terminated_at = child.stopping_since
+            child.process.terminate()
+
+    def _renew_leases(self):
+        owned = list(self.children) + list(self.restart_queue)
+        renew = self.client.register_script(_RENEW_LEASE_SCRIPT)
+        for bot_id in owned:
+            if renew(keys=[LEASE_KEY.format(bot_id=bot_id)], args=[self.node_id, LEASE_TTL_SECONDS]):
+                continue
+            logger.error("⚠️ Bail du bot %s perdu : arrêt de l'instance locale.", bot_id)
+            self.restart_queue.pop(bot_id, None)
+            child = self.children.get(bot_id)
+            if child is not None and child.stopping_since is None:
+                child.stopping_since = child.terminated_at = time.monotonic()
+                child.process.terminate()
+        self.last_renewed_at = time.monotonic()
+
+    def _start_due_restarts(self, registry):
+        now = time.monotonic()
+        for bot_id, (restarts, due_at) in list(self.restart_queue.items()):
+            if not self._wanted(registry, bot_id):
+                del self.restart_queue[bot_id]
+                self._release(bot_id)
+            elif now >= due_at:
+                del self.restart_queue[bot_id]
+                self._spawn(registry[bot_id], restarts)
+
+    def _claim_pending(self, client, registry):
+        wanted = [spec for bot_id, spec in registry.items() if self._wanted(registry, bot_id)
+                  and bot_id not in self.children and bot_id not in self.restart_queue]
+        if not wanted:
+            return
+        leases = client.mget([LEASE_KEY.format(bot_id=spec["bot_id"]) for spec in wanted])
+        pending = [spec for spec, lease in zip(wanted, leases) if lease is None]
+        placement = plan_placement(pending, live_nodes(client))
+        claims = 0
+        for spec in sorted(pending, key=lambda spec: spec["bot_id"]):
+            if claims >= self.claims_per_cycle or len(self.children) >= self.capacity:
+                return
+            if placement.get(spec["bot_id"]) != self.node_id:
+                continue
+            if client.set(LEASE_KEY.format(bot_id=spec["bot_id"]), self.node_id, nx=True, ex=LEASE_TTL_SECONDS):
+                self._spawn(spec, 0)
+                claims += 1
+
+    def _spawn(self, spec, restarts):
+        process = self._context.Process(target=run_bot_process, name=f"bot-{spec['bot_id']}",
+                                        args=(spec, self.redis_url, self.node_id, self.executor, restarts))
+        process.start()
+        self.children[spec["bot_id"]] = _BotChild(spec, process, restarts)
+        logger.info("🚀 Bot %s démarré sur %s (pid %s, redémarrages: %s).", spec["bot_id"], self.node_id, process.pid, restarts)
+
+    def _release(self, bot_id):
+        try:
+            self.client.register_script(_RELEASE_LEASE_SCRIPT)(keys=[LEASE_KEY.format(bot_id=bot_id)], args=[self.node_id])
+        except redis.RedisError as e:
+            logger.warning("⚠️ Bail du bot %s non libéré (expiration dans %s s): %s", bot_id, LEASE_TTL_SECONDS, e)
+
+    def run(self):
+        """
+        ▶️ Boucle du superviseur jusqu'à SIGTERM/SIGINT, puis arrêt des bots du nœud.
+        """
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, frame: self._stop.set())
+        logger.info("🧑‍✈️ Superviseur %s démarré (capacité: %s, executor: %s).", self.node_id, self.capacity, self.executor or "Chrome local")
+        while not self._stop.is_set():
+            try:
+                self.reconcile()
+            except redis.RedisError as e:
+                logger.warning("⚠️ Redis indisponible pour le superviseur: %s", e)
+                if self.children and time.monotonic() - self.last_renewed_at > LEASE_TTL_SECONDS:
+                    # Baux expirés : un autre nœud peut reprendre ces bots, les instances locales s'arrêtent
+                    logger.error("⚠️ Baux non renouvelés depuis %s s : arrêt des bots locaux.", LEASE_TTL_SECONDS)
+                    self.shutdown(release=False)
+            self._stop.wait(self.reconcile_seconds)
+        self.shutdown()
+
+    def shutdown(self, release=True):
+        """
+        ⏹️ Arrête les bots du nœud (SIGTERM, puis SIGKILL après STOP_GRACE_SECONDS) et libère leurs baux :
+        les bots toujours souhaités sont replacés sur les autres nœuds.
+        @param {bool} release - Libérer les baux et le nœud dans Redis.
+        """
+        for child in self.children.values():
+            child.process.terminate()
+        deadline = time.monotonic() + STOP_GRACE_SECONDS
+        for bot_id, child in self.children.items():
+            child.process.join(max(0, deadline - time.monotonic()))
+            if child.process.is_alive():
+                logger.error("🔪 Bot %s toujours actif après %s s : SIGKILL.", bot_id, STOP_GRACE_SECONDS)
+                child.process.kill()
+                child.process.join()
+        owned = list(self.children) + list(self.restart_queue)
+        self.children.clear()
+        self.restart_queue.clear()
+        if not release:
+            return
+        for bot_id in owned:
+            self._release(bot_id)
+        try:
+            self.client.delete(NODE_KEY.format(node_id=self.node_id))
+        except redis.RedisError:
+            pass
+        logger.info("🏁 Superviseur %s arrêté.", self.node_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Superviseur multi-bots d'un nœud (registre Redis, placement selon la charge).")
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL"), help="URL Redis (défaut : $REDIS_URL)")
+    parser.add_argument("--node-id", default=os.environ.get("BOT_NODE_ID"), help="Identifiant du nœud (défaut : hôte-pid)")
+    parser.add_argument("--capacity", type=int, default=os.environ.get("BOT_CAPACITY"), help="Bots simultanés sur ce nœud (défaut : nombre de cœurs)")
+    parser.add_argument("--executor", default=os.environ.get("SELENIUM_COMMAND_EXECUTOR"), help="Selenium Grid (défaut : Chrome local)")
+    parser.add_argument("--reconcile-seconds", type=float, default=2.0, help="Période du cycle de supervision")
+    args = parser.parse_args(argv)
+    if not args.redis_url or redis is None:
+        parser.error("Redis est requis (--redis-url ou $REDIS_URL, paquet redis installé).")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    BotSupervisor(args.redis_url, args.node_id, args.capacity, args.executor, args.reconcile_seconds).run()
+
+
+if __name__ == "__main__":
+    main()
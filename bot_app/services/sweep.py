@@ -0,0 +1,252 @@
+# bot_app/services/sweep.py
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bot_app.services.backtest import backtest_streak_martingale, candles_from_ticks
+from bot_app.services.tick_capture import load_ticks
+
+logger = logging.getLogger(__name__)
+
+# Balayage de paramètres de la stratégie série + Martingale sur l'historique de ticks enregistré.
+# Chaque combinaison de la grille est évaluée par le backtest vectorisé, au même rendement `payout`
+# pour toutes (le PnL croît avec le rendement : le faire varier dans la grille ne ferait que trier les
+# lignes par rendement). Les rendements n'étant pas enregistrés avec les ticks, le seuil MIN_YIELD_PERCENT
+# n'est pas modélisé : la colonne break_even_payout donne le rendement minimal pour lequel la
+# combinaison est rentable, à comparer au seuil. Les ticks sont placés une seule fois en mémoire
+# partagée ; chaque worker s'y attache et garde en cache les bougies agrégées par période.
+
+DEFAULT_GRID = {
+    "OFFSET_CANDLES": [2, 3, 4, 5],
+    "BET_SIZES": [[1, 2, 5], [1, 2, 4, 8], [1, 3, 9]],
+    "TRADING_PERIOD_MINUTES": [1, 2, 5],
+}
+DEFAULT_PAYOUT = 0.92 # Rendement du PnL (MIN_YIELD_PERCENT par défaut du bot)
+
+RESULT_COLUMNS = ("rank", "OFFSET_CANDLES", "BET_SIZES", "TRADING_PERIOD_MINUTES",
+                  "candles", "bets", "win_rate", "pnl", "max_drawdown", "busts", "break_even_payout")
+
+_worker_arrays = {} # Vues numpy sur la mémoire partagée (un jeu par processus worker)
+_worker_blocks = [] # Blocs attachés : gardés vivants tant que le worker tourne
+_worker_candles = {} # period_ms -> (opens, closes)
+_worker_payout = [DEFAULT_PAYOUT]
+
+
+def parameter_grid(grid=None):
+    """
+    🧮 Combinaisons de la grille de paramètres (produit cartésien), triées par période de bougie
+    pour que chaque shard réutilise les mêmes bougies agrégées.
+    @param {dict} grid - Listes de valeurs par clé (OFFSET_CANDLES, BET_SIZES, TRADING_PERIOD_MINUTES).
+    @returns {list} - Les combinaisons (dicts).
+    @throws {ValueError} - Si la grille contient une clé non balayée.
+    """
+    unknown = sorted(set(grid or {}) - set(DEFAULT_GRID))
+    if unknown:
+        raise ValueError(f"Paramètres non balayés: {', '.join(unknown)} (le rendement se règle avec payout).")
+    grid = dict(DEFAULT_GRID, **(grid or {}))
+    keys = list(DEFAULT_GRID)
+    combinations = [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+    return sorted(combinations, key=lambda combination: combination["TRADING_PERIOD_MINUTES"])
+
+
+def shard_combinations(combinations, shards):
+    """
+    🧩 Découpe les combinaisons en shards contigus de tailles égales (à une près).
+    @param {list} combinations - Les combinaisons.
+    @param {int} shards - Nombre de shards souhaité.
+    @returns {list} - Les shards non vides.
+    """
+    shards = max(1, min(int(shards), len(combinations)))
+    size, extra = divmod(len(combinations), shards)
+    result, position = [], 0
+    for i in range(shards):
+        end = position + size + (1 if i < extra else 0)
+        result.append(combinations[position:end])
+        position = end
+    return [shard for shard in result if shard]
+
+
+def evaluate_combinations(timestamps, prices, combinations, candle_cache=None, payout=DEFAULT_PAYOUT):
+    """
+    ⚡ Évalue des combinaisons sur les mêmes ticks (bougies agrégées une fois par période).
+    @param {numpy.ndarray} timestamps - Horodatages serveur (epoch ms), triés.
+    @param {numpy.ndarray} prices - Prix.
+    @param {list} combinations - Les combinaisons à évaluer.
+    @param {dict|None} candle_cache - Cache period_ms -> (opens, closes), partagé entre appels.
+    @param {float} payout - Gain net par unité misée, commun à toutes les combinaisons.
+    @returns {list} - Une ligne de résultats par combinaison.
+    """
+    candle_cache = {} if candle_cache is None else candle_cache
+    rows = []
+    for combination in combinations:
+        period_ms = int(combination["TRADING_PERIOD_MINUTES"] * 60000)
+        if period_ms not in candle_cache:
+            candles = candles_from_ticks(timestamps, prices, period_ms)
+            candle_cache[period_ms] = (candles["open"], candles["close"])
+        opens, closes = candle_cache[period_ms]
+        summary = backtest_streak_martingale(opens, closes, combination["OFFSET_CANDLES"], combination["BET_SIZES"], payout).summary()
+        rows.append(dict(combination, candles=len(opens), **summary))
+    return rows
+
+
+def rank_results(rows, rank_by="pnl", ascending=False):
+    """
+    🏆 Classe les résultats (les valeurs manquantes en dernier) et numérote les lignes.
+    @param {list} rows - Les lignes de résultats.
+    @param {str} rank_by - Colonne de classement (pnl, win_rate, max_drawdown, break_even_payout...).
+    @param {bool} ascending - Ordre croissant (ex : max_drawdown) au lieu de décroissant.
+    @returns {list} - Les lignes classées, avec la colonne 'rank'.
+    """
+    present = [row for row in rows if row.get(rank_by) is not None]
+    missing = [row for row in rows if row.get(rank_by) is None]
+    present.sort(key=lambda row: row[rank_by], reverse=not ascending) # Tri stable : ordre de la grille à égalité
+    return [dict(row, rank=rank) for rank, row in enumerate(present + missing, start=1)]
+
+
+def format_table(rows, limit=20):
+    """
+    📋 Tableau texte des meilleures lignes.
+    @param {list} rows - Les lignes classées.
+    @param {int|None} limit - Nombre de lignes affichées.
+    @returns {str}
+    """
+    rows = rows[:limit] if limit else rows
+    cells = [[str(row.get(column, "")) for column in RESULT_COLUMNS] for row in rows]
+    widths = [max([len(column)] + [len(line[i]) for line in cells]) for i, column in enumerate(RESULT_COLUMNS)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(RESULT_COLUMNS, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(line, widths)) for line in cells)
+    return "\n".join(lines)
+
+
+class SharedArrays:
+    """
+    🧠 Tableaux numpy copiés une seule fois dans des blocs de mémoire partagée. Seul le descripteur
+    (noms des blocs, formes, dtypes) est transmis aux workers, qui s'y attachent sans copie.
+    """
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.descriptor = {}
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.descriptor[key] = (block.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        🔗 S'attache aux blocs d'un descripteur.
+        @param {dict} descriptor - clé -> (nom du bloc, forme, dtype).
+        @returns {tuple} - (dict clé -> numpy.ndarray en lecture seule, liste des blocs à garder ouverts).
+        """
+        arrays, blocks = {}, []
+        for key, (name, shape, dtype) in descriptor.items():
+            block = shared_memory.SharedMemory(name=name)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            arrays[key] = array
+            blocks.append(block)
+        return arrays, blocks
+
+    def release(self):
+        """
+        🧹 Ferme et supprime les blocs (à appeler par le créateur une fois les workers terminés).
+        """
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def _attach_worker(descriptor, payout=DEFAULT_PAYOUT):
+    arrays, blocks = SharedArrays.attach(descriptor)
+    _worker_arrays.update(arrays)
+    _worker_blocks.extend(blocks)
+    _worker_candles.clear()
+    _worker_payout[0] = payout
+
+
+def _run_shard(combinations):
+    return evaluate_combinations(_worker_arrays["timestamps"], _worker_arrays["prices"], combinations, _worker_candles, _worker_payout[0])
+
+
+def run_sweep(directory, symbol, grid=None, workers=None, start_ms=None, end_ms=None, rank_by="pnl", ascending=False,
+              shards_per_worker=4, payout=DEFAULT_PAYOUT):
+    """
+    🚀 Balayage de la grille sur les ticks enregistrés d'un symbole, réparti sur un pool de processus.
+    @param {str} directory - Répertoire des segments de ticks (TICK_CAPTURE_DIR).
+    @param {str} symbol - Le symbole.
+    @param {dict} grid - La grille de paramètres (DEFAULT_GRID complétée).
+    @param {int|None} workers - Nombre de processus (défaut : nombre de cœurs ; 1 = sans pool).
+    @param {int|None} start_ms - Début inclus (epoch ms).
+    @param {int|None} end_ms - Fin exclue (epoch ms).
+    @param {str} rank_by - Colonne de classement.
+    @param {bool} ascending - Classement croissant.
+    @param {int} shards_per_worker - Shards par worker (équilibrage de charge).
+    @param {float} payout - Gain net par unité misée.
+    @returns {dict} - {'rows': lignes classées, 'combinations', 'ticks', 'workers', 'wall_seconds'}.
+    """
+    started = time.perf_counter()
+    timestamps, prices = load_ticks(directory, symbol, start_ms, end_ms)
+    combinations = parameter_grid(grid)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    logger.info("🧮 Balayage de %s combinaisons sur %s ticks de %s (%s workers).", len(combinations), len(timestamps), symbol, workers)
+
+    if workers == 1 or len(combinations) < 2:
+        rows = evaluate_combinations(timestamps, prices, combinations, payout=payout)
+    else:
+        shared = SharedArrays({"timestamps": timestamps, "prices": prices})
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker, initargs=(shared.descriptor, payout)) as pool:
+                shards = shard_combinations(combinations, workers * shards_per_worker)
+                rows = list(itertools.chain.from_iterable(pool.map(_run_shard, shards)))
+        finally:
+            shared.release()
+    return {
+        "rows": rank_results(rows, rank_by, ascending),
+        "combinations": len(combinations),
+        "payout": payout,
+        "ticks": len(timestamps),
+        "workers": workers,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balayage parallèle des paramètres de la stratégie sur les ticks enregistrés.")
+    parser.add_argument("directory", help="Répertoire des segments de ticks (TICK_CAPTURE_DIR)")
+    parser.add_argument("symbol", help="Symbole à évaluer (ex : EURUSD_otc)")
+    parser.add_argument("--grid", help="Grille de paramètres (JSON), complétée par la grille par défaut")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--payout", type=float, default=DEFAULT_PAYOUT, help="Rendement net des trades gagnants (ex : 0.92)")
+    parser.add_argument("--rank-by", default="pnl", help="Colonne de classement")
+    parser.add_argument("--ascending", action="store_true", help="Classement croissant (ex : max_drawdown)")
+    parser.add_argument("--top", type=int, default=20, help="Nombre de lignes affichées")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON complète")
+    args = parser.parse_args(argv)
+    grid = None
+    if args.grid:
+        with open(args.grid, "r") as grid_file:
+            grid = json.load(grid_file)
+    logging.basicConfig(level=logging.WARNING)
+    report = run_sweep(args.directory, args.symbol, grid, args.workers, rank_by=args.rank_by, ascending=args.ascending, payout=args.payout)
+    if args.json:
+        print(json.dumps(report, indent=1, default=str))
+        return
+    print(format_table(report["rows"], args.top))
+    print(f"\n{report['combinations']} combinaisons (rendement {report['payout']}), {report['ticks']} ticks, {report['workers']} workers, {report['wall_seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# bot_app/services/symbol_registry.py
+
+import logging
+from collections import OrderedDict, deque
+
+from bot_app.services.candles import CandleBuilder
+from bot_app.services.tick_buffer import TickRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolState:
+    """
+    📦 État borné d'un symbole : ticks récents, bougie en cours et bougies fermées.
+    """
+    __slots__ = ("symbol", "ticks", "builder", "candles")
+
+    def __init__(self, symbol, period_ms, tick_capacity, candle_capacity, fill_gaps=True):
+        self.symbol = symbol
+        self.ticks = TickRingBuffer(tick_capacity)
+        self.builder = CandleBuilder(period_ms, fill_gaps=fill_gaps, max_gap_candles=candle_capacity)
+        self.candles = deque(maxlen=candle_capacity)
+
+
+class SymbolRegistry:
+    """
+    🗂️ Démultiplexeur de ticks multi-symboles : un SymbolState par symbole présent dans le flux,
+    pour que l'historique de bougies soit déjà chaud au moment d'un changement de devise.
+
+    La mémoire est bornée : capacité fixe de ticks et de bougies par symbole, et au plus
+    `max_symbols` symboles suivis. Au-delà, le symbole le moins récemment mis à jour (LRU)
+    est évincé, sauf les symboles épinglés (la devise active).
+    """
+
+    def __init__(self, period_ms, max_symbols=64, tick_capacity=8192, candle_capacity=500, tick_history_ms=10 * 60 * 1000, fill_gaps=True):
+        self.period_ms = int(period_ms)
+        self.fill_gaps = fill_gaps
+        self.max_symbols = max_symbols
+        self.tick_capacity = tick_capacity
+        self.candle_capacity = candle_capacity
+        self.tick_history_ms = tick_history_ms
+        self.evicted_symbols = 0
+        self._states = OrderedDict()
+        self._pinned = set()
+
+    def __contains__(self, symbol):
+        return symbol in self._states
+
+    def __len__(self):
+        return len(self._states)
+
+    def symbols(self):
+        """
+        📋 Symboles suivis, du moins récemment au plus récemment mis à jour.
+        """
+        return list(self._states)
+
+    def get(self, symbol):
+        """
+        🔎 Retourne l'état d'un symbole, en le créant (et en évinçant un symbole LRU) si besoin.
+        Aucun état n'est créé sans symbole (devise pas encore choisie).
+        @param {str|None} symbol - Le symbole.
+        @returns {SymbolState|None} - L'état du symbole, None si symbol est None.
+        """
+        if symbol is None:
+            return None
+        state = self._states.get(symbol)
+        if state is None:
+            self._evict_if_full()
+            state = SymbolState(symbol, self.period_ms, self.tick_capacity, self.candle_capacity, self.fill_gaps)
+            self._states[symbol] = state
+        return state
+
+    def peek(self, symbol):
+        """
+        👀 Retourne l'état d'un symbole déjà suivi, sans le créer ni modifier l'ordre LRU.
+        @param {str|None} symbol - Le symbole.
+        @returns {SymbolState|None} - L'état du symbole, None s'il n'est pas suivi.
+        """
+        return self._states.get(symbol)
+
+    def pin(self, symbol):
+        """
+        📌 Épingle un symbole (jamais évincé) et désépingle les autres.
+        @param {str|None} symbol - Le symbole actif.
+        """
+        self._pinned = {symbol} if symbol is not None else set()
+
+    def on_tick(self, symbol, epoch_ms, price):
+        """
+        📥 Route un tick vers l'état de son symbole.
+        @param {str} symbol - Le symbole du tick.
+        @param {int} epoch_ms - Horodatage serveur.
+        @param {float} price - Le prix.
+        @returns {tuple} - (SymbolState, bougies fermées par ce tick).
+        """
+        state = self.get(symbol)
+        self._states.move_to_end(symbol)
+        state.ticks.append(epoch_ms, price)
+        closed = state.builder.update(epoch_ms, price)
+        if closed:
+            self._record_closed(state, closed)
+            state.ticks.evict_before(epoch_ms - self.tick_history_ms)
+        return state, closed
+
+    def advance(self, symbol, epoch_ms):
+        """
+        ⏭️ Ferme la bougie en cours d'un symbole si epoch_ms a dépassé sa fin (sans tick).
+        @param {str} symbol - Le symbole.
+        @param {int} epoch_ms - Heure serveur de référence.
+        @returns {list} - Les bougies fermées.
+        """
+        state = self._states.get(symbol)
+        if state is None:
+            return []
+        closed = state.builder.advance_to(epoch_ms)
+        self._record_closed(state, closed)
+        return closed
+
+    def advance_all(self, epoch_ms):
+        """
+        ⏱️ Ferme, pour tous les symboles suivis, les bougies terminées à epoch_ms (horloge des bougies).
+        @param {int} epoch_ms - Heure serveur de référence.
+        @returns {dict} - Bougies fermées par symbole (seuls les symboles concernés).
+        """
+        closed_by_symbol = {}
+        for symbol, state in self._states.items():
+            if state.builder.end_ms is not None and epoch_ms >= state.builder.end_ms:
+                closed = state.builder.advance_to(epoch_ms)
+                self._record_closed(state, closed)
+                closed_by_symbol[symbol] = closed
+        return closed_by_symbol
+
+    def _record_closed(self, state, closed):
+        for candle in closed:
+            if candle.open is not None: # Bougies avec ticks et bougies gap
+                state.candles.append(candle)
+
+    def _evict_if_full(self):
+        while len(self._states) >= self.max_symbols:
+            victim = next((symbol for symbol in self._states if symbol not in self._pinned), None)
+            if victim is None:
+                return
+            del self._states[victim]
+            self.evicted_symbols += 1
+            logger.debug("🧹 Symbole %s évincé du registre (LRU).", victim)
+
+    def stats(self):
+        """
+        📊 Occupation du registre.
+        @returns {dict} - Nombre de symboles suivis, capacité, évictions.
+        """
+        return {
+            "tracked_symbols": len(self._states),
+            "max_symbols": self.max_symbols,
+            "evicted_symbols": self.evicted_symbols,
+        }
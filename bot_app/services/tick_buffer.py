@@ -0,0 +1,122 @@
+# bot_app/services/tick_buffer.py
+
+import numpy as np
+import pandas as pd
+
+
+class TickRingBuffer:
+    """
+    🧮 Tampon circulaire de ticks (epoch_ms, prix) à capacité fixe, adossé à NumPy.
+
+    Chaque tick est écrit deux fois (à l'index i et i + capacité) : la fenêtre
+    des ticks conservés est donc toujours contiguë en mémoire et peut être
+    exposée sous forme de vue NumPy, sans copie. L'ajout est en O(1) et
+    l'éviction par fenêtre temporelle en O(log n).
+
+    Les vues retournées restent valides jusqu'au prochain append/evict.
+    Les timestamps doivent être croissants (c'est le cas du flux PocketOption).
+    """
+
+    def __init__(self, capacity=65536):
+        if capacity <= 0:
+            raise ValueError("La capacité du tampon de ticks doit être positive.")
+        self.capacity = int(capacity)
+        self._times = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._prices = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._head = 0 # Position physique (modulo capacité) du tick le plus ancien
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def empty(self):
+        return self._size == 0
+
+    def append(self, epoch_ms, price):
+        """
+        ➕ Ajoute un tick. Si le tampon est plein, le tick le plus ancien est écrasé.
+        @param {int} epoch_ms - Horodatage serveur du tick en millisecondes.
+        @param {float} price - Prix du tick.
+        @returns {bool} - False si le tick est antérieur au dernier tick stocké (ignoré).
+        """
+        if self._size and epoch_ms < self._times[self._head + self._size - 1]:
+            return False
+        cap = self.capacity
+        tail = (self._head + self._size) % cap
+        self._times[tail] = epoch_ms
+        self._times[tail + cap] = epoch_ms
+        self._prices[tail] = price
+        self._prices[tail + cap] = price
+        if self._size < cap:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % cap
+        return True
+
+    def times(self):
+        """
+        🕒 Vue (sans copie) des horodatages conservés, du plus ancien au plus récent.
+        @returns {np.ndarray} - Tableau int64 d'epoch_ms.
+        """
+        return self._times[self._head:self._head + self._size]
+
+    def prices(self):
+        """
+        💲 Vue (sans copie) des prix conservés, alignée sur times().
+        @returns {np.ndarray} - Tableau float64 de prix.
+        """
+        return self._prices[self._head:self._head + self._size]
+
+    def last(self):
+        """
+        🔚 Retourne le dernier tick reçu.
+        @returns {tuple|None} - (epoch_ms, prix) ou None si le tampon est vide.
+        """
+        if not self._size:
+            return None
+        index = self._head + self._size - 1
+        return int(self._times[index]), float(self._prices[index])
+
+    def window(self, start_ms, end_ms):
+        """
+        🔎 Vues (sans copie) des ticks dont l'horodatage est dans [start_ms, end_ms[.
+        @param {int} start_ms - Début de la fenêtre (inclus).
+        @param {int} end_ms - Fin de la fenêtre (exclue).
+        @returns {tuple} - (times, prices) sous forme de vues NumPy.
+        """
+        times = self.times()
+        start = np.searchsorted(times, start_ms, side='left')
+        end = np.searchsorted(times, end_ms, side='left')
+        return times[start:end], self.prices()[start:end]
+
+    def evict_before(self, epoch_ms):
+        """
+        🧹 Supprime les ticks strictement antérieurs à epoch_ms.
+        @param {int} epoch_ms - Limite de rétention.
+        @returns {int} - Nombre de ticks supprimés.
+        """
+        count = int(np.searchsorted(self.times(), epoch_ms, side='left'))
+        if count:
+            self._head = (self._head + count) % self.capacity
+            self._size -= count
+        return count
+
+    def clear(self):
+        """
+        🗑️ Vide le tampon sans réallouer la mémoire.
+        """
+        self._head = 0
+        self._size = 0
+
+    def to_dataframe(self, timezone=None):
+        """
+        📋 Convertit les ticks conservés en DataFrame ["Time", "Price"] (copie).
+        À réserver aux appels API : ne pas utiliser dans la boucle de ticks.
+        @param {tzinfo} timezone - Optionnel, timezone des datetimes de la colonne Time.
+        @returns {pd.DataFrame} - Les ticks.
+        """
+        times = pd.to_datetime(self.times(), unit='ms', utc=True)
+        if timezone is not None:
+            times = times.tz_convert(timezone)
+        return pd.DataFrame({"Time": times, "Price": self.prices().copy()})
@@ -0,0 +1,321 @@
+# bot_app/services/tick_capture.py
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TICK_CAPTURE_VERSION = 1
+
+# Enregistrement binaire à largeur fixe (20 octets, little-endian, sans padding) : un segment .bin
+# est directement mappable en mémoire (np.memmap) avec ce dtype, sans aucun parsing.
+TICK_RECORD_DTYPE = np.dtype([("symbol_id", "<u4"), ("ts_ms", "<i8"), ("price", "<f8")])
+
+SEGMENT_PREFIX = "ticks-"
+SEGMENT_SUFFIX = ".bin"
+INDEX_SUFFIX = ".idx.json" # Index du segment : table des symboles, nombre d'enregistrements, bornes par symbole
+
+
+class TickRecorder:
+    """
+    🎞️ Enregistreur append-only de tous les ticks décodés (symbole, horodatage serveur, prix), tous symboles confondus.
+
+    Le thread des ticks ne fait qu'un deque.extend (O(1) par tick, sans verrou ni E/S) ; un thread
+    dédié convertit les ticks en enregistrements binaires et les écrit toutes les `flush_seconds`.
+    Les segments tournent après `segment_records` enregistrements ou `segment_seconds` de ticks.
+    Au-delà de `max_pending` ticks en attente (disque bloqué), les nouveaux ticks sont comptés comme perdus.
+    Rétention : à chaque rotation, les segments les plus anciens du répertoire sont supprimés tant qu'il y en a
+    plus de `max_segments` ou qu'ils occupent plus de `max_bytes` (None : pas de limite). Le segment courant
+    n'est jamais supprimé : l'occupation reste bornée à max_bytes plus la taille d'un segment.
+    """
+
+    def __init__(self, directory, segment_records=1000000, segment_seconds=3600, flush_seconds=1.0, max_pending=1000000,
+                 max_segments=None, max_bytes=None):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.segment_span_ms = segment_seconds * 1000
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.max_segments = max_segments
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.dropped = 0
+        self.segments = 0
+        self.deleted_segments = 0
+        self.flush_errors = 0
+        self._pending = deque()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._file = None
+        self._segment_path = None
+        self._index = None
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def start(self):
+        """
+        ▶️ Démarre le thread d'écriture (sans effet si l'enregistrement est désactivé ou déjà actif).
+        """
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tick-recorder", daemon=True)
+        self._thread.start()
+
+    def record_many(self, ticks):
+        """
+        ➕ Met en file un lot de ticks décodés (chemin critique : aucune E/S).
+        @param {list} ticks - Les ticks (symbole, epoch_ms, prix).
+        """
+        if not self.enabled or not ticks:
+            return
+        if len(self._pending) + len(ticks) > self.max_pending:
+            self.dropped += len(ticks)
+            return
+        self._pending.extend(ticks)
+
+    def flush(self):
+        """
+        💾 Écrit les ticks en attente dans le segment courant (appelé par le thread d'écriture et à la fermeture).
+        @returns {int} - Nombre d'enregistrements écrits.
+        """
+        with self._flush_lock:
+            count = len(self._pending)
+            if not count:
+                return 0
+            pending = self._pending
+            batch = [pending.popleft() for _ in range(count)]
+            try:
+                written = 0
+                while written < count:
+                    first_ts = int(batch[written][1])
+                    if self._file is None or self._index["records"] >= self.segment_records \
+                            or first_ts - self._index["first_ts"] >= self.segment_span_ms:
+                        self._open_segment(first_ts)
+                    chunk = batch[written:written + self.segment_records - self._index["records"]]
+                    self._write_chunk(chunk)
+                    written += len(chunk)
+                self._file.flush()
+                self._write_index()
+            except OSError as e:
+                self.flush_errors += 1
+                logger.error("❌ Écriture des ticks impossible (%s): %s", self._segment_path, e)
+                return 0
+            self.written += count
+            return count
+
+    def close(self):
+        """
+        ⏹️ Arrête le thread d'écriture, écrit les ticks restants et ferme le segment courant.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+        with self._flush_lock:
+            self._close_segment()
+
+    def stats(self):
+        """
+        📊 Compteurs de l'enregistreur.
+        @returns {dict} - Ticks écrits, en attente, perdus, segments ouverts.
+        """
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "written": self.written,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "segments": self.segments,
+            "deleted_segments": self.deleted_segments,
+            "flush_errors": self.flush_errors,
+            "current_segment": self._segment_path,
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def _open_segment(self, first_ts):
+        self._close_segment()
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_ts:013d}")
+        path, suffix = base + SEGMENT_SUFFIX, 1
+        while os.path.exists(path): # Redémarrage dans la même milliseconde : jamais d'écrasement
+            path = f"{base}-{suffix}{SEGMENT_SUFFIX}"
+            suffix += 1
+        self._file = open(path, "wb")
+        self._segment_path = path
+        self._index = {
+            "version": TICK_CAPTURE_VERSION,
+            "record_dtype": TICK_RECORD_DTYPE.descr,
+            "symbols": {}, # symbole -> symbol_id
+            "records": 0,
+            "first_ts": first_ts,
+            "last_ts": first_ts,
+            "per_symbol": {}, # symbole -> {'count', 'first_ts', 'last_ts'}
+            "closed": False,
+        }
+        self.segments += 1
+        logger.info("🎞️ Nouveau segment de ticks: %s", path)
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        # Segments fermés, du plus ancien au plus récent ; le segment courant n'est jamais supprimé
+        if self.max_segments is None and self.max_bytes is None:
+            return
+        segments = list_segments(self.directory)
+        sizes = {path: os.path.getsize(path) for path in segments}
+        total_bytes = sum(sizes.values())
+        for path in list(segments):
+            if path == self._segment_path:
+                continue
+            over_count = self.max_segments is not None and len(segments) > self.max_segments
+            over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            index_path = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+            for stale_path in (path, index_path):
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e: # Jamais bloquant pour l'écriture des ticks
+                    logger.warning("🟡 Suppression du segment %s impossible: %s", stale_path, e)
+            segments.remove(path)
+            total_bytes -= sizes[path]
+            self.deleted_segments += 1
+            logger.info("🧹 Segment de ticks supprimé (rétention): %s", path)
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self._index["closed"] = True
+        self._write_index()
+
+    def _write_chunk(self, chunk):
+        symbols = self._index["symbols"]
+        names, timestamps, prices = zip(*chunk)
+        records = np.empty(len(chunk), dtype=TICK_RECORD_DTYPE)
+        records["symbol_id"] = [symbols.setdefault(name, len(symbols)) for name in names]
+        records["ts_ms"] = timestamps
+        records["price"] = prices
+        self._file.write(records.tobytes())
+
+        index = self._index
+        index["records"] += len(chunk)
+        index["last_ts"] = max(index["last_ts"], int(records["ts_ms"].max()))
+        ids_by_symbol = {symbol_id: name for name, symbol_id in symbols.items()}
+        for symbol_id in np.unique(records["symbol_id"]):
+            symbol_ts = records["ts_ms"][records["symbol_id"] == symbol_id]
+            entry = index["per_symbol"].setdefault(ids_by_symbol[int(symbol_id)], {"count": 0, "first_ts": int(symbol_ts[0]), "last_ts": int(symbol_ts[0])})
+            entry["count"] += len(symbol_ts)
+            entry["first_ts"] = min(entry["first_ts"], int(symbol_ts.min()))
+            entry["last_ts"] = max(entry["last_ts"], int(symbol_ts.max()))
+
+    def _write_index(self):
+        if self._index is None:
+            return
+        index_path = self._segment_path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        temporary_path = index_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as index_file:
+            json.dump(self._index, index_file)
+        os.replace(temporary_path, index_path) # Un lecteur ne voit jamais un index à moitié écrit
+
+
+class TickSegment:
+    """
+    📖 Lecture d'un segment de ticks par mappage mémoire (aucun parsing, aucune copie avant filtrage).
+    Le nombre d'enregistrements est déduit de la taille du fichier : un segment en cours d'écriture
+    (ou tronqué par un arrêt brutal) reste lisible jusqu'à son dernier enregistrement complet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        index_path = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        try:
+            with open(index_path, "r", encoding="utf-8") as index_file:
+                self.index = json.load(index_file)
+        except (OSError, ValueError):
+            self.index = {"symbols": {}, "per_symbol": {}, "closed": False}
+        self.symbols = self.index.get("symbols", {})
+        self.names = {symbol_id: name for name, symbol_id in self.symbols.items()}
+        count = os.path.getsize(path) // TICK_RECORD_DTYPE.itemsize
+        self.records = np.memmap(path, dtype=TICK_RECORD_DTYPE, mode="r", shape=(count,)) if count else np.empty(0, dtype=TICK_RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def ticks(self, symbol=None, start_ms=None, end_ms=None):
+        """
+        🔎 Enregistrements du segment, filtrés par symbole et par intervalle [start_ms, end_ms).
+        @param {str|None} symbol - Le symbole (None = tous).
+        @param {int|None} start_ms - Début inclus (epoch ms).
+        @param {int|None} end_ms - Fin exclue (epoch ms).
+        @returns {numpy.ndarray} - Tableau structuré TICK_RECORD_DTYPE (vue mappée si aucun filtre).
+        """
+        records = self.records
+        mask = None
+        if symbol is not None:
+            if symbol not in self.symbols:
+                return records[:0]
+            mask = records["symbol_id"] == self.symbols[symbol]
+        if start_ms is not None:
+            mask = (records["ts_ms"] >= start_ms) if mask is None else mask & (records["ts_ms"] >= start_ms)
+        if end_ms is not None:
+            mask = (records["ts_ms"] < end_ms) if mask is None else mask & (records["ts_ms"] < end_ms)
+        return records if mask is None else records[mask]
+
+
+def list_segments(directory):
+    """
+    📂 Segments de ticks d'un répertoire, dans l'ordre chronologique.
+    @param {str} directory - Répertoire de capture (TICK_CAPTURE_DIR).
+    @returns {list} - Chemins des fichiers .bin.
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def load_ticks(directory, symbol, start_ms=None, end_ms=None):
+    """
+    📈 Horodatages et prix d'un symbole sur tous les segments d'un répertoire.
+    Les segments dont l'index montre qu'ils ne contiennent pas le symbole (ou sont hors intervalle) sont ignorés.
+    @param {str} directory - Répertoire de capture.
+    @param {str} symbol - Le symbole.
+    @param {int|None} start_ms - Début inclus (epoch ms).
+    @param {int|None} end_ms - Fin exclue (epoch ms).
+    @returns {tuple} - (numpy.ndarray int64 des horodatages, numpy.ndarray float64 des prix), triés par horodatage.
+    """
+    timestamps, prices = [], []
+    for path in list_segments(directory):
+        segment = TickSegment(path)
+        bounds = segment.index.get("per_symbol", {}).get(symbol)
+        if segment.index.get("closed") and bounds is None:
+            continue
+        if bounds is not None and ((start_ms is not None and bounds["last_ts"] < start_ms)
+                                   or (end_ms is not None and bounds["first_ts"] >= end_ms)):
+            continue
+        records = segment.ticks(symbol, start_ms, end_ms)
+        timestamps.append(np.asarray(records["ts_ms"]))
+        prices.append(np.asarray(records["price"]))
+    if not timestamps:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    timestamps, prices = np.concatenate(timestamps), np.concatenate(prices)
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], prices[order]
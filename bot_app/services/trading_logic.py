@@ -1,8 +1,9 @@
 # bot_app/trading_logic.py
 
-import base64
 import json
+import queue
 import random
+import threading
 import time
 import pandas as pd
 from datetime import datetime, timedelta
@@ -14,54 +15,182 @@ from selenium.webdriver.chrome.options import Options
 # from selenium.webdriver.chrome.service import Service # Potentiellement nécessaire selon l'install
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-# from stock_indicators import indicators # Assure-toi que c'est le bon import
-# from stock_indicators.indicators.common.quote import Quote # Vérifie si c'est utilisé
+from selenium.common.exceptions import TimeoutException
+
+from bot_app.services.candles import GAP_CANDLE_COLOR
+from bot_app.services.capture import CaptureWriter
+from bot_app.services.clock import ServerClock, SystemClock
+from bot_app.services.control import COMMAND_PAUSE, COMMAND_RESUME, COMMAND_STOP, COMMAND_UPDATE_CONFIG, ControlListener
+from bot_app.services.frame_decoder import FrameDecoder
+from bot_app.services.indicators import IndicatorSet
+from bot_app.services.dom_extraction import DomReader
+from bot_app.services.driver_pool import driver_pool_key
+from bot_app.services.locators import LocatorRegistry
+from bot_app.services.ingestion import CdpFrameListener, INGESTION_MODE_CDP, INGESTION_MODE_POLL
+from bot_app.services.metrics import HotPathMetrics, LatencyStats, StepTimings, timed_stage
+from bot_app.services.panel_state import TradingPanelState
+from bot_app.services.stores import ActionRecord, CandleStore, RecordStore, SpillWriter, TradeRecord
+from bot_app.services.publisher import STALE_AFTER_REFRESHES, MetricsPublisher, StatePublisher
+from bot_app.services.pipeline import (
+    BLOCK, DROP_OLDEST, RUNTIME_MODE_PIPELINE, BoundedQueue, ExecutionStage, PipelineWorker,
+)
+from bot_app.services.symbol_registry import SymbolRegistry
+from bot_app.services.tick_capture import TickRecorder
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+TRADING_PAGE_PATH = "/en/cabinet/demo-quick-high-low/"
+
 class TradingBot:
-    def __init__(self, cookies_path="Trading_cookies.json", config=None):
+    def __init__(self, cookies_path="Trading_cookies.json", config=None, clock=None, driver_factory=None, driver_pool=None):
         logger.info("🚀 Initialisation du TradingBot Dieu-Donnee...")
         self.cookies_path = cookies_path
         self.config = config if config else self._load_default_config()
+        # Horloge (heure locale, temps monotone, pauses) et fabrique du driver : injectables pour le rejeu hors ligne
+        self.clock = clock if clock else SystemClock()
+        self.driver_factory = driver_factory
+        self.driver_pool = driver_pool # DriverPool : driver chaud emprunté au démarrage, rendu à l'arrêt
+        self.pooled_driver = None
 
         # Initialisation des variables d'état (anciennement globales)
         self.period_seconds = self.config.get("PERIOD", 0) # Secondes par bougie sur le graphe
-        self.candles_history = [] # Stockera les objets Quote pour stock_indicators si besoin
-        self.actions_log = {}
         self.max_actions_allowed = self.config.get("MAX_ACTIONS", 1)
         self.actions_relevancy_seconds = self.config.get("ACTIONS_SECONDS", self.period_seconds)
-        self.last_ui_refresh_time = datetime.now() # Pour la gestion UI si besoin
+        self.last_ui_refresh_time = self.clock.now() # Pour la gestion UI si besoin
         self.selected_currency_pair = None
         self.is_currency_changing = False # Flag pour gérer les changements de devise
-        self.current_active_currency = None
-        self.last_currency_change_time = datetime.now()
+        self.frame_decoder = FrameDecoder() # Décodeur par étapes des frames WebSocket (tous les symboles)
+        self._current_active_currency = None
+        self.last_currency_change_time = self.clock.now()
 
         self.companies_map = self.config.get("COMPANIES", {})
         self.currencies_map = self.config.get("CURRENCIES", {})
+        self.min_yield_percent = self.config.get("MIN_YIELD_PERCENT", 92) # Rendement minimal (%) pour trader une devise
 
-        self.ohlc_data = pd.DataFrame(columns=["Open", "High", "Low", "Close", "Color", "Timestamp"])
-        self.price_history_stream = pd.DataFrame(columns = ["Time", "Price"])
+        self.tick_history_ms = int(self.config.get("TICK_HISTORY_MINUTES", 10) * 60 * 1000) # Rétention des ticks
         
         self.trading_period_minutes = self.config.get("TRADING_PERIOD_MINUTES", 1) # Ex: 1 minute pour les bougies
         self.current_bet_index = 0
         self.bet_size_tiers = self.config.get("BET_SIZES", [1, 2, 5])
         self.active_bet_details = None # Infos sur le pari en cours
-        self.trade_history_log = []
         self.is_trade_active_now = False # Si une condition de trade est rencontrée
         self.trading_offset_candles = self.config.get("OFFSET_CANDLES", 2) # Nombre de bougies identiques pour trader
+        # Indicateurs en flux (série de couleurs, SMA/EMA, RSI, Bollinger, ATR) : O(1) par bougie fermée.
+        # SIGNAL_FILTERS (optionnel) conditionne le démarrage d'une série de trades à ces indicateurs.
+        self.indicators = IndicatorSet.from_config(self.config.get("INDICATORS"), streak_window=self.trading_offset_candles)
+        self.signal_filters = self.config.get("SIGNAL_FILTERS", {})
         
         self.timezone = pytz.timezone(self.config.get("TIMEZONE", 'Etc/GMT-2'))
+        # Historiques bornés en mémoire (bougies : colonnes NumPy, trades/actions : __slots__) ;
+        # au-delà de la rétention, les plus anciens sont déversés en JSONL dans SPILL_DIR (si configuré),
+        # dans des fichiers tournants bornés à SPILL_MAX_BYTES (SPILL_BACKUPS anciennes versions gardées)
+        spill_dir = self.config.get("SPILL_DIR")
+        spill_options = {"max_bytes": self.config.get("SPILL_MAX_BYTES", 50 * 1024 * 1024), "backups": self.config.get("SPILL_BACKUPS", 1)}
+        self.ohlc_store = CandleStore(self.config.get("CANDLE_HISTORY_SIZE", 500), SpillWriter(spill_dir, "candles", **spill_options), self.timezone)
+        self.trade_history_log = RecordStore(self.config.get("TRADE_HISTORY_SIZE", 1000), SpillWriter(spill_dir, "trades", **spill_options), self.timezone)
+        self.actions_log = RecordStore(self.config.get("ACTIONS_LOG_SIZE", 1000), SpillWriter(spill_dir, "actions", **spill_options), self.timezone)
         self.current_candle_start_time = None
         self.current_candle_end_time = None
+        # Registre multi-devises : ticks (tampon circulaire NumPy), bougie en cours (agrégateur OHLC incrémental)
+        # et bougies fermées pour chaque symbole du flux, bornés en mémoire et évincés par LRU.
+        self.symbols = SymbolRegistry(
+            self._get_candle_period_seconds() * 1000,
+            max_symbols=self.config.get("MAX_TRACKED_SYMBOLS", 64),
+            tick_capacity=self.config.get("TICK_BUFFER_CAPACITY", 8192),
+            candle_capacity=self.config.get("CANDLE_HISTORY_SIZE", 500),
+            tick_history_ms=self.tick_history_ms,
+            fill_gaps=self.config.get("FILL_GAP_CANDLES", True), # Périodes sans tick -> bougies plates
+        )
+        self.last_server_time_ms = None # Horodatage serveur le plus récent, tous symboles confondus
+        # Horloge des bougies : fermeture à l'heure serveur estimée, sans attendre le tick suivant
+        self.server_clock = ServerClock(time_source=self.clock.time_ms)
+        self.candle_close_grace_ms = self.config.get("CANDLE_CLOSE_GRACE_MS", 200) # Marge pour les ticks en vol
+        self.decision_latency = LatencyStats("decision_latency") # Frontière de bougie -> logique de trading
+        self.last_closed_boundary_ms = None # Fin (heure serveur) de la dernière bougie fermée de la devise active
+
+        # Pré-armement des ordres : montant saisi et boutons résolus ORDER_ARM_LEAD_MS avant la frontière,
+        # pour qu'il ne reste que le clic une fois le signal confirmé
+        self.order_arm_lead_ms = self.config.get("ORDER_ARM_LEAD_MS", 500)
+        self.armed_order = None # {'boundary_ms', 'amount', 'buttons': {'green': CachedElement, 'red': CachedElement}}
+        self.boundary_to_click_latency = LatencyStats("boundary_to_click") # Frontière de bougie -> clic de l'ordre
+
+        # Ingestion des frames WebSocket : push CDP (par défaut) ou polling des logs de performance (fallback)
+        self.ingestion_mode = self.config.get("INGESTION_MODE", INGESTION_MODE_CDP)
+        self.loop_interval_seconds = self.config.get("LOOP_INTERVAL_SECONDS", 0.1)
+        self.frame_listener = None
+        # Les logs de performance restent activés en mode CDP pour permettre la bascule sur le polling sans relancer
+        # Chrome ; en contrepartie, chromedriver les accumule : ils sont vidés (et ignorés) toutes les
+        # PERFORMANCE_LOG_DRAIN_SECONDS par l'étage ingestion, un get_log toutes les quelques secondes.
+        self.performance_log_drain_seconds = self.config.get("PERFORMANCE_LOG_DRAIN_SECONDS", 5.0)
+        self._next_performance_log_drain = 0.0
+        self.drained_log_entries = 0 # Entrées de logs de performance ignorées en mode CDP
+        self.tick_latency = LatencyStats("tick_latency") # Horodatage serveur du tick -> tick intégré à la bougie
+        self.capture = CaptureWriter(self.config.get("CAPTURE_PATH")) # Enregistrement des frames pour le rejeu (optionnel)
+        # Enregistrement binaire de tous les ticks décodés (segments mappables en mémoire), écrit hors du thread des ticks
+        self.tick_recorder = TickRecorder(
+            self.config.get("TICK_CAPTURE_DIR"),
+            segment_records=self.config.get("TICK_CAPTURE_SEGMENT_RECORDS", 1000000),
+            segment_seconds=self.config.get("TICK_CAPTURE_SEGMENT_SECONDS", 3600),
+            flush_seconds=self.config.get("TICK_CAPTURE_FLUSH_SECONDS", 1.0),
+            max_segments=self.config.get("TICK_CAPTURE_MAX_SEGMENTS", 168),
+            max_bytes=self.config.get("TICK_CAPTURE_MAX_BYTES", 2 * 1024 ** 3),
+        )
+
+        # Runtime en pipeline : ingestion -> bougies -> stratégie -> exécution, reliés par des files bornées.
+        # Une action d'interface lente ne bloque que l'étage d'exécution, jamais le traitement des ticks.
+        self.runtime_mode = self.config.get("RUNTIME_MODE", RUNTIME_MODE_PIPELINE)
+        self.driver_lock = threading.RLock() # Le driver WebDriver est partagé entre étages et vues : une action d'interface à la fois
+        # Lecture des logs de performance (mode polling) : get_log vide le tampon de chromedriver, un seul lecteur.
+        # Indépendante de driver_lock : chromedriver sérialise déjà chaque commande, get_log attend au plus la
+        # commande en cours et jamais une action d'interface entière (attentes, saisies, clics enchaînés).
+        self.driver_log_lock = threading.Lock()
+        self.state_lock = threading.RLock() # Registre multi-devises et agrégateurs : étage bougies vs autres étages
+        self.tick_queue = BoundedQueue("ticks", self.config.get("TICK_QUEUE_SIZE", 10000), drop_policy=DROP_OLDEST)
+        self.candle_queue = BoundedQueue("candles", self.config.get("CANDLE_QUEUE_SIZE", 1000), drop_policy=BLOCK)
+        self.execution = None # ExecutionStage, actif uniquement pendant le runtime en pipeline
+        self.pipeline_workers = []
+        self._next_currency_selection_at = 0.0 # Back-off des tentatives de sélection de devise (étage stratégie)
 
         self.driver = None
+        # Handles WebElement nommés, mis en cache ; attentes conditionnelles bornées par UI_WAIT_TIMEOUT_SECONDS
+        self.locators = LocatorRegistry(lambda: self.driver, wait_timeout=self.config.get("UI_WAIT_TIMEOUT_SECONDS", 10))
+        self.dom = DomReader(self.locators) # Lectures groupées du DOM (un execute_script par lecture)
+        # Histogrammes du chemin critique (get_log, décodage, ticks, bougies, logique, actions Selenium) et compteurs,
+        # publiés dans Redis par un thread dédié pour l'endpoint Prometheus (aucune E/S sur le chemin des ticks)
+        self.hot_metrics = HotPathMetrics()
+        self.metrics_publisher = MetricsPublisher(self.config.get("REDIS_URL"), self.config.get("BOT_ID", "default"),
+                                                  self.hot_metrics.snapshot, self.config.get("METRICS_PUBLISH_SECONDS", 1.0))
+        self.ui_steps = StepTimings(sink=self.hot_metrics) # Durée de chaque étape de l'interface (page, montant, modals, ordre)
+        # Instantanés versionnés (statut, bougies, trades) publiés dans Redis à chaque changement d'état :
+        # les vues les lisent directement, sans tâche Celery ni appel Selenium. Republié toutes les STATE_REFRESH_SECONDS ;
+        # les clés expirent après STATE_TTL_CANDLES bougies sans publication (bot tué sans arrêt propre)
+        state_refresh_seconds = self.config.get("STATE_REFRESH_SECONDS", 10)
+        state_ttl_seconds = int(max(self.config.get("STATE_TTL_CANDLES", 3) * self._get_candle_period_seconds(),
+                                    STALE_AFTER_REFRESHES * (state_refresh_seconds or 0), 1)) # EX : secondes entières
+        self.state_publisher = StatePublisher(self.config.get("REDIS_URL"), self.config.get("BOT_ID", "default"), self._build_state_snapshot,
+                                              refresh_seconds=state_refresh_seconds, ttl_seconds=state_ttl_seconds)
+        self.state_ohlc_size = self.config.get("STATE_OHLC_SIZE", 200)
+        self.state_trades_size = self.config.get("STATE_TRADES_SIZE", 200)
+        # Solde mis en cache : relu après chaque trade résolu ou au-delà de BALANCE_MAX_AGE_SECONDS, jamais par le statut
+        self.balance = None
+        self.balance_read_at = None
+        self.balance_max_age_seconds = self.config.get("BALANCE_MAX_AGE_SECONDS", 300)
+        self._balance_stale = True
+        # Canal de contrôle Redis (stop, pause/reprise, configuration à chaud) : commandes appliquées par la boucle
+        # du bot à l'itération suivante, quel que soit le worker qui les envoie
+        self.control = ControlListener(self.config.get("REDIS_URL"), self.config.get("BOT_ID", "default"))
+        self.is_paused = False # En pause : ticks et bougies suivis, aucune nouvelle décision de trading
+        self.stop_requested = False # Arrêt demandé (canal de contrôle ou superviseur), par opposition à un crash
+        self.human_typing = self.config.get("HUMAN_TYPING", False) # Frappe caractère par caractère avec délais aléatoires
+        # Modèle vérifié du panneau de trading : les actions déjà appliquées ne sont pas renvoyées
+        self.panel = TradingPanelState(self.config.get("PANEL_VERIFY_INTERVAL_SECONDS", 60), monotonic=self.clock.monotonic)
         self.is_running = False
         self._initialize_timestamps()
         logger.info("🤖 TradingBot initialisé avec la configuration : %s", self.config)
 
-    def _load_default_config(self):
+    @staticmethod
+    def _load_default_config():
         """
         ⚙️ Charge la configuration par défaut si aucune n'est fournie.
         @returns {dict} - La configuration par défaut.
@@ -80,19 +209,51 @@ class TradingBot:
             "TRADING_PERIOD_MINUTES": 1,
             "BET_SIZES": [1, 2, 5], # Exemple étendu
             "OFFSET_CANDLES": 2,
+            "INDICATORS": {"SMA_PERIOD": 20, "EMA_PERIOD": 9, "RSI_PERIOD": 14, "BOLLINGER_PERIOD": 20, "BOLLINGER_K": 2.0, "ATR_PERIOD": 14},
+            "SIGNAL_FILTERS": {}, # Ex: {"RSI_MAX": 70, "RSI_MIN": 30, "TREND_EMA": True, "MIN_ATR": 0.0001}
             "TIMEZONE": 'Etc/GMT-2',
             "BASE_URL": 'https://pocketoption.com',
             "CHROME_USER_AGENT": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36", # Mettre à jour
             "SELENIUM_COMMAND_EXECUTOR": None, # Pourrait être "http://selenium-hub:4444/wd/hub" avec Selenium Grid
+            "MIN_YIELD_PERCENT": 92,
+            "HUMAN_TYPING": False, # True : simule une frappe humaine (plus lent)
+            "UI_WAIT_TIMEOUT_SECONDS": 10,
+            "PANEL_VERIFY_INTERVAL_SECONDS": 60, # Re-vérification périodique du panneau de trading
+            "RUNTIME_MODE": "pipeline", # "pipeline" (étages en parallèle) ou "sequential" (boucle unique)
+            "SPILL_DIR": "spill", # Déversement JSONL des bougies/trades/actions au-delà de la rétention
+            "SPILL_MAX_BYTES": 50 * 1024 * 1024, # Taille max d'un fichier de déversement avant rotation
+            "SPILL_BACKUPS": 1, # Anciens fichiers gardés par store (le plus ancien est supprimé à la rotation)
+            "CAPTURE_PATH": None, # Ex: "captures/session.jsonl" : frames enregistrées pour le rejeu hors ligne
+            "TICK_CAPTURE_DIR": "ticks", # Segments binaires de tous les ticks décodés (None pour désactiver)
+            "TICK_CAPTURE_MAX_SEGMENTS": 168, # Rétention : une semaine de segments horaires...
+            "TICK_CAPTURE_MAX_BYTES": 2 * 1024 ** 3, # ...et 2 Go au plus ; les plus anciens sont supprimés à la rotation
+            "BOT_ID": "default", # Identifiant du bot dans les clés Redis publiées
+            "STATE_REFRESH_SECONDS": 10, # Republication périodique de l'état (les vues le jugent périmé après 3 manquées)
+            "STATE_TTL_CANDLES": 3, # Expiration des clés d'état, en bougies sans publication
+            "REDIS_URL": None, # Ex: "redis://redis:6379/0" : publication des métriques (endpoint Prometheus)
         }
 
     def _initialize_driver(self):
         """
         🚗 Initialise le driver Selenium. Peut être headless.
         """
+        if self.driver_factory is not None: # Driver fourni (rejeu hors ligne...)
+            self.driver = self.driver_factory()
+            logger.info("✅ Driver fourni par la fabrique: %s", type(self.driver).__name__)
+            return
+        self.driver = self._create_driver(self.config)
+
+    @staticmethod
+    def _create_driver(config):
+        """
+        🚗 Lance un driver Selenium (Chrome local ou Selenium Grid) selon la configuration.
+        Partagé avec le pool de drivers chauds.
+        @param {dict} config - La configuration du bot.
+        @returns {WebDriver} - Le driver.
+        """
         logger.info("🔧 Initialisation du driver Selenium...")
         options = Options()
-        if self.config.get("HEADLESS", True): # Par défaut headless pour le serveur
+        if config.get("HEADLESS", True): # Par défaut headless pour le serveur
             options.add_argument('--headless')
             options.add_argument('--disable-gpu') # Souvent nécessaire pour headless
         options.add_argument('--no-sandbox')
@@ -100,36 +261,52 @@ class TradingBot:
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_experimental_option('excludeSwitches', ['enable-automation'])
         options.add_experimental_option('useAutomationExtension', False)
-        if self.config.get("CHROME_USER_AGENT"):
-            options.add_argument(f"user-agent={self.config['CHROME_USER_AGENT']}")
+        if config.get("CHROME_USER_AGENT"):
+            options.add_argument(f"user-agent={config['CHROME_USER_AGENT']}")
         options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
 
-        if self.config.get("SELENIUM_COMMAND_EXECUTOR"):
-            logger.info("🌐 Connexion au Selenium Grid: %s", self.config["SELENIUM_COMMAND_EXECUTOR"])
-            self.driver = webdriver.Remote(
-                command_executor=self.config["SELENIUM_COMMAND_EXECUTOR"],
+        if config.get("SELENIUM_COMMAND_EXECUTOR"):
+            logger.info("🌐 Connexion au Selenium Grid: %s", config["SELENIUM_COMMAND_EXECUTOR"])
+            driver = webdriver.Remote(
+                command_executor=config["SELENIUM_COMMAND_EXECUTOR"],
                 options=options
             )
         else:
             # Assure-toi que chromedriver est dans le PATH ou spécifie le service
             # service = Service(executable_path='/path/to/chromedriver') # Si besoin
-            # self.driver = webdriver.Chrome(service=service, options=options)
+            # driver = webdriver.Chrome(service=service, options=options)
             logger.info("🌐 Connexion au Selenium via Chrome")
-            self.driver = webdriver.Chrome(options=options)
+            driver = webdriver.Chrome(options=options)
         
-        self.driver.maximize_window()
+        driver.maximize_window()
         logger.info("✅ Driver Selenium initialisé.")
+        return driver
 
     def _load_cookies_and_navigate(self):
         """
         🍪 Charge les cookies et navigue vers la page de trading.
         """
-        logger.info("🌍 Navigation vers: %s et chargement des cookies depuis %s", self.config["BASE_URL"], self.cookies_path)
-        self.driver.get(self.config["BASE_URL"])
-        self.driver.delete_all_cookies()
+        self._open_trading_page(self.driver, self.config, self.cookies_path, self.locators, self.ui_steps)
+
+    @staticmethod
+    def _open_trading_page(driver, config, cookies_path, locators=None, ui_steps=None):
+        """
+        🍪 Charge les cookies dans un driver et affiche la page de trading (panneau prêt).
+        Partagé avec le pool de drivers chauds.
+        @param {WebDriver} driver - Le driver.
+        @param {dict} config - La configuration du bot.
+        @param {str} cookies_path - Fichier de cookies du compte.
+        @param {LocatorRegistry|None} locators - Registre de locators (créé pour ce driver si absent).
+        @param {StepTimings|None} ui_steps - Mesure des étapes de l'interface.
+        """
+        locators = locators or LocatorRegistry(lambda: driver, wait_timeout=config.get("UI_WAIT_TIMEOUT_SECONDS", 10))
+        ui_steps = ui_steps or StepTimings()
+        logger.info("🌍 Navigation vers: %s et chargement des cookies depuis %s", config["BASE_URL"], cookies_path)
+        driver.get(config["BASE_URL"])
+        driver.delete_all_cookies()
 
         try:
-            with open(self.cookies_path, "r") as fichier:
+            with open(cookies_path, "r") as fichier:
                 cookies_json = json.load(fichier)
             for cookie in cookies_json:
                 cookie_data = {
@@ -143,44 +320,84 @@ class TradingBot:
                 if "expiry" in cookie and cookie["expiry"] is not None:
                     cookie_data["expiry"] = int(cookie["expiry"])
                 try:
-                    self.driver.add_cookie(cookie_data)
+                    driver.add_cookie(cookie_data)
                 except Exception as e:
                     logger.warning("⚠️ Impossible d'ajouter le cookie %s: %s", cookie.get("name"), e)
 
         except FileNotFoundError:
-            logger.error("❌ Fichier de cookies non trouvé: %s", self.cookies_path)
+            logger.error("❌ Fichier de cookies non trouvé: %s", cookies_path)
             raise
         except json.JSONDecodeError:
-            logger.error("❌ Erreur de décodage JSON du fichier de cookies: %s", self.cookies_path)
+            logger.error("❌ Erreur de décodage JSON du fichier de cookies: %s", cookies_path)
             raise
         
-        url = f'{self.config["BASE_URL"]}/en/cabinet/demo-quick-high-low/' # Configurable
+        url = f'{config["BASE_URL"]}{TRADING_PAGE_PATH}' # Configurable
         logger.info("🔄 Rechargement de la page avec les cookies: %s", url)
-        self.driver.get(url)
-        time.sleep(5) # Attendre que la page se charge bien
-
-        try: # Fermer la pop-up de félicitations si elle apparaît
-            close_congrats = self.driver.find_element(by=By.XPATH, value='/html/body/div[20]/div/div/div/a') # XPATH peut changer
+        with ui_steps.step("page_load"):
+            driver.get(url)
+            # Attendre que la page soit chargée et que le panneau de trading soit affiché (plutôt qu'un délai fixe)
+            locators.wait_until(lambda: driver.execute_script("return document.readyState") == "complete",
+                                message="Page de trading non chargée")
+            locators.wait_for("call_button", "visible")
+
+        try: # Fermer la pop-up de félicitations si elle apparaît (elle s'affiche avec le panneau, attente courte)
+            close_congrats = locators.wait_for("congrats_close", "clickable", timeout=1)
             close_congrats.click()
             logger.info("🎉 Pop-up 'Congratulations' fermée.")
         except Exception:
             logger.debug("Pas de pop-up 'Congratulations' trouvée.")
             pass
+
+    @staticmethod
+    def _trading_page_ready(driver):
+        """
+        🩺 Vérifie qu'un driver chaud est toujours sur la page de trading (session valide, page chargée)
+        et vide son tampon de logs de performance (frames accumulées hors de tout bot).
+        @param {WebDriver} driver - Le driver.
+        @returns {bool} - True si le driver peut être prêté.
+        """
+        ready_state, href = driver.execute_script("return [document.readyState, location.href]")
+        driver.get_log('performance')
+        return ready_state == "complete" and TRADING_PAGE_PATH in href
+
+    def _lease_warm_driver(self):
+        """
+        🏊 Emprunte un driver chaud (cookies chargés, page de trading affichée) au pool, s'il y en a un.
+        @returns {bool} - True si un driver a été obtenu ; sinon démarrage à froid.
+        """
+        if self.driver_pool is None or self.driver_factory is not None:
+            return False
+        if self.driver_pool.key is not None and self.driver_pool.key != driver_pool_key(self.cookies_path, self.config):
+            logger.warning("🏊 Pool de drivers préparé pour un autre compte ou d'autres options : démarrage à froid.")
+            return False
+        with self.ui_steps.step("driver_lease"):
+            pooled = self.driver_pool.lease(self.config.get("DRIVER_LEASE_TIMEOUT_SECONDS", 1.0))
+        if pooled is None:
+            logger.info("🏊 Aucun driver chaud disponible : démarrage à froid.")
+            return False
+        self.pooled_driver = pooled
+        self.driver = pooled.driver
+        logger.info("🏊 Driver chaud emprunté au pool (utilisation n°%s).", pooled.uses)
+        return True
     
     def _initialize_timestamps(self):
         """
         🕒 Initialise les horodatages de début et de fin de la bougie actuelle.
+        Une fenêtre déjà ouverte par l'agrégateur de la devise active est reprise telle quelle (jamais
+        réinitialisée : la bougie en cours et ses ticks sont conservés). Sinon, la fenêtre est alignée en
+        epoch ms sur la période, comme CandleBuilder, à partir de l'heure locale ; l'agrégateur, lui,
+        s'aligne sur son premier tick (heure serveur).
         """
-        self.current_candle_start_time = datetime.now(self.timezone).replace(second=0, microsecond=0)
-        if self.period_seconds > 0 and self.period_seconds < 60 : # Pour les périodes en secondes
-             # Aligner sur le multiple de self.period_seconds le plus proche
-            current_seconds = self.current_candle_start_time.second
-            seconds_to_subtract = current_seconds % self.period_seconds
-            self.current_candle_start_time = self.current_candle_start_time - timedelta(seconds=seconds_to_subtract)
-            self.current_candle_end_time = self.current_candle_start_time + timedelta(seconds=self.period_seconds)
-
-        else: # Pour les périodes en minutes
-            self.current_candle_end_time = self.current_candle_start_time + timedelta(minutes=self.trading_period_minutes)
+        with self.state_lock: # Fenêtre lue d'un bloc : l'étage bougies peut l'avancer en parallèle
+            builder = self.candle_builder
+            start_ms, end_ms = (builder.start_ms, builder.end_ms) if builder is not None else (None, None)
+        if start_ms is None:
+            period_ms = self._get_candle_period_seconds() * 1000
+            now_ms = int(self.clock.time_ms())
+            start_ms = now_ms - now_ms % period_ms
+            end_ms = start_ms + period_ms
+        self.current_candle_start_time = self._epoch_ms_to_datetime(start_ms)
+        self.current_candle_end_time = self._epoch_ms_to_datetime(end_ms)
         logger.info("🕯️ Bougie initiale: START=%s, END=%s (Période: %s min ou %s sec)", 
                     self.current_candle_start_time.strftime('%Y-%m-%d %H:%M:%S'), 
                     self.current_candle_end_time.strftime('%Y-%m-%d %H:%M:%S'),
@@ -188,102 +405,234 @@ class TradingBot:
                     self.period_seconds)
 
 
+    def _get_candle_period_seconds(self):
+        """
+        ⏲️ Durée d'une bougie en secondes (PERIOD si < 60 s, sinon TRADING_PERIOD_MINUTES).
+        @returns {int} - La durée en secondes.
+        """
+        if self.period_seconds > 0 and self.period_seconds < 60:
+            return self.period_seconds
+        return self.trading_period_minutes * 60
+
+    @staticmethod
+    def _datetime_to_epoch_ms(dt_object):
+        """
+        🕰️ Convertit un datetime (aware) en epoch en millisecondes.
+        @param {datetime|None} dt_object - Le datetime.
+        @returns {int|None} - L'epoch en ms.
+        """
+        return int(dt_object.timestamp() * 1000) if dt_object is not None else None
+
+    def _epoch_ms_to_datetime(self, epoch_ms):
+        """
+        🕰️ Convertit un epoch en millisecondes en datetime dans le timezone de la classe.
+        @param {int} epoch_ms - L'epoch en ms.
+        @returns {datetime} - Le datetime (aware).
+        """
+        return datetime.fromtimestamp(epoch_ms / 1000, self.timezone)
+
+    @property
+    def current_active_currency(self):
+        """
+        💱 Code de la devise active (ex: "EURUSD_otc").
+        """
+        return self._current_active_currency
+
+    @current_active_currency.setter
+    def current_active_currency(self, currency_code):
+        if currency_code == self._current_active_currency:
+            return
+        with self.state_lock: # L'étage bougies ne doit pas faire avancer le registre pendant le chargement
+            self._current_active_currency = currency_code
+            self.symbols.pin(currency_code) # La devise active n'est jamais évincée du registre
+            self._load_active_symbol_history()
+        self.state_publisher.mark_dirty()
+
+    @property
+    def active_symbol_state(self):
+        """
+        📦 État de la devise active dans le registre (lecture seule : jamais créé ici).
+        Créé et épinglé au changement de devise, il n'est donc jamais évincé ensuite.
+        @returns {SymbolState|None} - None tant qu'aucune devise n'est choisie.
+        """
+        return self.symbols.peek(self._current_active_currency)
+
+    @property
+    def tick_buffer(self):
+        """
+        🧮 Tampon circulaire des ticks de la devise active (None sans devise active).
+        """
+        state = self.active_symbol_state
+        return state.ticks if state is not None else None
+
+    @property
+    def candle_builder(self):
+        """
+        🧱 Agrégateur OHLC de la bougie en cours de la devise active (None sans devise active).
+        """
+        state = self.active_symbol_state
+        return state.builder if state is not None else None
+
+    def _load_active_symbol_history(self):
+        """
+        🔥 Charge l'historique déjà chaud de la devise active depuis le registre multi-devises :
+        bougies fermées (ohlc_store) et fenêtre de la bougie en cours.
+        """
+        state = self.symbols.get(self._current_active_currency)
+        if state is None: # Devise désélectionnée : rien à charger, nouvelle sélection à venir
+            self.ohlc_store.clear(None)
+            self.indicators.reset()
+            return
+        if self.last_server_time_ms is not None:
+            # Fermer la bougie en cours si le flux de ce symbole n'a pas encore franchi la frontière
+            self.symbols.advance(self._current_active_currency, self.last_server_time_ms)
+        self.ohlc_store.clear(self._current_active_currency)
+        self.indicators.reset()
+        for candle in state.candles:
+            candle_color = self._classify_candle(candle)
+            self.ohlc_store.append(candle, candle_color)
+            self.indicators.update(candle, candle_color) # Rechargement unique au changement de devise
+        if state.builder.start_ms is not None:
+            self.current_candle_start_time = self._epoch_ms_to_datetime(state.builder.start_ms)
+            self.current_candle_end_time = self._epoch_ms_to_datetime(state.builder.end_ms)
+        else:
+            self._initialize_timestamps()
+        logger.info("🔥 Historique chargé pour %s: %s bougies, %s ticks.", self._current_active_currency, len(state.candles), len(state.ticks))
+
+    def _classify_candle(self, candle):
+        """
+        🎨 Couleur d'une bougie fermée ("gray" pour une bougie gap).
+        @param {Candle} candle - La bougie.
+        @returns {str} - "green", "red" ou "gray".
+        """
+        return GAP_CANDLE_COLOR if candle.is_gap else self._get_candle_color(candle.open, candle.close)
+
+    @property
+    def ohlc_data(self):
+        """
+        📋 Historique OHLC de la devise active sous forme de DataFrame (copie construite à la demande,
+        hors du chemin critique ; la stratégie lit directement ohlc_store).
+        """
+        return pd.DataFrame(self.ohlc_store.last(), columns=["Open", "High", "Low", "Close", "Color", "Timestamp"])
+
+    @property
+    def price_history_stream(self):
+        """
+        📜 Historique des ticks de la devise active sous forme de DataFrame ["Time", "Price"].
+        Construit à la demande depuis le tampon circulaire (copie), hors de la boucle de ticks.
+        """
+        with self.state_lock: # Copie cohérente : l'étage bougies ajoute des ticks en parallèle
+            tick_buffer = self.tick_buffer
+            if tick_buffer is None:
+                return pd.DataFrame(columns=["Time", "Price"])
+            return tick_buffer.to_dataframe(self.timezone)
+
+    def _delegate_to_execution(self):
+        """
+        🧵 True si l'appel doit être confié à l'étage d'exécution (runtime en pipeline, appelant hors de cet étage).
+        """
+        return self.execution is not None and not self.execution.is_current_thread()
+
     def _set_position_amount(self, amount):
         """
         💰 Définit le montant de la mise.
         @param {str|int} amount - Le montant à miser.
         """
+        if self._delegate_to_execution():
+            self.execution.submit(self._set_position_amount, amount) # Dans l'ordre, avant l'éventuel ordre qui suit
+            return
+        if self.panel.matches("amount", amount):
+            logger.debug("💸 Montant %s déjà affiché, saisie évitée.", amount)
+            return
         try:
             logger.debug("💸 Tentative de définition du montant de la mise à : %s", amount)
             # Nouvelle méthode, plus fiable si le clavier virtuel n'est pas toujours là
-            bet_input = self.driver.find_element(By.XPATH,"/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[1]/div[2]/div[2]/div[1]/div/input")
-            bet_input.click() # Clique pour activer
-            time.sleep(0.2)
-            bet_input.send_keys(Keys.CONTROL + "a")
-            bet_input.send_keys(Keys.BACKSPACE)
-            time.sleep(0.1)
-            # Simuler la frappe humaine pour le montant
-            for char_amount in str(amount):
-                bet_input.send_keys(char_amount)
-                time.sleep(random.uniform(0.05, 0.15))
+            with self.ui_steps.step("set_amount"):
+                bet_input = self.locators.element("bet_amount_input")
+                bet_input.click() # Clique pour activer
+                bet_input.send_keys(Keys.CONTROL + "a")
+                bet_input.send_keys(Keys.BACKSPACE)
+                if self.human_typing:
+                    # Simuler la frappe humaine pour le montant (opt-in, HUMAN_TYPING)
+                    for char_amount in str(amount):
+                        bet_input.send_keys(char_amount)
+                        time.sleep(random.uniform(0.05, 0.15))
+                else:
+                    bet_input.send_keys(str(amount))
+            self.panel.confirm("amount", amount)
             logger.info("💵 Montant de la mise défini à : %s", amount)
             # Optionnel: cliquer ailleurs pour fermer le clavier si besoin
             # self.driver.find_element(By.TAG_NAME, "body").click() 
         except Exception as e:
+            self.panel.invalidate("amount") # État du champ inconnu, re-vérifié au prochain cycle
             logger.error("❌ Erreur lors de la définition du montant de la mise: %s", e)
             # self.save_debug_screenshot("set_amount_error") # Sauvegarder screenshot pour debug
 
     def _get_current_yield_and_select_best(self):
         """
-        📈 Vérifie le rendement actuel et sélectionne la meilleure devise si le rendement n'est pas de +92%.
+        📈 Vérifie le rendement actuel et sélectionne la devise au meilleur rendement s'il est sous MIN_YIELD_PERCENT.
+        Les lectures du DOM (panneau de trading, liste des actifs) se font chacune en un seul execute_script.
         @returns {bool} - True si le rendement est OK ou si une meilleure devise a été sélectionnée, False sinon.
         """
+        if self._delegate_to_execution():
+            try: # Appel bloquant pour l'étage stratégie uniquement (la suite de la logique dépend du résultat)
+                return self.execution.call(self._get_current_yield_and_select_best)
+            except Exception as e:
+                logger.error("❌ Vérification du rendement non exécutée: %s", e)
+                return False
+        started = time.perf_counter()
         try:
             logger.debug("🔍 Vérification du rendement actuel...")
-            # current_label_element = self.driver.find_element(By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[1]/div[1]/div[1]/div/a/div/span")
-            # current_currency_name = current_label_element.text
-            # Attention, le XPATH pour le % peut changer s'il y a des popups ou des changements de layout
-            current_percent_element = self.driver.find_element(By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[2]/div[1]/div[2]/div/div/div[1]")
-            current_percent_text = current_percent_element.text
-            logger.info("📊 Rendement actuel affiché : %s", current_percent_text)
-
-            if current_percent_text != "+92%": # Le rendement cible est configurable
-                logger.warning("📉 Rendement (%s) non optimal. Tentative de changement de devise.", current_percent_text)
+            panel = self.dom.read_trading_panel() # Actif courant + rendement + montant, un aller-retour
+            self.panel.reconcile({"asset": panel["asset"], "amount": panel["amount"]}) # Vérification gratuite du modèle
+            logger.info("📊 Rendement actuel affiché : %s", panel["yield_text"])
+
+            if panel["yield_percent"] is None or panel["yield_percent"] < self.min_yield_percent: # Le rendement cible est configurable
+                logger.warning("📉 Rendement (%s) non optimal. Tentative de changement de devise.", panel["yield_text"])
                 self._reset_trade_state() # Réinitialiser l'état de trading
                 
-                currency_div = self.driver.find_element(By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[1]/div[1]/div[1]/div") # Bouton pour ouvrir la liste des devises
-                currency_div.click()
-                time.sleep(1) # Attendre l'ouverture du modal
-
-                currency_nav_tab = self.driver.find_element(By.XPATH, "/html/body/div[9]/div/div/div/div[1]/div/div[1]/a[1]") # Onglet "Currencies"
-                currency_nav_tab.click()
-                time.sleep(1)
-
-                # Recherche de la première devise avec +92%
-                # Les XPATHs ici sont très fragiles et dépendent de la structure de la page.
-                # Il est préférable de boucler sur les éléments de la liste.
+                with self.ui_steps.step("open_asset_modal"):
+                    currency_div = self.locators.element("asset_selector") # Bouton pour ouvrir la liste des devises
+                    currency_div.click()
+                    currency_nav_tab = self.locators.wait_for("asset_currencies_tab", "clickable") # Onglet "Currencies"
+                    currency_nav_tab.click()
+                    self.locators.wait_for("asset_list_items", "present") # Liste des devises affichée
+
+                # Toute la liste (nom, rendement, disponibilité) est lue en un seul execute_script
                 try:
-                    currency_list_items = self.driver.find_elements(By.XPATH, "/html/body/div[9]/div/div/div/div[2]/div[2]/div/div/div[1]/ul/li")
-                    found_best_currency = False
-                    for item_li in currency_list_items:
-                        try:
-                            label_element = item_li.find_element(By.XPATH, ".//a/span[3]") # Nom de la devise
-                            yield_element = item_li.find_element(By.XPATH, ".//a/span[4]/span") # Rendement
-
-                            if yield_element.text == "+92%":
-                                currency_name_on_site = label_element.text
-                                if currency_name_on_site in self.currencies_map:
-                                    self.current_active_currency = self.currencies_map[currency_name_on_site]
-                                    logger.info("✅ Meilleure devise trouvée : %s (%s) avec rendement %s", currency_name_on_site, self.current_active_currency, yield_element.text)
-                                    item_li.click() # Sélectionner cette devise
-                                    time.sleep(1)
-                                    # Fermer le modal de sélection de devise (souvent avec Echap ou un bouton croix)
-                                    self.driver.find_element(By.XPATH, "/html/body/div[9]/div/div/div/div[2]/div[1]/div[1]/input").send_keys(Keys.ESCAPE) # Champ de recherche, puis Echap
-                                    found_best_currency = True
-                                    self.is_currency_changing = True # Indiquer qu'un changement a eu lieu
-                                    self.last_currency_change_time = datetime.now()
-                                    break 
-                                else:
-                                    logger.warning("⚠️ Devise %s avec +92%% non trouvée dans currencies_map.", currency_name_on_site)
-                        except Exception as e_item:
-                            logger.debug("Erreur mineure lors de l'itération sur un item de devise: %s", e_item)
-                            continue
-                    
-                    if not found_best_currency:
-                        logger.error("❌ Aucune devise avec +92%% de rendement trouvée ou mappée.")
+                    with self.ui_steps.step("read_assets"):
+                        assets = self.dom.read_assets()
+                    best_asset = self._select_best_asset(assets)
+                    if best_asset is None:
+                        logger.error("❌ Aucune devise disponible avec au moins %s%% de rendement trouvée ou mappée.", self.min_yield_percent)
                         # Fermer le modal quand même
                         try:
-                            self.driver.find_element(By.XPATH, "/html/body/div[9]/div/div/div/div[2]/div[1]/div[1]/input").send_keys(Keys.ESCAPE)
+                            self.locators.element("asset_search_input").send_keys(Keys.ESCAPE)
                         except: pass
                         return False
+
+                    self.current_active_currency = self.currencies_map[best_asset["name"]]
+                    logger.info("✅ Meilleure devise trouvée : %s (%s) avec rendement %s", best_asset["name"], self.current_active_currency, best_asset["yield_text"])
+                    with self.ui_steps.step("select_asset"):
+                        best_asset["element"].click() # Sélectionner cette devise
+                        self.panel.confirm("asset", best_asset["name"])
+                        try: # Attendre que le panneau de trading affiche la nouvelle devise
+                            self.locators.wait_until(lambda: self.dom.read_texts("current_asset_label").get("current_asset_label") == best_asset["name"],
+                                                     timeout=5)
+                        except TimeoutException:
+                            logger.warning("🟡 Le panneau n'affiche pas encore %s, on continue.", best_asset["name"])
+                        # Fermer le modal de sélection de devise (souvent avec Echap ou un bouton croix)
+                        self.locators.element("asset_search_input").send_keys(Keys.ESCAPE) # Champ de recherche, puis Echap
+                    self.is_currency_changing = True # Indiquer qu'un changement a eu lieu
+                    self.last_currency_change_time = self.clock.now()
                 except Exception as e_list:
+                    self.panel.invalidate("asset")
                     logger.error("❌ Erreur lors de la recherche de la meilleure devise: %s", e_list)
                     # self.save_debug_screenshot("get_yield_error")
                     return False
-            else: # Rendement déjà à +92%
+            else: # Rendement suffisant
                 # Vérifier si la devise actuelle est correctement enregistrée
-                current_label_element = self.driver.find_element(By.XPATH, "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[1]/div[1]/div[1]/div/a/div/span")
-                current_currency_name_on_site = current_label_element.text
+                current_currency_name_on_site = panel["asset"]
                 if current_currency_name_on_site in self.currencies_map:
                     mapped_code = self.currencies_map[current_currency_name_on_site]
                     if self.current_active_currency != mapped_code:
@@ -291,7 +640,7 @@ class TradingBot:
                         self._reset_trade_state() # Important si la devise a changé sans qu'on le sache
                         self.current_active_currency = mapped_code
                         self.is_currency_changing = True
-                        self.last_currency_change_time = datetime.now()
+                        self.last_currency_change_time = self.clock.now()
                 else:
                     logger.warning("⚠️ Devise actuelle %s non trouvée dans currencies_map. Risque de désynchronisation.", current_currency_name_on_site)
                     self.current_active_currency = None # Forcer une re-sélection au prochain cycle peut-être
@@ -304,6 +653,25 @@ class TradingBot:
             logger.error("❌ Erreur critique dans _get_current_yield_and_select_best: %s", e)
             # self.save_debug_screenshot("critical_yield_error")
             return False
+        finally:
+            self.hot_metrics.observe("select_best_yield", time.perf_counter() - started)
+
+    def _select_best_asset(self, assets):
+        """
+        🏆 Choisit l'actif disponible, présent dans currencies_map, au rendement le plus élevé (>= MIN_YIELD_PERCENT).
+        @param {list} assets - Les actifs lus par DomReader.read_assets().
+        @returns {dict|None} - L'actif retenu, ou None.
+        """
+        candidates = [
+            asset for asset in assets
+            if asset.get("available") and asset.get("yield_percent") is not None
+            and asset["yield_percent"] >= self.min_yield_percent and asset.get("name") in self.currencies_map
+        ]
+        unmapped = [asset["name"] for asset in assets if asset.get("yield_percent") is not None
+                    and asset["yield_percent"] >= self.min_yield_percent and asset.get("name") not in self.currencies_map]
+        if unmapped:
+            logger.debug("Devises à rendement suffisant absentes de currencies_map: %s", unmapped)
+        return max(candidates, key=lambda asset: asset["yield_percent"], default=None)
 
     def _get_candle_color(self, open_price, close_price):
         """
@@ -317,89 +685,94 @@ class TradingBot:
         ⏱️ Configure le délai d'expiration du trade. (Adapté de ton code)
         @param {int} minutes - Le nombre de minutes pour l'expiration.
         """
+        if self._delegate_to_execution():
+            self.execution.submit(self._set_trade_timeout, minutes)
+            return
+        if self.panel.matches("expiry_minutes", minutes) and self.panel.get("auto_switch") is True:
+            logger.debug("⏳ Expiration déjà configurée à %s minute(s), modal non rouvert.", minutes)
+            return
         try:
-            logger.debug("⏳ Configuration du délai d'expiration à %s minute(s)...", minutes)
-            # Clique sur l'icône pour changer le mode d'expiration si nécessaire
-            svg_element = self.driver.find_element(By.CSS_SELECTOR, "#put-call-buttons-chart-1 > div > div.blocks-wrap > div.block.block--expiration-inputs > div.block__control.control > div.control-buttons__wrapper > div > a > div > div > svg")
-            if svg_element.get_attribute("data-src") != "/themes/cabinet/svg/icons/trading-panel/exp-mode-2.svg":
-                svg_element.click()
-                time.sleep(0.5) # Attente de l'ouverture du modal
-
-            # Configuration du temps dans le modal
-            # Les XPATH/CSS Selectors sont spécifiques à l'UI de PocketOption et peuvent casser.
-            # Boucle pour gérer les cas où le modal n'est pas immédiatement prêt
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    # Heures à zéro
-                    hour_input = self.driver.find_element(By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__in > div:nth-child(1) > div > input")
-                    hour_input.click()
-                    hour_input.send_keys(Keys.CONTROL + "a")
-                    hour_input.send_keys(Keys.BACKSPACE) # Efface
-                    hour_input.send_keys("0") # Met à 0 heure
-                    time.sleep(0.1)
+            with self.ui_steps.step("set_expiry"):
+                logger.debug("⏳ Configuration du délai d'expiration à %s minute(s)...", minutes)
+                # Clique sur l'icône pour changer le mode d'expiration si nécessaire
+                svg_element = self.locators.element("expiration_mode_icon")
+                if svg_element.get_attribute("data-src") != "/themes/cabinet/svg/icons/trading-panel/exp-mode-2.svg":
+                    svg_element.click() # Ouvre le modal (attendu ci-dessous)
+
+                # Configuration du temps dans le modal
+                # Boucle pour gérer les cas où le modal n'est pas immédiatement prêt
+                max_retries = 3
+                for attempt in range(max_retries):
+                    try:
+                        # Heures à zéro (attend que le modal soit affiché)
+                        hour_input = self.locators.wait_for("expiry_hours_input", "visible")
+                        hour_input.click()
+                        hour_input.send_keys(Keys.CONTROL + "a")
+                        hour_input.send_keys(Keys.BACKSPACE) # Efface
+                        hour_input.send_keys("0") # Met à 0 heure
                     
-                    # Mettre les minutes
-                    # D'abord, s'assurer que c'est à 0 ou 1, puis cliquer sur + ou -
-                    # Il est plus simple de viser directement l'input des minutes
-                    minute_input = self.driver.find_element(By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__in > div:nth-child(2) > div > input")
-                    minute_input.click()
-                    minute_input.send_keys(Keys.CONTROL + "a")
-                    minute_input.send_keys(Keys.BACKSPACE)
-                    minute_input.send_keys(str(minutes)) # Met les minutes voulues
-                    time.sleep(0.1)
-
-                    # Secondes à zéro
-                    second_input = self.driver.find_element(By.CSS_SELECTOR, "#modal-root > div > div > div > div.trading-panel-modal__in > div:nth-child(3) > div > input")
-                    second_input.click()
-                    second_input.send_keys(Keys.CONTROL + "a")
-                    second_input.send_keys("00")
-                    time.sleep(0.1)
-
-                    # Gérer "Auto Rollover" / "Ouverture automatique"
-                    # ... (ton code pour auto_open)
-                    # Il faut une méthode plus robuste pour vérifier l'état du switch
-                    auto_open_label = self.driver.find_element(By.XPATH,'//*[@id="modal-root"]/div/div/div/div[2]/div/label')
-                    class_attr = auto_open_label.get_attribute('class')
-                    if 'is-checked' not in class_attr: # Si ce n'est pas coché
-                         auto_switch_thumb = self.driver.find_element(By.CSS_SELECTOR,'#modal-root > div > div > div > div.trading-panel-modal__dops.dops.dops-with-timeframes > div > label > div.mdl-switch__thumb > span')
-                         auto_switch_thumb.click()
-                         time.sleep(0.2)
-                         # Sélectionner le timeframe (ex: M1)
-                         # Ce sélecteur est fragile, il faut s'assurer que 'opened' est bien là
-                         # Il faut s'assurer que le timeframe sélectionné correspond à self.trading_period_minutes
-                         # Exemple pour M1:
-                         # time_frame_to_select_xpath = f"//div[contains(@class, 'dops__timeframes')]//div[contains(text(), 'M{self.trading_period_minutes}')]"
-                         # self.driver.find_element(By.XPATH, time_frame_to_select_xpath).click()
-                         # Pour l'instant, on va simplifier en supposant que M1 est le 2e enfant :
-                         select_time = self.driver.find_element(By.CSS_SELECTOR,'#modal-root > div > div > div > div.trading-panel-modal__dops.dops.dops-with-timeframes.opened > div.dops__timeframes > div:nth-child(2)') # M1
-                         select_time.click()
-                         time.sleep(0.2)
-
-                    # Cliquer sur le bouton "Time" (qui est en fait le champ pour fermer le modal)
-                    # Le XPATH que tu avais /html/body/div[4]/... correspond au bouton sur la page principale, pas dans le modal.
-                    # Il faut trouver le bouton de confirmation ou simplement simuler Echap.
-                    # Pour l'instant, on suppose que la modification des champs suffit et le modal se ferme ou que l'action suivante le ferme.
-                    # Ou, on peut essayer de cliquer sur le champ d'heure pour appliquer.
-                    hour_input.click() # Peut aider à valider/fermer
-                    logger.info("✅ Délai d'expiration configuré.")
-                    break # Sortir de la boucle retry
-                except Exception as e_modal:
-                    logger.warning("🟡 Tentative %s/%s: Erreur lors de la configuration du délai: %s. Réessai...", attempt + 1, max_retries, e_modal)
-                    if attempt + 1 == max_retries:
-                        logger.error("❌ Échec final de la configuration du délai d'expiration.")
-                        # self.save_debug_screenshot("set_timeout_error")
-                        raise
-                    time.sleep(1) # Attendre avant de réessayer
+                        # Mettre les minutes
+                        # D'abord, s'assurer que c'est à 0 ou 1, puis cliquer sur + ou -
+                        # Il est plus simple de viser directement l'input des minutes
+                        minute_input = self.locators.element("expiry_minutes_input")
+                        minute_input.click()
+                        minute_input.send_keys(Keys.CONTROL + "a")
+                        minute_input.send_keys(Keys.BACKSPACE)
+                        minute_input.send_keys(str(minutes)) # Met les minutes voulues
+
+                        # Secondes à zéro
+                        second_input = self.locators.element("expiry_seconds_input")
+                        second_input.click()
+                        second_input.send_keys(Keys.CONTROL + "a")
+                        second_input.send_keys("00")
+
+                        # Gérer "Auto Rollover" / "Ouverture automatique"
+                        # ... (ton code pour auto_open)
+                        # Il faut une méthode plus robuste pour vérifier l'état du switch
+                        auto_open_label = self.locators.element("auto_switch_label")
+                        class_attr = auto_open_label.get_attribute('class')
+                        auto_switch_clicked = 'is-checked' not in class_attr
+                        if auto_switch_clicked: # Si ce n'est pas coché
+                             auto_switch_thumb = self.locators.element("auto_switch_thumb")
+                             auto_switch_thumb.click()
+                             # Sélectionner le timeframe (ex: M1)
+                             # Ce sélecteur est fragile, il faut s'assurer que 'opened' est bien là
+                             # Il faut s'assurer que le timeframe sélectionné correspond à self.trading_period_minutes
+                             # Exemple pour M1:
+                             # time_frame_to_select_xpath = f"//div[contains(@class, 'dops__timeframes')]//div[contains(text(), 'M{self.trading_period_minutes}')]"
+                             # self.driver.find_element(By.XPATH, time_frame_to_select_xpath).click()
+                             # Pour l'instant, on va simplifier en supposant que M1 est le 2e enfant :
+                             select_time = self.locators.wait_for("timeframe_m1", "clickable") # M1, affiché une fois le switch ouvert
+                             select_time.click()
+
+                        # Cliquer sur le bouton "Time" (qui est en fait le champ pour fermer le modal)
+                        # Le XPATH que tu avais /html/body/div[4]/... correspond au bouton sur la page principale, pas dans le modal.
+                        # Il faut trouver le bouton de confirmation ou simplement simuler Echap.
+                        # Pour l'instant, on suppose que la modification des champs suffit et le modal se ferme ou que l'action suivante le ferme.
+                        # Ou, on peut essayer de cliquer sur le champ d'heure pour appliquer.
+                        hour_input.click() # Peut aider à valider/fermer
+                        self.panel.confirm("expiry_minutes", minutes)
+                        self.panel.confirm("auto_switch", True, applied=auto_switch_clicked)
+                        logger.info("✅ Délai d'expiration configuré.")
+                        break # Sortir de la boucle retry
+                    except Exception as e_modal:
+                        logger.warning("🟡 Tentative %s/%s: Erreur lors de la configuration du délai: %s. Réessai...", attempt + 1, max_retries, e_modal)
+                        if attempt + 1 == max_retries:
+                            logger.error("❌ Échec final de la configuration du délai d'expiration.")
+                            # self.save_debug_screenshot("set_timeout_error")
+                            raise
+                        # Pas de pause fixe : la tentative suivante attend que le modal soit affiché
             
-            # S'assurer que le modal est fermé, par exemple en cliquant sur le body
-            # self.driver.find_element(By.TAG_NAME, "body").click()
-            # Ou en envoyant Echap au champ principal de mise
-            bet_input_main = self.driver.find_element(By.XPATH,"/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[1]/div[2]/div[2]/div[1]/div/input")
-            bet_input_main.send_keys(Keys.ESCAPE)
+                # S'assurer que le modal est fermé, par exemple en cliquant sur le body
+                # self.driver.find_element(By.TAG_NAME, "body").click()
+                # Ou en envoyant Echap au champ principal de mise
+                bet_input_main = self.locators.element("bet_amount_input")
+                bet_input_main.send_keys(Keys.ESCAPE)
 
 
         except Exception as e:
+            self.panel.invalidate("expiry_minutes")
+            self.panel.invalidate("auto_switch")
             logger.error("❌ Erreur critique dans _set_trade_timeout: %s", e)
             # self.save_debug_screenshot("critical_timeout_error")
             raise
@@ -426,47 +799,179 @@ class TradingBot:
 
     def get_current_balance(self):
         """
-        🏦 Récupère le solde actuel du compte.
+        🏦 Lit le solde actuel du compte dans la page et met à jour le solde en cache.
         @returns {float|None} - Le solde, ou None en cas d'erreur.
         """
         try:
-            balance_element = self.driver.find_element(By.XPATH,"/html/body/div[4]/div[1]/header/div[3]/div[3]/div/div[2]/div[1]/span")
-            balance_text = balance_element.text.replace('$', '').replace(',', '').strip() # Nettoyer le formatage
-            logger.info("💰 Solde actuel: %s", balance_text)
-            return float(balance_text)
+            with self.driver_lock: # Partagé avec l'étage d'exécution
+                balance = self.dom.read_balance() # Un seul execute_script
+            if balance is None:
+                raise ValueError("solde absent ou illisible")
+            logger.info("💰 Solde actuel: %s", balance)
+            self.balance = balance
+            self.balance_read_at = self.clock.now()
+            self._balance_stale = False
+            self.state_publisher.mark_dirty()
+            return balance
         except Exception as e:
             logger.error("❌ Erreur lors de la récupération du solde: %s", e)
             # self.save_debug_screenshot("get_balance_error")
             return None
 
+    def _refresh_balance_if_stale(self):
+        """
+        🏦 Relit le solde s'il a pu changer (trade résolu) ou si le cache est trop ancien.
+        En runtime pipeline, la lecture est confiée à l'étage d'exécution (jamais sur l'étage stratégie).
+        """
+        if not self._balance_stale and self.balance_read_at is not None \
+                and (self.clock.now() - self.balance_read_at).total_seconds() < self.balance_max_age_seconds:
+            return
+        self._balance_stale = False # Une seule lecture en file, même si l'exécution est en retard
+        if self._delegate_to_execution():
+            self.execution.submit(self.get_current_balance)
+            return
+        self.get_current_balance()
+
     def _take_position(self, direction_color):
         """
         🚀 Place un ordre (CALL pour green, PUT pour red).
         @param {str} direction_color - "green" (achat/CALL) ou "red" (vente/PUT).
         """
+        if self._delegate_to_execution():
+            self.execution.submit(self._take_position, direction_color)
+            return
         try:
-            xpath_selector = ""
             if direction_color == 'green':
-                xpath_selector = "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[2]/div[2]/div[1]/a" # Bouton CALL/UP
                 logger.info("⬆️ Placement d'un ordre CALL (green)...")
             elif direction_color == 'red':
-                xpath_selector = "/html/body/div[4]/div[2]/div[3]/div/div/div/div[1]/div/div[5]/div/div/div[2]/div/div[2]/div[2]/div[2]/a" # Bouton PUT/DOWN
                 logger.info("⬇️ Placement d'un ordre PUT (red)...")
             else:
                 logger.error("❌ Couleur de direction invalide pour _take_position: %s", direction_color)
                 return
 
-            position_button = self.driver.find_element(By.XPATH, xpath_selector)
-            position_button.click()
+            # Handle mis en cache (résolu au pré-armement), re-résolu automatiquement s'il est périmé
+            with self.ui_steps.step("take_position"):
+                self._find_position_button(direction_color).click()
+            self.hot_metrics.inc("orders")
+            self.state_publisher.mark_dirty()
+            boundary_to_click_ms = self._record_boundary_to_click()
             # Log l'action
-            self.actions_log[datetime.now()] = {"direction": direction_color, "amount": self.active_bet_details['amount'] if self.active_bet_details else "N/A"}
-            logger.info("✅ Ordre %s placé.", direction_color.upper())
+            self.actions_log.append(ActionRecord(self.clock.time_ms(), direction_color, self.active_bet_details['amount'] if self.active_bet_details else "N/A", boundary_to_click_ms))
+            logger.info("✅ Ordre %s placé (%s ms après la frontière de bougie).", direction_color.upper(), boundary_to_click_ms)
 
         except Exception as e:
+            self.panel.invalidate() # L'état du panneau n'est plus sûr : re-vérification au prochain cycle
             logger.error("❌ Erreur lors de la prise de position (%s): %s", direction_color, e)
             # self.save_debug_screenshot(f"take_position_{direction_color}_error")
             # Il faudrait gérer ici si le trade n'a pas pu être placé (ex: boutons désactivés)
 
+    def _find_position_button(self, direction_color):
+        """
+        🔎 Résout le bouton d'ordre CALL (green) ou PUT (red).
+        @param {str} direction_color - "green" ou "red".
+        @returns {CachedElement} - Le bouton.
+        """
+        return self.locators.element("call_button" if direction_color == 'green' else "put_button")
+
+    def _record_boundary_to_click(self):
+        """
+        ⏱️ Mesure la latence frontière de bougie -> clic (heure serveur estimée) et l'attache au pari en cours.
+        @returns {float|None} - La latence en ms, ou None si aucune frontière n'est connue.
+        """
+        if self.last_closed_boundary_ms is None:
+            return None
+        latency_ms = round(self.server_clock.now_ms() - self.last_closed_boundary_ms, 3)
+        self.boundary_to_click_latency.record(latency_ms)
+        if self.active_bet_details is not None:
+            self.active_bet_details['boundary_to_click_ms'] = latency_ms
+        return latency_ms
+
+    def _expected_next_bet_amount(self, candle_color):
+        """
+        🔮 Montant que la logique de trading misera si la bougie en cours se ferme avec cette couleur.
+        Reproduit les règles de _apply_trade_logic (série d'offset, Martingale) sans rien modifier.
+        @param {str} candle_color - Couleur provisoire de la bougie en cours.
+        @returns {int|None} - Le montant, ou None si aucun ordre n'est attendu.
+        """
+        if not self.is_trade_active_now:
+            if self.indicators.streak.peek(candle_color) < self.trading_offset_candles:
+                return None
+            return self.bet_size_tiers[0]
+        if self.active_bet_details is None or candle_color == self.active_bet_details['color_traded']:
+            return self.bet_size_tiers[0]
+        next_index = self.current_bet_index + 1
+        return self.bet_size_tiers[next_index] if next_index < len(self.bet_size_tiers) else None
+
+    def _verify_panel_state(self):
+        """
+        🔁 Re-vérifie le modèle du panneau de trading quand il est dû (périodiquement ou après une erreur) :
+        actif et montant sont relus en un seul execute_script, l'expiration est ré-appliquée si elle est inconnue.
+        """
+        if not self.driver or not self.panel.needs_verification():
+            return
+        if self._delegate_to_execution():
+            self.panel.retry_verification_in(5) # Une seule vérification en file à la fois
+            self.execution.submit(self._verify_panel_state_now)
+            return
+        self._verify_panel_state_now()
+
+    def _verify_panel_state_now(self):
+        """
+        🔍 Relit le panneau de trading et ré-applique l'expiration si elle est inconnue (étage d'exécution).
+        """
+        try:
+            panel = self.dom.read_trading_panel()
+            self.panel.reconcile({"asset": panel["asset"], "amount": panel["amount"]})
+            if self.panel.get("expiry_minutes") is None or self.panel.get("auto_switch") is None:
+                self._set_trade_timeout(minutes=self.trading_period_minutes)
+        except Exception as e:
+            self.panel.retry_verification_in(5)
+            logger.warning("🟡 Vérification de l'état du panneau impossible: %s", e)
+
+    def _maybe_arm_order(self):
+        """
+        🎯 Pré-arme l'ordre ORDER_ARM_LEAD_MS avant la fin de la bougie en cours (heure serveur estimée) :
+        saisit le montant attendu d'après la couleur provisoire de la bougie et résout les boutons
+        CALL/PUT. À la confirmation du signal, _take_position n'a plus qu'à cliquer.
+        """
+        if not self.driver or self.is_paused or not self.server_clock.is_synchronized:
+            return
+        with self.state_lock: # Instantané de la bougie en cours : l'étage bougies la met à jour en parallèle
+            builder = self.candle_builder
+            if builder is None or builder.end_ms is None:
+                return
+            boundary_ms, current = builder.end_ms, builder.current
+        if self.armed_order and self.armed_order['boundary_ms'] == boundary_ms:
+            return
+        if self.server_clock.now_ms() < boundary_ms - self.order_arm_lead_ms:
+            return
+
+        provisional_color = self._get_candle_color(current.open, current.close) if current.ticks else None
+        amount = self._expected_next_bet_amount(provisional_color) if provisional_color else None
+        armed_order = {'boundary_ms': boundary_ms, 'amount': None, 'buttons': {}}
+        self.armed_order = armed_order # Frontière marquée tout de suite : pas de second pré-armement
+        if self._delegate_to_execution():
+            self.execution.submit(self._prepare_armed_order, armed_order, amount)
+        else:
+            self._prepare_armed_order(armed_order, amount)
+
+    def _prepare_armed_order(self, armed_order, amount):
+        """
+        🖱️ Partie interface du pré-armement : saisit le montant attendu et résout les boutons CALL/PUT.
+        @param {dict} armed_order - L'ordre pré-armé à compléter.
+        @param {int|None} amount - Le montant attendu, ou None si aucun ordre n'est prévu.
+        """
+        try:
+            if amount is not None:
+                self._set_position_amount(amount) # Sans effet si le montant est déjà affiché
+            armed_order['amount'] = self.panel.get("amount")
+            for direction_color in ('green', 'red'):
+                armed_order['buttons'][direction_color] = self._find_position_button(direction_color)
+            logger.debug("🎯 Ordre pré-armé pour la frontière %s (montant %s).", armed_order['boundary_ms'], armed_order['amount'])
+        except Exception as e:
+            logger.warning("🟡 Pré-armement de l'ordre impossible: %s", e)
+
+    @timed_stage("apply_trade_logic")
     def _apply_trade_logic(self, last_formed_candle_color):
         """
         🧠 Applique la logique de trading basée sur la couleur de la dernière bougie formée.
@@ -474,16 +979,21 @@ class TradingBot:
         """
         logger.debug("🚦 Application de la logique de trading avec la dernière bougie: %s", last_formed_candle_color)
         
-        # Vérifier si on a assez de bougies pour la logique d'offset
-        if len(self.ohlc_data) < self.trading_offset_candles:
-            logger.debug("📉 Pas assez de bougies (%s/%s) pour la logique d'offset. Attente...", len(self.ohlc_data), self.trading_offset_candles)
+        # Vérifier si on a assez de bougies pour la logique d'offset (fenêtre bornée, O(1) par bougie)
+        streak = self.indicators.streak
+        last_colors = list(streak.recent)
+        if len(last_colors) < self.trading_offset_candles:
+            logger.debug("📉 Pas assez de bougies (%s/%s) pour la logique d'offset. Attente...", len(last_colors), self.trading_offset_candles)
             return
 
-        last_colors = list(self.ohlc_data['Color'].tail(self.trading_offset_candles))
         logger.info("📊 Dernières %s couleurs de bougies: %s", self.trading_offset_candles, last_colors)
 
-        # Condition pour initier une série de trades
-        if not self.is_trade_active_now and len(set(last_colors)) == 1:
+        # Condition pour initier une série de trades : série d'offset, confirmée par les filtres d'indicateurs
+        if not self.is_trade_active_now and streak.length >= self.trading_offset_candles:
+            confirmed, blocking_filter = self.indicators.confirms(streak.color, self.signal_filters)
+            if not confirmed:
+                logger.info("🧮 Série de %s %s non confirmée par les indicateurs (%s). Pas de trade.", streak.length, streak.color, blocking_filter)
+                return
             self.is_trade_active_now = True
             logger.info("▶️ Condition de trade (série de %s %s) rencontrée. Activation de la séquence de trading.", self.trading_offset_candles, last_colors[0])
             self.current_bet_index = 0 # Réinitialiser l'index de mise au début d'une nouvelle série
@@ -500,9 +1010,16 @@ class TradingBot:
                 self._reset_trade_state()
                 return
             
-            # Si la devise a changé, on saute ce cycle de trading pour laisser le temps à la nouvelle devise de charger ses données
+            # Si la devise a changé et que son historique est déjà chaud (registre multi-devises), la bascule est instantanée.
+            # Sinon, on saute ce cycle de trading pour laisser le temps à la nouvelle devise de charger ses données
+            warm_colors = list(self.indicators.streak.recent) if self.is_currency_changing else []
+            if len(warm_colors) == self.trading_offset_candles:
+                self.is_currency_changing = False
+                last_colors = warm_colors
+                target_trade_color = last_colors[0]
+                logger.info("⚡ Historique de %s déjà chaud (%s bougies). Dernières couleurs: %s", self.current_active_currency, len(self.ohlc_store), last_colors)
             if self.is_currency_changing:
-                if (datetime.now() - self.last_currency_change_time).total_seconds() < (self.period_seconds * 2 if self.period_seconds > 0 else self.trading_period_minutes * 60 * 2): # Attendre au moins 2 périodes
+                if (self.clock.now() - self.last_currency_change_time).total_seconds() < (self.period_seconds * 2 if self.period_seconds > 0 else self.trading_period_minutes * 60 * 2): # Attendre au moins 2 périodes
                     logger.info("⏳ Changement de devise récent. Attente de stabilisation des données pour %s.", self.current_active_currency)
                     # Ne pas réinitialiser is_trade_active_now ici, on veut continuer la série sur la nouvelle devise si possible
                     return 
@@ -530,13 +1047,12 @@ class TradingBot:
                 # et de comparer la couleur tradée avec la couleur de CETTE bougie.
                 previous_traded_color = self.active_bet_details['color_traded']
                 win = (last_formed_candle_color == previous_traded_color)
-                self.trade_history_log.append({
-                    "timestamp": datetime.now(self.timezone),
-                    "traded_color": previous_traded_color,
-                    "amount": self.active_bet_details['amount'],
-                    "outcome_candle_color": last_formed_candle_color,
-                    "result": "WIN" if win else "LOSS"
-                })
+                self.trade_history_log.append(TradeRecord(
+                    self.clock.time_ms(), previous_traded_color, self.active_bet_details['amount'],
+                    last_formed_candle_color, "WIN" if win else "LOSS",
+                    self.active_bet_details.get('boundary_to_click_ms'),
+                ))
+                self._balance_stale = True # Le solde a changé : relu hors du chemin critique
 
                 if win:
                     logger.info("🎉 VICTOIRE ! Le trade %s de %s a gagné. (Bougie de résultat: %s)", previous_traded_color.upper(), self.active_bet_details['amount'], last_formed_candle_color)
@@ -580,6 +1096,58 @@ class TradingBot:
                 logger.info("Trade unique terminé: %s. Résultat: %s", previous_traded_color, "WIN" if win else "LOSS")
                 self._reset_trade_state() # Nettoyer après un trade unique
 
+    def _process_control_commands(self):
+        """
+        🎛️ Applique les commandes reçues sur le canal de contrôle depuis la dernière itération.
+        """
+        for command in self.control.drain():
+            try:
+                self._apply_control_command(command)
+            except Exception as e:
+                logger.error("❌ Commande de contrôle %s non appliquée: %s", command, e)
+            self.state_publisher.mark_dirty()
+
+    def _apply_control_command(self, command):
+        """
+        🎛️ Applique une commande de contrôle validée.
+        @param {dict} command - {'command': stop|pause|resume|update_config, 'config'?}.
+        """
+        name = command["command"]
+        logger.info("🎛️ Commande de contrôle reçue: %s", command)
+        if name == COMMAND_STOP:
+            self.stop_requested = True
+            self.is_running = False # La boucle (ou le pipeline) s'arrête et stop() nettoie
+        elif name == COMMAND_PAUSE and not self.is_paused:
+            self.is_paused = True
+            self.armed_order = None
+            if self.active_bet_details:
+                logger.warning("⏸️ Pause avec un trade en cours (%s) : son résultat ne sera pas suivi.", self.active_bet_details)
+            self.is_trade_active_now = False
+            self._reset_trade_state() # À la reprise, nouvelle série depuis la mise de base
+        elif name == COMMAND_RESUME and self.is_paused:
+            self.is_paused = False
+        elif name == COMMAND_UPDATE_CONFIG:
+            self._apply_live_config(command["config"])
+
+    def _apply_live_config(self, update):
+        """
+        🔧 Met à jour BET_SIZES, OFFSET_CANDLES et MIN_YIELD_PERCENT sans redémarrage.
+        @param {dict} update - Mise à jour validée (validate_live_config).
+        """
+        if "BET_SIZES" in update:
+            self.bet_size_tiers = list(update["BET_SIZES"])
+            if self.current_bet_index >= len(self.bet_size_tiers): # Palier disparu : la série repart de la base
+                self.is_trade_active_now = False
+                self._reset_trade_state()
+            self.armed_order = None # Montant pré-armé calculé avec l'ancienne échelle
+        if "OFFSET_CANDLES" in update:
+            self.trading_offset_candles = update["OFFSET_CANDLES"]
+            self.indicators.set_streak_window(self.trading_offset_candles, self.ohlc_store.recent_colors(len(self.ohlc_store)))
+        if "MIN_YIELD_PERCENT" in update:
+            self.min_yield_percent = update["MIN_YIELD_PERCENT"] # Appliqué à la vérification du rendement avant chaque trade
+        self.config.update(update)
+        logger.info("🔧 Configuration mise à jour à chaud: %s", update)
+
     def _reset_trade_state(self):
         """
         🔄 Réinitialise l'état de trading (index de mise, détails du pari).
@@ -588,11 +1156,58 @@ class TradingBot:
         self.current_bet_index = 0
         self.active_bet_details = None
         # self.is_trade_active_now = False # Ne pas forcément le faire ici, car _apply_trade_logic le gère
-        # self.ohlc_data = pd.DataFrame(columns=["Open", "High", "Low", "Close", "Color", "Timestamp"]) # Peut-être pas réinitialiser OHLC complet
+        # self.ohlc_store.clear() # Peut-être pas réinitialiser OHLC complet
         # self.price_history_stream = pd.DataFrame(columns = ["Time", "Price"]) # Idem
         self._set_position_amount(self.bet_size_tiers[0]) # Assurer que le montant est au minimum
         self._initialize_timestamps() # Réinitialiser les timers de bougie aussi
 
+    @timed_stage("candle_close")
+    def _on_candle_closed(self, candle):
+        """
+        🕯️ Enregistre une bougie fermée par le CandleBuilder et déclenche la logique de trading.
+        @param {Candle} candle - La bougie qui vient de se terminer.
+        """
+        candle_start_time = self._epoch_ms_to_datetime(candle.start_ms)
+        logger.info("🕯️ Fermeture de la bougie: %s à %s", 
+                    candle_start_time.strftime('%H:%M:%S'), 
+                    self._epoch_ms_to_datetime(candle.end_ms).strftime('%H:%M:%S'))
+
+        self.hot_metrics.inc("candles")
+        if candle.ticks:
+            candle_color = self._get_candle_color(candle.open, candle.close)
+            self.ohlc_store.append(candle, candle_color) # O(1), rétention bornée (CANDLE_HISTORY_SIZE)
+            self.indicators.update(candle, candle_color) # O(1), indépendant de la longueur de l'historique
+            
+            logger.info("Nouvelle bougie OHLC (%s): O:%.5f H:%.5f L:%.5f C:%.5f Couleur:%s (%s ticks)", 
+                        candle_start_time.strftime('%H:%M'),
+                        candle.open, candle.high, candle.low, candle.close, candle_color, candle.ticks)
+            # logger.debug("OHLC Data:\n%s", self.ohlc_store.last(5))
+
+            # Appliquer la logique de trading (current_candle_end_time est encore la fin de la bougie fermée)
+            self.last_closed_boundary_ms = candle.end_ms
+            self.decision_latency.record(self.server_clock.now_ms() - candle.end_ms)
+            if self.is_paused:
+                logger.info("⏸️ Bot en pause : pas de logique de trading sur cette bougie.")
+            else:
+                self._apply_trade_logic(candle_color)
+        elif candle.is_gap:
+            self.ohlc_store.append(candle, GAP_CANDLE_COLOR)
+            logger.info("🕳️ Bougie vide (%s): aucun tick, bougie plate à %.5f.", candle_start_time.strftime('%H:%M:%S'), candle.close)
+        else:
+            logger.warning("⚠️ Aucune donnée de tick pour la bougie de %s à %s.", 
+                           candle_start_time.strftime('%H:%M:%S'), 
+                           self._epoch_ms_to_datetime(candle.end_ms).strftime('%H:%M:%S'))
+
+        # Mettre à jour pour la prochaine bougie (le builder a déjà avancé sa fenêtre)
+        with self.state_lock:
+            builder = self.candle_builder
+            start_ms, end_ms = (builder.start_ms, builder.end_ms) if builder is not None else (None, None)
+        if start_ms is not None:
+            self.current_candle_start_time = self._epoch_ms_to_datetime(start_ms)
+            self.current_candle_end_time = self._epoch_ms_to_datetime(end_ms)
+        self.state_publisher.mark_dirty()
+        logger.debug("Prochaine bougie attendue: %s à %s", self.current_candle_start_time.strftime('%H:%M:%S'), self.current_candle_end_time.strftime('%H:%M:%S'))
+
     def _process_websocket_data(self):
         """
         📡 Traite les messages WebSocket récupérés des logs de performance du navigateur.
@@ -606,128 +1221,244 @@ class TradingBot:
             # Tentative de sélection pour démarrer
             if not self._get_current_yield_and_select_best():
                 logger.warning("Impossible de sélectionner une devise, le traitement WebSocket est en pause.")
-                time.sleep(5) # Attendre avant de réessayer
+                self.clock.sleep(5) # Attendre avant de réessayer
                 return
-            else: # Devise sélectionnée, on peut continuer
-                 self._initialize_timestamps() # S'assurer que les timestamps sont frais pour la nouvelle devise
-                 self.price_history_stream = pd.DataFrame(columns = ["Time", "Price"]) # Vider l'historique de prix de l'ancienne devise
-                 self.ohlc_data = pd.DataFrame(columns=["Open", "High", "Low", "Close", "Color", "Timestamp"]) # Vider OHLC
+            # Devise sélectionnée : son historique (ticks, bougies) a déjà été chargé depuis le registre multi-devises
 
         try:
-            logs = self.driver.get_log('performance')
+            ticks = self._collect_ticks()
         except Exception as e:
-            logger.error("❌ Erreur lors de la récupération des logs de performance: %s", e)
+            logger.error("❌ Erreur lors de la récupération des frames WebSocket: %s", e)
             return
 
-        for wsData_entry in logs:
+        for closed_candle in self._integrate_ticks(ticks):
+            self._on_candle_closed(closed_candle)
+
+    def _integrate_ticks(self, ticks):
+        """
+        🧩 Intègre un lot de ticks dans le registre multi-devises.
+        @param {list} ticks - Les ticks (symbole, epoch_ms, prix).
+        @returns {list} - Les bougies fermées de la devise active, dans l'ordre.
+        """
+        self.tick_recorder.record_many(ticks) # Mise en file uniquement, l'écriture se fait hors de ce thread
+        if not ticks:
+            return []
+        started = time.perf_counter()
+        closed_candles = []
+        for symbol, timestamp_ms, price in ticks:
             try:
-                message_data = json.loads(wsData_entry['message'])['message']
-                response_data = message_data.get('params', {}).get('response', {})
+                closed_candles.extend(self._handle_tick(symbol, timestamp_ms, price))
+            except Exception as e_tick:
+                logger.debug("Erreur mineure lors du traitement d'un tick %s: %s", symbol, e_tick)
+        self.hot_metrics.observe("tick_append", time.perf_counter() - started) # Lot de ticks (hors fermetures traitées par l'appelant)
+        self.hot_metrics.inc("ticks", len(ticks))
+        return closed_candles
+
+    def _start_frame_ingestion(self):
+        """
+        📡 Démarre l'abonnement push CDP aux frames WebSocket si le mode "cdp" est configuré.
+        En cas d'échec, bascule sur le polling des logs de performance.
+        """
+        if self.ingestion_mode != INGESTION_MODE_CDP:
+            logger.info("📡 Ingestion des frames WebSocket par polling des logs de performance.")
+            return
+        self.frame_listener = CdpFrameListener(self.driver, self.config.get("CDP_QUEUE_SIZE", 10000))
+        if not self.frame_listener.start():
+            self._fallback_to_polling()
 
-                if response_data.get('opcode', 0) == 2: # Message binaire
-                    payload_str_b64 = response_data.get('payloadData')
-                    if not payload_str_b64:
-                        continue
+    def _fallback_to_polling(self):
+        """
+        🔙 Abandonne l'abonnement CDP et repasse au polling de driver.get_log('performance').
+        """
+        logger.warning("🟡 Abonnement CDP indisponible, bascule sur le polling des logs de performance.")
+        if self.frame_listener:
+            self.frame_listener.stop()
+        self.frame_listener = None
+        self.ingestion_mode = INGESTION_MODE_POLL
 
-                    payload_bytes = base64.b64decode(payload_str_b64)
-                    
-                    # Tenter de décoder en UTF-8. Si ça échoue, c'est peut-être un autre format ou compressé.
-                    # PocketOption utilise souvent du JSON simple non compressé pour les ticks.
-                    try:
-                        payload_str = payload_bytes.decode('utf-8')
-                    except UnicodeDecodeError:
-                        # logger.debug("Données non UTF-8, potentiellement compressées ou autre format. Ignoré.")
-                        continue # Ignorer les messages non décodables pour l'instant
+    def _collect_ticks(self):
+        """
+        📥 Récupère et décode les ticks reçus depuis le dernier appel.
+        Mode CDP : attend au plus loop_interval_seconds la première frame poussée, puis vide la file.
+        Mode polling : draine les logs de performance.
+        Dans les deux cas, les frames passent par le décodeur par étapes (rejets bon marché avant parsing).
+        @returns {list} - Les ticks (symbole, epoch_ms, prix).
+        """
+        ticks = []
+        frame_listener = self.frame_listener # Copie locale : stop() peut le remettre à None depuis un autre thread
+        if frame_listener is not None:
+            if frame_listener.is_alive:
+                frames = frame_listener.drain(self.loop_interval_seconds) # Attente de la file : non mesurée
+                self.capture.write_frames(self.clock.time_ms(), self._current_active_currency, frames)
+                started = time.perf_counter()
+                for opcode, payload_b64 in frames:
+                    ticks.extend(self.frame_decoder.decode_frame(opcode, payload_b64))
+                if frames:
+                    self.hot_metrics.observe("frame_decode", time.perf_counter() - started)
+                    self.hot_metrics.inc("frames", len(frames))
+                self._drain_performance_log()
+                return ticks
+            self._fallback_to_polling()
+
+        driver = self.driver # Copie locale : stop() peut le remettre à None depuis un autre thread
+        if driver is None:
+            return ticks
+        with self.driver_log_lock: # Pas driver_lock : une action d'interface lente ne retarde pas les ticks
+            started = time.perf_counter()
+            log_entries = driver.get_log('performance')
+            self.hot_metrics.observe("get_log", time.perf_counter() - started)
+        self.capture.write_entries(self.clock.time_ms(), self._current_active_currency, log_entries)
+        started = time.perf_counter()
+        for wsData_entry in log_entries:
+            ticks.extend(self.frame_decoder.decode_log_entry(wsData_entry['message']))
+        if log_entries:
+            self.hot_metrics.observe("frame_decode", time.perf_counter() - started)
+            self.hot_metrics.inc("frames", len(log_entries))
+        return ticks
+
+    def _drain_performance_log(self):
+        """
+        🚿 Mode CDP : vide périodiquement le tampon des logs de performance de chromedriver (frames déjà
+        reçues par l'abonnement CDP), pour qu'il ne grossisse pas pendant toute la session.
+        """
+        driver = self.driver
+        now = self.clock.monotonic()
+        if driver is None or now < self._next_performance_log_drain:
+            return
+        self._next_performance_log_drain = now + self.performance_log_drain_seconds
+        try:
+            with self.driver_log_lock:
+                self.drained_log_entries += len(driver.get_log('performance'))
+        except Exception as e:
+            logger.debug("Vidage des logs de performance impossible: %s", e)
 
-                    try:
-                        data = json.loads(payload_str)
-                    except json.JSONDecodeError:
-                        # logger.debug("Impossible de décoder le payload JSON: %s", payload_str[:100]) # Log début du payload
-                        continue
-                    
-                    # Filtrer pour les données de prix de la devise active
-                    # Le format est souvent: [["EURUSD_otc",1678886400000,1.06659]] ou similaire
-                    if isinstance(data, list) and len(data) > 0 and \
-                       isinstance(data[0], list) and len(data[0]) == 3 and \
-                       isinstance(data[0][0], str) and data[0][0] == self.current_active_currency:
-                        
-                        timestamp_ms = data[0][1]
-                        price = data[0][2]
-                        
-                        dt_object = self._timestamp_to_human_readable(timestamp_ms)
-
-                        new_price_tick = pd.DataFrame({
-                            "Time": [dt_object], # Utiliser l'objet datetime directement
-                            "Price": [price]
-                        })
-                        self.price_history_stream = pd.concat([self.price_history_stream, new_price_tick], ignore_index=True)
-                        # logger.debug("Tick reçu pour %s: %s @ %s", self.current_active_currency, price, dt_object.strftime('%H:%M:%S.%f'))
-
-                        # Construction des bougies OHLC
-                        # Assurer que price_history_stream a 'Time' comme index pour le resample
-                        if not self.price_history_stream.empty and 'Time' in self.price_history_stream.columns:
-                            df_for_ohlc = self.price_history_stream.set_index('Time')
-                            
-                            # Vérifier si la bougie actuelle est terminée
-                            # current_time_aware = datetime.now(self.timezone)
-                            # Utiliser le temps du dernier tick reçu pour être plus précis
-                            current_tick_time_aware = dt_object 
-
-                            if self.current_candle_end_time and current_tick_time_aware >= self.current_candle_end_time:
-                                logger.info("🕯️ Fermeture de la bougie: %s à %s", 
-                                            self.current_candle_start_time.strftime('%H:%M:%S'), 
-                                            self.current_candle_end_time.strftime('%H:%M:%S'))
-                                
-                                # Sélectionner les ticks pour la bougie qui vient de se terminer
-                                candle_ticks = df_for_ohlc[(df_for_ohlc.index >= self.current_candle_start_time) & 
-                                                           (df_for_ohlc.index < self.current_candle_end_time)]
-
-                                if not candle_ticks.empty:
-                                    open_price = candle_ticks['Price'].iloc[0]
-                                    high_price = candle_ticks['Price'].max()
-                                    low_price = candle_ticks['Price'].min()
-                                    close_price = candle_ticks['Price'].iloc[-1]
-                                    candle_color = self._get_candle_color(open_price, close_price)
-                                    
-                                    new_ohlc_row = pd.DataFrame({
-                                        "Open": [open_price], "High": [high_price], 
-                                        "Low": [low_price], "Close": [close_price], 
-                                        "Color": [candle_color], "Timestamp": [self.current_candle_start_time] # Heure d'ouverture de la bougie
-                                    })
-                                    self.ohlc_data = pd.concat([self.ohlc_data, new_ohlc_row], ignore_index=True)
-                                    
-                                    logger.info("Nouvelle bougie OHLC (%s): O:%.5f H:%.5f L:%.5f C:%.5f Couleur:%s", 
-                                                self.current_candle_start_time.strftime('%H:%M'),
-                                                open_price, high_price, low_price, close_price, candle_color)
-                                    # logger.debug("OHLC Data:\n%s", self.ohlc_data.tail())
-
-                                    # Appliquer la logique de trading
-                                    self._apply_trade_logic(candle_color)
-
-                                else:
-                                    logger.warning("⚠️ Aucune donnée de tick pour la bougie de %s à %s.", 
-                                                   self.current_candle_start_time.strftime('%H:%M:%S'), 
-                                                   self.current_candle_end_time.strftime('%H:%M:%S'))
-                                
-                                # Mettre à jour pour la prochaine bougie
-                                self.current_candle_start_time = self.current_candle_end_time
-                                if self.period_seconds > 0 and self.period_seconds < 60:
-                                    self.current_candle_end_time = self.current_candle_start_time + timedelta(seconds=self.period_seconds)
-                                else:
-                                    self.current_candle_end_time = self.current_candle_start_time + timedelta(minutes=self.trading_period_minutes)
-                                logger.debug("Prochaine bougie attendue: %s à %s", self.current_candle_start_time.strftime('%H:%M:%S'), self.current_candle_end_time.strftime('%H:%M:%S'))
-                                
-                                # Nettoyer l'historique de prix pour ne pas qu'il grossisse indéfiniment
-                                # Garder par exemple les 10 dernières minutes de ticks
-                                max_history_time = timedelta(minutes=10) # Configurable
-                                self.price_history_stream = self.price_history_stream[self.price_history_stream['Time'] > (datetime.now(self.timezone) - max_history_time)]
-
-                    # D'autres types de messages WebSocket pourraient être gérés ici (ex: confirmation de trade, erreurs, etc.)
-                    # Mais PocketOption est assez limité sur ce qu'il envoie en clair.
-
-            except Exception as e_msg:
-                # logger.debug("Erreur mineure lors du traitement d'un message WebSocket: %s", e_msg)
-                pass # Beaucoup de messages ne sont pas pertinents
+    def _handle_tick(self, symbol, timestamp_ms, price):
+        """
+        🧩 Intègre un tick décodé dans l'état de son symbole (ticks, bougie en cours, fermeture éventuelle).
+        Seules les bougies de la devise active déclenchent la logique de trading ; les autres
+        symboles restent chauds pour un changement de devise instantané.
+        @param {str} symbol - Le symbole du tick.
+        @param {int} timestamp_ms - Horodatage serveur (epoch ms).
+        @param {float} price - Le prix.
+        @returns {list} - Les bougies fermées par ce tick si c'est la devise active (sinon vide).
+        """
+        # Ajout O(1) dans le tampon circulaire du symbole et mise à jour incrémentale de sa bougie.
+        # Le registre purge aussi les ticks de plus de TICK_HISTORY_MINUTES à chaque fermeture de bougie.
+        _, closed_candles = self.symbols.on_tick(symbol, timestamp_ms, price)
+        if self.last_server_time_ms is None or timestamp_ms > self.last_server_time_ms:
+            self.last_server_time_ms = timestamp_ms
+        received_ms = self.clock.time_ms()
+        self.server_clock.observe(timestamp_ms, received_ms)
+        self.tick_latency.record(received_ms - timestamp_ms)
+        # logger.debug("Tick reçu pour %s: %s @ %s", symbol, price, timestamp_ms)
+
+        return closed_candles if symbol == self._current_active_currency else []
+
+    def _run_candle_clock(self):
+        """
+        ⏱️ Horloge des bougies : ferme les bougies dès que l'heure serveur estimée (offset local/serveur
+        mesuré sur les ticks) dépasse leur fin + CANDLE_CLOSE_GRACE_MS, même si aucun tick n'arrive.
+        Les périodes vides deviennent des bougies gap. Les ticks arrivant après la fermeture sont ignorés.
+        @returns {list} - Les bougies fermées de la devise active.
+        """
+        builder = self.candle_builder
+        if builder is None or builder.end_ms is None or not self.server_clock.is_synchronized:
+            return []
+        server_now_ms = int(self.server_clock.now_ms())
+        if server_now_ms < builder.end_ms + self.candle_close_grace_ms:
+            return []
+        closed_by_symbol = self.symbols.advance_all(server_now_ms - self.candle_close_grace_ms)
+        return closed_by_symbol.get(self._current_active_currency, [])
+
+    def _ingestion_step(self):
+        """
+        📡 Étage ingestion : récupère et décode les frames, pousse les ticks vers l'étage bougies.
+        (Mode CDP : attente sur la file des frames poussées ; mode polling : pause loop_interval_seconds.)
+        """
+        ticks = self._collect_ticks()
+        if ticks:
+            self.tick_queue.put(ticks)
+        if self.frame_listener is None:
+            self.clock.sleep(self.loop_interval_seconds)
+
+    def _candle_step(self):
+        """
+        🕯️ Étage bougies : intègre les lots de ticks, fait tourner l'horloge des bougies et pousse
+        les bougies fermées de la devise active vers l'étage stratégie.
+        """
+        try:
+            ticks = self.tick_queue.get(timeout=self.loop_interval_seconds)
+        except queue.Empty:
+            ticks = []
+        with self.state_lock:
+            symbol = self._current_active_currency
+            closed_candles = self._integrate_ticks(ticks)
+            closed_candles.extend(self._run_candle_clock()) # Fermeture à l'heure, même sans nouveau tick
+        for closed_candle in closed_candles: # Hors verrou : la file peut appliquer de la backpressure
+            self.candle_queue.put((symbol, closed_candle))
+
+    def _strategy_step(self):
+        """
+        🧠 Étage stratégie : logique de trading sur chaque bougie fermée, pré-armement de l'ordre,
+        re-vérification du panneau. Les actions d'interface sont confiées à l'étage d'exécution.
+        """
+        self._process_control_commands() # Même thread que la logique de trading : aucun verrou nécessaire
+        try:
+            symbol, closed_candle = self.candle_queue.get(timeout=self.loop_interval_seconds)
+            if symbol != self.current_active_currency:
+                closed_candle = None # Bougie d'une devise quittée entre-temps : déjà dans le registre, hors stratégie
+        except queue.Empty:
+            closed_candle = None
+        if not self.current_active_currency:
+            if self.clock.monotonic() >= self._next_currency_selection_at and not self._get_current_yield_and_select_best():
+                logger.warning("Impossible de sélectionner une devise, nouvelle tentative dans 5 s.")
+                self._next_currency_selection_at = self.clock.monotonic() + 5
+            return
+        if closed_candle is not None:
+            self._on_candle_closed(closed_candle)
+        self._maybe_arm_order() # Montant et boutons prêts juste avant la prochaine frontière
+        self._verify_panel_state() # Re-vérification périodique ou après erreur (sans effet sinon)
+        self._refresh_balance_if_stale()
+
+    def _run_pipeline(self):
+        """
+        🏭 Lance les étages ingestion, bougies et stratégie dans des threads ; le thread appelant
+        (celui qui a créé le driver) devient l'étage d'exécution jusqu'à l'arrêt du bot.
+        """
+        self.execution = ExecutionStage(self.driver_lock, self.config.get("EXECUTION_QUEUE_SIZE", 100))
+        should_run = lambda: self.is_running
+        self.pipeline_workers = [
+            PipelineWorker("ingestion", self._ingestion_step, should_run),
+            PipelineWorker("candles", self._candle_step, should_run),
+            PipelineWorker("strategy", self._strategy_step, should_run),
+        ]
+        for worker in self.pipeline_workers:
+            worker.start()
+        try:
+            self.execution.run(should_run, poll_timeout=self.loop_interval_seconds)
+        finally:
+            for worker in self.pipeline_workers:
+                worker.join(5)
+            self.execution = None
+
+    def _pipeline_stats(self):
+        """
+        📊 Profondeur et lag des files, état des étages.
+        @returns {dict} - Statistiques du runtime.
+        """
+        execution = self.execution
+        return {
+            "runtime_mode": self.runtime_mode,
+            "queues": {
+                "ticks": self.tick_queue.stats(),
+                "candles": self.candle_queue.stats(),
+            },
+            "execution": execution.stats() if execution else None,
+            "workers": {
+                worker.name: {"alive": worker.is_alive, "iterations": worker.iterations, "errors": worker.errors}
+                for worker in self.pipeline_workers
+            },
+        }
 
     def start(self):
         """
@@ -740,8 +1471,9 @@ class TradingBot:
         logger.info("🏁 Démarrage du bot de trading Dieu-Donnee...")
         self.is_running = True
         try:
-            self._initialize_driver()
-            self._load_cookies_and_navigate()
+            if not self._lease_warm_driver(): # Driver chaud du pool en moins d'une seconde, sinon démarrage à froid
+                self._initialize_driver()
+                self._load_cookies_and_navigate()
             
             # Initialisation après chargement de la page
             self._reset_trade_state() # Assure un état propre et montant de base
@@ -751,15 +1483,34 @@ class TradingBot:
                 return
             
             self._set_trade_timeout(minutes=self.trading_period_minutes) # Configure l'expiration
+            self._start_frame_ingestion() # Abonnement push CDP (ou polling en fallback)
+            self.tick_recorder.start()
+            self.metrics_publisher.start()
+            self.state_publisher.start()
+            self.control.start()
 
             logger.info("✅ Bot démarré et prêt à trader sur %s.", self.current_active_currency)
 
-            # Boucle principale
+            if self.runtime_mode == RUNTIME_MODE_PIPELINE:
+                self._run_pipeline() # Étages en parallèle, jusqu'à l'arrêt du bot
+                return
+
+            # Boucle principale (runtime séquentiel)
             while self.is_running:
+                self._process_control_commands()
+                if not self.is_running:
+                    break
                 self._process_websocket_data()
-                # Petite pause pour ne pas surcharger le CPU avec get_log,
-                # et pour laisser le temps aux messages WS d'arriver.
-                time.sleep(0.1) # Très court, car les ticks sont rapides. À ajuster.
+                for closed_candle in self._run_candle_clock(): # Fermeture des bougies à l'heure, même sans nouveau tick
+                    self._on_candle_closed(closed_candle)
+                self._maybe_arm_order() # Montant et boutons prêts juste avant la prochaine frontière
+                self._verify_panel_state() # Re-vérification périodique ou après erreur (sans effet sinon)
+                self._refresh_balance_if_stale()
+                if self.frame_listener is None:
+                    # Mode polling : petite pause pour ne pas surcharger le CPU avec get_log,
+                    # et pour laisser le temps aux messages WS d'arriver.
+                    # (En mode CDP, l'attente se fait directement sur la file des frames poussées.)
+                    self.clock.sleep(self.loop_interval_seconds)
         
         except Exception as e:
             logger.critical("💥 Erreur critique lors de l'exécution du bot: %s", e, exc_info=True)
@@ -774,13 +1525,29 @@ class TradingBot:
         """
         logger.info("🛑 Tentative d'arrêt du bot...")
         self.is_running = False
+        if self.frame_listener:
+            self.frame_listener.stop()
+            self.frame_listener = None
         if self.driver:
             try:
-                self.driver.quit()
-                logger.info("✅ Driver Selenium fermé.")
+                with self.driver_lock, self.driver_log_lock: # Attendre la fin de l'action d'interface et du get_log en cours
+                    if self.pooled_driver is not None:
+                        self.driver_pool.release(self.pooled_driver) # Rechargé et vérifié par le pool avant d'être reprêté
+                        logger.info("♻️ Driver Selenium rendu au pool.")
+                    else:
+                        self.driver.quit()
+                        logger.info("✅ Driver Selenium fermé.")
             except Exception as e:
                 logger.error("❌ Erreur lors de la fermeture du driver: %s", e)
             self.driver = None
+            self.pooled_driver = None
+        for store in (self.ohlc_store, self.trade_history_log, self.actions_log):
+            store.spill.close()
+        self.capture.close()
+        self.tick_recorder.close()
+        self.metrics_publisher.stop()
+        self.control.stop()
+        self.state_publisher.stop() # État final publié : is_running = False
     
     def update_cookies(self, new_cookies_json_list):
         """
@@ -805,32 +1572,56 @@ class TradingBot:
         """
         return {
             "is_running": self.is_running,
+            "is_paused": self.is_paused,
             "current_active_currency": self.current_active_currency,
-            "current_balance": self.get_current_balance() if self.driver and self.is_running else None,
+            "current_balance": self.balance, # Solde en cache (aucun appel Selenium)
+            "balance_read_at": self.balance_read_at.isoformat() if self.balance_read_at else None,
             "active_bet_details": self.active_bet_details,
             "current_bet_index": self.current_bet_index,
             "is_trade_active_now": self.is_trade_active_now, # La condition de série est-elle active ?
-            "last_ohlc_data_count": len(self.ohlc_data),
+            "last_ohlc_data_count": len(self.ohlc_store),
             "last_trade_log_count": len(self.trade_history_log),
+            "ingestion_mode": self.ingestion_mode,
+            "drained_log_entries": self.drained_log_entries,
+            "tick_latency": self.tick_latency.summary(),
+            "decision_latency": self.decision_latency.summary(),
+            "server_clock_offset_ms": round(self.server_clock.offset_ms, 3),
+            "boundary_to_click_latency": self.boundary_to_click_latency.summary(),
+            "frame_decoder": self.frame_decoder.stats(),
+            "tick_capture": self.tick_recorder.stats(),
+            "locators": self.locators.stats(),
+            "ui_step_timings": self.ui_steps.summary(),
+            "trading_panel": self.panel.snapshot(),
+            "indicators": self.indicators.snapshot(),
+            "symbol_registry": self.symbols.stats(),
+            "driver_pool": self.driver_pool.stats() if self.driver_pool else None,
+            "pipeline": self._pipeline_stats(),
             "next_candle_expected_close": self.current_candle_end_time.strftime('%Y-%m-%d %H:%M:%S') if self.current_candle_end_time else "N/A",
             "current_config": self.config # Pourrait être sélectif pour ne pas tout exposer
         }
         
+    def _build_state_snapshot(self):
+        """
+        🛰️ Instantané publié par StatePublisher (construit dans son thread).
+        @returns {dict} - {'status', 'ohlc', 'trades'}.
+        """
+        return {
+            "status": self.get_status(),
+            "ohlc": self.get_ohlc_history(self.state_ohlc_size),
+            "trades": self.get_trade_history(self.state_trades_size),
+        }
+
     def get_ohlc_history(self, last_n=20):
         """
         📊 Retourne les N dernières bougies OHLC.
         """
-        if self.ohlc_data.empty:
-            return []
-        return self.ohlc_data.tail(last_n).to_dict(orient='records')
+        return self.ohlc_store.last(last_n) # O(last_n)
 
     def get_trade_history(self, last_n=20):
         """
         📜 Retourne les N derniers trades enregistrés.
         """
-        if not self.trade_history_log:
-            return []
-        return self.trade_history_log[-last_n:]
+        return self.trade_history_log.last(last_n) # O(last_n)
         
     def save_debug_screenshot(self, filename_prefix="debug"):
         """
@@ -1,13 +1,88 @@
-from celery import shared_task
+from celery import chord, shared_task
+from celery.signals import worker_process_init
+from django.conf import settings
+from bot_app.services.control import COMMAND_STOP, send_control_command
+from bot_app.services.driver_pool import DriverPool, driver_pool_key
+from bot_app.services.sweep import DEFAULT_PAYOUT, evaluate_combinations, parameter_grid, rank_results, shard_combinations
+from bot_app.services.tick_capture import load_ticks
 from bot_app.services.trading_logic import TradingBot # Assure-toi que le chemin est correct
 import logging
+import os
+
+try:
+    import fcntl # Verrou de pré-chauffage partagé par les processus du nœud (Unix)
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
 # Variable globale pour garder une instance du bot (simpliste, pour un seul worker)
-# Pour plusieurs workers, il faudrait une gestion d'état plus complexe (Redis, DB)
-# ou s'assurer qu'un seul worker exécute une instance de bot donnée à la fois.
+# Plusieurs bots (par compte, utilisateur ou actif) : registre Redis et superviseurs par nœud,
+# voir bot_app/services/supervisor.py et l'endpoint bot/fleet/.
 current_bot_instance = None 
+# Drivers Chrome chauds du processus worker (DRIVER_POOL_SIZE > 0) : un redémarrage du bot emprunte un driver
+# déjà authentifié sur la page de trading au lieu de relancer Chrome
+driver_pool = None
+driver_pool_warm_lock = None # Fichier verrouillé (gardé ouvert) par le processus enfant qui pré-chauffe le nœud
+
+
+def _get_driver_pool(cookies_path, bot_config):
+    """
+    🏊 Pool de drivers chauds du worker pour ce compte et ces options (recréé si elles changent).
+    @param {str} cookies_path - Fichier de cookies du compte.
+    @param {dict} bot_config - La configuration du bot.
+    @returns {DriverPool|None} - None si le pool est désactivé.
+    """
+    global driver_pool
+    if settings.DRIVER_POOL_SIZE <= 0:
+        return None
+    key = driver_pool_key(cookies_path, bot_config)
+    if driver_pool is not None and driver_pool.key != key:
+        logger.info("🏊 Compte ou options du driver modifiés : nouveau pool de drivers chauds.")
+        driver_pool.close()
+        driver_pool = None
+    if driver_pool is None:
+        bot_config = dict(bot_config) # Le bot modifie sa configuration à chaud, pas celle du pool
+        driver_pool = DriverPool(
+            create=lambda: TradingBot._create_driver(bot_config),
+            prepare=lambda driver: TradingBot._open_trading_page(driver, bot_config, cookies_path),
+            check=TradingBot._trading_page_ready,
+            size=settings.DRIVER_POOL_SIZE,
+            max_uses=settings.DRIVER_POOL_MAX_USES,
+            max_age_seconds=settings.DRIVER_POOL_MAX_AGE_SECONDS,
+            key=key,
+        )
+        driver_pool.start()
+    return driver_pool
+
+
+def _claim_driver_pool_warm_up():
+    """
+    🔐 Réserve le pré-chauffage du nœud pour ce processus enfant (verrou de fichier non bloquant).
+    Le verrou est libéré à la mort du processus : l'enfant qui le remplace reprend le pré-chauffage.
+    @returns {bool} - True si ce processus doit pré-chauffer le pool.
+    """
+    global driver_pool_warm_lock
+    if fcntl is None:
+        return True
+    lock_file = open(settings.DRIVER_POOL_WARM_LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    driver_pool_warm_lock = lock_file
+    return True
+
+
+@worker_process_init.connect
+def warm_driver_pool(**kwargs):
+    # Pré-chauffage au démarrage du worker, pour le compte et la configuration par défaut (ceux de l'API),
+    # dans un seul processus enfant par nœud : avec -c N, chaque enfant pré-chauffé lancerait DRIVER_POOL_SIZE
+    # Chrome de plus. Les autres enfants ne créent leur pool qu'au premier bot qu'ils exécutent.
+    if settings.DRIVER_POOL_SIZE > 0 and _claim_driver_pool_warm_up():
+        logger.info("🏊 Pré-chauffage du pool de drivers dans le processus %s.", os.getpid())
+        _get_driver_pool(os.path.join(settings.BASE_DIR, 'Trading_cookies.json'), TradingBot._load_default_config())
 
 @shared_task(bind=True, name='bot_app.tasks.start_trading_bot_task')
 def start_trading_bot_task(self, cookies_path="Trading_cookies.json", config_override=None):
@@ -21,9 +96,12 @@ def start_trading_bot_task(self, cookies_path="Trading_cookies.json", config_ove
     try:
         # Charger la config depuis Django settings ou un fichier de config
         # Pour l'instant, on utilise config_override ou les défauts de la classe.
-        bot_config = config_override if config_override else None 
+        bot_config = dict(config_override) if config_override else TradingBot._load_default_config()
+        if not bot_config.get("REDIS_URL"):
+            bot_config["REDIS_URL"] = settings.REDIS_URL # Publication des métriques lues par l'endpoint Prometheus
         
-        current_bot_instance = TradingBot(cookies_path=cookies_path, config=bot_config)
+        current_bot_instance = TradingBot(cookies_path=cookies_path, config=bot_config,
+                                          driver_pool=_get_driver_pool(cookies_path, bot_config))
         current_bot_instance.start() # Ceci est bloquant, donc la tâche Celery va tourner tant que le bot tourne.
         
         # Si .start() se termine (par exemple, si is_running devient False), la tâche se termine aussi.
@@ -39,9 +117,14 @@ def start_trading_bot_task(self, cookies_path="Trading_cookies.json", config_ove
         raise # Permet à Celery de marquer la tâche comme échouée.
 
 @shared_task(name='bot_app.tasks.stop_trading_bot_task')
-def stop_trading_bot_task():
+def stop_trading_bot_task(bot_id="default"):
     global current_bot_instance
     logger.info("🛑 Tâche Celery 'stop_trading_bot_task' initiée.")
+    try: # Le bot peut tourner dans un autre processus ou un autre worker : commande sur son canal de contrôle
+        if send_control_command(settings.REDIS_URL, bot_id, COMMAND_STOP):
+            return {"status": "stopping", "message": "Stop command sent on the control channel."}
+    except Exception as e:
+        logger.warning("⚠️ Canal de contrôle indisponible (%s), arrêt local uniquement.", e)
     if current_bot_instance and current_bot_instance.is_running:
         current_bot_instance.stop()
         current_bot_instance = None # Libérer l'instance
@@ -84,4 +167,34 @@ def update_bot_cookies_task(cookies_json_list, cookies_path="Trading_cookies.jso
     # Mais si on voulait le faire "à chaud", ce serait plus complexe.
     dummy_bot_for_cookies = TradingBot(cookies_path=cookies_path) # Juste pour utiliser la méthode
     dummy_bot_for_cookies.update_cookies(cookies_json_list)
-    return {"status": "cookies_updated", "message": f"Cookies file {cookies_path} updated. Bot restart required."}
\ No newline at end of file
+    if driver_pool is not None:
+        driver_pool.recycle_all() # Drivers chauds authentifiés avec les anciens cookies
+    return {"status": "cookies_updated", "message": f"Cookies file {cookies_path} updated. Bot restart required."}
+
+
+# Balayage de paramètres réparti sur plusieurs nœuds : chaque worker relit les ticks depuis le
+# répertoire de segments (stockage partagé ou répliqué, mappé en mémoire : le cache de pages est
+# commun aux processus d'un même nœud). Seules les combinaisons transitent par le broker.
+@shared_task(name='bot_app.tasks.run_sweep_shard_task')
+def run_sweep_shard_task(directory, symbol, combinations, start_ms=None, end_ms=None, payout=DEFAULT_PAYOUT):
+    logger.info("🧮 Tâche Celery 'run_sweep_shard_task' : %s combinaisons sur %s.", len(combinations), symbol)
+    timestamps, prices = load_ticks(directory, symbol, start_ms, end_ms)
+    return evaluate_combinations(timestamps, prices, combinations, payout=payout)
+
+@shared_task(name='bot_app.tasks.aggregate_sweep_results_task')
+def aggregate_sweep_results_task(shard_results, rank_by="pnl", ascending=False):
+    rows = [row for shard in shard_results for row in shard]
+    logger.info("🏆 Balayage terminé : %s combinaisons classées par %s.", len(rows), rank_by)
+    return rank_results(rows, rank_by, ascending)
+
+@shared_task(name='bot_app.tasks.start_parameter_sweep_task')
+def start_parameter_sweep_task(directory, symbol, grid=None, shards=16, start_ms=None, end_ms=None, rank_by="pnl", ascending=False,
+                               payout=DEFAULT_PAYOUT):
+    combinations = parameter_grid(grid)
+    shard_list = shard_combinations(combinations, shards)
+    # chord : les shards s'exécutent en parallèle, l'agrégation se déclenche quand tous sont terminés
+    result = chord(
+        run_sweep_shard_task.s(directory, symbol, shard, start_ms, end_ms, payout) for shard in shard_list
+    )(aggregate_sweep_results_task.s(rank_by, ascending))
+    logger.info("🚀 Balayage de %s combinaisons réparti en %s shards (résultat: %s).", len(combinations), len(shard_list), result.id)
+    return {"status": "dispatched", "sweep_id": result.id, "combinations": len(combinations), "shards": len(shard_list)}
@@ -1,3 +1,1279 @@
-from django.test import TestCase
+# bot_app/tests.py
 
-# Create your tests here.
+# Tests unitaires des services du bot (sans base de données, navigateur ni Redis) :
+#   python manage.py test bot_app   ou   python -m pytest bot_app/tests.py
+import base64
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase, mock
+
+import numpy as np
+
+from bot_app.services import backtest, benchmarks, replay, risk, sweep
+from bot_app.services.candles import Candle, CandleBuilder
+from bot_app.services.capture import frame_to_log_entry, read_capture
+from bot_app.services.clock import ServerClock, SimulatedClock
+from bot_app.services.control import parse_command, validate_live_config
+from bot_app.services.driver_pool import DriverPool
+from bot_app.services.frame_decoder import FrameDecoder
+from bot_app.services.indicators import EMA, RSI, SMA, BollingerBands, ColorStreak, IndicatorSet
+from bot_app.services.ingestion import INGESTION_MODE_POLL, CdpFrameListener
+from bot_app.services.metrics import HotPathMetrics, render_prometheus
+from bot_app.services.panel_state import TradingPanelState
+from bot_app.services.pipeline import ExecutionStage
+from bot_app.services import publisher
+from bot_app.services.replay import ReplayDriver, ReplaySession
+from bot_app.services.stores import CandleStore, RecordStore, SpillWriter, TradeRecord
+from bot_app.services.supervisor import bot_process_config, register_bot
+from bot_app.services.symbol_registry import SymbolRegistry
+from bot_app.services.tick_capture import TickRecorder, TickSegment, list_segments, load_ticks
+from bot_app.services.tick_buffer import TickRingBuffer
+from bot_app.services.trading_logic import TradingBot
+
+logging.getLogger("bot_app").setLevel(logging.CRITICAL) # Journaux du bot inutiles dans la sortie des tests
+
+SYMBOL = "EURUSD_otc"
+T0 = 1700000040000 # Aligné sur la minute
+
+
+def make_bot(start_ms=T0, **config):
+    """
+    🤖 TradingBot hors ligne (sans driver, Redis ni écriture disque) sur une horloge simulée.
+    """
+    bot_config = {
+        "CURRENCIES": {SYMBOL: SYMBOL}, "TIMEZONE": "UTC", "TRADING_PERIOD_MINUTES": 1, "PERIOD": 5,
+        "SPILL_DIR": None, "TICK_CAPTURE_DIR": None, "CAPTURE_PATH": None, "MIN_YIELD_PERCENT": 0,
+    }
+    bot_config.update(config)
+    return TradingBot(config=bot_config, clock=SimulatedClock(start_ms))
+
+
+class TickRingBufferTests(TestCase):
+
+    def test_append_keeps_ticks_in_order(self):
+        buffer = TickRingBuffer(capacity=4)
+        for i in range(3):
+            self.assertTrue(buffer.append(1000 + i, 1.0 + i))
+        self.assertEqual(buffer.times().tolist(), [1000, 1001, 1002])
+        self.assertEqual(buffer.prices().tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(buffer.last(), (1002, 3.0))
+
+    def test_wrap_around_overwrites_oldest_and_stays_contiguous(self):
+        buffer = TickRingBuffer(capacity=4)
+        for i in range(10):
+            buffer.append(i, float(i))
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.times().tolist(), [6, 7, 8, 9])
+        self.assertEqual(buffer.prices().tolist(), [6.0, 7.0, 8.0, 9.0])
+        self.assertIsNotNone(buffer.times().base) # Vue sur le tableau interne, sans copie
+
+    def test_out_of_order_tick_is_rejected(self):
+        buffer = TickRingBuffer(capacity=4)
+        buffer.append(2000, 1.0)
+        self.assertFalse(buffer.append(1999, 2.0))
+        self.assertEqual(len(buffer), 1)
+
+    def test_window_and_eviction_after_wrap(self):
+        buffer = TickRingBuffer(capacity=5)
+        for i in range(8):
+            buffer.append(i * 100, float(i))
+        times, prices = buffer.window(400, 700)
+        self.assertEqual(times.tolist(), [400, 500, 600])
+        self.assertEqual(prices.tolist(), [4.0, 5.0, 6.0])
+        self.assertEqual(buffer.evict_before(500), 2)
+        self.assertEqual(buffer.times().tolist(), [500, 600, 700])
+        buffer.append(800, 8.0)
+        self.assertEqual(buffer.times().tolist(), [500, 600, 700, 800])
+
+    def test_clear_and_invalid_capacity(self):
+        buffer = TickRingBuffer(capacity=2)
+        buffer.append(1, 1.0)
+        buffer.clear()
+        self.assertTrue(buffer.empty)
+        self.assertIsNone(buffer.last())
+        with self.assertRaises(ValueError):
+            TickRingBuffer(capacity=0)
+
+
+class CandleBuilderTests(TestCase):
+
+    def test_ohlc_is_built_incrementally_and_closed_by_next_period_tick(self):
+        builder = CandleBuilder(1000)
+        for epoch_ms, price in ((5100, 1.0), (5200, 3.0), (5300, 0.5), (5900, 2.0)):
+            self.assertEqual(builder.update(epoch_ms, price), [])
+        self.assertEqual((builder.start_ms, builder.end_ms), (5000, 6000))
+        closed = builder.update(6000, 2.5)
+        self.assertEqual(len(closed), 1)
+        candle = closed[0]
+        self.assertEqual((candle.open, candle.high, candle.low, candle.close, candle.ticks), (1.0, 3.0, 0.5, 2.0, 4))
+        self.assertEqual((builder.start_ms, builder.current.open), (6000, 2.5))
+
+    def test_late_tick_is_ignored(self):
+        builder = CandleBuilder(1000)
+        builder.update(5100, 1.0)
+        builder.update(6100, 2.0)
+        self.assertEqual(builder.update(5900, 9.0), [])
+        self.assertEqual(builder.late_ticks, 1)
+        self.assertEqual(builder.current.high, 2.0)
+
+    def test_empty_periods_become_gap_candles_at_last_close(self):
+        builder = CandleBuilder(1000)
+        builder.update(5100, 1.0)
+        builder.update(5500, 1.5)
+        closed = builder.update(8200, 2.0) # Périodes 6000 et 7000 sans tick
+        self.assertEqual([candle.start_ms for candle in closed], [5000, 6000, 7000])
+        self.assertFalse(closed[0].is_gap)
+        for gap in closed[1:]:
+            self.assertTrue(gap.is_gap)
+            self.assertEqual((gap.open, gap.high, gap.low, gap.close), (1.5, 1.5, 1.5, 1.5))
+        self.assertEqual((builder.start_ms, builder.current.open), (8000, 2.0))
+
+    def test_advance_to_closes_without_tick_and_caps_gap_candles(self):
+        builder = CandleBuilder(1000, max_gap_candles=2)
+        builder.update(5100, 1.0)
+        self.assertEqual(builder.advance_to(5999), [])
+        closed = builder.advance_to(10500) # Bougie en cours + 4 périodes vides, dont 2 matérialisées
+        self.assertEqual([candle.start_ms for candle in closed], [5000, 8000, 9000])
+        self.assertEqual(builder.skipped_periods, 2)
+        self.assertEqual((builder.start_ms, builder.end_ms, builder.current.ticks), (10000, 11000, 0))
+        self.assertTrue(builder.advance_to(11000)[0].is_gap) # Période sans tick : bougie gap
+
+    def test_gap_filling_disabled_skips_empty_periods(self):
+        builder = CandleBuilder(1000, fill_gaps=False)
+        builder.update(5100, 1.0)
+        closed = builder.update(8100, 2.0)
+        self.assertEqual([candle.start_ms for candle in closed], [5000])
+        self.assertEqual(builder.skipped_periods, 2)
+
+
+class ServerClockTests(TestCase):
+
+    def test_offset_is_the_least_delayed_sample(self):
+        clock = ServerClock(window_ms=60000, time_source=lambda: 0)
+        self.assertFalse(clock.is_synchronized)
+        self.assertEqual(clock.offset_ms, 0.0)
+        for server_ms, local_ms in ((10000, 10300), (11000, 11050), (12000, 12400)):
+            clock.observe(server_ms, local_ms)
+        self.assertTrue(clock.is_synchronized)
+        self.assertEqual(clock.offset_ms, -50) # Tick reçu 50 ms après son horodatage serveur
+        self.assertEqual(clock.now_ms(20000), 19950)
+
+    def test_old_samples_leave_the_window(self):
+        clock = ServerClock(window_ms=1000, time_source=lambda: 0)
+        clock.observe(1000, 1010) # Meilleur échantillon, bientôt trop ancien
+        clock.observe(1500, 1600)
+        self.assertEqual(clock.offset_ms, -10)
+        clock.observe(2300, 2500)
+        self.assertEqual(clock.offset_ms, -100) # Échantillon de 1010 expiré
+        self.assertEqual(clock.samples, 3)
+
+    def test_now_ms_uses_the_time_source(self):
+        local_ms = [5000]
+        clock = ServerClock(time_source=lambda: local_ms[0])
+        clock.observe(5200) # Horloge locale en retard de 200 ms sur le serveur
+        local_ms[0] = 6000
+        self.assertEqual(clock.now_ms(), 6200)
+
+
+class CandleWindowTests(TestCase):
+
+    def test_reset_trade_state_keeps_the_candle_in_progress(self):
+        bot = make_bot()
+        bot.current_active_currency = SYMBOL
+        for i in range(6):
+            bot.symbols.on_tick(SYMBOL, T0 + 20000 + i * 500, 1.0 + i)
+        builder = bot.candle_builder
+        self.assertEqual((builder.start_ms, builder.end_ms), (T0 + 20000, T0 + 25000))
+
+        bot._reset_trade_state()
+        self.assertEqual((builder.start_ms, builder.end_ms, builder.current.ticks), (T0 + 20000, T0 + 25000, 6))
+        self.assertEqual(bot._datetime_to_epoch_ms(bot.current_candle_start_time), T0 + 20000)
+        self.assertEqual(bot._datetime_to_epoch_ms(bot.current_candle_end_time), T0 + 25000)
+
+        _, closed = bot.symbols.on_tick(SYMBOL, T0 + 25000, 7.0)
+        self.assertEqual(len(closed), 1) # La bougie en cours, sans bougies gap dupliquées
+        self.assertFalse(closed[0].is_gap)
+        self.assertEqual((closed[0].start_ms, closed[0].ticks), (T0 + 20000, 6))
+
+    def test_window_without_ticks_is_aligned_on_the_period(self):
+        bot = make_bot(start_ms=T0 + 12345)
+        bot.current_active_currency = SYMBOL
+        self.assertEqual(bot._datetime_to_epoch_ms(bot.current_candle_start_time), T0 + 10000)
+        self.assertEqual(bot._datetime_to_epoch_ms(bot.current_candle_end_time), T0 + 15000)
+
+
+def _log_entry(payload, opcode=2, method="Network.webSocketFrameReceived"):
+    # Entrée de driver.get_log('performance') telle que Chrome la sérialise
+    params = {"response": {"opcode": opcode, "payloadData": base64.b64encode(payload).decode()}}
+    return json.dumps({"message": {"method": method, "params": params}}, separators=(',', ':'))
+
+
+class FrameDecoderTests(TestCase):
+
+    def test_tick_frame_is_decoded_with_normalized_timestamp(self):
+        decoder = FrameDecoder()
+        ticks = decoder.decode_log_entry(_log_entry(b'[["EURUSD_otc",1700000000.5,1.0665]]'))
+        self.assertEqual(ticks, [("EURUSD_otc", 1700000000500, 1.0665)])
+        self.assertEqual((decoder.decoded_frames, decoder.decoded_ticks), (1, 1))
+
+    def test_each_rejection_stage_has_its_own_counter(self):
+        decoder = FrameDecoder(symbol="EURUSD_otc")
+        decoder.decode_log_entry(_log_entry(b'[["EURUSD_otc",1,1]]', method="Network.requestWillBeSent"))
+        decoder.decode_log_entry(_log_entry(b'[["EURUSD_otc",1,1]]', opcode=1))
+        decoder.decode_log_entry('{"message": "Network.webSocketFrameReceived" "opcode":2')
+        decoder.decode_frame(2, "AAA") # Padding invalide
+        decoder.decode_frame(2, base64.b64encode(b'42["signals"]').decode())
+        decoder.decode_frame(2, base64.b64encode(b'[["GBPUSD_otc",1700000000,1.2]]').decode())
+        decoder.decode_frame(2, base64.b64encode(b'[["EURUSD_otc",1700000000,').decode())
+        decoder.decode_frame(2, base64.b64encode(b'[["EURUSD_otc"]]').decode())
+        self.assertEqual(decoder.stats()["dropped"], {
+            "method": 1, "opcode": 1, "envelope": 1, "base64": 1, "prefix": 1, "symbol": 1, "json": 1, "shape": 1,
+        })
+        self.assertEqual(decoder.decoded_frames, 0)
+
+
+class SymbolRegistryTests(TestCase):
+
+    def test_least_recently_updated_symbol_is_evicted(self):
+        registry = SymbolRegistry(1000, max_symbols=2)
+        registry.on_tick("A", 1000, 1.0)
+        registry.on_tick("B", 1000, 1.0)
+        registry.on_tick("A", 1100, 1.1) # A redevient le plus récent
+        registry.on_tick("C", 1000, 1.0)
+        self.assertEqual(registry.symbols(), ["A", "C"])
+        self.assertEqual(registry.stats()["evicted_symbols"], 1)
+
+    def test_pinned_symbol_is_never_evicted(self):
+        registry = SymbolRegistry(1000, max_symbols=2)
+        registry.on_tick("A", 1000, 1.0)
+        registry.pin("A")
+        registry.on_tick("B", 1000, 1.0)
+        registry.on_tick("C", 1000, 1.0)
+        self.assertEqual(registry.symbols(), ["A", "C"])
+
+    def test_none_symbol_is_never_registered(self):
+        registry = SymbolRegistry(1000)
+        self.assertIsNone(registry.get(None))
+        self.assertIsNone(registry.peek("A")) # Lecture sans création
+        self.assertEqual(len(registry), 0)
+
+    def test_bot_without_active_currency_registers_nothing(self):
+        bot = make_bot()
+        self.assertIsNone(bot.candle_builder)
+        self.assertTrue(bot.price_history_stream.empty)
+        bot._reset_trade_state()
+        self.assertEqual(bot.symbols.symbols(), [])
+        bot.current_active_currency = SYMBOL
+        bot.current_active_currency = None
+        self.assertEqual(bot.symbols.symbols(), [SYMBOL])
+
+
+class TradingPanelStateTests(TestCase):
+
+    def setUp(self):
+        self.now = [100.0]
+        self.panel = TradingPanelState(verify_interval_seconds=60, monotonic=lambda: self.now[0])
+
+    def test_known_value_skips_the_action(self):
+        panel = self.panel
+        self.assertFalse(panel.matches("amount", "$2")) # Inconnu : action nécessaire
+        panel.confirm("amount", "$2")
+        self.assertTrue(panel.matches("amount", "2.00"))
+        self.assertFalse(panel.matches("amount", 3))
+        self.assertEqual((panel.skipped_actions["amount"], panel.applied_actions["amount"]), (1, 1))
+
+    def test_invalidate_forgets_values_and_forces_verification(self):
+        panel = self.panel
+        panel.confirm("amount", 2)
+        panel.confirm("asset", "EURUSD_otc")
+        panel.reconcile({})
+        self.assertFalse(panel.needs_verification())
+        panel.invalidate("amount")
+        self.assertIsNone(panel.get("amount"))
+        self.assertEqual(panel.get("asset"), "EURUSD_otc")
+        self.assertTrue(panel.needs_verification())
+        panel.invalidate()
+        self.assertFalse(panel.matches("asset", "EURUSD_otc"))
+
+    def test_reconcile_adopts_dom_values_and_counts_mismatches(self):
+        panel = self.panel
+        panel.confirm("amount", 2)
+        panel.confirm("expiry_minutes", 1)
+        changed = panel.reconcile({"amount": "$5", "expiry_minutes": "1", "asset": None})
+        self.assertEqual(changed, ["amount"])
+        self.assertEqual((panel.get("amount"), panel.get("expiry_minutes"), panel.get("asset")), (5.0, 1, None))
+        self.assertEqual((panel.mismatches, panel.verifications), (1, 1))
+
+    def test_verification_interval_and_retry_delay(self):
+        panel = self.panel
+        panel.reconcile({"amount": 1})
+        self.now[0] += 59
+        self.assertFalse(panel.needs_verification())
+        self.now[0] += 1
+        self.assertTrue(panel.needs_verification())
+        panel.retry_verification_in(5)
+        self.assertFalse(panel.needs_verification())
+        self.now[0] += 5
+        self.assertTrue(panel.needs_verification())
+
+
+class FakeLogDriver:
+    """
+    🧪 Driver minimal du mode polling : get_log sert une frame de tick par appel.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_log(self, log_type):
+        self.calls += 1
+        return [{"message": _log_entry(b'[["EURUSD_otc",1700000000,1.1]]')}]
+
+
+class PipelineConcurrencyTests(TestCase):
+
+    def test_slow_execution_action_does_not_delay_polling_ingestion(self):
+        bot = make_bot()
+        bot.driver = FakeLogDriver()
+        execution = ExecutionStage(bot.driver_lock)
+        running = [True]
+        thread = threading.Thread(target=execution.run, args=(lambda: running[0], 0.01), daemon=True)
+        thread.start()
+        action_started = threading.Event()
+        action_done = threading.Event()
+
+        def slow_ui_action(): # Ex : attente d'un élément puis clics, plusieurs secondes sous driver_lock
+            action_started.set()
+            action_done.wait(5)
+
+        try:
+            execution.submit(slow_ui_action)
+            self.assertTrue(action_started.wait(2))
+            started = time.perf_counter()
+            ticks = bot._collect_ticks()
+            elapsed = time.perf_counter() - started
+            self.assertEqual(ticks, [(SYMBOL, 1700000000000, 1.1)])
+            self.assertLess(elapsed, 0.5)
+            self.assertFalse(action_done.is_set()) # L'action d'interface était toujours en cours
+        finally:
+            action_done.set()
+            running[0] = False
+            thread.join(2)
+
+    def test_other_stages_read_the_candle_window_without_registering_symbols(self):
+        bot = make_bot()
+        bot.current_active_currency = SYMBOL
+        bot.symbols.on_tick(SYMBOL, T0 + 1000, 1.0)
+        bot.symbols.on_tick(SYMBOL, T0 + 2000, 1.2)
+        self.assertEqual(len(bot.price_history_stream), 2)
+        bot._reset_trade_state()
+        self.assertEqual(bot.symbols.symbols(), [SYMBOL])
+
+    def test_candle_window_is_read_under_the_state_lock(self):
+        bot = make_bot(start_ms=T0 + 7000) # Fenêtre locale : T0 + 5000
+        bot.current_active_currency = SYMBOL
+        locked = threading.Event()
+
+        def candle_stage(): # L'étage bougies garde le verrou pendant l'intégration d'un lot
+            with bot.state_lock:
+                locked.set()
+                time.sleep(0.2)
+                bot.symbols.on_tick(SYMBOL, T0 + 1000, 1.0)
+
+        thread = threading.Thread(target=candle_stage, daemon=True)
+        thread.start()
+        self.assertTrue(locked.wait(2))
+        bot._reset_trade_state() # Attend la fin du lot : fenêtre ouverte par le tick, pas une fenêtre locale
+        thread.join(2)
+        self.assertEqual(bot._datetime_to_epoch_ms(bot.current_candle_start_time), T0)
+
+
+class TickRecorderTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = self.tmp.name
+
+    def test_segments_rotate_on_record_count(self):
+        recorder = TickRecorder(self.directory, segment_records=4)
+        recorder.record_many([(SYMBOL, T0 + i, 1.0 + i) for i in range(10)])
+        self.assertEqual(recorder.flush(), 10)
+        recorder.close()
+        segments = list_segments(self.directory)
+        self.assertEqual([len(TickSegment(path)) for path in segments], [4, 4, 2])
+        self.assertEqual(recorder.stats()["segments"], 3)
+        self.assertTrue(all(TickSegment(path).index["closed"] for path in segments))
+
+    def test_segments_rotate_on_time_span(self):
+        recorder = TickRecorder(self.directory, segment_seconds=60)
+        recorder.record_many([(SYMBOL, T0, 1.0), (SYMBOL, T0 + 30000, 1.1)])
+        recorder.flush()
+        recorder.record_many([(SYMBOL, T0 + 61000, 1.2)]) # Lot suivant au-delà de 60 s : nouveau segment
+        recorder.flush()
+        recorder.close()
+        self.assertEqual([len(TickSegment(path)) for path in list_segments(self.directory)], [2, 1])
+
+    def test_retention_deletes_the_oldest_segments_on_rotation(self):
+        recorder = TickRecorder(self.directory, segment_records=2, max_segments=2)
+        recorder.record_many([(SYMBOL, T0 + i * 1000, 1.0 + i) for i in range(7)])
+        recorder.flush()
+        recorder.close()
+        segments = list_segments(self.directory)
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(recorder.stats()["deleted_segments"], 2)
+        self.assertEqual(load_ticks(self.directory, SYMBOL)[0].tolist(), [T0 + 4000, T0 + 5000, T0 + 6000])
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(
+            name for path in segments for name in (os.path.basename(path), os.path.basename(path)[:-4] + ".idx.json")))
+
+    def test_retention_by_size_keeps_the_current_segment(self):
+        record_size = 20 # TICK_RECORD_DTYPE
+        recorder = TickRecorder(self.directory, segment_records=3, max_bytes=4 * record_size)
+        recorder.record_many([(SYMBOL, T0 + i * 1000, 1.0) for i in range(9)])
+        recorder.flush()
+        recorder.close()
+        # Vérifiée à l'ouverture du 3e segment : les segments fermés tiennent dans max_bytes, plus le segment courant
+        self.assertEqual([TickSegment(path).ticks()["ts_ms"][0] for path in list_segments(self.directory)], [T0 + 3000, T0 + 6000])
+
+    def test_memmap_read_back_filters_symbol_and_interval(self):
+        recorder = TickRecorder(self.directory, segment_records=3)
+        recorder.record_many([
+            (SYMBOL, T0, 1.0), ("GBPUSD_otc", T0 + 500, 2.0), (SYMBOL, T0 + 1000, 1.1),
+            (SYMBOL, T0 + 2000, 1.2), ("GBPUSD_otc", T0 + 2500, 2.1), (SYMBOL, T0 + 3000, 1.3),
+        ])
+        recorder.flush()
+        recorder.close()
+        timestamps, prices = load_ticks(self.directory, SYMBOL)
+        self.assertEqual(timestamps.tolist(), [T0, T0 + 1000, T0 + 2000, T0 + 3000])
+        self.assertEqual(prices.tolist(), [1.0, 1.1, 1.2, 1.3])
+        timestamps, _ = load_ticks(self.directory, SYMBOL, start_ms=T0 + 1000, end_ms=T0 + 3000)
+        self.assertEqual(timestamps.tolist(), [T0 + 1000, T0 + 2000])
+        self.assertEqual(load_ticks(self.directory, "AUDUSD_otc")[0].size, 0)
+
+    def test_truncated_segment_stays_readable(self):
+        recorder = TickRecorder(self.directory)
+        recorder.record_many([(SYMBOL, T0 + i * 1000, 1.0) for i in range(3)])
+        recorder.flush() # Segment encore ouvert, puis arrêt brutal au milieu d'un enregistrement
+        path = list_segments(self.directory)[0]
+        with open(path, "ab") as segment_file:
+            segment_file.write(b"\x00" * 7)
+        self.assertEqual(len(TickSegment(path)), 3)
+        self.assertEqual(load_ticks(self.directory, SYMBOL)[0].size, 3)
+        recorder.close()
+        self.assertTrue(os.path.exists(path))
+
+
+def seeded_tick_series(seed, minutes=60, ticks_per_minute=8):
+    """
+    🎲 Marche aléatoire reproductible de ticks (horodatages irréguliers, toutes les minutes couvertes).
+    """
+    rng = np.random.default_rng(seed)
+    offsets = np.sort(rng.integers(0, 60000, size=(minutes, ticks_per_minute)), axis=1)
+    timestamps = (T0 + np.arange(minutes)[:, None] * 60000 + offsets).ravel()
+    prices = 1.1 + np.cumsum(rng.normal(0, 0.0002, size=timestamps.size))
+    return timestamps, prices
+
+
+class BacktestEquivalenceTests(TestCase):
+
+    CONFIGS = ((2, (1, 2, 5)), (3, (1, 3, 9, 27)), (1, (2, 4)), (4, (1, 2)))
+
+    def test_vectorized_backtest_matches_the_event_driven_bot(self):
+        timestamps, prices = seeded_tick_series(seed=42)
+        candles = backtest.candles_from_ticks(timestamps, prices, 60000)
+        opens, closes = candles["open"], candles["close"]
+        for offset_candles, bet_sizes in self.CONFIGS:
+            with self.subTest(offset_candles=offset_candles, bet_sizes=bet_sizes):
+                result = backtest.check_equivalence(opens, closes, offset_candles, bet_sizes)
+                self.assertTrue(result["equivalent"], result)
+                self.assertEqual(result["trades"], result["vectorized_trades"])
+                self.assertGreater(result["trades"], 0)
+
+                reference = backtest.event_driven_trades(opens, closes, {"OFFSET_CANDLES": offset_candles, "BET_SIZES": list(bet_sizes)})
+                reference_pnl = sum(trade["amount"] * 0.92 if trade["result"] == "WIN" else -trade["amount"] for trade in reference)
+                summary = backtest.backtest_streak_martingale(opens, closes, offset_candles, bet_sizes, payout=0.92).summary()
+                self.assertAlmostEqual(summary["pnl"], reference_pnl, places=6)
+
+
+class SweepTests(TestCase):
+
+    GRID = {"OFFSET_CANDLES": [2, 3], "BET_SIZES": [[1, 2], [1, 2, 4]], "TRADING_PERIOD_MINUTES": [5, 1]}
+
+    def test_parameter_grid_is_the_cartesian_product_sorted_by_period(self):
+        combinations = sweep.parameter_grid(self.GRID)
+        self.assertEqual(len(combinations), 8)
+        self.assertEqual([c["TRADING_PERIOD_MINUTES"] for c in combinations], [1] * 4 + [5] * 4)
+        self.assertEqual(len({json.dumps(c, sort_keys=True) for c in combinations}), 8)
+        self.assertEqual(len(sweep.parameter_grid()), 4 * len(sweep.DEFAULT_GRID["BET_SIZES"]) * 3)
+
+    def test_parameter_grid_rejects_parameters_it_does_not_sweep(self):
+        with self.assertRaises(ValueError):
+            sweep.parameter_grid({"MIN_YIELD_PERCENT": [80, 90]})
+
+    def test_shards_are_contiguous_balanced_and_non_empty(self):
+        combinations = list(range(10))
+        shards = sweep.shard_combinations(combinations, 4)
+        self.assertEqual([len(shard) for shard in shards], [3, 3, 2, 2])
+        self.assertEqual(sum(shards, []), combinations)
+        self.assertEqual(sweep.shard_combinations(combinations[:2], 8), [[0], [1]])
+        self.assertEqual(sweep.shard_combinations(combinations, 0), [combinations])
+
+    def test_rank_results_puts_missing_values_last(self):
+        rows = [{"id": "a", "pnl": 1.0}, {"id": "b", "pnl": None}, {"id": "c", "pnl": 3.0}, {"id": "d", "pnl": -2.0}]
+        self.assertEqual([(r["rank"], r["id"]) for r in sweep.rank_results(rows)], [(1, "c"), (2, "a"), (3, "d"), (4, "b")])
+        self.assertEqual([r["id"] for r in sweep.rank_results(rows, ascending=True)], ["d", "a", "c", "b"])
+
+    def test_shared_arrays_round_trip_read_only(self):
+        timestamps, prices = seeded_tick_series(seed=3, minutes=5)
+        shared = sweep.SharedArrays({"timestamps": timestamps, "prices": prices})
+        try:
+            arrays, blocks = sweep.SharedArrays.attach(shared.descriptor)
+            np.testing.assert_array_equal(arrays["timestamps"], timestamps)
+            np.testing.assert_array_equal(arrays["prices"], prices)
+            self.assertEqual(arrays["prices"].dtype, np.asarray(prices).dtype)
+            with self.assertRaises(ValueError):
+                arrays["prices"][0] = 0.0
+            del arrays
+            for block in blocks:
+                block.close()
+        finally:
+            shared.release()
+        with self.assertRaises(FileNotFoundError):
+            sweep.SharedArrays.attach(shared.descriptor)
+
+    def test_payout_scales_pnl_but_not_the_break_even_payout(self):
+        timestamps, prices = seeded_tick_series(seed=42)
+        combinations = sweep.parameter_grid({"OFFSET_CANDLES": [2], "BET_SIZES": [[1, 2, 5]], "TRADING_PERIOD_MINUTES": [1]})
+        low, = sweep.evaluate_combinations(timestamps, prices, combinations, payout=0.80)
+        high, = sweep.evaluate_combinations(timestamps, prices, combinations, payout=0.92)
+        self.assertGreater(low["bets"], 0)
+        self.assertLess(low["pnl"], high["pnl"])
+        self.assertAlmostEqual(low["break_even_payout"], high["break_even_payout"])
+        self.assertNotIn("MIN_YIELD_PERCENT", high)
+
+
+class RiskTests(TestCase):
+
+    def test_always_winning_never_ruins(self):
+        report = risk.simulate_bankroll(bet_sizes=(1, 2, 5), payout=0.92, win_rate=1.0, bankroll=10.0, paths=200, bets=50, seed=1)
+        self.assertEqual(report["ruin_probability"], 0.0)
+        self.assertIsNone(report["median_bets_to_ruin"])
+        self.assertAlmostEqual(report["expected_pnl"], 50 * 0.92)
+        self.assertEqual(report["max_drawdown"], 0.0)
+        self.assertEqual(report["mean_busts"], 0.0)
+
+    def test_always_losing_ruins_at_the_first_uncovered_stake(self):
+        # 10 - 1 - 2 - 5 = 2, puis 2 - 1 = 1 : la mise suivante (2) n'est plus couverte au 5e ordre
+        report = risk.simulate_bankroll(bet_sizes=(1, 2, 5), win_rate=0.0, bankroll=10.0, paths=20, bets=30, seed=1)
+        self.assertEqual(report["ruin_probability"], 1.0)
+        self.assertEqual(report["median_bets_to_ruin"], 4)
+        self.assertAlmostEqual(report["expected_pnl"], -9.0)
+        self.assertEqual(report["max_drawdown"], 9.0)
+
+    def test_seeded_runs_are_reproducible(self):
+        first = risk.simulate_bankroll(win_rate=0.5, bankroll=20.0, paths=500, bets=100, seed=7)
+        self.assertEqual(first, risk.simulate_bankroll(win_rate=0.5, bankroll=20.0, paths=500, bets=100, seed=7))
+        self.assertGreater(first["ruin_probability"], 0.0)
+        self.assertLess(first["ruin_probability"], 1.0)
+
+    def test_rejects_paths_longer_than_a_chunk(self):
+        with self.assertRaises(ValueError):
+            risk.simulate_bankroll(paths=1, bets=risk.MAX_BETS_PER_PATH + 1)
+        with self.assertRaises(ValueError):
+            risk.simulate_bankroll(paths=1, bets=0)
+
+    def test_bootstrap_draws_circular_blocks_of_the_history(self):
+        history = np.array([True, False, False, True, False])
+        samples = risk.bootstrap_outcomes(history, paths=50, bets=12, block_size=3, rng=np.random.default_rng(3))
+        self.assertEqual(samples.shape, (50, 12))
+        doubled = np.concatenate([history, history])
+        blocks = {tuple(doubled[start:start + 3]) for start in range(len(history))}
+        for row in samples:
+            for first in range(0, 12, 3):
+                self.assertIn(tuple(row[first:first + 3]), blocks)
+        self.assertAlmostEqual(samples.mean(), history.mean(), delta=0.1)
+
+    def test_bootstrapped_simulation_uses_the_history_win_rate(self):
+        report = risk.simulate_bankroll(outcomes=[True] * 30, paths=100, bets=40, seed=2)
+        self.assertEqual((report["source"], report["win_rate"], report["ruin_probability"]), ("bootstrap", 1.0, 0.0))
+        with self.assertRaises(ValueError):
+            risk.bootstrap_outcomes([], paths=1, bets=1)
+
+
+def exposition_samples(text):
+    # Lignes d'échantillons "nom{labels} valeur" -> {"nom{labels}": valeur}
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line and not line.startswith("#")}
+
+
+class PrometheusExpositionTests(TestCase):
+
+    NAME = "trading_bot_stage_duration_seconds"
+
+    def make_snapshot(self):
+        metrics = HotPathMetrics(buckets=(0.001, 0.01, 0.1))
+        for seconds in (0.0005, 0.001, 0.005, 0.05, 0.5, 2.0):
+            metrics.observe("decode", seconds)
+        metrics.inc("ticks", 7)
+        return dict(metrics.snapshot(), published_at=1700000000.5)
+
+    def test_buckets_are_cumulative_up_to_inf(self):
+        samples = exposition_samples(render_prometheus({"bot-1": self.make_snapshot()}))
+        bucket = self.NAME + '_bucket{bot="bot-1",stage="decode",le="%s"}'
+        # Bornes inclusives (le) : 0.001 tombe dans le premier compartiment
+        self.assertEqual([samples[bucket % bound] for bound in ("0.001", "0.01", "0.1", "+Inf")], [2, 3, 4, 6])
+        self.assertEqual(samples[self.NAME + '_count{bot="bot-1",stage="decode"}'], 6)
+        self.assertAlmostEqual(samples[self.NAME + '_sum{bot="bot-1",stage="decode"}'], 2.5565)
+        self.assertEqual(samples['trading_bot_ticks_total{bot="bot-1"}'], 7)
+        self.assertEqual(samples['trading_bot_snapshot_timestamp_seconds{bot="bot-1"}'], 1700000000.5)
+
+    def test_metric_families_are_typed_once(self):
+        text = render_prometheus({"a": self.make_snapshot(), "b": self.make_snapshot()})
+        self.assertEqual(text.count(f"# TYPE {self.NAME} histogram"), 1)
+        self.assertEqual(text.count("# TYPE trading_bot_ticks_total counter"), 1)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_bot_id_label_is_escaped(self):
+        text = render_prometheus({'x"y\\z\nw': self.make_snapshot()})
+        self.assertIn('trading_bot_ticks_total{bot="x\\"y\\\\z\\nw"} 7', text)
+        self.assertEqual(len(text.splitlines()), len(render_prometheus({"plain": self.make_snapshot()}).splitlines()))
+
+
+class FakeRedis:
+    # Sous-ensemble de redis.Redis utilisé par StatePublisher / read_state (set avec ex, pipeline, get)
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.sets = 0
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+        self.sets += 1
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+class StatePublisherTests(TestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(publisher, "get_redis_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.status = {"is_running": True}
+
+    def make_publisher(self, **options):
+        return publisher.StatePublisher("redis://fake", "bot-1", lambda: {"status": self.status, "ohlc": [], "trades": []}, **options)
+
+    def test_state_keys_expire(self):
+        self.assertTrue(self.make_publisher(refresh_seconds=10, ttl_seconds=180).publish())
+        self.assertEqual(self.redis.expiry, {f"trading_bot:bot-1:{part}": 180 for part in publisher.STATE_PARTS})
+        snapshot = publisher.read_state("redis://fake", "bot-1", "status")
+        self.assertEqual(snapshot["max_age_seconds"], 10 * publisher.STALE_AFTER_REFRESHES)
+
+    def test_state_is_republished_without_changes(self):
+        state_publisher = self.make_publisher(min_interval_seconds=0.0, refresh_seconds=0.02, ttl_seconds=1)
+        state_publisher.start()
+        deadline = time.monotonic() + 2
+        while state_publisher.published < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        state_publisher.stop()
+        self.assertGreaterEqual(state_publisher.published, 4)
+        self.assertEqual(publisher.read_state("redis://fake", "bot-1", "status")["version"], state_publisher.version)
+
+    def test_a_snapshot_not_republished_in_time_is_served_as_stopped(self):
+        self.make_publisher(refresh_seconds=10, ttl_seconds=180).publish()
+        snapshot = publisher.read_state("redis://fake", "bot-1", "status")
+        published_at = snapshot["published_at"]
+        self.assertEqual(publisher.status_from_snapshot(snapshot, now=published_at + 29), {"is_running": True})
+        stale = publisher.status_from_snapshot(snapshot, now=published_at + 31)
+        self.assertEqual((stale["is_running"], stale["stale"], stale["snapshot_age_seconds"]), (False, True, 31.0))
+        self.assertTrue(self.status["is_running"]) # L'instantané lu n'est pas modifié
+
+    def test_snapshots_without_refresh_never_go_stale(self):
+        self.make_publisher().publish()
+        snapshot = publisher.read_state("redis://fake", "bot-1", "status")
+        self.assertIsNone(self.redis.expiry["trading_bot:bot-1:status"])
+        self.assertFalse(publisher.is_stale(snapshot, now=snapshot["published_at"] + 86400))
+
+    def test_bot_state_ttl_covers_a_few_candles(self):
+        bot = make_bot(REDIS_URL="redis://fake", STATE_REFRESH_SECONDS=10, STATE_TTL_CANDLES=3, TRADING_PERIOD_MINUTES=5, PERIOD=0)
+        self.assertEqual((bot.state_publisher.refresh_seconds, bot.state_publisher.ttl_seconds), (10, 900))
+
+
+class LiveControlTests(TestCase):
+
+    def test_valid_updates_are_normalized(self):
+        update = {"BET_SIZES": [1, 2.5, 4], "OFFSET_CANDLES": 3, "MIN_YIELD_PERCENT": 85}
+        self.assertEqual(validate_live_config(update), update)
+        self.assertEqual(parse_command(json.dumps({"command": "update_config", "config": {"OFFSET_CANDLES": 1}})),
+                         {"command": "update_config", "config": {"OFFSET_CANDLES": 1}})
+        self.assertEqual(parse_command(b'{"command": "pause", "config": {"ignored": 1}}'), {"command": "pause"})
+
+    def test_invalid_updates_are_rejected(self):
+        invalid = (
+            {}, None, [], {"TRADING_PERIOD_MINUTES": 5}, {"BET_SIZES": [1, 2], "BOT_ID": "x"},
+            {"BET_SIZES": []}, {"BET_SIZES": [1, -2]}, {"BET_SIZES": [1, 0]}, {"BET_SIZES": [True, 2]}, {"BET_SIZES": "1,2"},
+            {"BET_SIZES": [1, "2"]}, {"OFFSET_CANDLES": True}, {"OFFSET_CANDLES": 0}, {"OFFSET_CANDLES": -1}, {"OFFSET_CANDLES": 2.0},
+            {"MIN_YIELD_PERCENT": False}, {"MIN_YIELD_PERCENT": -1}, {"MIN_YIELD_PERCENT": 101}, {"MIN_YIELD_PERCENT": "90"},
+        )
+        for config in invalid:
+            with self.subTest(config=config), self.assertRaises(ValueError):
+                validate_live_config(config)
+
+    def test_invalid_messages_are_rejected(self):
+        for raw in ("not json", "[]", '{"command": "restart"}', "{}", '{"command": "update_config"}',
+                    '{"command": "update_config", "config": {"OFFSET_CANDLES": 0}}', None):
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                parse_command(raw)
+
+    def test_rejected_messages_are_not_queued(self):
+        bot = make_bot()
+        self.assertFalse(bot.control.push('{"command": "update_config", "config": {"BET_SIZES": [1, true]}}'))
+        self.assertTrue(bot.control.push('{"command": "resume"}'))
+        self.assertEqual((bot.control.received, bot.control.rejected), (1, 1))
+        self.assertEqual(bot.control.drain(), [{"command": "resume"}])
+
+    def test_shrinking_the_ladder_below_the_current_tier_restarts_the_series(self):
+        bot = make_bot(BET_SIZES=[1, 2, 5, 10])
+        bot.current_bet_index, bot.active_bet_details, bot.is_trade_active_now = 3, {"amount": 10}, True
+        bot._apply_live_config({"BET_SIZES": [1, 2]})
+        self.assertEqual((bot.current_bet_index, bot.active_bet_details, bot.is_trade_active_now), (0, None, False))
+        self.assertEqual((bot.bet_size_tiers, bot.config["BET_SIZES"]), ([1, 2], [1, 2]))
+
+        bot.current_bet_index, bot.active_bet_details = 1, {"amount": 2}
+        bot._apply_live_config({"BET_SIZES": [1, 3, 9]}) # Palier courant conservé
+        self.assertEqual((bot.current_bet_index, bot.active_bet_details), (1, {"amount": 2}))
+
+    def test_offset_update_rebuilds_the_streak_window(self):
+        bot = make_bot(OFFSET_CANDLES=2)
+        for i, (open_price, close_price) in enumerate(((1.0, 1.1), (1.1, 1.0), (1.0, 1.2), (1.2, 1.3), (1.3, 1.25), (1.25, 1.2))):
+            bot._on_candle_closed(Candle(T0 + i * 5000, T0 + (i + 1) * 5000, open_price, 1.4, 0.9, close_price, 3))
+        colors = bot.ohlc_store.recent_colors(6)
+        self.assertEqual(colors, ["green", "red", "green", "green", "red", "red"])
+        self.assertEqual(list(bot.indicators.streak.recent), colors[-2:])
+        bot._apply_live_config({"OFFSET_CANDLES": 4})
+        self.assertEqual(bot.trading_offset_candles, 4)
+        self.assertEqual(bot.indicators.streak.recent.maxlen, 4)
+        self.assertEqual(list(bot.indicators.streak.recent), colors[-4:])
+
+    def test_pause_resets_the_series_and_blocks_trading(self):
+        bot = make_bot(BET_SIZES=[1, 2, 5])
+        bot.current_bet_index, bot.active_bet_details, bot.is_trade_active_now = 2, {"amount": 5}, True
+        bot.armed_order = object()
+        bot.control.push('{"command": "pause"}')
+        bot._process_control_commands()
+        self.assertTrue(bot.is_paused)
+        self.assertEqual((bot.current_bet_index, bot.active_bet_details, bot.is_trade_active_now, bot.armed_order), (0, None, False, None))
+
+        with mock.patch.object(bot, "_apply_trade_logic") as trade_logic:
+            bot._on_candle_closed(candle_at(0, 1.1))
+            trade_logic.assert_not_called()
+            self.assertEqual(len(bot.ohlc_store), 1) # Bougies toujours suivies pendant la pause
+            bot.control.push('{"command": "resume"}')
+            bot._process_control_commands()
+            bot._on_candle_closed(candle_at(1, 1.2))
+            trade_logic.assert_called_once()
+        self.assertFalse(bot.is_paused)
+
+
+class BenchmarkHistoryTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.history = os.path.join(tmp.name, "history.jsonl")
+        benchmarks.append_history(self.history, {"version": benchmarks.BENCHMARK_VERSION, "commit": "base", **benchmarks.host_signature(),
+                                                 "results": {"ticks_per_second": 1000.0}})
+
+    def run_main(self, ticks_per_second, *flags):
+        with mock.patch.object(benchmarks, "run_benchmarks", return_value={"ticks_per_second": ticks_per_second}), \
+                mock.patch("builtins.print"):
+            return benchmarks.main(["--history", self.history, "--record", *flags])
+
+    def test_regression_is_not_recorded_without_force(self):
+        self.assertEqual(self.run_main(500.0), 1)
+        self.assertEqual(len(benchmarks.load_history(self.history)), 1)
+        self.assertEqual(self.run_main(500.0, "--force"), 1)
+        self.assertEqual(len(benchmarks.load_history(self.history)), 2)
+
+    def test_results_without_regression_are_recorded(self):
+        self.assertEqual(self.run_main(1050.0), 0)
+        self.assertEqual(benchmarks.load_history(self.history)[-1]["results"], {"ticks_per_second": 1050.0})
+        self.assertEqual(benchmarks.load_history(self.history)[-1]["host"], benchmarks.host_signature()["host"])
+
+    def test_records_from_another_host_are_not_a_baseline(self):
+        other = dict(benchmarks.host_signature(), host="autre-machine")
+        benchmarks.append_history(self.history, {"version": benchmarks.BENCHMARK_VERSION, "commit": "other", **other,
+                                                 "results": {"ticks_per_second": 5000.0}})
+        self.assertEqual(self.run_main(1050.0), 0) # Comparé à "base" (même hôte), pas à "other"
+        with mock.patch.object(benchmarks, "host_signature", return_value=dict(other, python="0.0")):
+            self.assertEqual(self.run_main(10.0), 0) # Aucune référence pour cet hôte : pas de comparaison
+        self.assertEqual(len(benchmarks.load_history(self.history)), 4)
+
+
+class SupervisorConfigTests(TestCase):
+
+    def test_default_write_directories_are_namespaced_per_bot(self):
+        configs = [bot_process_config({"bot_id": bot_id}, "redis://localhost:6379/0") for bot_id in ("bot-a", "bot-b")]
+        self.assertEqual([config["SPILL_DIR"] for config in configs], [os.path.join("spill", "bot-a"), os.path.join("spill", "bot-b")])
+        self.assertEqual(configs[0]["TICK_CAPTURE_DIR"], os.path.join("ticks", "bot-a"))
+        self.assertEqual(configs[0]["BOT_ID"], "bot-a")
+
+    def test_spec_directories_are_kept(self):
+        spec = {"bot_id": "bot-a", "config": {"SPILL_DIR": "/data/spill-a", "TICK_CAPTURE_DIR": None}}
+        config = bot_process_config(spec, "redis://localhost:6379/0", executor="http://grid:4444/wd/hub")
+        self.assertEqual((config["SPILL_DIR"], config["TICK_CAPTURE_DIR"]), ("/data/spill-a", None))
+        self.assertEqual(config["SELENIUM_COMMAND_EXECUTOR"], "http://grid:4444/wd/hub")
+
+    def test_bot_ids_that_leave_the_bot_directory_are_rejected(self):
+        for bot_id in ("/tmp/evil", "../../x", "..", ".", "a/b", "a\\b", "a..b", "", "bot 1", "bot\n", None, 7):
+            with self.subTest(bot_id=bot_id):
+                with self.assertRaises(ValueError):
+                    bot_process_config({"bot_id": bot_id}, "redis://localhost:6379/0")
+                with self.assertRaises(ValueError):
+                    register_bot("redis://localhost:6379/0", bot_id)
+        self.assertEqual(bot_process_config({"bot_id": "Bot_1.eu-west"}, None)["SPILL_DIR"], os.path.join("spill", "Bot_1.eu-west"))
+
+
+class FakeChromeDriver:
+    """
+    🧪 Driver du pool : `ready` pilote la vérification de la page, quit() est compté.
+    """
+
+    def __init__(self):
+        self.ready = True
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class DriverPoolTests(TestCase):
+
+    def make_pool(self, check=None, **options):
+        self.drivers = []
+
+        def create():
+            self.drivers.append(FakeChromeDriver())
+            return self.drivers[-1]
+
+        return DriverPool(create, prepare=lambda driver: None, check=check or (lambda driver: driver.ready), **options)
+
+    def test_lease_takes_a_warm_driver_and_refills(self):
+        pool = self.make_pool(size=1)
+        self.assertTrue(pool._maintain())
+        pooled = pool.lease(timeout=0)
+        self.assertIs(pooled.driver, self.drivers[0])
+        self.assertEqual((pooled.uses, pool.stats()["leased"], pool.stats()["idle"]), (1, 1, 0))
+        pool._maintain() # Remplacement du driver prêté
+        self.assertEqual((len(self.drivers), pool.stats()["idle"]), (2, 1))
+
+    def test_lease_without_warm_driver_is_a_miss(self):
+        pool = self.make_pool(size=1)
+        self.assertIsNone(pool.lease(timeout=0))
+        self.assertEqual(pool.stats()["misses"], 1)
+
+    def test_broken_driver_is_retired_at_lease(self):
+        pool = self.make_pool(size=2)
+        pool._maintain()
+        self.drivers[0].ready = False
+        pooled = pool.lease(timeout=0)
+        self.assertIs(pooled.driver, self.drivers[1])
+        pool._close_retired()
+        self.assertEqual((self.drivers[0].quit_calls, pool.stats()["recycled"]), (1, 1))
+
+    def test_released_driver_is_reused_then_retired_when_worn_out(self):
+        pool = self.make_pool(size=1, max_uses=2)
+        pool._maintain()
+        pooled = pool.lease(timeout=0)
+        pool.release(pooled)
+        pool._maintain() # Rechargé et remis dans le pool (pas de second driver)
+        self.assertEqual((len(self.drivers), pool.stats()["idle"]), (1, 1))
+        pooled = pool.lease(timeout=0)
+        self.assertEqual(pooled.uses, 2)
+        pool.release(pooled)
+        pool._maintain()
+        self.assertEqual((self.drivers[0].quit_calls, len(self.drivers), pool.stats()["idle"]), (1, 2, 1))
+
+    def test_recycle_all_retires_idle_drivers_of_old_generation(self):
+        pool = self.make_pool(size=1)
+        pool._maintain()
+        pooled = pool.lease(timeout=0)
+        pool._maintain()
+        pool.recycle_all()
+        pool.release(pooled) # Génération précédente : recyclé au retour
+        pool._maintain()
+        self.assertEqual([driver.quit_calls for driver in self.drivers], [1, 1, 0])
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_drivers_in_health_check_count_toward_capacity(self):
+        in_check = threading.Event()
+        resume = threading.Event()
+        slow = [False]
+
+        def slow_check(driver): # Vérification périodique lente (page qui ne répond plus)
+            if slow[0]:
+                in_check.set()
+                resume.wait(5)
+            return driver.ready
+
+        pool = self.make_pool(check=slow_check, size=1, health_check_seconds=0)
+        pool._fill()
+        slow[0] = True
+        thread = threading.Thread(target=pool._health_check_idle, daemon=True)
+        thread.start()
+        self.assertTrue(in_check.wait(2))
+        self.assertEqual(pool.stats()["checking"], 1)
+        self.assertTrue(pool._fill())
+        self.assertEqual(len(self.drivers), 1) # Aucun Chrome en trop pendant la vérification
+        resume.set()
+        thread.join(2)
+        self.assertEqual((pool.stats()["idle"], pool.stats()["checking"]), (1, 0))
+
+    def test_drivers_waiting_to_be_closed_count_until_closed(self):
+        pool = self.make_pool(size=1)
+        pool._maintain()
+        pool._retire(pool._idle.popleft()) # Ex : retiré par un prêt depuis un autre thread
+        self.assertEqual(pool._warm_count(), 1)
+        pool._fill() # Fermé d'abord, puis remplacé : jamais deux Chrome non prêtés
+        self.assertEqual((self.drivers[0].quit_calls, len(self.drivers), pool.stats()["idle"]), (1, 2, 1))
+
+
+class StubFrameListener:
+    """
+    🧪 Abonnement CDP simulé : frames servies par drain(), `alive` pilote la bascule sur le polling.
+    """
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.alive = True
+        self.stopped = False
+
+    @property
+    def is_alive(self):
+        return self.alive
+
+    def drain(self, timeout=0.1):
+        frames, self.frames = self.frames, []
+        return frames
+
+    def stop(self):
+        self.stopped = True
+
+
+class FrameIngestionTests(TestCase):
+
+    def test_listener_queue_drops_oldest_frames_when_full(self):
+        listener = CdpFrameListener(driver=None, max_queue_size=2)
+        for frame in ((2, "a"), (2, "b"), (2, "c")):
+            listener._push(frame)
+        self.assertEqual(listener.dropped_frames, 1)
+        self.assertEqual(listener.drain(timeout=0), [(2, "b"), (2, "c")])
+        self.assertEqual(listener.drain(timeout=0), [])
+
+    def test_cdp_mode_decodes_pushed_frames_and_drains_the_performance_log(self):
+        bot = make_bot(PERFORMANCE_LOG_DRAIN_SECONDS=5)
+        bot.driver = FakeLogDriver()
+        payload = base64.b64encode(b'[["EURUSD_otc",1700000000,1.1]]').decode()
+        bot.frame_listener = StubFrameListener([(2, payload)])
+        self.assertEqual(bot._collect_ticks(), [(SYMBOL, 1700000000000, 1.1)])
+        self.assertEqual((bot.driver.calls, bot.drained_log_entries), (1, 1)) # Entrées ignorées, pas décodées
+        bot._collect_ticks()
+        self.assertEqual(bot.driver.calls, 1) # Pas avant PERFORMANCE_LOG_DRAIN_SECONDS
+        bot.clock.sleep(5)
+        bot._collect_ticks()
+        self.assertEqual(bot.driver.calls, 2)
+
+    def test_dead_listener_falls_back_to_polling(self):
+        bot = make_bot()
+        bot.driver = FakeLogDriver()
+        listener = bot.frame_listener = StubFrameListener([])
+        listener.alive = False
+        self.assertEqual(bot._collect_ticks(), [(SYMBOL, 1700000000000, 1.1)]) # Ticks lus par get_log
+        self.assertTrue(listener.stopped)
+        self.assertIsNone(bot.frame_listener)
+        self.assertEqual(bot.ingestion_mode, INGESTION_MODE_POLL)
+
+    def test_listener_that_fails_to_subscribe_falls_back_to_polling(self):
+        bot = make_bot()
+        bot.driver = FakeLogDriver() # Sans bidi_connection : l'abonnement CDP échoue
+        bot._start_frame_ingestion()
+        self.assertIsNone(bot.frame_listener)
+        self.assertEqual(bot.ingestion_mode, INGESTION_MODE_POLL)
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as jsonl_file:
+        return [json.loads(line) for line in jsonl_file]
+
+
+class StoreSpillTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def test_candle_store_spills_the_oldest_candle_when_full(self):
+        spill = SpillWriter(self.directory, "candles")
+        store = CandleStore(capacity=2, spill=spill)
+        store.clear(SYMBOL)
+        for i, (open_price, close_price) in enumerate(((1.0, 2.0), (2.0, 1.5), (1.5, 1.5))):
+            store.append(Candle(T0 + i * 5000, T0 + (i + 1) * 5000, open_price, 2.0, 1.0, close_price, 3), "green" if close_price > open_price else "red")
+        spill.close()
+        self.assertEqual([candle["Open"] for candle in store.last()], [2.0, 1.5])
+        spilled = read_jsonl(spill.path)
+        self.assertEqual(len(spilled), 1)
+        self.assertEqual((spilled[0]["symbol"], spilled[0]["Open"], spilled[0]["Color"], spilled[0]["ticks"]), (SYMBOL, 1.0, "green", 3))
+
+    def test_record_store_spills_evicted_records(self):
+        spill = SpillWriter(self.directory, "trades")
+        store = RecordStore(capacity=2, spill=spill)
+        for i in range(3):
+            store.append(TradeRecord(T0 + i, "green", i + 1, "red", "LOSS"))
+        spill.close()
+        self.assertEqual([trade["amount"] for trade in store.last(5)], [2, 3])
+        self.assertEqual([trade["amount"] for trade in read_jsonl(spill.path)], [1])
+
+    def test_spill_file_rotates_and_keeps_bounded_backups(self):
+        spill = SpillWriter(self.directory, "actions", max_bytes=60, backups=1)
+        for i in range(12):
+            spill.write({"index": i, "padding": "x" * 10})
+        spill.close()
+        names = sorted(os.listdir(self.directory))
+        self.assertEqual(names, ["actions.1.jsonl", "actions.jsonl"])
+        self.assertTrue(all(os.path.getsize(os.path.join(self.directory, name)) <= 60 for name in names))
+        kept = read_jsonl(os.path.join(self.directory, "actions.1.jsonl")) + read_jsonl(spill.path)
+        self.assertEqual([record["index"] for record in kept], list(range(12 - len(kept), 12))) # Les plus récents
+        self.assertEqual(spill.spilled, 12)
+
+    def test_spill_disabled_without_directory(self):
+        spill = SpillWriter(None, "candles")
+        spill.write({"a": 1})
+        self.assertFalse(spill.enabled)
+        self.assertEqual(spill.spilled, 0)
+
+
+def rolling_windows(values, period):
+    return np.lib.stride_tricks.sliding_window_view(np.asarray(values), period)
+
+
+def reference_ema(values, period):
+    alpha = 2.0 / (period + 1)
+    ema = [np.mean(values[:period])]
+    for price in values[period:]:
+        ema.append(ema[-1] + alpha * (price - ema[-1]))
+    return np.array(ema)
+
+
+def reference_wilder_rsi(values, period):
+    changes = np.diff(values)
+    gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    rsi = [100 - 100 / (1 + avg_gain / avg_loss)]
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+        rsi.append(100 - 100 / (1 + avg_gain / avg_loss))
+    return np.array(rsi)
+
+
+def stream(indicator, values):
+    # Valeurs successives d'un indicateur en flux, None tant qu'il n'est pas prêt
+    return [indicator.update(value) for value in values]
+
+
+def candle_at(i, close, spread=0.001):
+    return Candle(T0 + i * 5000, T0 + (i + 1) * 5000, close, close + spread, close - spread, close, 4)
+
+
+class IndicatorTests(TestCase):
+
+    def setUp(self):
+        self.prices = 1.1 + np.cumsum(np.random.default_rng(3).normal(0, 0.001, size=200))
+
+    def test_sma_matches_rolling_mean(self):
+        values = stream(SMA(20), self.prices)
+        self.assertEqual(values[:19], [None] * 19)
+        np.testing.assert_allclose(values[19:], rolling_windows(self.prices, 20).mean(axis=1), rtol=1e-12)
+
+    def test_ema_matches_sma_seeded_reference(self):
+        values = stream(EMA(9), self.prices)
+        self.assertEqual(values[:8], [None] * 8)
+        np.testing.assert_allclose(values[8:], reference_ema(self.prices, 9), rtol=1e-12)
+
+    def test_rsi_matches_wilder_reference(self):
+        values = stream(RSI(14), self.prices)
+        self.assertEqual(values[:14], [None] * 14)
+        np.testing.assert_allclose(values[14:], reference_wilder_rsi(self.prices, 14), rtol=1e-9)
+
+    def test_rsi_without_losses_is_100(self):
+        self.assertEqual(stream(RSI(3), [1.0, 1.1, 1.2, 1.3])[-1], 100.0)
+
+    def test_bollinger_bands_match_population_std(self):
+        bands = BollingerBands(20, k=2.0)
+        stream(bands, self.prices)
+        window = self.prices[-20:]
+        self.assertAlmostEqual(bands.middle, window.mean(), places=12)
+        self.assertAlmostEqual(bands.upper, window.mean() + 2 * window.std(), places=9)
+        self.assertAlmostEqual(bands.percent_b(bands.lower), 0.0, places=9)
+
+    def test_bollinger_percent_b_is_none_on_flat_series(self):
+        bands = BollingerBands(5)
+        self.assertIsNone(bands.percent_b(1.0)) # Pas prêtes
+        stream(bands, [1.2] * 5)
+        self.assertTrue(bands.ready)
+        self.assertIsNone(bands.percent_b(1.2))
+
+    def test_color_streak_ignores_gray_candles(self):
+        streak = ColorStreak(window=3)
+        for color in ("red", "green", "gray", "green", "gray"):
+            streak.update(color)
+        self.assertEqual((streak.color, streak.length), ("green", 2))
+        self.assertEqual(list(streak.recent), ["red", "green", "green"])
+        self.assertEqual((streak.peek("green"), streak.peek("red")), (3, 1))
+
+    def test_set_streak_window_rebuilds_from_colors(self):
+        indicators = IndicatorSet(streak_window=2)
+        for color in ("green", "green", "green"):
+            indicators.streak.update(color)
+        indicators.set_streak_window(4, ["red", "green", "gray", "red", "red"])
+        self.assertEqual(indicators.streak.recent.maxlen, 4)
+        self.assertEqual(list(indicators.streak.recent), ["red", "green", "red", "red"])
+        self.assertEqual((indicators.streak.color, indicators.streak.length), ("red", 2))
+
+    def test_gap_candles_do_not_update_indicators(self):
+        indicators = IndicatorSet(sma_period=2)
+        indicators.update(candle_at(0, 1.0), "green")
+        indicators.update(candle_at(1, 5.0), "gray")
+        self.assertEqual((indicators.updates, indicators.last_close, indicators.sma.ready), (1, 1.0, False))
+
+
+class IndicatorFilterTests(TestCase):
+
+    def make_indicators(self, closes):
+        indicators = IndicatorSet(sma_period=3, ema_period=3, rsi_period=3, bollinger_period=3, atr_period=3)
+        for i, close in enumerate(closes):
+            indicators.update(candle_at(i, close), "green")
+        return indicators
+
+    def test_no_filter_always_confirms(self):
+        self.assertEqual(IndicatorSet().confirms("green", {}), (True, None))
+
+    def test_each_filter_blocks_until_its_indicator_is_ready(self):
+        indicators = self.make_indicators([1.0])
+        cases = {
+            "RSI_MAX": "rsi_not_ready", "RSI_MIN": "rsi_not_ready", "TREND_EMA": "ema_not_ready",
+            "MIN_ATR": "atr_not_ready", "MAX_BOLLINGER_PERCENT_B": "bollinger_not_ready", "MIN_BOLLINGER_PERCENT_B": "bollinger_not_ready",
+        }
+        for key, reason in cases.items():
+            with self.subTest(key=key):
+                self.assertEqual(indicators.confirms("green", {key: True if key == "TREND_EMA" else 50}), (False, reason))
+
+    def test_rsi_filters(self):
+        rising = self.make_indicators([1.0, 1.1, 1.2, 1.3, 1.4]) # RSI = 100
+        self.assertEqual(rising.confirms("green", {"RSI_MAX": 70}), (False, "rsi_max"))
+        self.assertEqual(rising.confirms("red", {"RSI_MAX": 70}), (True, None)) # RSI_MAX ne concerne que les CALL
+        self.assertEqual(rising.confirms("red", {"RSI_MIN": 30}), (True, None))
+        falling = self.make_indicators([1.4, 1.3, 1.2, 1.1, 1.0]) # RSI = 0
+        self.assertEqual(falling.confirms("red", {"RSI_MIN": 30}), (False, "rsi_min"))
+
+    def test_trend_ema_filter(self):
+        rising = self.make_indicators([1.0, 1.1, 1.2, 1.3, 1.4]) # Clôture au-dessus de l'EMA
+        self.assertEqual(rising.confirms("green", {"TREND_EMA": True}), (True, None))
+        self.assertEqual(rising.confirms("red", {"TREND_EMA": True}), (False, "trend_ema"))
+        self.assertEqual(rising.confirms("red", {"TREND_EMA": False}), (True, None))
+
+    def test_min_atr_filter(self):
+        indicators = self.make_indicators([1.0, 1.0, 1.0, 1.0]) # True range = 2 * 0.001
+        self.assertAlmostEqual(indicators.atr.value, 0.002)
+        self.assertEqual(indicators.confirms("green", {"MIN_ATR": 0.001}), (True, None))
+        self.assertEqual(indicators.confirms("green", {"MIN_ATR": 0.01}), (False, "min_atr"))
+
+    def test_bollinger_percent_b_filters(self):
+        rising = self.make_indicators([1.0, 1.1, 1.2, 1.3]) # Clôture dans le haut des bandes
+        self.assertEqual(rising.confirms("green", {"MAX_BOLLINGER_PERCENT_B": 0.8}), (False, "bollinger_max"))
+        self.assertEqual(rising.confirms("red", {"MIN_BOLLINGER_PERCENT_B": 0.2}), (True, None))
+        falling = self.make_indicators([1.3, 1.2, 1.1, 1.0])
+        self.assertEqual(falling.confirms("red", {"MIN_BOLLINGER_PERCENT_B": 0.2}), (False, "bollinger_min"))
+        flat = self.make_indicators([1.0, 1.0, 1.0])
+        self.assertEqual(flat.confirms("green", {"MAX_BOLLINGER_PERCENT_B": 0.8}), (False, "bollinger_not_ready"))
+
+
+def synthetic_batches(seed, ticks=240, step_ms=500):
+    """
+    🎲 Lots d'entrées de log de performance (format de capture) : un tick par lot, marche aléatoire reproductible.
+    """
+    rng = np.random.default_rng(seed)
+    prices = np.round(1.1 + np.cumsum(rng.normal(0, 0.0005, size=ticks)), 5)
+    batches = []
+    for i, price in enumerate(prices):
+        timestamp_ms = T0 + i * step_ms
+        payload = base64.b64encode(json.dumps([[SYMBOL, timestamp_ms / 1000, float(price)]]).encode()).decode()
+        batches.append({"t": timestamp_ms + 40, "symbol": SYMBOL, "entries": [frame_to_log_entry(2, payload)]})
+    return batches
+
+
+class ReplayTests(TestCase):
+
+    CONFIG = {
+        "CURRENCIES": {SYMBOL: SYMBOL}, "TIMEZONE": "UTC", "TRADING_PERIOD_MINUTES": 1, "PERIOD": 5,
+        "RUNTIME_MODE": "sequential", "INGESTION_MODE": INGESTION_MODE_POLL, "HUMAN_TYPING": False,
+        "SPILL_DIR": None, "TICK_CAPTURE_DIR": None, "MIN_YIELD_PERCENT": 90, "BASE_URL": "https://pocketoption.com",
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.capture_path = os.path.join(tmp.name, "session.jsonl")
+        self.cookies_path = os.path.join(tmp.name, "cookies.json")
+        with open(self.cookies_path, "w") as cookies_file:
+            json.dump([], cookies_file)
+
+    def run_live(self, batches):
+        # Bot « en direct » : le driver sert le flux au fil de l'horloge et le bot l'enregistre (CAPTURE_PATH)
+        clock = SimulatedClock(batches[0]["t"])
+        drivers = []
+        bot = TradingBot(cookies_path=self.cookies_path, config=dict(self.CONFIG, CAPTURE_PATH=self.capture_path),
+                         clock=clock, driver_factory=lambda: drivers[0])
+        drivers.append(ReplayDriver(batches, clock, SYMBOL, tail_ms=5000 + bot.candle_close_grace_ms))
+        drivers[0].on_exhausted = lambda: setattr(bot, "is_running", False)
+        bot.start()
+        return bot, drivers[0]
+
+    def test_replayed_capture_gives_the_live_candles_and_trades(self):
+        live_bot, live_driver = self.run_live(synthetic_batches(seed=5))
+        live_trades = live_bot.get_trade_history(len(live_bot.trade_history_log))
+        self.assertEqual(len(read_capture(self.capture_path)), 240) # Un lot par get_log non vide
+        self.assertGreater(len(live_trades), 0)
+
+        session = ReplaySession(self.capture_path, config=self.CONFIG)
+        report = session.run()
+        self.assertTrue(report["completed"])
+        self.assertEqual(session.bot.ohlc_store.last(), live_bot.ohlc_store.last())
+        self.assertEqual(report["trades"], live_trades)
+        self.assertEqual(report["orders"], live_driver.orders)
+
+    def test_cli_prints_the_replay_report(self):
+        self.run_live(synthetic_batches(seed=5, ticks=40))
+        config_path = os.path.join(os.path.dirname(self.capture_path), "config.json")
+        with open(config_path, "w") as config_file:
+            json.dump(self.CONFIG, config_file)
+        with mock.patch("builtins.print") as printed, mock.patch("logging.basicConfig"):
+            replay.main([self.capture_path, "--config", config_path])
+        report = json.loads(printed.call_args[0][0])
+        self.assertTrue(report["completed"])
+        self.assertEqual((report["batches"], report["entries"]), (40, 40))
@@ -5,14 +5,20 @@ from .views import (
     BotCookiesView,
     BotLogsView,
     BotOHLCView,
-    BotTradesHistoryView
+    BotTradesHistoryView,
+    BotRiskView,
+    BotMetricsView,
+    BotFleetView
 )
 
 urlpatterns = [
-    path('bot/<str:action>/', BotControlView.as_view(), name='bot-control'),
+    path('bot/risk/', BotRiskView.as_view(), name='bot-risk'),
+    path('bot/fleet/', BotFleetView.as_view(), name='bot-fleet'),
+    path('bot/metrics/', BotMetricsView.as_view(), name='bot-metrics'),
     path('bot/status/', BotStatusView.as_view(), name='bot-status'),
     path('bot/cookies/', BotCookiesView.as_view(), name='bot-cookies'),
     path('bot/logs/', BotLogsView.as_view(), name='bot-logs'),
     path('bot/ohlc/', BotOHLCView.as_view(), name='bot-ohlc'),
     path('bot/trades/', BotTradesHistoryView.as_view(), name='bot-trades'),
+    path('bot/<str:action>/', BotControlView.as_view(), name='bot-control'), # En dernier : capturerait status, ohlc, trades...
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 from rest_framework.views import APIView
+from django.http import HttpResponse
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings # Pour accéder aux chemins, etc.
@@ -8,16 +9,27 @@ import logging
 
 from .tasks import (
     start_trading_bot_task, 
-    stop_trading_bot_task, 
-    get_bot_status_task,
-    get_bot_ohlc_task,
-    get_bot_trades_task,
     update_bot_cookies_task
 )
+from .services.control import COMMAND_PAUSE, COMMAND_RESUME, COMMAND_STOP, COMMAND_UPDATE_CONFIG, send_control_command
+from .services.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+from .services.publisher import is_stale, read_metrics_snapshots, read_state, status_from_snapshot
+from .services.risk import simulate_bankroll
+from .services.supervisor import DESIRED_RUNNING, DESIRED_STOPPED, fleet_status, register_bot, set_desired_state, unregister_bot
 
 logger = logging.getLogger(__name__)
 COOKIES_FILE_PATH = os.path.join(settings.BASE_DIR, 'Trading_cookies.json') # Assure-toi que BASE_DIR est bien configuré
 
+
+def _read_bot_state(request, part):
+    # Dernier instantané publié par le bot dans Redis (un GET, aucune tâche Celery) ; ?bot=<BOT_ID> pour plusieurs bots
+    return read_state(settings.REDIS_URL, request.query_params.get("bot", "default"), part)
+
+
+def _snapshot_headers(snapshot):
+    return {"X-Snapshot-Version": str(snapshot["version"]), "X-Snapshot-Published-At": str(snapshot["published_at"]),
+            "X-Snapshot-Stale": "true" if is_stale(snapshot) else "false"}
+
 class BotControlView(APIView):
     def post(self, request, action):
         logger.info("API Reçue: Action '%s'", action)
@@ -26,29 +38,36 @@ class BotControlView(APIView):
             config_override = request.data.get("config", None)
             task = start_trading_bot_task.delay(cookies_path=COOKIES_FILE_PATH, config_override=config_override)
             return Response({"status": "starting", "task_id": task.id, "message": "Bot start task initiated."}, status=status.HTTP_202_ACCEPTED)
-        elif action == "stop":
-            task = stop_trading_bot_task.delay()
-            return Response({"status": "stopping", "task_id": task.id, "message": "Bot stop task initiated."}, status=status.HTTP_202_ACCEPTED)
-        else:
+        # stop, pause, resume, config : publiés sur le canal de contrôle Redis du bot (appliqués à sa prochaine itération),
+        # sans passer par la file Celery occupée par la tâche de démarrage
+        commands = {"stop": COMMAND_STOP, "pause": COMMAND_PAUSE, "resume": COMMAND_RESUME, "config": COMMAND_UPDATE_CONFIG}
+        if action not in commands:
             return Response({"error": "Invalid action"}, status=status.HTTP_400_BAD_REQUEST)
+        bot_id = request.data.get("bot", "default")
+        try:
+            receivers = send_control_command(settings.REDIS_URL, bot_id, commands[action], request.data.get("config"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.warning("Publication de la commande '%s' impossible: %s", action, e)
+            return Response({"error": "Could not reach the control channel."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if not receivers:
+            return Response({"status": "not_running", "message": f"No running bot listening as '{bot_id}'."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"status": "sent", "command": commands[action], "bot": bot_id, "receivers": receivers}, status=status.HTTP_202_ACCEPTED)
 
 class BotStatusView(APIView):
     def get(self, request):
         logger.debug("API Reçue: Demande de statut")
-        # Pour une réponse plus rapide, on pourrait stocker l'état dans Redis via Celery
-        # et le lire ici. Pour l'instant, on appelle la tâche (qui peut être lente si elle attend une instance).
-        # Alternative: la tâche Celery `get_bot_status_task` pourrait écrire dans un cache.
-        # Simplifions pour l'instant en supposant que l'instance est globale dans tasks.py (NON RECOMMANDÉ EN PROD MULTI-WORKER)
-        
-        # Solution plus robuste: utiliser Celery pour récupérer l'état
-        task_result = get_bot_status_task.apply_async()
+        # Statut publié par le bot à chaque changement d'état (StatePublisher), lu directement dans Redis
         try:
-            # Attendre le résultat avec un timeout pour ne pas bloquer l'API trop longtemps
-            bot_status_data = task_result.get(timeout=5) 
-            return Response(bot_status_data, status=status.HTTP_200_OK)
-        except Exception as e: # TimeoutError, etc.
-            logger.warning("Timeout ou erreur lors de la récupération du statut du bot via Celery: %s", e)
-            return Response({"status": "unknown", "is_running": False, "message": "Could not retrieve bot status in time."}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+            snapshot = _read_bot_state(request, "status")
+        except Exception as e:
+            logger.warning("Lecture du statut dans Redis impossible: %s", e)
+            return Response({"status": "unknown", "is_running": False, "message": "Could not retrieve bot status."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if snapshot is None:
+            return Response({"is_running": False, "message": "No bot instance found."}, status=status.HTTP_200_OK)
+        # Instantané non republié à temps (bot tué sans arrêt propre) : servi comme arrêté
+        return Response(status_from_snapshot(snapshot), status=status.HTTP_200_OK, headers=_snapshot_headers(snapshot))
 
 
 class BotCookiesView(APIView):
@@ -93,21 +112,107 @@ class BotLogsView(APIView): # Très basique, pour des logs plus avancés, utilis
 class BotOHLCView(APIView):
     def get(self, request):
         last_n = int(request.query_params.get("last_n", 20))
-        task_result = get_bot_ohlc_task.apply_async(args=[last_n])
         try:
-            ohlc_data = task_result.get(timeout=3)
-            return Response(ohlc_data, status=status.HTTP_200_OK)
+            snapshot = _read_bot_state(request, "ohlc")
         except Exception:
-            return Response({"error": "Could not retrieve OHLC data."}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+            return Response({"error": "Could not retrieve OHLC data."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if snapshot is None:
+            return Response([], status=status.HTTP_200_OK)
+        return Response(snapshot["data"][-last_n:] if last_n > 0 else [], status=status.HTTP_200_OK, headers=_snapshot_headers(snapshot))
 
 class BotTradesHistoryView(APIView):
     def get(self, request):
         last_n = int(request.query_params.get("last_n", 20))
-        task_result = get_bot_trades_task.apply_async(args=[last_n])
         try:
-            trades_data = task_result.get(timeout=3)
-            return Response(trades_data, status=status.HTTP_200_OK)
+            snapshot = _read_bot_state(request, "trades")
         except Exception:
-            return Response({"error": "Could not retrieve trade history."}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+            return Response({"error": "Could not retrieve trade history."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if snapshot is None:
+            return Response([], status=status.HTTP_200_OK)
+        return Response(snapshot["data"][-last_n:] if last_n > 0 else [], status=status.HTTP_200_OK, headers=_snapshot_headers(snapshot))
+
+class BotRiskView(APIView):
+    # Simulation exécutée directement dans la requête (quelques centaines de ms) : à appeler avant de démarrer un bot
+    def post(self, request):
+        data = request.data
+        logger.info("API Reçue: Simulation de risque Martingale")
+        outcomes = data.get("outcomes")
+        try:
+            history_size = int(data.get("history_size", 1000))
+            if history_size <= 0:
+                raise ValueError("history_size doit être positif.")
+            if outcomes is not None and not isinstance(outcomes, list):
+                raise ValueError("outcomes doit être une liste d'issues (true/false ou WIN/LOSS).")
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if data.get("from_history") and outcomes is None:
+            # Rééchantillonne les issues réelles du bot (derniers trades publiés dans Redis)
+            try:
+                snapshot = _read_bot_state(request, "trades")
+            except Exception:
+                return Response({"error": "Could not retrieve trade history."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            trades = snapshot["data"][-history_size:] if snapshot else []
+            outcomes = [trade.get("result") == "WIN" for trade in trades if trade.get("result") in ("WIN", "LOSS")]
+            if not outcomes:
+                return Response({"error": "No resolved trades to bootstrap from."}, status=status.HTTP_400_BAD_REQUEST)
+        elif outcomes is not None:
+            outcomes = [outcome is True or outcome == "WIN" for outcome in outcomes]
+        try:
+            report = simulate_bankroll(
+                bet_sizes=data.get("bet_sizes", [1, 2, 5]),
+                payout=float(data.get("payout", 0.92)),
+                win_rate=float(data.get("win_rate", 0.5)),
+                bankroll=float(data.get("bankroll", 100.0)),
+                paths=int(data.get("paths", 10000)),
+                bets=int(data.get("bets", 500)),
+                outcomes=outcomes,
+                block_size=int(data.get("block_size", 10)),
+                seed=data.get("seed"),
+            )
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+class BotFleetView(APIView):
+    # Registre des bots exécutés par les superviseurs (un processus par bot, placé selon la charge des nœuds)
+    def get(self, request):
+        try:
+            return Response(fleet_status(settings.REDIS_URL), status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.warning("Lecture du registre des bots impossible: %s", e)
+            return Response({"error": "Could not read the bot registry."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def post(self, request):
+        data = request.data
+        bot_id, action = data.get("bot"), data.get("action")
+        logger.info("API Reçue: Action '%s' sur le bot '%s' de la flotte", action, bot_id)
+        try:
+            if action == "start":
+                spec = register_bot(settings.REDIS_URL, bot_id, data.get("cookies_path", COOKIES_FILE_PATH),
+                                    data.get("config"), data.get("node"), DESIRED_RUNNING)
+            elif action == "stop":
+                spec = set_desired_state(settings.REDIS_URL, bot_id, DESIRED_STOPPED)
+            elif action == "remove":
+                spec = {"bot_id": bot_id, "removed": True} if unregister_bot(settings.REDIS_URL, bot_id) else None
+            else:
+                return Response({"error": "Invalid action"}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.warning("Mise à jour du registre des bots impossible: %s", e)
+            return Response({"error": "Could not update the bot registry."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if spec is None:
+            return Response({"error": f"Unknown bot '{bot_id}'."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(spec, status=status.HTTP_202_ACCEPTED)
+
+class BotMetricsView(APIView):
+    # Format texte Prometheus, lu directement dans Redis (publié par chaque bot) : aucune tâche Celery
+    def get(self, request):
+        try:
+            snapshots = read_metrics_snapshots(settings.REDIS_URL)
+        except Exception as e:
+            logger.warning("Lecture des métriques dans Redis impossible: %s", e)
+            return HttpResponse("# Redis indisponible\n", content_type=PROMETHEUS_CONTENT_TYPE, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return HttpResponse(render_prometheus(snapshots), content_type=PROMETHEUS_CONTENT_TYPE)
 
 # Tu peux ajouter un endpoint pour la config plus tard
\ No newline at end of file
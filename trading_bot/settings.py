@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from datetime import timedelta
 import os
+import tempfile
 import environ
 from pathlib import Path
 
@@ -175,6 +176,12 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC' # Ou ton timezone préféré
+REDIS_URL = os.environ.get('REDIS_URL', CELERY_BROKER_URL) # État et métriques publiés par les bots (lus sans passer par Celery)
+DRIVER_POOL_SIZE = int(os.environ.get('DRIVER_POOL_SIZE', 0)) # Drivers Chrome chauds du processus worker qui exécute le bot (0 : démarrage à froid)
+# Pré-chauffé au démarrage dans un seul processus enfant par nœud (verrou sur ce fichier, local au nœud)
+DRIVER_POOL_WARM_LOCK_PATH = os.environ.get('DRIVER_POOL_WARM_LOCK_PATH', os.path.join(tempfile.gettempdir(), 'trading_bot_driver_pool.lock'))
+DRIVER_POOL_MAX_USES = int(os.environ.get('DRIVER_POOL_MAX_USES', 20)) # Prêts avant recyclage d'un driver
+DRIVER_POOL_MAX_AGE_SECONDS = int(os.environ.get('DRIVER_POOL_MAX_AGE_SECONDS', 3600))
 
 # LOGGING CONFIGURATION
 LOGGING_FILE_PATH = os.path.join(BASE_DIR, 'app_trading_bot.log')